@@ -0,0 +1,50 @@
+"""Add rolling summary columns to chat sessions."""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0013_chat_session_summary"
+down_revision = "0012_push_pruning_fields"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {col["name"] for col in inspector.get_columns("chat_sessions")}
+
+    with op.batch_alter_table("chat_sessions", schema=None) as batch_op:
+        if "summary" not in columns:
+            batch_op.add_column(sa.Column("summary", sa.Text(), nullable=True))
+        if "summarized_count" not in columns:
+            batch_op.add_column(
+                sa.Column(
+                    "summarized_count",
+                    sa.Integer(),
+                    nullable=False,
+                    server_default="0",
+                )
+            )
+
+    indexes = {index["name"] for index in inspector.get_indexes("chat_messages")}
+    if "ix_chat_messages_session_created" not in indexes:
+        op.create_index(
+            "ix_chat_messages_session_created",
+            "chat_messages",
+            ["session_id", "created_at"],
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {col["name"] for col in inspector.get_columns("chat_sessions")}
+
+    with op.batch_alter_table("chat_sessions", schema=None) as batch_op:
+        if "summarized_count" in columns:
+            batch_op.drop_column("summarized_count")
+        if "summary" in columns:
+            batch_op.drop_column("summary")
@@ -0,0 +1,71 @@
+"""Index sessions and refresh tokens by owner and expiry."""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0014_session_token_indexes"
+down_revision = "0013_chat_session_summary"
+branch_labels = None
+depends_on = None
+
+# (tabla, nombre, columnas, unique)
+INDEXES = (
+    ("sessions", "ix_sessions_user_expires", ["user_id", "expires_at"], False),
+    ("sessions", "ix_sessions_expires_at", ["expires_at"], False),
+    ("sessions", "ix_sessions_token", ["token"], True),
+    (
+        "refresh_tokens",
+        "ix_refresh_tokens_user_expires",
+        ["user_id", "expires_at"],
+        False,
+    ),
+    ("refresh_tokens", "ix_refresh_tokens_expires_at", ["expires_at"], False),
+    ("refresh_tokens", "ix_refresh_tokens_token", ["token"], True),
+)
+
+
+def _covered(inspector: sa.Inspector, table: str, columns: list[str]) -> bool:
+    """True when an index or unique constraint already starts with ``columns``."""
+
+    existing = [index["column_names"] for index in inspector.get_indexes(table)]
+    existing += [
+        constraint["column_names"]
+        for constraint in inspector.get_unique_constraints(table)
+    ]
+    return any(names[: len(columns)] == columns for names in existing)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    concurrently = bind.dialect.name == "postgresql"
+
+    for table, name, columns, unique in INDEXES:
+        if _covered(inspector, table, columns):
+            continue
+        if concurrently:
+            # Tablas grandes en producción: sin bloquear escrituras.
+            with op.get_context().autocommit_block():
+                op.create_index(
+                    name,
+                    table,
+                    columns,
+                    unique=unique,
+                    postgresql_concurrently=True,
+                )
+        else:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table, name, _columns, _unique in reversed(INDEXES):
+        if name == "ix_refresh_tokens_token":
+            continue  # creado por 0004
+        indexes = {index["name"] for index in inspector.get_indexes(table)}
+        if name in indexes:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,42 @@
+"""Track the last summarized chat message as a keyset cursor."""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = "0015_chat_summary_cursor"
+down_revision = "0014_session_token_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {col["name"] for col in inspector.get_columns("chat_sessions")}
+
+    with op.batch_alter_table("chat_sessions", schema=None) as batch_op:
+        if "summarized_until_at" not in columns:
+            batch_op.add_column(
+                sa.Column("summarized_until_at", sa.DateTime(), nullable=True)
+            )
+        if "summarized_until_id" not in columns:
+            batch_op.add_column(
+                sa.Column(
+                    "summarized_until_id", postgresql.UUID(as_uuid=True), nullable=True
+                )
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {col["name"] for col in inspector.get_columns("chat_sessions")}
+
+    with op.batch_alter_table("chat_sessions", schema=None) as batch_op:
+        if "summarized_until_id" in columns:
+            batch_op.drop_column("summarized_until_id")
+        if "summarized_until_at" in columns:
+            batch_op.drop_column("summarized_until_at")
@@ -0,0 +1,295 @@
+"""Short-lived cache from access tokens to lightweight user principals.
+
+Authenticating a request used to decode the JWT, look up the session row,
+load the user and refresh every relationship. :class:`AuthPrincipalCache`
+keeps the result for a few seconds in-process and for up to
+``AUTH_CACHE_TTL_SECONDS`` in Redis (via :class:`CacheClient`), keyed by the
+SHA-256 of the token so raw tokens never reach the cache.
+
+Invalidation is driven by a revocation set: individual token hashes (evicted
+sessions) and a per-user epoch (logout, logout_all, refresh rotation, MFA
+changes). Entries cached before the epoch are ignored. Revocations apply to
+this process immediately; other workers see them through Redis, and in the
+worst case within ``AUTH_CACHE_LOCAL_TTL_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from backend.core.metrics import AUTH_PRINCIPAL_CACHE_TOTAL
+from backend.utils.cache import CacheClient
+from backend.utils.config import Config
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def _from_iso(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+@dataclass(frozen=True, slots=True)
+class AuthPrincipal:
+    """The subset of :class:`User` that authenticated routes actually read."""
+
+    id: UUID
+    email: str
+    risk_profile: str | None = None
+    mfa_enabled: bool = False
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+    @classmethod
+    def from_user(cls, user: Any) -> AuthPrincipal:
+        risk_profile = getattr(user, "risk_profile", None)
+        return cls(
+            id=user.id,
+            email=user.email,
+            risk_profile=getattr(risk_profile, "value", risk_profile),
+            mfa_enabled=bool(getattr(user, "mfa_enabled", False)),
+            created_at=getattr(user, "created_at", None),
+            updated_at=getattr(user, "updated_at", None),
+        )
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "id": str(self.id),
+            "email": self.email,
+            "risk_profile": self.risk_profile,
+            "mfa_enabled": self.mfa_enabled,
+            "created_at": _iso(self.created_at),
+            "updated_at": _iso(self.updated_at),
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> AuthPrincipal:
+        return cls(
+            id=UUID(str(payload["id"])),
+            email=str(payload["email"]),
+            risk_profile=payload.get("risk_profile"),
+            mfa_enabled=bool(payload.get("mfa_enabled", False)),
+            created_at=_from_iso(payload.get("created_at")),
+            updated_at=_from_iso(payload.get("updated_at")),
+        )
+
+
+def token_fingerprint(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class AuthPrincipalCache:
+    """Two-level token → principal cache with a revocation set."""
+
+    def __init__(
+        self,
+        *,
+        ttl: int | None = None,
+        local_ttl: int | None = None,
+        max_entries: int | None = None,
+        remote: CacheClient | None = None,
+    ) -> None:
+        self.ttl = max(0, Config.AUTH_CACHE_TTL_SECONDS if ttl is None else ttl)
+        self.local_ttl = max(
+            0, Config.AUTH_CACHE_LOCAL_TTL_SECONDS if local_ttl is None else local_ttl
+        )
+        self.max_entries = max(
+            1, Config.AUTH_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        )
+        self._remote = remote or CacheClient("auth-principal", ttl=max(1, self.ttl))
+        # fingerprint -> (expira monotonic, cached_at wall, principal)
+        self._local: OrderedDict[str, tuple[float, float, AuthPrincipal]] = (
+            OrderedDict()
+        )
+        self._revoked_tokens: dict[str, float] = {}
+        self._user_epochs: dict[str, float] = {}
+        # Las revocaciones llegan también desde rutas síncronas (threadpool).
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _revoked_locally(self, key: str, user_id: str, cached_at: float) -> bool:
+        if key in self._revoked_tokens:
+            return True
+        epoch = self._user_epochs.get(user_id)
+        return epoch is not None and cached_at <= epoch
+
+    async def get(self, token: str) -> AuthPrincipal | None:
+        if not self.enabled:
+            return None
+        self._loop = asyncio.get_running_loop()
+        key = token_fingerprint(token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires_at, cached_at, principal = entry
+                if expires_at > now and not self._revoked_locally(
+                    key, str(principal.id), cached_at
+                ):
+                    self._local.move_to_end(key)
+                    AUTH_PRINCIPAL_CACHE_TOTAL.labels(result="local").inc()
+                    return principal
+                self._local.pop(key, None)
+
+        principal = await self._get_remote(key)
+        if principal is None:
+            AUTH_PRINCIPAL_CACHE_TOTAL.labels(result="miss").inc()
+        else:
+            AUTH_PRINCIPAL_CACHE_TOTAL.labels(result="redis").inc()
+        return principal
+
+    async def _get_remote(self, key: str) -> AuthPrincipal | None:
+        payload, revoked = await asyncio.gather(
+            self._remote.get(f"p:{key}"), self._remote.get(f"revoked:{key}")
+        )
+        if not isinstance(payload, dict) or revoked:
+            return None
+        try:
+            principal = AuthPrincipal.from_payload(payload["principal"])
+            cached_at = float(payload["cached_at"])
+            remaining = float(payload["expires_at"]) - time.time()
+        except (KeyError, TypeError, ValueError):
+            return None
+        user_id = str(principal.id)
+        epoch = await self._remote.get(f"epoch:{user_id}")
+        if epoch is not None and cached_at <= float(epoch):
+            return None
+        if remaining <= 0:
+            return None
+        with self._lock:
+            if self._revoked_locally(key, user_id, cached_at):
+                return None
+            self._store_local(key, principal, cached_at, remaining)
+        return principal
+
+    def _store_local(
+        self, key: str, principal: AuthPrincipal, cached_at: float, remaining: float
+    ) -> None:
+        ttl = min(self.local_ttl, remaining)
+        if ttl <= 0:
+            return
+        self._local[key] = (time.monotonic() + ttl, cached_at, principal)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def set(
+        self,
+        token: str,
+        principal: AuthPrincipal,
+        *,
+        expires_at: datetime,
+        cached_at: float,
+    ) -> None:
+        """Cache ``principal`` until ``expires_at`` (capped by the TTL).
+
+        ``cached_at`` must be taken *before* the database lookup so that a
+        revocation racing with the lookup still wins.
+        """
+
+        if not self.enabled:
+            return
+        self._loop = asyncio.get_running_loop()
+        key = token_fingerprint(token)
+        remaining = min(float(self.ttl), expires_at.timestamp() - time.time())
+        if remaining <= 0:
+            return
+        with self._lock:
+            if self._revoked_locally(key, str(principal.id), cached_at):
+                return
+            self._store_local(key, principal, cached_at, remaining)
+        await self._remote.set(
+            f"p:{key}",
+            {
+                "principal": principal.to_payload(),
+                "cached_at": cached_at,
+                "expires_at": time.time() + remaining,
+            },
+            ttl=max(1, int(remaining)),
+        )
+
+    def revoke_token(self, token: str) -> None:
+        """Stop serving ``token`` from the cache (e.g. an evicted session)."""
+
+        key = token_fingerprint(token)
+        with self._lock:
+            self._local.pop(key, None)
+            self._revoked_tokens[key] = time.monotonic() + self.ttl
+            self._prune_revocations()
+        self._publish(f"revoked:{key}", 1)
+
+    def invalidate_user(self, user_id: UUID | str) -> None:
+        """Drop every cached principal of ``user_id`` issued up to now."""
+
+        user_key = str(user_id)
+        epoch = time.time()
+        with self._lock:
+            for key, (_, _, principal) in list(self._local.items()):
+                if str(principal.id) == user_key:
+                    del self._local[key]
+            self._user_epochs[user_key] = epoch
+            self._prune_revocations()
+        self._publish(f"epoch:{user_key}", epoch)
+
+    def _prune_revocations(self) -> None:
+        # Pasado el TTL ninguna entrada anterior puede seguir en caché.
+        now = time.monotonic()
+        for key, until in list(self._revoked_tokens.items()):
+            if until <= now:
+                del self._revoked_tokens[key]
+        horizon = time.time() - self.ttl
+        for user_key, epoch in list(self._user_epochs.items()):
+            if epoch < horizon:
+                del self._user_epochs[user_key]
+
+    def _publish(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None:
+            self._spawn(key, value)
+            return
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            # Llamado desde el threadpool: la escritura remota va al loop dueño.
+            loop.call_soon_threadsafe(self._spawn, key, value)
+
+    def _spawn(self, key: str, value: Any) -> None:
+        task = asyncio.get_running_loop().create_task(
+            self._remote.set(key, value, ttl=max(1, self.ttl))
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+            self._revoked_tokens.clear()
+            self._user_epochs.clear()
+
+
+auth_principal_cache = AuthPrincipalCache()
+
+__all__ = [
+    "AuthPrincipal",
+    "AuthPrincipalCache",
+    "auth_principal_cache",
+    "token_fingerprint",
+]
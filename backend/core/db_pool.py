@@ -0,0 +1,365 @@
+"""Connection pool instrumentation, idle-only pre-ping and pool auto-sizing.
+
+* :class:`InstrumentedQueuePool` / :class:`InstrumentedAsyncQueuePool` time
+  every checkout (queue wait, new connections and pre-ping included) and
+  count pool timeouts. :func:`instrument_engine` adds in-use/idle/overflow
+  gauges and connect/close/invalidate counters to show connection churn.
+* ``pool_pre_ping=True`` costs a round trip on *every* checkout. With
+  :func:`install_idle_pre_ping` only connections that sat idle for longer
+  than ``idle_seconds`` are pinged. A failed ping raises
+  ``DisconnectionError``, so the pool discards the connection and retries
+  with a fresh one, exactly like SQLAlchemy's own pre-ping.
+* :class:`PoolAutoTuner` records the peak number of connections in use per
+  interval and recommends ``ceil(p90(peaks) * 1.25)``. When enabled it
+  applies the recommendation by recreating the pool, keeping
+  ``pool_size + max_overflow`` (the connection budget) unchanged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from sqlalchemy import event, exc as sa_exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.util import greenlet_spawn
+
+from backend.metrics.db_metrics import (
+    db_pool_checked_out,
+    db_pool_checkout_seconds,
+    db_pool_checkouts_total,
+    db_pool_connection_events_total,
+    db_pool_idle,
+    db_pool_overflow,
+    db_pool_pre_ping_total,
+    db_pool_recommended_size,
+    db_pool_size,
+    db_pool_timeouts_total,
+)
+from backend.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+_CHECKED_IN_AT = "bullbear_checked_in_at"
+# Ventanas (de ``interval_seconds``) que se recuerdan para recomendar tamaño.
+_AUTOTUNE_WINDOWS = 12
+_AUTOTUNE_MIN_WINDOWS = 3
+_AUTOTUNE_HEADROOM = 1.25
+
+
+class PoolStats:
+    """In-process checkout statistics for one engine (shown in /api/health)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.window_peak = 0
+        self.peaks: deque[int] = deque(maxlen=_AUTOTUNE_WINDOWS)
+        self.recommended_size: int | None = None
+
+    def record_checkout(self, waited: float, in_use: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+            if in_use > self.window_peak:
+                self.window_peak = in_use
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def roll_window(self, in_use: int = 0) -> int:
+        """Close the current window and return its peak concurrency."""
+
+        with self._lock:
+            peak = max(self.window_peak, in_use)
+            self.peaks.append(peak)
+            self.window_peak = in_use
+            return peak
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (
+                    round(self.wait_total / self.checkouts * 1000, 3)
+                    if self.checkouts
+                    else 0.0
+                ),
+                "max_wait_ms": round(self.wait_max * 1000, 3),
+                "window_peak_in_use": self.window_peak,
+                "recommended_size": self.recommended_size,
+            }
+
+
+_POOL_STATS: dict[str, PoolStats] = {}
+_POOL_STATS_LOCK = threading.Lock()
+
+
+def pool_stats(label: str) -> PoolStats:
+    stats = _POOL_STATS.get(label)
+    if stats is None:
+        with _POOL_STATS_LOCK:
+            stats = _POOL_STATS.setdefault(label, PoolStats())
+    return stats
+
+
+class _InstrumentedPoolMixin:
+    metrics_label = "sync"
+
+    def connect(self) -> Any:
+        label = self.metrics_label
+        started = time.perf_counter()
+        try:
+            connection = super().connect()  # type: ignore[misc]
+        except sa_exc.TimeoutError:
+            db_pool_timeouts_total.labels(engine=label).inc()
+            pool_stats(label).record_timeout()
+            raise
+        waited = time.perf_counter() - started
+        db_pool_checkout_seconds.labels(engine=label).observe(waited)
+        pool_stats(label).record_checkout(waited, self.checkedout())  # type: ignore[attr-defined]
+        return connection
+
+    def _do_return_conn(self, record: Any) -> None:
+        super()._do_return_conn(record)  # type: ignore[misc]
+        # El evento "checkin" llega antes de devolver la conexión a la cola.
+        _update_pool_gauges(self, self.metrics_label)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def _update_pool_gauges(pool: Any, label: str) -> None:
+    checkedin = getattr(pool, "checkedin", None)
+    if callable(checkedin):
+        db_pool_idle.labels(engine=label).set(checkedin())
+    overflow = getattr(pool, "overflow", None)
+    if callable(overflow):
+        db_pool_overflow.labels(engine=label).set(max(0, overflow()))
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """Attach pool gauges and churn counters to ``engine`` (a sync ``Engine``)."""
+
+    if not isinstance(engine, Engine):  # QA: motores falsos en tests
+        return
+    pool_size = getattr(engine.pool, "size", None)
+    if callable(pool_size):
+        db_pool_size.labels(engine=label).set(pool_size())
+
+    def _on_checkout(*_args: Any) -> None:
+        db_pool_checkouts_total.labels(engine=label).inc()
+        db_pool_checked_out.labels(engine=label).inc()
+        _update_pool_gauges(engine.pool, label)
+
+    def _on_checkin(*_args: Any) -> None:
+        db_pool_checked_out.labels(engine=label).dec()
+        _update_pool_gauges(engine.pool, label)
+
+    def _churn(name: str):
+        counter = db_pool_connection_events_total.labels(engine=label, event=name)
+
+        def _on_event(*_args: Any) -> None:
+            counter.inc()
+
+        return _on_event
+
+    event.listen(engine, "checkout", _on_checkout)
+    event.listen(engine, "checkin", _on_checkin)
+    for name in ("connect", "close", "invalidate"):
+        event.listen(engine, name, _churn(name))
+
+
+def install_idle_pre_ping(engine: Engine, label: str, idle_seconds: float) -> None:
+    """Ping connections on checkout only after ``idle_seconds`` in the pool."""
+
+    if not isinstance(engine, Engine):
+        return
+    dialect = engine.dialect
+    ok = db_pool_pre_ping_total.labels(engine=label, result="ok")
+    stale = db_pool_pre_ping_total.labels(engine=label, result="stale")
+
+    def _on_checkin(_dbapi_connection: Any, record: Any) -> None:
+        if record is not None:
+            record.info[_CHECKED_IN_AT] = time.monotonic()
+
+    def _on_checkout(dbapi_connection: Any, record: Any, _proxy: Any) -> None:
+        checked_in_at = record.info.get(_CHECKED_IN_AT)
+        # Conexión recién creada o usada hace poco: sin ida y vuelta extra.
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            dialect.do_ping(dbapi_connection)
+        except Exception as exc:
+            stale.inc()
+            # El pool invalida esta conexión y reintenta con una nueva.
+            raise sa_exc.DisconnectionError() from exc
+        ok.inc()
+
+    event.listen(engine, "checkin", _on_checkin)
+    event.listen(engine, "checkout", _on_checkout)
+
+
+def pool_status(engine: Engine | None, label: str) -> dict[str, Any] | None:
+    """Live pool numbers plus checkout statistics, for health endpoints."""
+
+    if not isinstance(engine, Engine):
+        return None
+    pool = engine.pool
+    status: dict[str, Any] = {"pool_class": type(pool).__name__}
+    for name in ("size", "checkedout", "checkedin", "overflow"):
+        reader = getattr(pool, name, None)
+        if callable(reader):
+            status[name] = reader()
+    if "overflow" in status:
+        status["overflow"] = max(0, status["overflow"])
+    status.update(pool_stats(label).snapshot())
+    return status
+
+
+def _resized(pool: Any, size: int) -> Any:
+    """Fresh copy of ``pool`` with ``size`` persistent connections, same budget."""
+
+    budget = pool.size() + max(0, pool._max_overflow)
+    fresh = pool.recreate()
+    # Pool nuevo y vacío: ajustar su contabilidad es seguro.
+    fresh._pool.maxsize = size
+    fresh._overflow = 0 - size
+    fresh._max_overflow = max(0, budget - size)
+    return fresh
+
+
+class PoolAutoTuner:
+    """Periodically sizes registered pools from their observed peak concurrency."""
+
+    def __init__(
+        self,
+        *,
+        interval_seconds: float | None = None,
+        min_size: int | None = None,
+        apply: bool | None = None,
+    ) -> None:
+        self.interval_seconds = max(
+            1.0,
+            float(
+                Config.DB_POOL_AUTOTUNE_INTERVAL_SECONDS
+                if interval_seconds is None
+                else interval_seconds
+            ),
+        )
+        self.min_size = max(
+            1, Config.DB_POOL_AUTOTUNE_MIN_SIZE if min_size is None else min_size
+        )
+        self.apply = Config.DB_POOL_AUTOTUNE if apply is None else apply
+        self._engines: dict[str, Any] = {}
+        self._task: asyncio.Task | None = None
+
+    def register(self, label: str, engine: Any) -> None:
+        """Track ``engine`` (``Engine`` or ``AsyncEngine``) under ``label``."""
+
+        self._engines[label] = engine
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def recommend(self, label: str, pool: Any) -> int | None:
+        stats = pool_stats(label)
+        peaks = sorted(stats.peaks)
+        if len(peaks) < _AUTOTUNE_MIN_WINDOWS or pool._max_overflow < 0:
+            return None
+        p90 = peaks[min(len(peaks) - 1, math.ceil(0.9 * len(peaks)) - 1)]
+        budget = pool.size() + pool._max_overflow
+        target = min(budget, max(self.min_size, math.ceil(p90 * _AUTOTUNE_HEADROOM)))
+        stats.recommended_size = target
+        db_pool_recommended_size.labels(engine=label).set(target)
+        return target
+
+    async def run_once(self) -> dict[str, int]:
+        """Close a window for every engine; return the pools that were resized."""
+
+        resized: dict[str, int] = {}
+        for label, engine in list(self._engines.items()):
+            sync_engine = getattr(engine, "sync_engine", engine)
+            pool = getattr(sync_engine, "pool", None)
+            if not isinstance(pool, QueuePool) or pool.size() <= 0:
+                continue
+            pool_stats(label).roll_window(pool.checkedout())
+            target = self.recommend(label, pool)
+            current = pool.size()
+            # Histéresis: recrear el pool cierra las conexiones ociosas.
+            if (
+                not self.apply
+                or target is None
+                or abs(target - current) < max(1, round(current * 0.2))
+            ):
+                continue
+
+            def _swap(engine: Any = sync_engine, size: int = target) -> None:
+                old = engine.pool
+                engine.pool = _resized(old, size)
+                old.dispose()
+
+            if sync_engine is engine:
+                await asyncio.to_thread(_swap)
+            else:
+                await greenlet_spawn(_swap)
+            db_pool_size.labels(engine=label).set(target)
+            resized[label] = target
+            logger.info("db_pool_resized: %s %s -> %s", label, current, target)
+        return resized
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._loop(), name="db-pool-autotune")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pragma: no cover - resiliencia del bucle
+                logger.warning("db_pool_autotune_error: %s", exc)
+
+
+pool_autotuner = PoolAutoTuner()
+
+__all__ = [
+    "InstrumentedAsyncQueuePool",
+    "InstrumentedQueuePool",
+    "PoolAutoTuner",
+    "PoolStats",
+    "install_idle_pre_ping",
+    "instrument_engine",
+    "pool_autotuner",
+    "pool_stats",
+    "pool_status",
+]
@@ -1,13 +1,106 @@
+"""Per-email login backoff and soft-lock state.
+
+Each email hash owns three fields: consecutive failures, the end of the
+current backoff window and the end of a soft-lock cooldown. Every operation
+reads and updates them atomically in a single round trip — a Lua script over
+a Redis hash when Redis is configured, or the equivalent synchronous code
+over an in-process dict — so concurrent workers cannot lose increments and
+the login route needs one call before authenticating (:meth:`check`) and one
+after a wrong password (:meth:`record_failure`).
+"""
+
 from __future__ import annotations
 
 import math
 import time
+from collections import OrderedDict
+from collections.abc import Sequence
 from dataclasses import dataclass
+from typing import Any
 
+from backend.core.logging_config import get_logger, log_event
 from backend.utils.cache import CacheClient
 
 BACKOFF_WINDOWS: list[float] = [60.0, 120.0, 300.0, 900.0]
 _CACHE_TTL = int(max(BACKOFF_WINDOWS[-1] * 2, 1800))
+# Hash nuevo: las claves JSON antiguas del mismo namespace darían WRONGTYPE.
+_HASH_KEY_INFIX = "h:"
+
+LOGGER = get_logger(service="login_backoff")
+
+# KEYS[1] = hash; ARGV = now, reset_after (-1 = nunca).
+# Limpia ventanas vencidas y, si no hay cooldown ni espera activa, reinicia
+# el contador a partir de ``reset_after`` fallos.
+_CHECK_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local reset_after = tonumber(ARGV[2])
+local v = redis.call('HMGET', key, 'f', 'l', 'c')
+local failures = tonumber(v[1]) or 0
+local locked = tonumber(v[2])
+local cooldown = tonumber(v[3])
+if cooldown and cooldown <= now then
+  redis.call('HDEL', key, 'c')
+  cooldown = nil
+end
+if locked and locked <= now then
+  redis.call('HDEL', key, 'l')
+  locked = nil
+end
+if not cooldown and not locked and reset_after >= 0 and failures >= reset_after then
+  redis.call('DEL', key)
+  failures = 0
+end
+return {failures, tostring(locked or ''), tostring(cooldown or '')}
+"""
+
+# KEYS[1] = hash; ARGV = now, ttl, start_after, soft_lock_threshold,
+# cooldown_seconds, windows...
+_FAILURE_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local start_after = tonumber(ARGV[3])
+local soft_lock = tonumber(ARGV[4])
+local cooldown_seconds = tonumber(ARGV[5])
+local windows = #ARGV - 5
+local failures = redis.call('HINCRBY', key, 'f', 1)
+local seconds = 0
+local locked = nil
+if windows > 0 and failures >= start_after then
+  seconds = tonumber(ARGV[6 + math.min(failures - start_after, windows - 1)])
+  locked = now + seconds
+  redis.call('HSET', key, 'l', tostring(locked))
+else
+  redis.call('HDEL', key, 'l')
+end
+local cooldown = tonumber(redis.call('HGET', key, 'c'))
+local activated = 0
+if soft_lock > 0 and cooldown_seconds > 0 and failures >= soft_lock then
+  local target = now + cooldown_seconds
+  if not (cooldown and cooldown > now and cooldown >= target) then
+    cooldown = target
+    redis.call('HSET', key, 'c', tostring(cooldown))
+    activated = 1
+  end
+end
+redis.call('EXPIRE', key, tonumber(ARGV[2]))
+return {failures, tostring(locked or ''), tostring(cooldown or ''),
+        tostring(seconds), activated}
+"""
+
+# KEYS[1] = hash; ARGV = now, ttl, cooldown_seconds.
+_COOLDOWN_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local target = now + tonumber(ARGV[3])
+local cooldown = tonumber(redis.call('HGET', key, 'c'))
+if cooldown and cooldown > now and cooldown >= target then
+  return 0
+end
+redis.call('HSET', key, 'c', tostring(target))
+redis.call('EXPIRE', key, tonumber(ARGV[2]))
+return 1
+"""
 
 
 @dataclass
@@ -15,6 +108,9 @@ class LoginBackoffState:
     failures: int = 0
     locked_until: float | None = None
     cooldown_until: float | None = None
+    # Solo en el resultado de ``record_failure``.
+    backoff_seconds: float = 0.0
+    cooldown_activated: bool = False
 
     @property
     def remaining(self) -> float:
@@ -30,107 +126,290 @@ class LoginBackoffState:
         delta = self.cooldown_until - time.time()
         return max(0.0, delta)
 
+    @property
+    def wait_seconds(self) -> int:
+        """Whole seconds to report in ``Retry-After`` for the backoff window."""
+
+        remaining = self.remaining
+        return max(1, math.ceil(remaining)) if remaining > 0 else 0
+
+    @property
+    def cooldown_seconds(self) -> int:
+        remaining = self.cooldown_remaining
+        return max(1, math.ceil(remaining)) if remaining > 0 else 0
+
+
+def _optional_float(value: Any) -> float | None:
+    if value is None or value in ("", b""):
+        return None
+    return float(value)
+
+
+class MemoryBackoffStore:
+    """In-process store with the same semantics as the Redis scripts.
+
+    Operations contain no ``await``, so each one is atomic within the event
+    loop. Entries share one TTL and are refreshed on write, so the oldest
+    entry is always at the front and expired ones are evicted from there.
+    """
+
+    def __init__(self, ttl: float = _CACHE_TTL) -> None:
+        self.ttl = ttl
+        # key -> [failures, locked_until, cooldown_until, expires_at]
+        self._entries: OrderedDict[str, list[Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        entries = self._entries
+        while entries:
+            key = next(iter(entries))
+            if entries[key][3] > now:
+                break
+            del entries[key]
+
+    def _get(self, key: str, now: float) -> list[Any] | None:
+        self._evict(now)
+        return self._entries.get(key)
+
+    def _touch(self, key: str, entry: list[Any], now: float) -> None:
+        entry[3] = now + self.ttl
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+    def check(self, key: str, *, now: float, reset_after: int) -> LoginBackoffState:
+        entry = self._get(key, now)
+        if entry is None:
+            return LoginBackoffState()
+        if entry[2] is not None and entry[2] <= now:
+            entry[2] = None
+        if entry[1] is not None and entry[1] <= now:
+            entry[1] = None
+        if (
+            entry[1] is None
+            and entry[2] is None
+            and reset_after >= 0
+            and entry[0] >= reset_after
+        ):
+            del self._entries[key]
+            return LoginBackoffState()
+        return LoginBackoffState(
+            failures=entry[0], locked_until=entry[1], cooldown_until=entry[2]
+        )
+
+    def record_failure(
+        self,
+        key: str,
+        *,
+        now: float,
+        start_after: int,
+        windows: Sequence[float],
+        soft_lock_threshold: int,
+        cooldown_seconds: float,
+    ) -> LoginBackoffState:
+        entry = self._get(key, now) or [0, None, None, 0.0]
+        entry[0] += 1
+        failures = entry[0]
+        seconds = 0.0
+        if windows and failures >= start_after:
+            seconds = float(windows[min(failures - start_after, len(windows) - 1)])
+            entry[1] = now + seconds
+        else:
+            entry[1] = None
+        activated = False
+        if soft_lock_threshold > 0 and cooldown_seconds > 0:
+            if failures >= soft_lock_threshold:
+                activated = self._set_cooldown(entry, now, cooldown_seconds)
+        self._touch(key, entry, now)
+        return LoginBackoffState(
+            failures=failures,
+            locked_until=entry[1],
+            cooldown_until=entry[2],
+            backoff_seconds=seconds,
+            cooldown_activated=activated,
+        )
+
+    def activate_cooldown(self, key: str, *, now: float, seconds: float) -> bool:
+        entry = self._get(key, now) or [0, None, None, 0.0]
+        activated = self._set_cooldown(entry, now, seconds)
+        if activated:
+            self._touch(key, entry, now)
+        return activated
+
+    @staticmethod
+    def _set_cooldown(entry: list[Any], now: float, seconds: float) -> bool:
+        target = now + seconds
+        current = entry[2]
+        if current is not None and current > now and current >= target:
+            return False
+        entry[2] = target
+        return True
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class RedisBackoffStore:
+    """Runs the backoff Lua scripts, registering them once per client."""
+
+    def __init__(self, client: Any, ttl: int = _CACHE_TTL) -> None:
+        self.ttl = ttl
+        self._check = client.register_script(_CHECK_LUA)
+        self._failure = client.register_script(_FAILURE_LUA)
+        self._cooldown = client.register_script(_COOLDOWN_LUA)
+
+    async def check(
+        self, key: str, *, now: float, reset_after: int
+    ) -> LoginBackoffState:
+        failures, locked, cooldown = await self._check(
+            keys=[key], args=[repr(now), reset_after]
+        )
+        return LoginBackoffState(
+            failures=int(failures),
+            locked_until=_optional_float(locked),
+            cooldown_until=_optional_float(cooldown),
+        )
+
+    async def record_failure(
+        self,
+        key: str,
+        *,
+        now: float,
+        start_after: int,
+        windows: Sequence[float],
+        soft_lock_threshold: int,
+        cooldown_seconds: float,
+    ) -> LoginBackoffState:
+        failures, locked, cooldown, seconds, activated = await self._failure(
+            keys=[key],
+            args=[
+                repr(now),
+                self.ttl,
+                start_after,
+                soft_lock_threshold,
+                repr(float(cooldown_seconds)),
+                *(repr(float(window)) for window in windows),
+            ],
+        )
+        return LoginBackoffState(
+            failures=int(failures),
+            locked_until=_optional_float(locked),
+            cooldown_until=_optional_float(cooldown),
+            backoff_seconds=float(seconds),
+            cooldown_activated=bool(int(activated)),
+        )
+
+    async def activate_cooldown(self, key: str, *, now: float, seconds: float) -> bool:
+        activated = await self._cooldown(
+            keys=[key], args=[repr(now), self.ttl, repr(float(seconds))]
+        )
+        return bool(int(activated))
+
 
 class LoginBackoffManager:
     def __init__(self, cache: CacheClient):
         self._cache = cache
+        self._memory = MemoryBackoffStore(ttl=_CACHE_TTL)
+        redis_client = cache.redis
+        self._redis = (
+            RedisBackoffStore(redis_client, ttl=_CACHE_TTL)
+            if redis_client is not None
+            else None
+        )
 
-    async def _load(self, email_hash: str) -> LoginBackoffState:
-        payload = await self._cache.get(email_hash)
-        if not payload:
-            return LoginBackoffState()
-        return LoginBackoffState(
-            failures=int(payload.get("failures", 0)),
-            locked_until=(
-                float(payload.get("locked_until"))
-                if payload.get("locked_until") is not None
-                else None
-            ),
-            cooldown_until=(
-                float(payload.get("cooldown_until"))
-                if payload.get("cooldown_until") is not None
-                else None
-            ),
+    def _key(self, email_hash: str) -> str:
+        return f"{self._cache.namespace}:{_HASH_KEY_INFIX}{email_hash}".lower()
+
+    async def _run(self, operation: str, email_hash: str, **kwargs: Any) -> Any:
+        key = self._key(email_hash)
+        if self._redis is not None:
+            try:
+                return await getattr(self._redis, operation)(key, **kwargs)
+            except Exception as exc:
+                log_event(
+                    LOGGER,
+                    service="login_backoff",
+                    event="dependency_unavailable",
+                    level="warning",
+                    dependency="redis",
+                    error=str(exc),
+                )
+        return getattr(self._memory, operation)(key, **kwargs)
+
+    async def check(
+        self, email_hash: str, *, reset_after: int | None = None
+    ) -> LoginBackoffState:
+        """Current state in one round trip, dropping windows that already ended.
+
+        With ``reset_after`` the counter is also reset when no backoff or
+        cooldown is active and it reached that many failures — the previous
+        lockout has been served, so the next attempt starts from scratch.
+        """
+
+        return await self._run(
+            "check",
+            email_hash,
+            now=time.time(),
+            reset_after=-1 if reset_after is None else max(0, reset_after),
         )
 
-    async def _save(self, email_hash: str, state: LoginBackoffState) -> None:
-        await self._cache.set(
+    async def record_failure(
+        self,
+        email_hash: str,
+        *,
+        start_after: int = 1,
+        soft_lock_threshold: int = 0,
+        cooldown_seconds: float = 0,
+    ) -> LoginBackoffState:
+        """Count a failed attempt and apply backoff/soft-lock atomically."""
+
+        return await self._run(
+            "record_failure",
             email_hash,
-            {
-                "failures": state.failures,
-                "locked_until": state.locked_until,
-                "cooldown_until": state.cooldown_until,
-            },
-            ttl=_CACHE_TTL,
+            now=time.time(),
+            start_after=max(1, start_after),
+            # Se lee en cada llamada: los tests parchean BACKOFF_WINDOWS.
+            windows=list(BACKOFF_WINDOWS),
+            soft_lock_threshold=max(0, int(soft_lock_threshold)),
+            cooldown_seconds=max(0.0, float(cooldown_seconds)),
         )
 
     async def register_failure(self, email_hash: str, *, start_after: int = 1) -> float:
-        state = await self._load(email_hash)
-        state.failures += 1
-        effective_start = max(1, start_after)
-        seconds = 0.0
-        if state.failures >= effective_start:
-            window_index = min(
-                state.failures - effective_start,
-                len(BACKOFF_WINDOWS) - 1,
-            )
-            seconds = BACKOFF_WINDOWS[window_index]
-            state.locked_until = time.time() + seconds
-        else:
-            state.locked_until = None
-        await self._save(email_hash, state)
-        return seconds
+        state = await self.record_failure(email_hash, start_after=start_after)
+        return state.backoff_seconds
 
     async def clear(self, email_hash: str) -> None:
-        await self._cache.delete(email_hash)
+        key = self._key(email_hash)
+        self._memory.delete(key)
+        if self._redis is not None:
+            await self._cache.delete(f"{_HASH_KEY_INFIX}{email_hash}")
 
     async def clear_all(self) -> None:
+        self._memory.clear()
         await self._cache.clear_namespace()
 
     async def remaining_seconds(self, email_hash: str) -> float:
-        state = await self._load(email_hash)
-        remaining = state.remaining
-        if remaining <= 0 and state.failures > 0 and state.locked_until is not None:
-            state.locked_until = None
-            await self._save(email_hash, state)
-        return remaining
+        return (await self.check(email_hash)).remaining
 
     async def failure_count(self, email_hash: str) -> int:
-        state = await self._load(email_hash)
-        return state.failures
+        return (await self.check(email_hash)).failures
 
     async def required_wait_seconds(self, email_hash: str) -> int:
-        remaining = await self.remaining_seconds(email_hash)
-        if remaining <= 0:
-            return 0
-        return max(1, math.ceil(remaining))
+        return (await self.check(email_hash)).wait_seconds
 
     async def activate_cooldown(self, email_hash: str, seconds: int) -> bool:
         if seconds <= 0:
             return False
-        state = await self._load(email_hash)
-        now = time.time()
-        cooldown_until = now + float(seconds)
-        if (
-            state.cooldown_until is not None
-            and state.cooldown_until > now
-            and state.cooldown_until >= cooldown_until
-        ):
-            return False
-        state.cooldown_until = cooldown_until
-        await self._save(email_hash, state)
-        return True
+        return await self._run(
+            "activate_cooldown", email_hash, now=time.time(), seconds=float(seconds)
+        )
 
     async def cooldown_remaining_seconds(self, email_hash: str) -> int:
-        state = await self._load(email_hash)
-        remaining = state.cooldown_remaining
-        if remaining <= 0 and state.cooldown_until is not None:
-            state.cooldown_until = None
-            await self._save(email_hash, state)
-            return 0
-        if remaining <= 0:
-            return 0
-        return max(1, math.ceil(remaining))
+        return (await self.check(email_hash)).cooldown_seconds
 
 
 login_backoff = LoginBackoffManager(CacheClient("login-backoff", ttl=_CACHE_TTL))
@@ -138,5 +417,8 @@ login_backoff = LoginBackoffManager(CacheClient("login-backoff", ttl=_CACHE_TTL)
 __all__ = [
     "BACKOFF_WINDOWS",
     "LoginBackoffManager",
+    "LoginBackoffState",
+    "MemoryBackoffStore",
+    "RedisBackoffStore",
     "login_backoff",
 ]
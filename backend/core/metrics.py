@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import time
-
 from fastapi import APIRouter
 from fastapi.responses import PlainTextResponse
 
@@ -38,12 +36,9 @@ except ImportError:  # pragma: no cover - fallback sin cliente de Prometheus
         return b"# prometheus_client not installed\n"
 
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-
+# QA: ``path`` es la plantilla de la ruta (ver ObservabilityMiddleware)
 REQUEST_COUNT = Counter(
-    "bullbearbroker_requests_total",
+    "http_requests_total",
     "Total HTTP requests",
     ["method", "path", "status"],
 )
@@ -69,6 +64,24 @@ LOGIN_DURATION = Histogram(
     "Duration of the login handler in seconds.",
 )
 
+# QA: espera por un slot del pool de hashing y duración total de cada operación
+PASSWORD_HASH_QUEUE_SECONDS = Histogram(
+    "password_hash_queue_seconds",
+    "Time a password hash/verify waited before a worker picked it up.",
+    ["operation"],
+)
+PASSWORD_HASH_DURATION_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "End-to-end duration of password hash/verify calls.",
+    ["operation"],
+)
+
+AUTH_PRINCIPAL_CACHE_TOTAL = Counter(
+    "auth_principal_cache_total",
+    "Access-token to principal lookups grouped by the layer that answered.",
+    ["result"],
+)
+
 ALERTS_RATE_LIMITED = Counter(
     "alerts_rate_limited_total",
     "Alert operations blocked by rate limiting.",
@@ -82,28 +95,6 @@ AI_PROVIDER_FAILOVER_TOTAL = Counter(
 )
 
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start = time.perf_counter()
-        method = request.method
-        path = request.url.path
-
-        try:
-            response: Response = await call_next(request)
-        except Exception:
-            duration = time.perf_counter() - start
-            REQUEST_LATENCY.labels(method=method, path=path).observe(duration)
-            REQUEST_COUNT.labels(method=method, path=path, status="500").inc()
-            raise
-
-        duration = time.perf_counter() - start
-        REQUEST_LATENCY.labels(method=method, path=path).observe(duration)
-        REQUEST_COUNT.labels(
-            method=method, path=path, status=str(response.status_code)
-        ).inc()
-        return response
-
-
 metrics_router = APIRouter()
 
 
@@ -0,0 +1,127 @@
+"""Async password hashing on a bounded executor.
+
+bcrypt is deliberately slow (tens to hundreds of ms per call), so running it
+inline in an ``async def`` handler stalls every other coroutine on the worker.
+:class:`PasswordHasher` moves hashing and verification to a process pool (or
+a thread pool, where forking is undesirable, e.g. under tests), caps how many
+run at once and records how long callers queue for a slot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from backend.core.metrics import (
+    PASSWORD_HASH_DURATION_SECONDS,
+    PASSWORD_HASH_QUEUE_SECONDS,
+)
+from backend.utils.config import Config, password_context
+
+
+def _hash(password: str, submitted_at: float) -> tuple[str, float]:
+    return password_context.hash(password), time.time() - submitted_at
+
+
+def _verify_and_update(
+    password: str, hashed: str, submitted_at: float
+) -> tuple[tuple[bool, str | None], float]:
+    queued = time.time() - submitted_at
+    try:
+        return password_context.verify_and_update(password, hashed), queued
+    except ValueError:  # hash desconocido o corrupto: nunca coincide
+        return (False, None), queued
+
+
+class PasswordHasher:
+    """Run passlib hashing off the event loop with bounded concurrency."""
+
+    def __init__(
+        self,
+        *,
+        mode: str | None = None,
+        workers: int | None = None,
+        max_concurrency: int | None = None,
+    ) -> None:
+        default_mode = "thread" if Config.TESTING else "process"
+        self.mode = (mode or Config.PASSWORD_HASH_EXECUTOR or default_mode).lower()
+        self.workers = max(
+            1, workers or Config.PASSWORD_HASH_WORKERS or (os.cpu_count() or 1)
+        )
+        self.max_concurrency = max(
+            1, max_concurrency or Config.PASSWORD_HASH_MAX_CONCURRENCY or self.workers
+        )
+        self._executor: Executor | None = None
+        # Un semáforo por event loop: asyncio.Semaphore queda ligado al primero.
+        self._slots: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+
+    def _get_executor(self) -> Executor | None:
+        if self.mode == "inline":
+            return None
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    def _slot(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slot = self._slots.get(loop)
+        if slot is None:
+            slot = self._slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return slot
+
+    async def _run(self, operation: str, func, *args):  # type: ignore[no-untyped-def]
+        submitted_at = time.time()
+        async with self._slot():
+            executor = self._get_executor()
+            if executor is None:
+                result, queued = func(*args, submitted_at)
+            else:
+                loop = asyncio.get_running_loop()
+                result, queued = await loop.run_in_executor(
+                    executor, func, *args, submitted_at
+                )
+        PASSWORD_HASH_QUEUE_SECONDS.labels(operation=operation).observe(
+            max(queued, 0.0)
+        )
+        PASSWORD_HASH_DURATION_SECONDS.labels(operation=operation).observe(
+            max(time.time() - submitted_at, 0.0)
+        )
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed: str
+    ) -> tuple[bool, str | None]:
+        """Return ``(valid, new_hash)``; ``new_hash`` is set when it needs rehashing."""
+
+        return await self._run("verify", _verify_and_update, password, hashed)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        valid, _ = await self.verify_and_update(password, hashed)
+        return valid
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
+
+__all__ = ["PasswordHasher", "password_hasher"]
@@ -1,31 +1,204 @@
-"""Shared helpers for rate limit dependencies with graceful fallbacks."""
+"""Shared helpers for rate limit dependencies with graceful fallbacks.
+
+Every limiter uses GCRA (generic cell rate algorithm): a key allows ``times``
+hits per ``seconds`` and its whole state is one number, the theoretical
+arrival time (TAT) of the next conforming hit. A check is O(1) in time and
+memory regardless of the window size. With Redis available the TAT lives in
+Redis and is updated by an atomic Lua script, so every worker shares the same
+budget; otherwise (or when Redis fails) each process keeps its own TATs in
+:class:`GCRAMemoryStore`, which reclaims idle keys incrementally.
+"""
 
 from __future__ import annotations
 
 import contextlib
 import hashlib
+import math
 import os
 import time
-from collections import defaultdict
+from collections import OrderedDict
 from collections.abc import Awaitable, Callable
+from typing import Any
 
 from fastapi import HTTPException, Request, Response
 from fastapi_limiter import FastAPILimiter
-from fastapi_limiter.depends import RateLimiter
 
 from backend.core.logging_config import get_logger, log_event
 from backend.utils.config import Config
 
-_IN_MEMORY_BUCKETS: dict[str, list[float]] = defaultdict(list)
-
 LimitCallback = Callable[[Request, str], None]
+IdentifierCallback = Callable[[Request], Awaitable[str]]
 
 
 LOGGER = get_logger(service="rate_limit")
 
+# Tolerancia para comparar floats: N golpes seguidos deben caber exactamente.
+_GCRA_EPSILON = 1e-9
+# Entradas que revisa el barrido incremental en cada golpe.
+_SWEEP_STEP = 2
+_REDIS_KEY_PREFIX = "rate-limit:"
+
+# KEYS[1]: clave; ARGV: periodo (ms), intervalo de emisión (ms), peso.
+# Usa el reloj de Redis para que todos los workers compartan la misma hora.
+_GCRA_LUA = """
+redis.replicate_commands()
+local period = tonumber(ARGV[1])
+local emission = tonumber(ARGV[2])
+local weight = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+  tat = now
+end
+local new_tat = tat + weight * emission
+local wait = new_tat - now - period
+if wait > 0 then
+  return math.ceil(wait)
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.max(1, math.ceil(new_tat - now)))
+return 0
+"""
+
+
+class GCRAMemoryStore:
+    """Per-process GCRA state: one TAT per key, idle keys swept as we go.
+
+    A key is idle once its TAT is in the past (it would behave exactly like a
+    fresh key). Each :meth:`hit` examines up to ``sweep_step`` entries at the
+    front of the table, dropping idle ones and rotating live ones to the back
+    (a clock hand), so memory tracks the number of recently active keys
+    instead of every client ever seen.
+    """
+
+    def __init__(self, *, sweep_step: int = _SWEEP_STEP) -> None:
+        self._tats: OrderedDict[str, float] = OrderedDict()
+        self._sweep_step = max(1, int(sweep_step))
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def hit(
+        self, key: str, *, limit: int, period: float, weight: int = 1, now: float
+    ) -> float:
+        """Record a hit at ``now``; return 0 or the seconds until it would fit."""
+
+        tats = self._tats
+        if tats:
+            self._sweep_front(now)
+        tat = tats.get(key)
+        if tat is None or tat < now:
+            tat = now
+        new_tat = tat + weight * (period / max(1, limit))
+        wait = new_tat - now - period
+        if wait > _GCRA_EPSILON:
+            return wait
+        tats[key] = new_tat
+        return 0.0
+
+    def _sweep_front(self, now: float) -> None:
+        tats = self._tats
+        for _ in range(min(self._sweep_step, len(tats))):
+            key = next(iter(tats))
+            if tats[key] <= now:
+                del tats[key]
+            else:
+                tats.move_to_end(key)
+
+    def sweep(self, now: float | None = None) -> int:
+        """Drop every idle key and return how many were removed."""
+
+        now = time.monotonic() if now is None else now
+        idle = [key for key, tat in self._tats.items() if tat <= now]
+        for key in idle:
+            del self._tats[key]
+        return len(idle)
+
+    def clear(self, predicate: Callable[[str], bool] | None = None) -> None:
+        if predicate is None:
+            self._tats.clear()
+            return
+        for key in [key for key in self._tats if predicate(key)]:
+            del self._tats[key]
+
+
+class _RedisGCRA:
+    """Runs the GCRA Lua script, registering it once per Redis client."""
+
+    def __init__(self) -> None:
+        self._client: Any = None
+        self._script: Any = None
+
+    async def hit(
+        self, client: Any, key: str, *, limit: int, period: float, weight: int = 1
+    ) -> float:
+        if client is not self._client:
+            self._script = client.register_script(_GCRA_LUA)
+            self._client = client
+        wait_ms = await self._script(
+            keys=[key],
+            args=[
+                int(period * 1000),
+                period * 1000 / max(1, limit),
+                max(1, int(weight)),
+            ],
+        )
+        return int(wait_ms) / 1000
+
+
+_IN_MEMORY_STORE = GCRAMemoryStore()
+_REDIS_GCRA = _RedisGCRA()
+
+
+def _client_host(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+async def _identifier_client_host(request: Request) -> str:
+    return _client_host(request)
+
+
+class RateLimiter:
+    """Redis-backed GCRA dependency shared by every worker.
+
+    Drop-in for ``fastapi_limiter.depends.RateLimiter`` (same call signature
+    and 429 on overflow) using the client registered in ``FastAPILimiter``.
+    """
+
+    def __init__(
+        self,
+        *,
+        times: int,
+        seconds: int,
+        identifier: IdentifierCallback | None = None,
+        prefix: str | None = None,
+        scope: str = "",
+    ) -> None:
+        self.times = max(1, int(times))
+        self.seconds = max(1, int(seconds))
+        self.identifier = identifier or _identifier_client_host
+        self.prefix = f"{_REDIS_KEY_PREFIX}{prefix or ''}{scope}"
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        del response
+        client = FastAPILimiter.redis
+        identity = await self.identifier(request)
+        wait = await _REDIS_GCRA.hit(
+            client,
+            f"{self.prefix}{identity}:{self.times}:{self.seconds}",
+            limit=self.times,
+            period=self.seconds,
+        )
+        if wait:
+            raise HTTPException(
+                status_code=429,
+                detail="Too Many Requests",
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+
 
 class SimpleRateLimiter:
-    """Minimal rate limiter compatible with the test helpers."""
+    """Keyed limiter for handlers that rate limit imperatively."""
 
     def __init__(self) -> None:
         self._limits: dict[str, tuple[int, int]] = {}
@@ -63,14 +236,40 @@ class SimpleRateLimiter:
         window_seconds = max(1, int(window_seconds))
         step = max(1, int(weight))
         bucket_key = f"{client_ip}:{key}:{max_requests}:{window_seconds}"
-        bucket = _IN_MEMORY_BUCKETS[bucket_key]
-        now = time.monotonic()
-        bucket[:] = [tick for tick in bucket if now - tick < window_seconds]
 
-        if len(bucket) + step > max_requests:
-            raise HTTPException(status_code=429, detail=detail)
+        redis_client = getattr(FastAPILimiter, "redis", None)
+        if redis_client is not None:
+            try:
+                wait = await _REDIS_GCRA.hit(
+                    redis_client,
+                    f"{_REDIS_KEY_PREFIX}{bucket_key}",
+                    limit=max_requests,
+                    period=window_seconds,
+                    weight=step,
+                )
+            except Exception as exc:
+                log_event(
+                    LOGGER,
+                    service="rate_limit",
+                    event="dependency_unavailable",
+                    level="warning",
+                    dependency="redis",
+                    identifier=key,
+                    error=str(exc),
+                )
+            else:
+                if wait:
+                    raise HTTPException(status_code=429, detail=detail)
+                return
 
-        bucket.extend([now] * step)
+        if _IN_MEMORY_STORE.hit(
+            bucket_key,
+            limit=max_requests,
+            period=window_seconds,
+            weight=step,
+            now=time.monotonic(),
+        ):
+            raise HTTPException(status_code=429, detail=detail)
 
 
 # Default alert dispatch limit (5 requests per minute unless overridden)
@@ -161,16 +360,14 @@ def login_rate_limiter(
                 log_event(LOGGER, **payload)
 
         bucket_key = f"{fallback_prefix}{identifier}:{times}:{seconds}"
-        window = _IN_MEMORY_BUCKETS[bucket_key]
-        now = time.monotonic()
-        window[:] = [tick for tick in window if now - tick < seconds]
-        if len(window) >= times:
+        if _IN_MEMORY_STORE.hit(
+            bucket_key, limit=times, period=seconds, now=time.monotonic()
+        ):
             if state_attribute:
                 setattr(request.state, state_attribute, True)
             if on_limit:
                 on_limit(request, "email")
             raise HTTPException(status_code=429, detail=detail)
-        window.append(now)
         if state_attribute:
             setattr(request.state, state_attribute, False)
 
@@ -191,12 +388,12 @@ def rate_limit(
     """Return a dependency that enforces rate limits with Redis or an in-memory fallback."""
 
     prefix_override = os.getenv("BB_RATE_PREFIX")
-    limiter_kwargs = dict(times=times, seconds=seconds)
+    limiter_kwargs = dict(times=times, seconds=seconds, scope=f"{identifier}:")
     if prefix_override:
         limiter_kwargs["prefix"] = prefix_override
     limiter = RateLimiter(**limiter_kwargs)
     bucket_prefix = f"{prefix_override or ''}{identifier}:{times}:{seconds}"
-    fallback_limit = fallback_times or times
+    fallback_limit = max(1, int(fallback_times or times))
 
     async def _dependency(request: Request, response: Response) -> None:
         if state_attribute:
@@ -225,14 +422,10 @@ def rate_limit(
                     error=str(exc),
                 )
 
-        client_host = request.client.host if request.client else "unknown"
-        bucket_key = f"{client_host}:{bucket_prefix}"
-        window = _IN_MEMORY_BUCKETS[bucket_key]
-        now = time.monotonic()
-        window[:] = [tick for tick in window if now - tick < seconds]
-        window.append(now)
-        if len(window) > fallback_limit:
-            window.pop()
+        bucket_key = f"{_client_host(request)}:{bucket_prefix}"
+        if _IN_MEMORY_STORE.hit(
+            bucket_key, limit=fallback_limit, period=seconds, now=time.monotonic()
+        ):
             if state_attribute:
                 setattr(request.state, state_attribute, True)
             if on_limit:
@@ -249,16 +442,12 @@ def reset_rate_limiter_cache(identifier: str | None = None) -> None:
     """Utility used in tests to reset the fallback buckets."""
 
     if identifier is None:
-        _IN_MEMORY_BUCKETS.clear()
+        _IN_MEMORY_STORE.clear()
         return
 
-    keys = [
-        key
-        for key in list(_IN_MEMORY_BUCKETS.keys())
-        if key.startswith(identifier) or f":{identifier}:" in key
-    ]
-    for key in keys:
-        _IN_MEMORY_BUCKETS.pop(key, None)
+    _IN_MEMORY_STORE.clear(
+        lambda key: key.startswith(identifier) or f":{identifier}:" in key
+    )
 
 
 async def clear_testing_state() -> None:
@@ -267,7 +456,7 @@ async def clear_testing_state() -> None:
     redis_client = getattr(FastAPILimiter, "redis", None)
     if redis_client is not None:
         with contextlib.suppress(Exception):  # pragma: no cover - limpieza defensiva
-            login_ip_pattern = "auth_login_ip*"
+            login_ip_pattern = f"{_REDIS_KEY_PREFIX}*auth_login_ip*"
             keys = await redis_client.keys(login_ip_pattern)
             if keys:
                 await redis_client.delete(*keys)
@@ -277,6 +466,8 @@ async def clear_testing_state() -> None:
 
 
 __all__ = [
+    "GCRAMemoryStore",
+    "RateLimiter",
     "SimpleRateLimiter",
     "rate_limiter",
     "identifier_login_by_email",
@@ -6,7 +6,8 @@ import os
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
-import jwt
+from backend.core.token_verifier import TokenVerifier, load_key_material
+from backend.utils.config import Config
 
 JWT_ALG = "HS256"
 ACCESS_MIN = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
@@ -19,6 +20,18 @@ REFRESH_SECRET = os.environ.get(
     "REFRESH_TOKEN_SECRET", os.environ.get("SECRET_KEY", "change-me")
 )
 
+# Claves preparadas una sola vez; las de acceso además cachean claims verificados.
+access_verifier = TokenVerifier(
+    algorithm=Config.ACCESS_TOKEN_ALGORITHM or JWT_ALG,
+    secret=ACCESS_SECRET,
+    private_key=load_key_material(Config.ACCESS_TOKEN_PRIVATE_KEY),
+    key_id=Config.ACCESS_TOKEN_KEY_ID,
+    jwks=load_key_material(Config.ACCESS_TOKEN_JWKS),
+    cache_size=Config.JWT_CLAIMS_CACHE_SIZE,
+)
+# Los refresh se verifican una vez por rotación: sin caché.
+refresh_verifier = TokenVerifier(algorithm=JWT_ALG, secret=REFRESH_SECRET, cache_size=0)
+
 
 def _now() -> datetime:
     return datetime.now(UTC)
@@ -33,7 +46,7 @@ def create_access_token(sub: str, extra: dict[str, Any] | None = None) -> str:
     }
     if extra:
         payload.update(extra)
-    return jwt.encode(payload, ACCESS_SECRET, algorithm=JWT_ALG)
+    return access_verifier.encode(payload)
 
 
 def create_refresh_token(sub: str, jti: str | None = None) -> str:
@@ -45,12 +58,12 @@ def create_refresh_token(sub: str, jti: str | None = None) -> str:
     }
     if jti:
         payload["jti"] = jti
-    return jwt.encode(payload, REFRESH_SECRET, algorithm=JWT_ALG)
+    return refresh_verifier.encode(payload)
 
 
 def decode_access(token: str) -> dict[str, Any]:
-    return jwt.decode(token, ACCESS_SECRET, algorithms=[JWT_ALG])
+    return access_verifier.decode(token)
 
 
 def decode_refresh(token: str) -> dict[str, Any]:
-    return jwt.decode(token, REFRESH_SECRET, algorithms=[JWT_ALG])
+    return refresh_verifier.decode(token)
@@ -0,0 +1,185 @@
+"""JWT verification with prepared keys and a verified-claims LRU.
+
+``jwt.decode(token, secret)`` re-validates and re-prepares the key on every
+call, and the same access token is decoded several times per request (auth
+dependency, session lookup, WebSocket handshake). :class:`TokenVerifier`
+prepares each key once as a :class:`jwt.PyJWK` and remembers the claims of
+tokens whose signature already verified, keyed by the SHA-256 of the token,
+until their ``exp``. Tokens without ``exp`` are never cached.
+
+Besides HMAC it accepts asymmetric algorithms (``EdDSA``, ``ES256``...): the
+signing key is a PEM private key and verification keys come from a JWKS with
+one entry per ``kid``, so keys can be rotated by publishing the new public
+key before signing with it. Workers and edge proxies then only need the
+public JWKS (:meth:`TokenVerifier.public_jwks`), never the shared secret.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+_HMAC_ALGORITHMS = frozenset({"HS256", "HS384", "HS512"})
+
+
+class UnknownKeyIdError(jwt.InvalidTokenError):
+    """The token's ``kid`` matches no verification key.
+
+    A subclass of :class:`jwt.InvalidTokenError` (unlike PyJWT's
+    ``InvalidKeyError``), so callers answer it with a 401 like any other
+    bad token.
+    """
+
+
+def _b64url(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).rstrip(b"=").decode("ascii")
+
+
+def load_key_material(value: str | None) -> str | None:
+    """Return ``value`` itself when it is inline PEM/JSON, else a file's contents."""
+
+    if not value:
+        return None
+    stripped = value.strip()
+    if stripped.startswith(("-----BEGIN", "{")):
+        return stripped
+    return Path(stripped).read_text(encoding="utf-8")
+
+
+class TokenVerifier:
+    """Encodes and verifies JWTs for one token type (access, refresh...)."""
+
+    def __init__(
+        self,
+        *,
+        algorithm: str = "HS256",
+        secret: str | bytes | None = None,
+        private_key: str | None = None,
+        key_id: str | None = None,
+        jwks: Mapping[str, Any] | str | None = None,
+        cache_size: int = 4096,
+    ) -> None:
+        algorithms = get_default_algorithms()
+        if algorithm not in algorithms:
+            raise ValueError(f"Unsupported JWT algorithm {algorithm!r}")
+        self.algorithm = algorithm
+        self.key_id = key_id
+        self._algorithms = [algorithm]
+        self._cache_size = max(0, int(cache_size))
+        self._cache: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._keys: dict[str | None, jwt.PyJWK] = {}
+        self._public_jwks: list[dict[str, Any]] = []
+
+        algorithm_obj = algorithms[algorithm]
+        if algorithm in _HMAC_ALGORITHMS:
+            if secret is None:
+                raise ValueError(f"{algorithm} requires a shared secret")
+            raw = secret.encode("utf-8") if isinstance(secret, str) else secret
+            self._signing_key: Any = algorithm_obj.prepare_key(raw)
+            self._keys[None] = jwt.PyJWK(
+                {"kty": "oct", "k": _b64url(raw)}, algorithm=algorithm
+            )
+            return
+
+        if private_key is None and jwks is None:
+            raise ValueError(f"{algorithm} requires a private key or a JWKS")
+        self._signing_key = (
+            algorithm_obj.prepare_key(private_key) if private_key else None
+        )
+        entries = self._jwks_entries(jwks)
+        if self._signing_key is not None and not any(
+            entry.get("kid") == key_id for entry in entries
+        ):
+            # La clave pública de firma siempre verifica, aunque falte en el JWKS.
+            public = algorithm_obj.to_jwk(self._signing_key.public_key(), as_dict=True)
+            if key_id is not None:
+                public["kid"] = key_id
+            entries.append(public)
+        for entry in entries:
+            self._keys[entry.get("kid")] = jwt.PyJWK(entry, algorithm=algorithm)
+            self._public_jwks.append({**entry, "alg": algorithm, "use": "sig"})
+
+    @staticmethod
+    def _jwks_entries(jwks: Mapping[str, Any] | str | None) -> list[dict[str, Any]]:
+        if jwks is None:
+            return []
+        document = json.loads(jwks) if isinstance(jwks, str) else jwks
+        # Solo material público: nunca re-publicar "d" de una clave privada.
+        return [
+            {name: value for name, value in entry.items() if name != "d"}
+            for entry in document.get("keys", [])
+        ]
+
+    @property
+    def asymmetric(self) -> bool:
+        return self.algorithm not in _HMAC_ALGORITHMS
+
+    def public_jwks(self) -> dict[str, list[dict[str, Any]]]:
+        """Verification keys to publish to other services (empty for HMAC)."""
+
+        return {"keys": [dict(entry) for entry in self._public_jwks]}
+
+    def encode(self, payload: Mapping[str, Any]) -> str:
+        if self._signing_key is None:
+            raise RuntimeError("This verifier has no signing key")
+        headers = {"kid": self.key_id} if self.asymmetric and self.key_id else None
+        return jwt.encode(
+            dict(payload), self._signing_key, algorithm=self.algorithm, headers=headers
+        )
+
+    def _key_for(self, token: str) -> jwt.PyJWK:
+        if len(self._keys) == 1:
+            return next(iter(self._keys.values()))
+        kid = jwt.get_unverified_header(token).get("kid")
+        try:
+            return self._keys[kid]
+        except KeyError:
+            raise UnknownKeyIdError(f"Unknown key id {kid!r}") from None
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """Verify ``token`` and return a copy of its claims.
+
+        Raises the same :mod:`jwt` exceptions as :func:`jwt.decode`.
+        """
+
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        if self._cache_size:
+            with self._lock:
+                cached = self._cache.get(digest)
+                if cached is not None:
+                    if cached[0] > time.time():
+                        self._cache.move_to_end(digest)
+                        return dict(cached[1])
+                    del self._cache[digest]
+
+        # Caducados o desconocidos: jwt.decode produce el error exacto.
+        claims = jwt.decode(token, self._key_for(token), algorithms=self._algorithms)
+        exp = claims.get("exp")
+        if self._cache_size and isinstance(exp, int | float):
+            with self._lock:
+                self._cache[digest] = (float(exp), claims)
+                self._cache.move_to_end(digest)
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return dict(claims)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+__all__ = ["TokenVerifier", "UnknownKeyIdError", "load_key_material"]
@@ -5,15 +5,29 @@ from __future__ import annotations
 import importlib
 import os
 import threading
-from collections.abc import Callable, Generator
+from collections.abc import AsyncGenerator, Callable, Generator
 from typing import Any, cast
 from urllib.parse import urlparse
 
 from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
-
+from sqlalchemy.pool import NullPool
+
+from backend.core.db_pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    install_idle_pre_ping,
+    instrument_engine,
+    pool_autotuner,
+    pool_status,
+)
 from backend.core.logging_config import get_logger
 from backend.models.base import Base
 from backend.utils.config import (
@@ -38,6 +52,10 @@ _TESTING_MODE = bool(getattr(Config, "TESTING", False)) or os.getenv(
 _ENGINE: Engine | None = None
 _ENGINE_LOCK = threading.Lock()
 
+_ASYNC_ENGINE: AsyncEngine | None = None
+# QA: evita reintentar en cada request si el driver async no está instalado
+_ASYNC_ENGINE_UNAVAILABLE = False
+
 
 def _current_env() -> str:
     """Return the active environment name following ENV precedence rules."""
@@ -156,6 +174,52 @@ def create_all_if_local(engine) -> None:
         )
 
 
+def _pool_settings() -> dict[str, int]:
+    """QueuePool sizing shared by the sync and async engines."""
+
+    def _setting(name: str, legacy: str, default: int) -> int:
+        value = getattr(Config, name, None)
+        if value is None:
+            value = getattr(Config, legacy, default)
+        return int(value)
+
+    return {
+        "pool_size": _setting("DB_POOL_SIZE", "POOL_SIZE", 5),
+        "max_overflow": _setting("DB_MAX_OVERFLOW", "MAX_OVERFLOW", 10),
+        "pool_timeout": _setting("DB_POOL_TIMEOUT", "POOL_TIMEOUT", 30),
+        "pool_recycle": _setting("DB_POOL_RECYCLE", "POOL_RECYCLE", 1800),
+    }
+
+
+def _postgres_connect_args(use_pool: bool, connect_timeout: int) -> dict[str, Any]:
+    if use_pool:
+        connect_args: dict[str, Any] = {
+            "sslmode": "require",
+            "prepare_threshold": None,
+            "connect_timeout": connect_timeout,
+        }
+    else:
+        connect_args = {
+            "connect_timeout": connect_timeout,
+            "prepared_statement_cache_size": 0,
+        }
+    schema_override = os.getenv("TEST_SCHEMA")
+    if schema_override:
+        connect_args["options"] = f"-c search_path={schema_override},public"
+    return connect_args
+
+
+def _pre_ping_idle_seconds() -> float:
+    return float(getattr(Config, "DB_POOL_PRE_PING_IDLE_SECONDS", 0.0) or 0.0)
+
+
+def _instrument_pool(engine: Engine, label: str, *, idle_pre_ping: bool) -> None:
+    instrument_engine(engine, label)
+    idle_seconds = _pre_ping_idle_seconds()
+    if idle_pre_ping and idle_seconds > 0:
+        install_idle_pre_ping(engine, label, idle_seconds)
+
+
 def _build_engine_from_env() -> Engine:
     """Build a SQLAlchemy engine honouring Supabase connection rules."""
 
@@ -173,9 +237,15 @@ def _build_engine_from_env() -> Engine:
     use_pool = Config.DB_USE_POOL
     connect_timeout = int(getattr(Config, "DB_CONNECT_TIMEOUT", 10))
 
-    schema_override = os.getenv("TEST_SCHEMA")
-
     if database_url.startswith("sqlite"):
+        # QA: SQLite en memoria y drivers async mantienen su pool por defecto
+        sqlite_url = make_url(database_url)
+        sqlite_pool: dict[str, Any] = (
+            {}
+            if sqlite_url.database in (None, "", ":memory:")
+            or sqlite_url.get_dialect().is_async
+            else {"poolclass": InstrumentedQueuePool}
+        )
         engine = cast(
             Engine,
             create_engine(
@@ -183,79 +253,29 @@ def _build_engine_from_env() -> Engine:
                 future=True,
                 echo=False,
                 connect_args={"check_same_thread": False},
+                **sqlite_pool,
             ),
         )
         connect_args: dict[str, Any] = {"check_same_thread": False}
     else:
-        if use_pool:
-            connect_args = {
-                "sslmode": "require",
-                "prepare_threshold": None,
-                "connect_timeout": connect_timeout,
-            }
-            if schema_override:
-                connect_args["options"] = f"-c search_path={schema_override},public"
-            pool_size = getattr(Config, "DB_POOL_SIZE", None)
-            if pool_size is None:
-                pool_size = getattr(Config, "POOL_SIZE", 5)
-            max_overflow = getattr(Config, "DB_MAX_OVERFLOW", None)
-            if max_overflow is None:
-                max_overflow = getattr(Config, "MAX_OVERFLOW", 10)
-            pool_timeout = getattr(Config, "DB_POOL_TIMEOUT", None)
-            if pool_timeout is None:
-                pool_timeout = getattr(Config, "POOL_TIMEOUT", 30)
-            pool_recycle = getattr(Config, "DB_POOL_RECYCLE", None)
-            if pool_recycle is None:
-                pool_recycle = getattr(Config, "POOL_RECYCLE", 1800)
-            engine = cast(
-                Engine,
-                create_engine(
-                    database_url,
-                    future=True,
-                    echo=False,
-                    poolclass=QueuePool,
-                    pool_size=pool_size,
-                    max_overflow=max_overflow,
-                    pool_timeout=pool_timeout,
-                    pool_recycle=pool_recycle,
-                    pool_pre_ping=True,
-                    connect_args=connect_args,
-                ),
-            )
-        else:
-            connect_args = {
-                "connect_timeout": connect_timeout,
-                "prepared_statement_cache_size": 0,
-            }
-            if schema_override:
-                connect_args["options"] = f"-c search_path={schema_override},public"
-            pool_size = getattr(Config, "DB_POOL_SIZE", None)
-            if pool_size is None:
-                pool_size = getattr(Config, "POOL_SIZE", 5)
-            max_overflow = getattr(Config, "DB_MAX_OVERFLOW", None)
-            if max_overflow is None:
-                max_overflow = getattr(Config, "MAX_OVERFLOW", 10)
-            pool_timeout = getattr(Config, "DB_POOL_TIMEOUT", None)
-            if pool_timeout is None:
-                pool_timeout = getattr(Config, "POOL_TIMEOUT", 30)
-            pool_recycle = getattr(Config, "DB_POOL_RECYCLE", None)
-            if pool_recycle is None:
-                pool_recycle = getattr(Config, "POOL_RECYCLE", 1800)
-            engine = cast(
-                Engine,
-                create_engine(
-                    database_url,
-                    future=True,
-                    echo=False,
-                    poolclass=QueuePool,
-                    pool_size=int(pool_size),
-                    max_overflow=int(max_overflow),
-                    pool_timeout=int(pool_timeout),
-                    pool_recycle=int(pool_recycle),
-                    pool_pre_ping=True,
-                    connect_args=connect_args,
-                ),
-            )
+        connect_args = _postgres_connect_args(use_pool, connect_timeout)
+        engine = cast(
+            Engine,
+            create_engine(
+                database_url,
+                future=True,
+                echo=False,
+                poolclass=InstrumentedQueuePool,
+                # QA: con umbral de inactividad solo se hace ping a conexiones ociosas
+                pool_pre_ping=_pre_ping_idle_seconds() <= 0,
+                connect_args=connect_args,
+                **_pool_settings(),
+            ),
+        )
+    _instrument_pool(
+        engine, "sync", idle_pre_ping=not database_url.startswith("sqlite")
+    )
+    pool_autotuner.register("sync", engine)
 
     _log_engine_initialization(database_url, connect_args, use_pool)
     create_all_if_local(engine)
@@ -407,19 +427,157 @@ engine = get_engine()
 
 
 def reset_engine() -> None:
-    """Reset the cached engine, useful for test suites that monkeypatch SQLAlchemy."""
+    """Reset the cached engines, useful for test suites that monkeypatch SQLAlchemy."""
 
-    global _ENGINE
+    global _ENGINE, _ASYNC_ENGINE, _ASYNC_ENGINE_UNAVAILABLE
     with _ENGINE_LOCK:
         try:
             if _ENGINE is not None:
                 _ENGINE.dispose()
+            if _ASYNC_ENGINE is not None:
+                # QA: dispose síncrono; las conexiones async en uso se cierran al devolverse
+                _ASYNC_ENGINE.sync_engine.dispose()
         finally:
             _ENGINE = None
+            _ASYNC_ENGINE = None
+            _ASYNC_ENGINE_UNAVAILABLE = False
             if hasattr(_SESSIONMAKER, "configure"):
                 _SESSIONMAKER.configure(bind=None)
 
 
+def get_async_database_url(database_url: str) -> str | None:
+    """Map a sync database URL to its async driver, or ``None`` if unsupported.
+
+    SQLite uses aiosqlite and PostgreSQL uses psycopg 3 (already required by
+    the sync engine), so no extra driver is needed in production. In-memory
+    SQLite is not shared between engines and is therefore rejected.
+    """
+
+    scheme, separator, rest = database_url.partition("://")
+    if not separator:
+        return None
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "sqlite":
+        if not rest.strip("/") or ":memory:" in rest or "mode=memory" in rest:
+            return None
+        return f"sqlite+aiosqlite://{rest}"
+    if dialect in {"postgresql", "postgres"}:
+        return f"postgresql+psycopg://{rest}"
+    return None
+
+
+def _build_async_engine() -> AsyncEngine | None:
+    if not getattr(Config, "DB_ASYNC_ENABLED", True):
+        return None
+    database_url = get_database_url()
+    async_url = get_async_database_url(database_url) if database_url else None
+    if async_url is None:
+        logger.info(
+            {
+                "service": "database",
+                "event": "async_engine_skipped",
+                "reason": "unsupported_url",
+                "level": "info",
+            }
+        )
+        return None
+
+    try:
+        if async_url.startswith("sqlite"):
+            # NullPool: abrir un fichero SQLite es barato y las conexiones de
+            # aiosqlite quedan ligadas al event loop que las creó.
+            async_engine = create_async_engine(
+                async_url, future=True, echo=False, poolclass=NullPool
+            )
+        else:
+            connect_args = _postgres_connect_args(
+                Config.DB_USE_POOL, int(getattr(Config, "DB_CONNECT_TIMEOUT", 10))
+            )
+            async_engine = create_async_engine(
+                async_url,
+                future=True,
+                echo=False,
+                poolclass=InstrumentedAsyncQueuePool,
+                pool_pre_ping=_pre_ping_idle_seconds() <= 0,
+                connect_args=connect_args,
+                **_pool_settings(),
+            )
+    except Exception as exc:  # noqa: BLE001 - driver async ausente: modo sync
+        logger.warning(
+            {
+                "service": "database",
+                "event": "async_engine_unavailable",
+                "error": str(exc),
+                "level": "warning",
+            }
+        )
+        return None
+
+    _instrument_pool(
+        async_engine.sync_engine,
+        "async",
+        idle_pre_ping=not async_url.startswith("sqlite"),
+    )
+    pool_autotuner.register("async", async_engine)
+    return async_engine
+
+
+def get_async_engine() -> AsyncEngine | None:
+    """Return the singleton async engine, or ``None`` when it cannot be built."""
+
+    global _ASYNC_ENGINE, _ASYNC_ENGINE_UNAVAILABLE
+    if _ASYNC_ENGINE is not None or _ASYNC_ENGINE_UNAVAILABLE:
+        return _ASYNC_ENGINE
+
+    with _ENGINE_LOCK:
+        if _ASYNC_ENGINE is None and not _ASYNC_ENGINE_UNAVAILABLE:
+            _ASYNC_ENGINE = _build_async_engine()
+            _ASYNC_ENGINE_UNAVAILABLE = _ASYNC_ENGINE is None
+        return _ASYNC_ENGINE
+
+
+_ASYNC_SESSIONMAKER = async_sessionmaker(
+    class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+class _AsyncSessionFactoryProxy:
+    """Lazily bound ``async_sessionmaker``.
+
+    Evaluates falsy when no async engine is available so services can write
+    ``if self._async_session_factory:`` and fall back to the sync path.
+    """
+
+    def __bool__(self) -> bool:
+        return get_async_engine() is not None
+
+    def __call__(self, **kwargs: Any) -> AsyncSession:
+        async_engine = get_async_engine()
+        if async_engine is None:
+            raise RuntimeError("Async database engine not available")
+        return _ASYNC_SESSIONMAKER(bind=async_engine, **kwargs)
+
+
+AsyncSessionLocal = _AsyncSessionFactoryProxy()
+
+
+def async_session_factory_for(session_factory: Any) -> _AsyncSessionFactoryProxy | None:
+    """Return the async counterpart of ``session_factory`` when there is one.
+
+    Only the default :data:`SessionLocal` maps to :data:`AsyncSessionLocal`;
+    injected factories (e.g. in-memory SQLite in tests) keep the sync path.
+    """
+
+    if session_factory is SessionLocal and AsyncSessionLocal:
+        return AsyncSessionLocal
+    return None
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 def get_db() -> Generator:
     _ensure_session_bind()
     db = SessionLocal()
@@ -435,12 +593,33 @@ def get_database_diagnostics() -> dict[str, Any]:
     return dict(_DATABASE_DETAILS)
 
 
+def get_pool_status() -> dict[str, Any]:
+    """Live connection pool numbers per engine for ``/api/health``."""
+
+    status: dict[str, Any] = {}
+    sync_status = pool_status(_ENGINE, "sync")
+    if sync_status is not None:
+        status["sync"] = sync_status
+    # No construye el motor async solo para el healthcheck.
+    if _ASYNC_ENGINE is not None:
+        async_status = pool_status(_ASYNC_ENGINE.sync_engine, "async")
+        if async_status is not None:
+            status["async"] = async_status
+    return status
+
+
 __all__ = [
     "Base",
     "engine",
     "SessionLocal",
+    "AsyncSessionLocal",
+    "async_session_factory_for",
     "get_engine",
+    "get_async_engine",
+    "get_async_database_url",
     "reset_engine",
     "get_db",
+    "get_async_db",
     "get_database_diagnostics",
+    "get_pool_status",
 ]
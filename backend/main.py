@@ -13,16 +13,15 @@ from fastapi.responses import JSONResponse
 from fastapi_limiter import FastAPILimiter
 
 from backend import database as database_module
-from backend.core.http_logging import RequestLogMiddleware
+from backend.core.db_pool import pool_autotuner
 from backend.core.logging_config import get_logger, log_event
-from backend.core.metrics import MetricsMiddleware
+from backend.core.password_hashing import password_hasher
+from backend.core.rate_limit import rate_limit
 from backend.core.tracing import configure_tracing
 
 # ✅ Codex fix: Import global error handlers
 from backend.middleware.error_handler import register_error_handlers
-
-# ✅ Codex fix: Import structured logging middleware
-from backend.middleware.logging_middleware import LoggingMiddleware
+from backend.middleware.observability import ObservabilityMiddleware
 from backend.models.base import Base
 from backend.routers import (  # ✅ Codex fix: registrar gateway WebSocket realtime
     ai,
@@ -43,8 +42,12 @@ from backend.routers import (  # ✅ Codex fix: registrar gateway WebSocket real
     realtime,
 )
 from backend.services.alert_service import alert_service
+from backend.services.insight_scheduler import insight_scheduler
 from backend.services.integration_reporter import log_api_integration_report
 from backend.services.notification_dispatcher import notification_dispatcher
+from backend.services.notification_outbox import notification_outbox
+from backend.services.provider_http import provider_clients
+from backend.services.session_pruner import session_pruner
 from backend.services.websocket_manager import AlertWebSocketManager
 from backend.utils.config import APP_ENV, Config
 
@@ -54,8 +57,13 @@ ENV = getattr(
 _ORIGINAL_ENV = ENV
 
 try:  # pragma: no cover - user service puede no estar disponible en algunos tests
-    from backend.services.user_service import InvalidTokenError, user_service
+    from backend.services.user_service import (
+        InvalidTokenError,
+        resolve_current_user,
+        user_service,
+    )
 except Exception:  # pragma: no cover - entorno sin servicio de usuarios
+    resolve_current_user = None  # type: ignore[assignment]
     user_service = None  # type: ignore[assignment]
     InvalidTokenError = Exception  # type: ignore[assignment]
 
@@ -202,6 +210,27 @@ async def lifespan(app: FastAPI):
         notification_dispatcher.realtime
     )  # ✅ Codex fix: servicio global para WebSocket realtime
     app.state.notification_dispatcher = notification_dispatcher
+    # QA: cola de notificaciones salientes (Redis Streams o memoria local)
+    notification_dispatcher.attach_outbox(notification_outbox)
+    alert_service.register_outbox(notification_outbox)
+    if Config.NOTIFICATION_OUTBOX_ENABLED and not getattr(Config, "TESTING", False):
+        try:
+            await notification_outbox.start()
+        except Exception as exc:  # pragma: no cover - entrega inline como respaldo
+            logger.warning("notification_outbox_start_failed", error=str(exc))
+    app.state.notification_outbox = notification_outbox
+    # QA: sesiones HTTP keep-alive compartidas por proveedor IA
+    if not getattr(Config, "TESTING", False):
+        await provider_clients.start()
+    # QA: precálculo de insights guiado por movimientos de mercado
+    if Config.INSIGHT_PRECOMPUTE_ENABLED and not getattr(Config, "TESTING", False):
+        await insight_scheduler.start()
+    # QA: limpieza periódica de sesiones y refresh tokens caducados
+    if Config.SESSION_PRUNE_ENABLED and not getattr(Config, "TESTING", False):
+        await session_pruner.start()
+    # QA: ventanas de concurrencia del pool; solo redimensiona con DB_POOL_AUTOTUNE
+    if not getattr(Config, "TESTING", False):
+        await pool_autotuner.start()
     app.state.realtime_price_task = (
         None  # ✅ Codex fix: inicializar referencia a tarea de precios
     )
@@ -221,6 +250,19 @@ async def lifespan(app: FastAPI):
 
     # 🔹 Shutdown
     # Si necesitas liberar recursos (ej: cerrar redis) hazlo aquí
+    with suppress(Exception):  # QA: drenar la cola antes de cerrar los sockets
+        await notification_outbox.stop()
+    with suppress(Exception):
+        await insight_scheduler.stop()
+    with suppress(Exception):
+        await session_pruner.stop()
+    with suppress(Exception):
+        await pool_autotuner.stop()
+    with suppress(Exception):
+        await provider_clients.close()
+    with suppress(Exception):
+        password_hasher.shutdown()
+
     realtime_service = getattr(app.state, "realtime_service", None)
     if realtime_service is not None:
         with suppress(
@@ -317,10 +359,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-app.add_middleware(MetricsMiddleware)
-app.add_middleware(RequestLogMiddleware)
-# ✅ Codex fix: Register structured logging middleware
-app.add_middleware(LoggingMiddleware)
+# Request id, access log, métricas y límite global en una sola capa ASGI
+_http_rate_limit_hooks = []
+if Config.HTTP_RATE_LIMIT_TIMES > 0:
+    _http_rate_limit_hooks.append(
+        rate_limit(
+            times=Config.HTTP_RATE_LIMIT_TIMES,
+            seconds=Config.HTTP_RATE_LIMIT_SECONDS,
+            identifier="http_global",
+        )
+    )
+app.add_middleware(ObservabilityMiddleware, rate_limit_hooks=_http_rate_limit_hooks)
 
 # ✅ Codex fix: Enable global error handlers
 register_error_handlers(app)
@@ -381,9 +430,11 @@ async def alerts_websocket(
 ) -> None:
     """Canal WebSocket que transmite alertas en tiempo real."""
 
+    user_id = None
     if token and user_service is not None:
         try:
-            await asyncio.to_thread(user_service.get_current_user, token)
+            principal = await resolve_current_user(user_service, token)
+            user_id = getattr(principal, "id", None)
         except InvalidTokenError:
             await websocket.close(code=1008, reason="Token inválido")
             return
@@ -392,7 +443,7 @@ async def alerts_websocket(
             await websocket.close(code=1011, reason="Error autenticando usuario")
             return
 
-    await alerts_ws_manager.connect(websocket)
+    await alerts_ws_manager.connect(websocket, user_id=user_id)
     try:
         await websocket.send_json(
             {
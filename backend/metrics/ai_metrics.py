@@ -40,6 +40,29 @@ ai_cache_miss_total = Counter(
     ["model"],
 )
 
+# QA: latencia de operaciones de caché IA por backend (redis/memory)
+ai_cache_latency_seconds = Histogram(
+    "ai_cache_latency_seconds",
+    "Latencia de operaciones de caché IA",
+    ["operation", "backend"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+# QA: resultado de cada búsqueda en caché IA por ruta (hit_exact/hit_semantic/miss)
+ai_cache_lookups_total = Counter(
+    "ai_cache_lookups_total",
+    "Búsquedas en la caché IA por ruta y resultado",
+    ["route", "outcome"],
+)
+
+# QA: tiempo por fuente de contexto (prices/indicators/news/alerts/forex)
+ai_enrichment_duration_seconds = Histogram(
+    "ai_enrichment_duration_seconds",
+    "Duración de cada fuente de enriquecimiento IA",
+    ["source", "outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+)
+
 ai_stream_tokens_total = Counter(
     "ai_stream_tokens_total",
     "Tokens enviados por streaming",
@@ -50,6 +73,14 @@ ai_stream_duration_seconds = Histogram(
     "Duración del streaming IA",
 )
 
+# QA: tiempo hasta el primer token por proveedor (local = sin proveedor)
+ai_stream_first_token_seconds = Histogram(
+    "ai_stream_first_token_seconds",
+    "Tiempo hasta el primer token del streaming IA",
+    ["provider"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0),
+)
+
 ai_conversations_active_total = Gauge(
     "ai_conversations_active_total",
     "Conversaciones IA activas",
@@ -85,6 +116,29 @@ ai_adaptive_timeouts_total = Counter(
     "Timeouts adaptativos activados",
 )
 
+# QA: peticiones cubiertas (hedged) -> lanzamientos, ganadores y cancelaciones
+ai_hedged_requests_total = Counter(
+    "ai_hedged_requests_total",
+    "Peticiones IA cubiertas con un segundo proveedor (por resultado)",
+    ["provider", "outcome"],
+)
+ai_hedge_wasted_seconds = Histogram(
+    "ai_hedge_wasted_seconds",
+    "Tiempo consumido por la llamada perdedora antes de cancelarla",
+    ["provider"],
+)
+# QA: coste por proveedor de cada llamada en modo cubierto (primaria o cobertura)
+ai_hedge_provider_calls_total = Counter(
+    "ai_hedge_provider_calls_total",
+    "Llamadas a proveedores IA dentro de una petición cubierta",
+    ["provider", "role", "outcome"],
+)
+ai_hedge_provider_seconds_total = Counter(
+    "ai_hedge_provider_seconds_total",
+    "Segundos de proveedor consumidos por las llamadas de peticiones cubiertas",
+    ["provider", "role", "outcome"],
+)
+
 
 ai_insights_generated_total = Counter(
     "ai_insights_generated_total", "Número total de insights generados por IA"
@@ -96,6 +150,25 @@ ai_insight_failures_total = Counter(
     "ai_insight_failures_total",
     "Errores ocurridos durante la generación de insights IA",
 )
+# QA: regeneraciones del precálculo de insights por motivo (cold/stale/market_move)
+ai_insight_refresh_total = Counter(
+    "ai_insight_refresh_total",
+    "Insights IA regenerados por el planificador",
+    ["reason"],
+)
+ai_insight_served_total = Counter(
+    "ai_insight_served_total",
+    "Insights IA servidos por origen (store/generated)",
+    ["source"],
+)
+
+# QA: tamaño de los lotes de inferencia de sentimiento (micro-batching)
+ai_sentiment_batch_size = Histogram(
+    "ai_sentiment_batch_size",
+    "Textos por llamada de inferencia de sentimiento",
+    ["backend"],
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
 
 
 ai_notifications_total = Counter(
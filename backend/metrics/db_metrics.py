@@ -0,0 +1,111 @@
+"""Métricas Prometheus del pool de conexiones a la base de datos."""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# QA: conexiones prestadas ahora mismo por motor (sync / async)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Conexiones del pool actualmente en uso",
+    ["engine"],
+)
+
+db_pool_size = Gauge(
+    "db_pool_size",
+    "Tamaño configurado del pool de conexiones",
+    ["engine"],
+)
+
+db_pool_checkouts_total = Counter(
+    "db_pool_checkouts_total",
+    "Conexiones entregadas por el pool",
+    ["engine"],
+)
+
+# QA: espera hasta obtener conexión (incluye pre-ping y conexiones nuevas)
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Latencia de checkout de conexiones del pool",
+    ["engine"],
+    buckets=(
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+        30,
+    ),
+)
+
+db_pool_idle = Gauge(
+    "db_pool_idle",
+    "Conexiones abiertas y libres en el pool",
+    ["engine"],
+)
+
+db_pool_overflow = Gauge(
+    "db_pool_overflow",
+    "Conexiones abiertas por encima de pool_size",
+    ["engine"],
+)
+
+db_pool_timeouts_total = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts que agotaron pool_timeout",
+    ["engine"],
+)
+
+# QA: rotación de conexiones (connect / close / invalidate)
+db_pool_connection_events_total = Counter(
+    "db_pool_connection_events_total",
+    "Eventos de ciclo de vida de conexiones DBAPI",
+    ["engine", "event"],
+)
+
+db_pool_pre_ping_total = Counter(
+    "db_pool_pre_ping_total",
+    "Pre-pings de conexiones ociosas por resultado",
+    ["engine", "result"],
+)
+
+db_pool_recommended_size = Gauge(
+    "db_pool_recommended_size",
+    "pool_size sugerido por la concurrencia observada",
+    ["engine"],
+)
+
+# QA: mantenimiento de sesiones/refresh tokens caducados (SessionPruner)
+db_rows_pruned_total = Counter(
+    "db_rows_pruned_total",
+    "Filas caducadas eliminadas por el job de mantenimiento",
+    ["table"],
+)
+
+db_table_rows = Gauge(
+    "db_table_rows",
+    "Filas por tabla (estimación del planner en PostgreSQL)",
+    ["table"],
+)
+
+__all__ = [
+    "db_pool_checked_out",
+    "db_pool_checkout_seconds",
+    "db_pool_checkouts_total",
+    "db_pool_connection_events_total",
+    "db_pool_idle",
+    "db_pool_overflow",
+    "db_pool_pre_ping_total",
+    "db_pool_recommended_size",
+    "db_pool_size",
+    "db_pool_timeouts_total",
+    "db_rows_pruned_total",
+    "db_table_rows",
+]
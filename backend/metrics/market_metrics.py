@@ -0,0 +1,12 @@
+"""Métricas Prometheus para datos de mercado e indicadores técnicos."""
+
+from prometheus_client import Counter
+
+# QA: aciertos/fallos de la caché en proceso de velas e indicadores
+indicator_cache_lookups_total = Counter(
+    "indicator_cache_lookups_total",
+    "Consultas a la caché de indicadores por capa y resultado",
+    ["layer", "outcome"],
+)
+
+__all__ = ["indicator_cache_lookups_total"]
@@ -0,0 +1,30 @@
+"""Métricas Prometheus para la cola de notificaciones salientes."""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# QA: profundidad de la cola por canal (realtime, push, telegram)
+notification_outbox_depth = Gauge(
+    "notification_outbox_depth",
+    "Mensajes pendientes en la cola de notificaciones",
+    ["channel"],
+)
+
+# QA: tiempo entre el encolado y el inicio de la entrega
+notification_outbox_lag_seconds = Histogram(
+    "notification_outbox_lag_seconds",
+    "Retraso de la cola de notificaciones",
+    ["channel"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+notification_outbox_messages_total = Counter(
+    "notification_outbox_messages_total",
+    "Mensajes procesados por la cola de notificaciones",
+    ["channel", "outcome"],
+)
+
+__all__ = [
+    "notification_outbox_depth",
+    "notification_outbox_lag_seconds",
+    "notification_outbox_messages_total",
+]
@@ -0,0 +1,143 @@
+"""Single-pass ASGI middleware for request ids, access logs, metrics and limits.
+
+Replaces the former ``MetricsMiddleware``/``RequestLogMiddleware``/
+``LoggingMiddleware`` stack. Each of those was a ``BaseHTTPMiddleware`` (an
+extra task and body stream per layer), and two of them recorded latency and
+counters for the same request. This middleware wraps ``send`` once and, per
+HTTP request:
+
+* reuses a sane inbound ``X-Request-ID`` or generates one, exposes it as
+  ``request.state.request_id`` and echoes it in the response;
+* runs the optional rate limit hooks (any ``rate_limit()`` dependency) before
+  routing and answers 429 itself when one of them rejects the request;
+* emits one structured ``http_request`` log line;
+* observes ``http_requests_total`` and the request duration histogram labelled
+  with the route template (``/api/markets/history/{symbol}``) instead of the
+  raw path, so label cardinality is bounded by the number of routes.
+
+WebSocket and lifespan scopes pass through untouched.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from starlette.datastructures import MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core.metrics import REQUEST_COUNT, REQUEST_LATENCY
+from backend.metrics.ai_metrics import ai_requests_total
+
+RateLimitHook = Callable[[Request, Response], Awaitable[None]]
+
+# Etiqueta fija para 404: nunca usamos el path crudo como label.
+UNMATCHED_ROUTE = "unmatched"
+_MAX_REQUEST_ID_LENGTH = 128
+
+
+def route_template(scope: Scope) -> str:
+    """Return the path template of the route that handled ``scope``."""
+
+    route = scope.get("route")
+    path = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+def _inbound_request_id(scope: Scope) -> str | None:
+    for name, value in scope.get("headers") or ():
+        if name == b"x-request-id":
+            candidate = value.decode("latin-1").strip()
+            if 0 < len(candidate) <= _MAX_REQUEST_ID_LENGTH and candidate.isprintable():
+                return candidate
+            return None
+    return None
+
+
+class ObservabilityMiddleware:
+    """Pure ASGI replacement for the per-request logging/metrics stack."""
+
+    def __init__(
+        self, app: ASGIApp, *, rate_limit_hooks: Sequence[RateLimitHook] = ()
+    ) -> None:
+        self.app = app
+        self.rate_limit_hooks = tuple(rate_limit_hooks)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_id = _inbound_request_id(scope) or str(uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
+        try:
+            if self.rate_limit_hooks and await self._rate_limited(
+                scope, receive, send_wrapper
+            ):
+                return
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self._record(scope, status_code, time.perf_counter() - start, request_id)
+
+    async def _rate_limited(self, scope: Scope, receive: Receive, send: Send) -> bool:
+        request = Request(scope, receive)
+        response = Response()
+        try:
+            for hook in self.rate_limit_hooks:
+                await hook(request, response)
+        except HTTPException as exc:
+            if exc.status_code != 429:
+                raise
+            rejection = JSONResponse(
+                {"detail": exc.detail}, status_code=429, headers=exc.headers
+            )
+            await rejection(scope, receive, send)
+            return True
+        return False
+
+    @staticmethod
+    def _record(
+        scope: Scope, status_code: int, duration: float, request_id: str
+    ) -> None:
+        method = scope["method"]
+        route = route_template(scope)
+        REQUEST_LATENCY.labels(method=method, path=route).observe(duration)
+        REQUEST_COUNT.labels(method=method, path=route, status=str(status_code)).inc()
+        if route.startswith("/api/ai"):
+            outcome = "success" if 200 <= status_code < 400 else "error"
+            ai_requests_total.labels(outcome=outcome).inc()
+        logging.info(
+            json.dumps(
+                {
+                    "service": "backend",
+                    "event": "http_request",
+                    "method": method,
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "request_id": request_id,
+                    "timestamp": datetime.now(UTC).isoformat().replace("+00:00", "Z"),
+                }
+            )
+        )
+
+
+__all__ = ["ObservabilityMiddleware", "RateLimitHook", "route_template"]
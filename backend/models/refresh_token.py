@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, String, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, func
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import relationship
 
@@ -11,6 +11,10 @@ from backend.models.base import Base
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_expires", "user_id", "expires_at"),
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+    )
 
     # ✅ id ahora es UUID real en la DB
     id = Column(PGUUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
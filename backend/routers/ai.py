@@ -4,7 +4,6 @@
 
 from __future__ import annotations
 
-import asyncio
 import logging
 from datetime import datetime
 from typing import Annotated, Any
@@ -13,9 +12,15 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel, ConfigDict, Field, model_validator
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
 from backend.database import get_db
+from backend.services.chat_memory import (
+    fold_into_summary,
+    split_history,
+    window_history,
+)
 from backend.utils.config import Config
 
 from backend.models import (  # isort: skip
@@ -30,8 +35,13 @@ except ImportError:  # pragma: no cover
     from services.ai_service import AIResponsePayload, ai_service  # type: ignore
 
 try:  # pragma: no cover - optional when running without user_service
-    from backend.services.user_service import InvalidTokenError, user_service
+    from backend.services.user_service import (
+        InvalidTokenError,
+        resolve_current_user,
+        user_service,
+    )
 except Exception:  # pragma: no cover
+    resolve_current_user = None  # type: ignore[assignment]
     user_service = None  # type: ignore[assignment]
     InvalidTokenError = Exception  # type: ignore[assignment]
 
@@ -124,9 +134,7 @@ async def get_current_user(
     _ensure_user_service_available()
 
     try:
-        return await asyncio.to_thread(
-            user_service.get_current_user, credentials.credentials
-        )
+        return await resolve_current_user(user_service, credentials.credentials)
     except InvalidTokenError as exc:  # pragma: no cover - defensive
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)
@@ -154,28 +162,110 @@ def _fetch_session(
     return session
 
 
-def _load_history(db: Session, session: ChatSessionModel) -> list[ChatMessageModel]:
-    return (
-        db.query(ChatMessageModel)
-        .filter(ChatMessageModel.session_id == session.id)
-        .order_by(ChatMessageModel.created_at.asc())
+def _load_history(
+    db: Session, session: ChatSessionModel, *, limit: int | None = None
+) -> list[ChatMessageModel]:
+    """Messages of ``session`` oldest first; only the newest ``limit`` if given."""
+
+    query = db.query(ChatMessageModel).filter(ChatMessageModel.session_id == session.id)
+    if limit is None:
+        return query.order_by(
+            ChatMessageModel.created_at.asc(), ChatMessageModel.id.asc()
+        ).all()
+    # QA: usa ix_chat_messages_session_created y no crece con la sesión
+    recent = (
+        query.order_by(ChatMessageModel.created_at.desc(), ChatMessageModel.id.desc())
+        .limit(limit)
         .all()
     )
+    recent.reverse()
+    return recent
+
+
+def _summary_cursor(
+    db: Session, session: ChatSessionModel
+) -> tuple[datetime, UUID] | None:
+    if session.summarized_until_at is not None:
+        return session.summarized_until_at, session.summarized_until_id
+    summarized = session.summarized_count or 0
+    if not summarized:
+        return None
+    # Sesiones resumidas antes del cursor: se ubica una única vez por posición.
+    last = (
+        db.query(ChatMessageModel.created_at, ChatMessageModel.id)
+        .filter(ChatMessageModel.session_id == session.id)
+        .order_by(ChatMessageModel.created_at.asc(), ChatMessageModel.id.asc())
+        .offset(summarized - 1)
+        .first()
+    )
+    return (last[0], last[1]) if last is not None else None
+
+
+def _refresh_summary(
+    db: Session, session: ChatSessionModel, history: list[ChatMessageModel]
+) -> None:
+    """Fold every message the prompt leaves out into ``session.summary``.
+
+    That is everything older than ``history`` plus the messages of
+    ``history`` that the token budget drops. Reads resume after the
+    ``(created_at, id)`` of the last summarized message, so each request only
+    touches the messages that left the prompt since the previous one.
+    """
+
+    start, _ = split_history(history, token_budget=Config.AI_CHAT_HISTORY_TOKEN_BUDGET)
+    if start >= len(history):
+        return
+    boundary = history[start]
+    query = db.query(ChatMessageModel).filter(
+        ChatMessageModel.session_id == session.id,
+        or_(
+            ChatMessageModel.created_at < boundary.created_at,
+            and_(
+                ChatMessageModel.created_at == boundary.created_at,
+                ChatMessageModel.id < boundary.id,
+            ),
+        ),
+    )
+    cursor = _summary_cursor(db, session)
+    if cursor is not None:
+        query = query.filter(
+            or_(
+                ChatMessageModel.created_at > cursor[0],
+                and_(
+                    ChatMessageModel.created_at == cursor[0],
+                    ChatMessageModel.id > cursor[1],
+                ),
+            )
+        )
+    pending = query.order_by(
+        ChatMessageModel.created_at.asc(), ChatMessageModel.id.asc()
+    ).all()
+    if not pending:
+        return
+    session.summary = fold_into_summary(
+        session.summary,
+        pending,
+        token_budget=Config.AI_CHAT_SUMMARY_TOKEN_BUDGET,
+    )
+    session.summarized_count = (session.summarized_count or 0) + len(pending)
+    session.summarized_until_at = pending[-1].created_at
+    session.summarized_until_id = pending[-1].id
 
 
 def _prepare_context(
     base_context: dict[str, Any] | None,
     history: list[ChatMessageModel],
+    summary: str | None = None,
 ) -> dict[str, Any]:
     context: dict[str, Any] = dict(base_context or {})
-    serialized_history = [
-        {"role": message.role, "content": message.content}
-        for message in history
-        if message.content
-    ]
+    serialized_history = window_history(
+        history, token_budget=Config.AI_CHAT_HISTORY_TOKEN_BUDGET
+    )
     if serialized_history:
         existing_history = list(context.get("history") or [])
         context["history"] = serialized_history + existing_history
+    if summary:
+        context["history_summary"] = summary
     return context
 
 
@@ -208,8 +298,10 @@ async def chat_endpoint(
         )
 
     session = _fetch_session(db, current_user.id, payload.session_id)
-    history = _load_history(db, session)
-    context = _prepare_context(payload.context, history)
+    window = max(1, Config.AI_CHAT_HISTORY_MAX_MESSAGES)
+    history = _load_history(db, session, limit=window)
+    _refresh_summary(db, session, history)
+    context = _prepare_context(payload.context, history, session.summary)
 
     user_message = _persist_message(db, session, "user", prompt)
 
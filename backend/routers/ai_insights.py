@@ -4,10 +4,11 @@ from __future__ import annotations
 
 import json
 import logging
+from datetime import UTC, datetime
 
 from fastapi import APIRouter, HTTPException, Request, status
 
-from backend.services.ai_service import AIService
+from backend.services.insight_scheduler import InsightKey, insight_scheduler
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -33,25 +34,30 @@ async def generate_insights(request: Request, payload: dict):
             detail="El campo 'symbol' es requerido",
         )
 
-    ai = AIService()
-    result = await ai.generate_insight(
-        symbol=symbol, timeframe=timeframe, profile=profile
-    )
-
-    if isinstance(result, dict) and result.get("error"):
+    # QA: servimos desde el almacén versionado; sólo la primera petición genera
+    key = InsightKey(str(symbol), str(timeframe), str(profile))
+    try:
+        record = await insight_scheduler.get(key)
+    except Exception as exc:
         logger.error(
             json.dumps(
                 {
                     "ai_event": "insight_generation_failed",
                     "symbol": symbol,
-                    "error": result["error"],
+                    "error": str(exc),
                 }
             )
         )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=result["error"],
-        )
+            detail=str(exc),
+        ) from exc
+
+    result = {
+        **record.payload,
+        "version": record.version,
+        "generated_at": datetime.fromtimestamp(record.generated_at, UTC).isoformat(),
+    }
 
     correlation_id = getattr(request.state, "correlation_id", None)
     if correlation_id and isinstance(result, dict):
@@ -16,6 +16,11 @@ except ImportError:  # pragma: no cover
 router = APIRouter(tags=["AI"])
 
 
+def _sse_event(chunk: str) -> str:
+    # Los tokens reales pueden traer saltos de línea: una línea ``data:`` por cada uno.
+    return "".join(f"data: {line}\n" for line in chunk.split("\n")) + "\n"
+
+
 @router.post("/stream")
 async def stream_message(request: Request, payload: dict) -> StreamingResponse:
     """Stream AI generated responses using Server-Sent Events."""
@@ -26,7 +31,7 @@ async def stream_message(request: Request, payload: dict) -> StreamingResponse:
         stream = ai_service.stream_generate(message)
         try:
             async for chunk in stream:
-                yield f"data: {chunk}\n\n"
+                yield _sse_event(chunk)
                 if await request.is_disconnected():
                     break
         finally:
@@ -36,5 +41,10 @@ async def stream_message(request: Request, payload: dict) -> StreamingResponse:
     return StreamingResponse(
         stream_generator(),
         media_type="text/event-stream",
-        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            # Evita que proxies (nginx) acumulen tokens y retrasen el primero.
+            "X-Accel-Buffering": "no",
+        },
     )
@@ -23,11 +23,13 @@ try:  # pragma: no cover - fallback when user service is unavailable
     from backend.services.user_service import (  # type: ignore
         InvalidTokenError,
         UserNotFoundError,
+        resolve_current_user,
         user_service,
     )
 except Exception:  # pragma: no cover - tests may inject a stub
     InvalidTokenError = RuntimeError  # type: ignore[assignment]
     UserNotFoundError = RuntimeError  # type: ignore[assignment]
+    resolve_current_user = None  # type: ignore[assignment]
     user_service = None  # type: ignore[assignment]
 
 
@@ -202,7 +204,7 @@ async def get_current_user(
 
     token = credentials.credentials
     try:
-        return await asyncio.to_thread(user_service.get_current_user, token)
+        return await resolve_current_user(user_service, token)
     except InvalidTokenError as exc:  # pragma: no cover - explicit mapping
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
 
@@ -275,9 +277,7 @@ def _record_alert_rate_limit(request: Request, action: str) -> None:
 async def list_alerts(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> list[dict[str, Any]]:
-    alerts = await asyncio.to_thread(
-        alerts_service.list_alerts_for_user, current_user.id
-    )
+    alerts = await alerts_service.list_alerts_for_user_async(current_user.id)
     return [_serialize_alert(alert) for alert in alerts]
 
 
@@ -18,11 +18,13 @@ from pydantic import BaseModel, field_validator
 from sqlalchemy.orm import Session
 
 import backend.core.login_backoff as login_backoff_module
+from backend.core.auth_cache import auth_principal_cache
 from backend.core.logging_config import get_logger, log_event
 from backend.core.login_backoff import login_backoff
 from backend.core.metrics import LOGIN_ATTEMPTS, LOGIN_DURATION, LOGIN_RATE_LIMITED
 from backend.core.rate_limit import login_rate_limiter, rate_limit
 from backend.core.security import (
+    access_verifier,
     create_access_token,
     create_refresh_token,
     decode_refresh,
@@ -41,6 +43,7 @@ from backend.services.user_service import (
     InvalidTokenError,
     UserAlreadyExistsError,
     generate_mfa_secret,
+    resolve_current_user,
     user_service,
     verify_mfa_code,
 )
@@ -120,6 +123,26 @@ _refresh_rate_limit = rate_limit(
 )
 
 
+async def _create_user(email: str, password: str, risk_profile: str | None) -> Any:
+    # bcrypt fuera del event loop cuando el servicio lo soporta.
+    create_async = getattr(user_service, "create_user_async", None)
+    if create_async is not None:
+        return await create_async(email, password, risk_profile=risk_profile)
+    try:
+        return user_service.create_user(
+            email=email, password=password, risk_profile=risk_profile
+        )
+    except TypeError:  # [Codex] nuevo - compatibilidad con servicios dummy en tests
+        return user_service.create_user(email=email, password=password)
+
+
+async def _authenticate_user(email: str, password: str) -> Any:
+    authenticate_async = getattr(user_service, "authenticate_user_async", None)
+    if authenticate_async is not None:
+        return await authenticate_async(email, password)
+    return user_service.authenticate_user(email=email, password=password)
+
+
 EMAIL_REGEX = re.compile(r"^[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}$", re.IGNORECASE)
 
 
@@ -217,15 +240,8 @@ async def register(user_data: UserCreate):
         )
 
     try:
-        new_user = user_service.create_user(
-            email=user_data.email,
-            password=user_data.password,
-            risk_profile=user_data.risk_profile,
-        )
-    except TypeError:  # [Codex] nuevo - compatibilidad con servicios dummy en tests
-        new_user = user_service.create_user(
-            email=user_data.email,
-            password=user_data.password,
+        new_user = await _create_user(
+            user_data.email, user_data.password, user_data.risk_profile
         )
     except UserAlreadyExistsError as exc:  # pragma: no cover - tests cubren el éxito
         email_hash = hashlib.sha256(user_data.email.encode("utf-8")).hexdigest()[:8]
@@ -289,7 +305,22 @@ async def login(
             span.set_attribute("limited.ip", limited_ip)
             span.set_attribute("user.email_hash", email_hash)
 
-        cooldown_remaining = await login_backoff.cooldown_remaining_seconds(email_hash)
+        backoff_threshold = _LOGIN_BACKOFF_START_AFTER
+        windows = getattr(login_backoff_module, "BACKOFF_WINDOWS", None)
+        if windows:
+            try:
+                first_window = float(windows[0])
+            except (TypeError, ValueError):  # pragma: no cover - defensive casting
+                first_window = float(_LOGIN_BACKOFF_START_AFTER)
+            if first_window < 1:
+                backoff_threshold = max(1, backoff_threshold - 1)
+
+        # Una sola lectura atómica: cooldown, espera y fallos (con reinicio si
+        # la ventana anterior ya se cumplió).
+        backoff_state = await login_backoff.check(
+            email_hash, reset_after=backoff_threshold
+        )
+        cooldown_remaining = backoff_state.cooldown_seconds
         if cooldown_remaining > 0:
             outcome = "locked"
             duration = time.perf_counter() - start
@@ -313,21 +344,8 @@ async def login(
                 headers={"Retry-After": str(cooldown_remaining)},
             )
 
-        backoff_threshold = _LOGIN_BACKOFF_START_AFTER
-        windows = getattr(login_backoff_module, "BACKOFF_WINDOWS", None)
-        if windows:
-            try:
-                first_window = float(windows[0])
-            except (TypeError, ValueError):  # pragma: no cover - defensive casting
-                first_window = float(_LOGIN_BACKOFF_START_AFTER)
-            if first_window < 1:
-                backoff_threshold = max(1, backoff_threshold - 1)
-
-        failure_count = await login_backoff.failure_count(email_hash)
-        wait_seconds = await login_backoff.required_wait_seconds(email_hash)
-        if wait_seconds == 0 and failure_count >= backoff_threshold:
-            await login_backoff.clear(email_hash)
-            failure_count = 0
+        failure_count = backoff_state.failures
+        wait_seconds = backoff_state.wait_seconds
 
         if Config.ENABLE_CAPTCHA_ON_LOGIN:
             captcha_required = failure_count >= Config.LOGIN_CAPTCHA_THRESHOLD
@@ -378,36 +396,26 @@ async def login(
             )
 
         try:
-            user = user_service.authenticate_user(
-                email=credentials.email,
-                password=credentials.password,
-            )
+            user = await _authenticate_user(credentials.email, credentials.password)
         except InvalidCredentialsError as exc:
-            backoff_seconds = await login_backoff.register_failure(
+            failure_state = await login_backoff.record_failure(
                 email_hash,
                 start_after=backoff_threshold,
+                soft_lock_threshold=_SOFT_LOCK_THRESHOLD,
+                cooldown_seconds=_SOFT_LOCK_COOLDOWN,
             )
-            soft_lock_triggered = False
-            if _SOFT_LOCK_THRESHOLD > 0:
-                failures = await login_backoff.failure_count(email_hash)
-                if failures >= _SOFT_LOCK_THRESHOLD:
-                    cooldown_seconds = _SOFT_LOCK_COOLDOWN
-                    if cooldown_seconds > 0:
-                        soft_lock_triggered = await login_backoff.activate_cooldown(
-                            email_hash,
-                            cooldown_seconds,
-                        )
-                        if soft_lock_triggered:
-                            if span is not None:
-                                span.set_attribute("soft_lock", True)
-                            log_event(
-                                logger,
-                                service="auth_router",
-                                event="account_soft_lock",
-                                level="warning",
-                                email_hash=email_hash,
-                                cooldown_sec=cooldown_seconds,
-                            )
+            backoff_seconds = failure_state.backoff_seconds
+            if failure_state.cooldown_activated:
+                if span is not None:
+                    span.set_attribute("soft_lock", True)
+                log_event(
+                    logger,
+                    service="auth_router",
+                    event="account_soft_lock",
+                    level="warning",
+                    email_hash=email_hash,
+                    cooldown_sec=_SOFT_LOCK_COOLDOWN,
+                )
             duration = time.perf_counter() - start
             limiter_response = Response()
             try:
@@ -436,7 +444,7 @@ async def login(
                 if span is not None:
                     span.set_attribute("outcome", outcome)
                     span.set_attribute("limited.ip", limited_ip)
-                retry_after = await login_backoff.required_wait_seconds(email_hash)
+                retry_after = failure_state.wait_seconds
                 log_event(
                     logger,
                     service="auth_router",
@@ -517,7 +525,8 @@ async def login(
         access_token = create_access_token(sub=sub, extra={"jti": str(uuid4())})
         access_expires = datetime.now(UTC) + timedelta(minutes=15)
         user_service.register_external_session(user.id, access_token, access_expires)
-        await login_backoff.clear(email_hash)
+        if failure_count:
+            await login_backoff.clear(email_hash)
 
         duration = time.perf_counter() - start
         LOGIN_DURATION.observe(duration)
@@ -580,6 +589,7 @@ def refresh_token(
 
         db.delete(db_token)
         db.commit()
+        auth_principal_cache.invalidate_user(sub_uuid)
 
         new_refresh = create_refresh_token(sub=sub, jti=str(uuid4()))
         refresh_payload = decode_refresh(new_refresh)
@@ -670,6 +680,7 @@ def logout(
             db.commit()
         else:
             user_service.revoke_all_refresh_tokens(sub_uuid)
+        auth_principal_cache.invalidate_user(sub_uuid)
         AuditService.log_event(user_id_for_audit, "logout")
         return {"detail": "All sessions revoked"}
 
@@ -681,6 +692,8 @@ def logout(
         db.commit()
     else:
         user_service.revoke_refresh_token(req.refresh_token)
+    if user_id_for_audit:
+        auth_principal_cache.invalidate_user(user_id_for_audit)
 
     AuditService.log_event(user_id_for_audit, "logout")
     return {"detail": "Session revoked"}
@@ -709,6 +722,7 @@ def setup_mfa(
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    auth_principal_cache.invalidate_user(db_user.id)
 
     issuer = getattr(Config, "MFA_ISSUER", "BullBearBroker")
     otpauth_url = TOTP(secret).provisioning_uri(name=user.email, issuer_name=issuer)
@@ -744,6 +758,7 @@ def verify_mfa(
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    auth_principal_cache.invalidate_user(db_user.id)
 
     return {"detail": "MFA enabled"}
 
@@ -763,12 +778,19 @@ def logout_all(
     return {"detail": "All sessions revoked"}
 
 
+@router.get("/jwks.json")
+async def jwks() -> dict[str, list[dict[str, Any]]]:
+    """Public keys for verifying access tokens without the shared secret."""
+
+    return access_verifier.public_jwks()
+
+
 @router.get("/me")
 async def get_current_user(
     token: Annotated[HTTPAuthorizationCredentials, Depends(security)],
 ):
     try:
-        user = user_service.get_current_user(token.credentials)
+        user = await resolve_current_user(user_service, token.credentials)
         user_service.register_session_activity(token.credentials)
         return {
             "id": str(user.id),
@@ -10,7 +10,7 @@ from sqlalchemy import text
 from backend import database as database_module
 from backend.core.logging_config import get_logger, log_event
 from backend.core.rate_limit import rate_limit
-from backend.database import get_database_diagnostics
+from backend.database import get_database_diagnostics, get_pool_status
 from backend.services.push_service import push_service
 
 # No necesitamos poner prefix aquí, ya lo maneja main.py
@@ -140,6 +140,10 @@ async def _check_database() -> dict[str, Any]:
             "details": diagnostic_payload,
         }
 
+    try:
+        enriched["pool_stats"] = get_pool_status()
+    except Exception as exc:  # pragma: no cover - defensive
+        enriched["pool_stats"] = {"error": str(exc)[:200]}
     return {"status": "ok", "details": enriched}
 
 
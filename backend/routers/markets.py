@@ -11,13 +11,11 @@ from typing import Any
 from fastapi import APIRouter, HTTPException, Query
 
 from backend.core.logging_config import get_logger, log_event
-from backend.services.timeseries_service import get_closes
+from backend.services.market_indicators_service import (
+    IndicatorRequest,
+    indicator_service,
+)
 from backend.utils.config import Config
-from backend.utils.indicators import average_true_range  # [Codex] nuevo
-from backend.utils.indicators import ichimoku_cloud  # [Codex] nuevo
-from backend.utils.indicators import stochastic_rsi  # [Codex] nuevo
-from backend.utils.indicators import volume_weighted_average_price  # [Codex] nuevo
-from backend.utils.indicators import bollinger, ema, macd, rsi
 
 try:  # pragma: no cover - allow running from different entrypoints
     from services.forex_service import forex_service
@@ -356,114 +354,40 @@ async def get_indicators(
     """
     Devuelve indicadores técnicos calculados sobre series históricas.
     """
-    try:
-        closes, meta = await get_closes(type, symbol, interval, limit)
-    except Exception as err:
-        raise HTTPException(status_code=400, detail=str(err)) from err
-
-    if not closes or len(closes) < 30:
-        raise HTTPException(
-            status_code=400,
-            detail="No hay suficientes datos para calcular indicadores",
-        )
-
-    indicators: dict[str, Any] = {"last_close": closes[-1]}
-
-    highs = meta.get("highs") or []  # [Codex] nuevo
-    lows = meta.get("lows") or []  # [Codex] nuevo
-    volumes = meta.get("volumes") or []  # [Codex] nuevo
-
-    rsi_val = rsi(closes, rsi_period)
-    if rsi_val is not None:
-        indicators["rsi"] = {"period": rsi_period, "value": rsi_val}
-
     # Múltiples EMAs
     try:
         periods = [int(x.strip()) for x in ema_periods.split(",") if x.strip()]
     except Exception:
         periods = [20, 50]
-    ema_list = []
-    for p in periods:
-        val = ema(closes, p)
-        if val is not None:
-            ema_list.append({"period": p, "value": val})
-    if ema_list:
-        indicators["ema"] = ema_list
-
-    macd_obj = macd(closes, fast=macd_fast, slow=macd_slow, signal=macd_signal)
-    if macd_obj:
-        indicators["macd"] = {
-            "fast": macd_fast,
-            "slow": macd_slow,
-            "signal": macd_signal,
-            **macd_obj,
-        }
-
-    bb_obj = bollinger(closes, period=bb_period, mult=bb_mult)
-    if bb_obj:
-        indicators["bollinger"] = {
-            "period": bb_period,
-            "mult": bb_mult,
-            **bb_obj,
-        }
-
-    if include_atr:
-        atr_val = average_true_range(highs, lows, closes, period=atr_period)
-        if atr_val is not None:
-            indicators["atr"] = {
-                "period": atr_period,
-                "value": atr_val,
-            }  # [Codex] nuevo
-
-    if include_stoch_rsi:
-        stoch_val = stochastic_rsi(
-            closes,
-            period=stoch_rsi_period,
-            smooth_k=stoch_rsi_k,
-            smooth_d=stoch_rsi_d,
-        )
-        if stoch_val:
-            indicators["stochastic_rsi"] = {
-                "period": stoch_rsi_period,
-                "smooth_k": stoch_rsi_k,
-                "smooth_d": stoch_rsi_d,
-                **stoch_val,
-            }  # [Codex] nuevo
-
-    if include_ichimoku:
-        ichimoku_vals = ichimoku_cloud(
-            highs,
-            lows,
-            closes,
-            conversion_period=ichimoku_conversion,
-            base_period=ichimoku_base,
-            span_b_period=ichimoku_span_b,
-        )
-        if ichimoku_vals:
-            indicators["ichimoku"] = {
-                "conversion": ichimoku_conversion,
-                "base": ichimoku_base,
-                "span_b": ichimoku_span_b,
-                **ichimoku_vals,
-            }  # [Codex] nuevo
-
-    if include_vwap:
-        vwap_val = volume_weighted_average_price(highs, lows, closes, volumes)
-        if vwap_val is not None:
-            indicators["vwap"] = {"value": vwap_val}  # [Codex] nuevo
 
-    return {
-        "symbol": symbol.upper(),
-        "type": type.lower(),
-        "interval": interval.lower(),
-        "count": len(closes),
-        "source": meta.get("source"),
-        "note": meta.get("note"),
-        "indicators": indicators,
-        "series": {
-            "closes": closes,  # [Codex] nuevo
-            "highs": highs,
-            "lows": lows,
-            "volumes": volumes,
-        },
-    }
+    request = IndicatorRequest(
+        asset_type=type,
+        symbol=symbol,
+        interval=interval,
+        limit=limit,
+        rsi_period=rsi_period,
+        ema_periods=tuple(periods),
+        macd_fast=macd_fast,
+        macd_slow=macd_slow,
+        macd_signal=macd_signal,
+        bb_period=bb_period,
+        bb_mult=bb_mult,
+        include_atr=include_atr,
+        atr_period=atr_period,
+        include_stoch_rsi=include_stoch_rsi,
+        stoch_rsi_period=stoch_rsi_period,
+        stoch_rsi_k=stoch_rsi_k,
+        stoch_rsi_d=stoch_rsi_d,
+        include_ichimoku=include_ichimoku,
+        ichimoku_conversion=ichimoku_conversion,
+        ichimoku_base=ichimoku_base,
+        ichimoku_span_b=ichimoku_span_b,
+        include_vwap=include_vwap,
+    )
+    # QA: misma caché de velas/indicadores que usa el enriquecimiento de la IA
+    try:
+        bundle = await indicator_service.get_bundle(request)
+    except Exception as err:
+        raise HTTPException(status_code=400, detail=str(err)) from err
+
+    return bundle.to_dict()
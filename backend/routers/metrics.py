@@ -3,21 +3,12 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Response
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
-
-# ✅ Codex fix: Define global Prometheus metrics used across the backend
-http_requests_total = Counter(
-    "http_requests_total",
-    "Total HTTP requests",
-    ["method", "path", "status"],
-)
-
-# ✅ Codex fix: Track request latency distribution per path
-request_latency_seconds = Histogram(
-    "request_latency_seconds",
-    "Request latency",
-    ["path"],
-)
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from backend.core.metrics import REQUEST_COUNT
+
+# Alias histórico: el contador lo alimenta ObservabilityMiddleware.
+http_requests_total = REQUEST_COUNT
 
 router = APIRouter()
 
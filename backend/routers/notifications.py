@@ -75,9 +75,9 @@ def send_global_test_notification() -> dict[str, int]:
     Envía una notificación de prueba global a todos los suscriptores push registrados.
     Conserva compatibilidad con el flujo previo de validación.
     """
-    subscriptions = push_service.get_all_subscriptions()
     payload = {"title": "BullBearBroker Test", "body": "Prueba de notificación global"}
-    sent = push_service.broadcast_to_subscriptions(subscriptions, payload)
+    # QA: broadcast recorre las suscripciones paginadas en lugar de cargar la tabla
+    sent = push_service.broadcast(payload)
     return {"sent": sent}
 
 
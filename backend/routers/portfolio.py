@@ -19,10 +19,10 @@ from backend.schemas.portfolio import (
 from backend.services.portfolio_service import (
     add_position,
     create_portfolio,
-    get_portfolio_owned,
+    get_portfolio_owned_async,
     get_position_owned,
     get_returns_series,
-    list_portfolios,
+    list_portfolios_async,
     metrics,
     remove_position,
     risk_metrics,
@@ -96,7 +96,7 @@ async def create_portfolio_endpoint(
 async def list_portfolios_endpoint(
     current_user: Annotated[Any, Depends(get_current_user)],
 ) -> list[PortfolioOut]:
-    portfolios = await asyncio.to_thread(list_portfolios, current_user.id)
+    portfolios = await list_portfolios_async(current_user.id)
     return [
         _portfolio_to_out(
             portfolio,
@@ -115,9 +115,7 @@ async def get_portfolio_endpoint(
     current_user: Annotated[Any, Depends(get_current_user)],
 ) -> PortfolioOut:
     try:
-        portfolio = await asyncio.to_thread(
-            get_portfolio_owned, current_user.id, portfolio_id
-        )
+        portfolio = await get_portfolio_owned_async(current_user.id, portfolio_id)
     except ValueError as exc:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
 
@@ -146,7 +144,7 @@ async def add_position_endpoint(
     current_user: Annotated[Any, Depends(get_current_user)],
 ) -> PositionOut:
     try:
-        await asyncio.to_thread(get_portfolio_owned, current_user.id, portfolio_id)
+        await get_portfolio_owned_async(current_user.id, portfolio_id)
     except ValueError as exc:
         raise HTTPException(status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
 
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import asyncio
 from datetime import datetime
 from typing import Annotated
 from uuid import UUID
@@ -19,8 +18,13 @@ from backend.services.audit_service import AuditService
 from backend.services.push_service import endpoint_fingerprint, push_service
 
 try:  # pragma: no cover - optional when running tests without user_service
-    from backend.services.user_service import InvalidTokenError, user_service
+    from backend.services.user_service import (
+        InvalidTokenError,
+        resolve_current_user,
+        user_service,
+    )
 except Exception:  # pragma: no cover - fallback when user_service is unavailable
+    resolve_current_user = None  # type: ignore[assignment]
     user_service = None  # type: ignore[assignment]
     InvalidTokenError = Exception  # type: ignore[assignment]
 
@@ -93,9 +97,7 @@ async def get_current_user(
         )
 
     try:
-        return await asyncio.to_thread(
-            user_service.get_current_user, credentials.credentials
-        )
+        return await resolve_current_user(user_service, credentials.credentials)
     except InvalidTokenError as exc:  # pragma: no cover - defensive
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)
@@ -13,7 +13,12 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from backend.core.logging_config import get_logger, log_event
 from backend.metrics.realtime_metrics import ws_errors_total, ws_messages_sent_total
-from backend.services.ai_service import ai_service
+from backend.services.insight_scheduler import (
+    MARKET_INSIGHT_KEY,
+    InsightKey,
+    InsightRecord,
+    insight_scheduler,
+)
 from backend.services.realtime_service import RealtimeService
 
 router = APIRouter()
@@ -49,7 +54,8 @@ async def _price_broadcast_loop(app) -> None:
                 "price": round(random.uniform(80.0, 120.0), 2),
                 "timestamp": datetime.now(UTC).isoformat(),
             }
-            await service.broadcast(payload)
+            # QA: conflación por símbolo; sólo viaja el último valor de cada tick
+            await service.publish("price", payload["symbol"], payload)
         except (
             asyncio.CancelledError
         ):  # pragma: no cover - cancelación durante shutdown
@@ -67,28 +73,63 @@ async def _price_broadcast_loop(app) -> None:
             )
 
 
+def _insight_stream_id(version: int) -> str:
+    # Enlaza los "insight_chunk" con el "insight" final de la misma versión.
+    return f"{MARKET_INSIGHT_KEY.symbol.lower()}-{version}"
+
+
+def _insight_message(record: InsightRecord) -> dict[str, Any]:
+    return {
+        "type": "insight",  # ✅ Codex fix: difusión de insights IA
+        "stream_id": _insight_stream_id(record.version),
+        "content": str(record.payload.get("insight", "")),
+        "version": record.version,
+        "timestamp": datetime.fromtimestamp(record.generated_at, UTC).isoformat(),
+    }
+
+
 async def _insights_broadcast_loop(app) -> None:
     service: RealtimeService = app.state.realtime_service
+
+    async def _forward_token(key: InsightKey, token_version: int, token: str) -> None:
+        if key != MARKET_INSIGHT_KEY:
+            return
+        if getattr(app.state, "realtime_insights_subscribers", 0) <= 0:
+            return
+        # QA: reenviamos cada token en cuanto llega del proveedor
+        await service.broadcast(
+            {
+                "type": "insight_chunk",
+                "stream_id": _insight_stream_id(token_version),
+                "version": token_version,
+                "content": token,
+            }
+        )
+
+    insight_scheduler.add_token_listener(_forward_token)
+    try:
+        await _broadcast_insight_versions(app, service)
+    finally:
+        insight_scheduler.remove_token_listener(_forward_token)
+
+
+async def _broadcast_insight_versions(app, service: RealtimeService) -> None:
+    version = 0
     while True:
         try:
             if getattr(app.state, "realtime_insights_subscribers", 0) <= 0:
                 await asyncio.sleep(0.5)
                 continue
 
-            insight_chunks: list[str] = []
-            async for chunk in ai_service.stream_generate(
-                "Genera un insight breve del mercado actual"
-            ):
-                insight_chunks.append(chunk)
-
-            if insight_chunks:
-                message = {
-                    "type": "insight",  # ✅ Codex fix: difusión de insights IA
-                    "content": "".join(insight_chunks).strip(),
-                    "timestamp": datetime.now(UTC).isoformat(),
-                }
-                await service.broadcast(message)
-            await asyncio.sleep(1)
+            # QA: el insight lo precalcula el planificador según el mercado; aquí
+            # sólo difundimos cada versión nueva en lugar de regenerarlo cada segundo
+            record = await insight_scheduler.next_version(
+                MARKET_INSIGHT_KEY, after=version, timeout=5.0
+            )
+            if record is None:
+                continue
+            version = record.version
+            await service.broadcast(_insight_message(record))
         except (
             asyncio.CancelledError
         ):  # pragma: no cover - cancelación durante shutdown
@@ -132,14 +173,18 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
     app = websocket.app
     _ensure_state_defaults(app)
     realtime_service: RealtimeService = app.state.realtime_service
+    # QA: ?format=compact activa frames por lotes con deltas numéricos
+    compact = websocket.query_params.get("format") == "compact"
 
-    await realtime_service.register(websocket)
+    await realtime_service.register(websocket, compact=compact)
     await _ensure_price_task(app)
 
     initial_message = {
         "status": "connected",  # ✅ Codex fix: saludo inicial con timestamp ISO
         "timestamp": datetime.now(UTC).isoformat(),
     }
+    if compact:
+        initial_message["format"] = "compact"
     await websocket.send_json(initial_message)
     ws_messages_sent_total.inc()  # ✅ Codex fix: contabilizar saludo inicial enviado
 
@@ -168,6 +213,15 @@ async def websocket_endpoint(websocket: WebSocket) -> None:
                     response = {"status": "subscribed", "channel": channel}
                     await websocket.send_json(response)
                     ws_messages_sent_total.inc()
+                    latest = (
+                        insight_scheduler.latest(MARKET_INSIGHT_KEY)
+                        if channel == "insights"
+                        else None
+                    )
+                    if latest is not None:
+                        # El último insight ya calculado llega sin esperar al siguiente
+                        await websocket.send_json(_insight_message(latest))
+                        ws_messages_sent_total.inc()
                 else:
                     await websocket.send_json({"error": "invalid_channel"})
                     ws_messages_sent_total.inc()
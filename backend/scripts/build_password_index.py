@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Compile a breached-password dataset into a memory-mappable index.
+
+Reads a text dataset (plain passwords or SHA-1 hashes such as the HIBP
+``HASH:count`` dumps, one per line) and writes the sorted prefix + Bloom
+filter file read by :class:`backend.services.password_index.PasswordIndex`.
+Point ``PASSWORD_BREACH_DATASET_PATH`` at the output to use it.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/build_password_index.py \
+        pwned-passwords-sha1.txt backend/data/compromised_passwords.idx
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+
+from backend.services.password_index import (
+    DEFAULT_BITS_PER_ENTRY,
+    DEFAULT_BLOOM_K,
+    DEFAULT_WIDTH,
+    build_index,
+    dataset_digests,
+)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dataset", help="fichero de texto de origen")
+    parser.add_argument("output", help="índice compilado de destino")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH)
+    parser.add_argument("--bits-per-entry", type=int, default=DEFAULT_BITS_PER_ENTRY)
+    parser.add_argument("--bloom-k", type=int, default=DEFAULT_BLOOM_K)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    with open(options.dataset, encoding="utf-8", errors="replace") as handle:
+        count = build_index(
+            dataset_digests(handle),
+            options.output,
+            width=options.width,
+            bits_per_entry=options.bits_per_entry,
+            bloom_k=options.bloom_k,
+        )
+    print(
+        json.dumps(
+            {
+                "output": options.output,
+                "entries": count,
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""Event-loop lag benchmark for password verification during login bursts.
+
+Runs ``--logins`` concurrent bcrypt verifications through
+:class:`backend.core.password_hashing.PasswordHasher` in each requested mode
+(``inline`` reproduces the old behaviour of verifying inside the handler)
+while a probe coroutine measures how late the event loop wakes it up. Prints
+verification throughput and loop-lag percentiles per mode.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/login_benchmark.py --logins 50 \
+        --modes inline,thread,process --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any
+
+DEFAULT_MODES = "inline,thread,process"
+MODES = ("inline", "thread", "process")
+
+
+def _percentile(samples: list[float], fraction: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def parse_modes(raw: str) -> list[str]:
+    """Parse a comma separated list of executor modes, keeping order."""
+
+    modes: list[str] = []
+    for chunk in raw.split(","):
+        name = chunk.strip().lower()
+        if name in MODES and name not in modes:
+            modes.append(name)
+    if not modes:
+        raise ValueError(f"no valid modes in {raw!r}; expected {', '.join(MODES)}")
+    return modes
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> list[float]:
+    """Sample how late ``asyncio.sleep(interval)`` returns until ``stop``."""
+
+    lags: list[float] = []
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(loop.time() - expected, 0.0))
+    return lags
+
+
+def summarize(lags: list[float], elapsed: float, logins: int) -> dict[str, Any]:
+    def _ms(value: float | None) -> float | None:
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "logins": logins,
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(logins / elapsed, 1) if elapsed > 0 else None,
+        "lag_p50_ms": _ms(_percentile(lags, 0.50)),
+        "lag_p99_ms": _ms(_percentile(lags, 0.99)),
+        "lag_max_ms": _ms(max(lags) if lags else None),
+    }
+
+
+async def run_mode(
+    mode: str, password_hash: str, *, logins: int, workers: int | None
+) -> dict[str, Any]:
+    from backend.core.password_hashing import PasswordHasher
+
+    hasher = PasswordHasher(mode=mode, workers=workers)
+    try:
+        # Calienta el pool (arranque de procesos spawn) fuera de la medición.
+        await hasher.verify("benchmark-password", password_hash)
+        stop = asyncio.Event()
+        probe = asyncio.create_task(measure_loop_lag(stop))
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(hasher.verify("benchmark-password", password_hash) for _ in range(logins))
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        lags = await probe
+    finally:
+        hasher.shutdown()
+    if not all(results):
+        raise RuntimeError(f"verification failed in mode {mode}")
+    return {"mode": mode, **summarize(lags, elapsed, logins)}
+
+
+async def run_benchmark(options: argparse.Namespace) -> dict[str, Any]:
+    from backend.utils.config import password_context
+
+    password_hash = password_context.hash("benchmark-password")
+    reports = []
+    for mode in parse_modes(options.modes):
+        reports.append(
+            await run_mode(
+                mode, password_hash, logins=options.logins, workers=options.workers
+            )
+        )
+    return {"scheme": password_context.identify(password_hash), "modes": reports}
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(f"scheme={report['scheme']}")
+    header = ("mode", "logins", "elapsed_s", "logins/s", "lag_p50", "lag_p99", "max")
+    print("{:<10}{:>8}{:>11}{:>10}{:>10}{:>10}{:>10}".format(*header))
+    for summary in report["modes"]:
+        print(
+            "{:<10}{:>8}{:>11}{:>10}{:>10}{:>10}{:>10}".format(
+                summary["mode"],
+                summary["logins"],
+                summary["elapsed_s"],
+                str(summary["logins_per_s"]),
+                str(summary["lag_p50_ms"]),
+                str(summary["lag_p99_ms"]),
+                str(summary["lag_max_ms"]),
+            )
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--modes", default=DEFAULT_MODES)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="imprime el reporte JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    report = asyncio.run(run_benchmark(options))
+    if options.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
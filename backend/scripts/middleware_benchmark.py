@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""Throughput of the HTTP observability middleware, before and after.
+
+Builds a tiny FastAPI app with a ``/api/markets/history/{symbol}`` route and
+drives it in-process (raw ASGI calls, no sockets or HTTP client) through:
+
+* ``legacy``: three ``BaseHTTPMiddleware`` layers doing what the former
+  ``MetricsMiddleware``, ``RequestLogMiddleware`` and ``LoggingMiddleware``
+  did (raw-path labels, duplicated latency/counters, two log calls);
+* ``asgi``: :class:`backend.middleware.observability.ObservabilityMiddleware`.
+
+Logging stays at WARNING, so the numbers measure middleware overhead rather
+than log I/O.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/middleware_benchmark.py --requests 5000 \
+        --concurrency 50 --stacks legacy,asgi
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import Any
+
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+STACKS = ("legacy", "asgi")
+DEFAULT_STACKS = "legacy,asgi"
+
+
+def parse_stacks(raw: str) -> list[str]:
+    """Parse a comma separated list of middleware stacks, keeping order."""
+
+    stacks: list[str] = []
+    for chunk in raw.split(","):
+        name = chunk.strip().lower()
+        if name in STACKS and name not in stacks:
+            stacks.append(name)
+    if not stacks:
+        raise ValueError(f"no valid stacks in {raw!r}; expected {', '.join(STACKS)}")
+    return stacks
+
+
+def _legacy_layers(registry: CollectorRegistry) -> list[type]:
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    count = Counter(
+        "legacy_requests", "", ["method", "path", "status"], registry=registry
+    )
+    latency = Histogram("legacy_latency", "", ["method", "path"], registry=registry)
+    count_dup = Counter(
+        "legacy_http", "", ["method", "path", "status"], registry=registry
+    )
+    latency_dup = Histogram("legacy_latency_path", "", ["path"], registry=registry)
+
+    class Metrics(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):  # noqa: ANN001, ANN201
+            start = time.perf_counter()
+            response = await call_next(request)
+            path = request.url.path
+            latency.labels(request.method, path).observe(time.perf_counter() - start)
+            count.labels(request.method, path, str(response.status_code)).inc()
+            return response
+
+    class RequestLog(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):  # noqa: ANN001, ANN201
+            start = time.perf_counter()
+            response = await call_next(request)
+            response.headers["X-Request-ID"] = "legacy"
+            logging.info("http_request %s", time.perf_counter() - start)
+            return response
+
+    class Logging(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):  # noqa: ANN001, ANN201
+            start = time.monotonic()
+            response = await call_next(request)
+            path = request.url.path
+            latency_dup.labels(path).observe(time.monotonic() - start)
+            count_dup.labels(request.method, path, str(response.status_code)).inc()
+            logging.info(json.dumps({"event": "http_request", "path": path}))
+            return response
+
+    return [Metrics, RequestLog, Logging]
+
+
+def build_app(stack: str) -> Any:
+    from fastapi import FastAPI
+
+    from backend.middleware import observability
+
+    app = FastAPI()
+
+    @app.get("/api/markets/history/{symbol}")
+    async def history(symbol: str) -> dict[str, str]:
+        return {"symbol": symbol}
+
+    if stack == "legacy":
+        for layer in _legacy_layers(CollectorRegistry()):
+            app.add_middleware(layer)
+    else:
+        app.add_middleware(observability.ObservabilityMiddleware)
+    return app
+
+
+async def _request(app: Any, symbol: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/api/markets/history/{symbol}",
+        "raw_path": f"/api/markets/history/{symbol}".encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 5000),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def drive(app: Any, *, requests: int, concurrency: int) -> dict[str, Any]:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    statuses: list[int] = []
+
+    async def _one(index: int) -> None:
+        async with semaphore:
+            statuses.append(await _request(app, f"SYM{index % 500}"))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "ok": sum(1 for status in statuses if status == 200),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(requests / elapsed, 1) if elapsed > 0 else None,
+        "us_per_request": round(elapsed / requests * 1e6, 1) if requests else None,
+    }
+
+
+async def run_benchmark(options: argparse.Namespace) -> dict[str, Any]:
+    logging.getLogger().setLevel(logging.WARNING)
+    reports = []
+    for stack in parse_stacks(options.stacks):
+        app = build_app(stack)
+        # Calentamiento: compila rutas y crea los hijos de las métricas.
+        await drive(app, requests=200, concurrency=options.concurrency)
+        summary = await drive(
+            app, requests=options.requests, concurrency=options.concurrency
+        )
+        reports.append({"stack": stack, **summary})
+    return {"concurrency": options.concurrency, "stacks": reports}
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(f"concurrency={report['concurrency']}")
+    header = ("stack", "requests", "ok", "elapsed_s", "req/s", "us/req")
+    print("{:<8}{:>10}{:>8}{:>11}{:>11}{:>10}".format(*header))
+    for summary in report["stacks"]:
+        print(
+            "{:<8}{:>10}{:>8}{:>11}{:>11}{:>10}".format(
+                summary["stack"],
+                summary["requests"],
+                summary["ok"],
+                summary["elapsed_s"],
+                str(summary["requests_per_s"]),
+                str(summary["us_per_request"]),
+            )
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--stacks", default=DEFAULT_STACKS)
+    parser.add_argument("--json", action="store_true", help="imprime el reporte JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    report = asyncio.run(run_benchmark(options))
+    if options.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
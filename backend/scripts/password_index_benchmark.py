@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+"""Memory and latency benchmark for the breached-password lookup backends.
+
+Generates ``--entries`` synthetic HIBP-style ``SHA1:count`` lines, then loads
+them through :class:`backend.services.password_guard.PasswordBreachDetector`
+both as the text file (Python sets) and as a compiled index (``mmap`` +
+Bloom filter). Prints load time, resident-set growth and lookup latency
+percentiles for breached (hit) and unknown (miss) passwords.
+
+The index engine runs first: the sets never return their memory to the OS,
+so measuring them first would hide the index's RSS.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/password_index_benchmark.py \
+        --entries 2000000 --lookups 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+
+def _percentile(samples: list[float], fraction: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # macOS/BSD: solo el pico está disponible.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def write_dataset(path: Path, entries: int, *, seed: int = 7) -> list[str]:
+    """Write ``entries`` SHA-1 lines and return the plain passwords behind them."""
+
+    from backend.services.password_index import sha1_digest
+
+    rng = random.Random(seed)
+    passwords = [f"pw-{i}-{rng.getrandbits(32):08x}" for i in range(entries)]
+    with path.open("w", encoding="ascii") as handle:
+        for password in passwords:
+            count = rng.randint(1, 5000)
+            handle.write(f"{sha1_digest(password).hex().upper()}:{count}\n")
+    return passwords
+
+
+def summarize(
+    engine: str,
+    *,
+    load_seconds: float,
+    rss_delta: int,
+    hit_samples: list[float],
+    miss_samples: list[float],
+) -> dict[str, Any]:
+    def _us(value: float | None) -> float | None:
+        return None if value is None else round(value * 1e6, 2)
+
+    return {
+        "engine": engine,
+        "load_s": round(load_seconds, 3),
+        "rss_mib": round(rss_delta / (1024 * 1024), 1),
+        "hit_us_p50": _us(_percentile(hit_samples, 0.5)),
+        "hit_us_p99": _us(_percentile(hit_samples, 0.99)),
+        "miss_us_p50": _us(_percentile(miss_samples, 0.5)),
+        "miss_us_p99": _us(_percentile(miss_samples, 0.99)),
+    }
+
+
+def run_engine(
+    engine: str, dataset: Path, hits: list[str], misses: list[str]
+) -> dict[str, Any]:
+    from backend.services.password_guard import PasswordBreachDetector
+
+    gc.collect()
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    detector = PasswordBreachDetector(str(dataset))
+    detector._ensure_loaded()
+    load_seconds = time.perf_counter() - started
+
+    samples: dict[bool, list[float]] = {True: [], False: []}
+    for expected, batch in ((True, hits), (False, misses)):
+        for password in batch:
+            begin = time.perf_counter()
+            found = detector.is_compromised(password)
+            samples[expected].append(time.perf_counter() - begin)
+            if found is not expected:
+                raise AssertionError(f"{engine}: wrong answer for {password!r}")
+    rss_delta = _rss_bytes() - rss_before
+    summary = summarize(
+        engine,
+        load_seconds=load_seconds,
+        rss_delta=rss_delta,
+        hit_samples=samples[True],
+        miss_samples=samples[False],
+    )
+    del detector
+    return summary
+
+
+def run_benchmark(options: argparse.Namespace) -> dict[str, Any]:
+    from backend.services.password_index import build_index, dataset_digests
+
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as workdir:
+        text_path = Path(workdir) / "breached.txt"
+        index_path = Path(workdir) / "breached.idx"
+        passwords = write_dataset(text_path, options.entries)
+        hits = rng.sample(passwords, min(options.lookups, len(passwords)))
+        misses = [f"unknown-{rng.getrandbits(48):012x}" for _ in range(options.lookups)]
+        del passwords
+
+        started = time.perf_counter()
+        with text_path.open(encoding="ascii") as handle:
+            build_index(dataset_digests(handle), index_path)
+        build_seconds = time.perf_counter() - started
+        gc.collect()
+
+        reports = [
+            run_engine("index", index_path, hits, misses),
+            run_engine("sets", text_path, hits, misses),
+        ]
+        return {
+            "entries": options.entries,
+            "lookups": options.lookups,
+            "build_s": round(build_seconds, 3),
+            "text_mib": round(text_path.stat().st_size / (1024 * 1024), 1),
+            "index_mib": round(index_path.stat().st_size / (1024 * 1024), 1),
+            "engines": reports,
+        }
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(
+        f"entries={report['entries']} lookups={report['lookups']} "
+        f"build={report['build_s']}s text={report['text_mib']}MiB "
+        f"index={report['index_mib']}MiB"
+    )
+    header = (
+        "engine",
+        "load_s",
+        "RSS MiB",
+        "hit p50",
+        "hit p99",
+        "miss p50",
+        "miss p99",
+    )
+    print("{:<8}{:>9}{:>9}{:>10}{:>10}{:>10}{:>10}".format(*header))
+    for summary in report["engines"]:
+        print(
+            "{:<8}{:>9}{:>9}{:>10}{:>10}{:>10}{:>10}".format(
+                summary["engine"],
+                summary["load_s"],
+                summary["rss_mib"],
+                str(summary["hit_us_p50"]),
+                str(summary["hit_us_p99"]),
+                str(summary["miss_us_p50"]),
+                str(summary["miss_us_p99"]),
+            )
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--json", action="store_true", help="imprime el reporte JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    report = run_benchmark(options)
+    if options.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+"""Per-check cost of the rate limiter engines across many distinct keys.
+
+Hits ``--keys`` distinct client keys ``--rounds`` times each (shuffled) with
+the GCRA in-memory store from :mod:`backend.core.rate_limit` and with
+``legacy``, a copy of the former list-of-timestamps buckets. Prints the cost
+per check (mean and p99 over batches), the keys still tracked at the end and
+the memory retained by each store. A simulated clock spreads the schedule
+over ``--span`` windows so early buckets go idle before the run finishes.
+With ``--redis-url`` the atomic Lua backend is measured too (round trips
+included, so expect microseconds instead of nanoseconds).
+
+Usage:
+    PYTHONPATH=. python backend/scripts/rate_limit_benchmark.py --keys 100000 \
+        --rounds 5 --limit 10 --window 60 --span 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any
+
+BATCH = 1000
+
+
+class LegacyListStore:
+    """The previous engine: a list of hit timestamps per bucket."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, list[float]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def hit(
+        self, key: str, *, limit: int, period: float, weight: int = 1, now: float
+    ) -> float:
+        bucket = self._buckets[key]
+        bucket[:] = [tick for tick in bucket if now - tick < period]
+        if len(bucket) + weight > limit:
+            return period - (now - bucket[0])
+        bucket.extend([now] * weight)
+        return 0.0
+
+
+def _percentile(samples: list[float], fraction: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_schedule(keys: int, rounds: int, *, seed: int = 7) -> list[str]:
+    """Every key ``rounds`` times, shuffled so buckets are hit out of order."""
+
+    schedule = [f"198.51.{i // 65536}.{i % 65536}:bench" for i in range(keys)]
+    schedule *= rounds
+    random.Random(seed).shuffle(schedule)
+    return schedule
+
+
+def summarize(
+    batch_seconds: list[float],
+    *,
+    checks: int,
+    rejected: int,
+    tracked: int,
+    retained: int,
+) -> dict[str, Any]:
+    def _ns(value: float | None) -> float | None:
+        return None if value is None else round(value / BATCH * 1e9, 1)
+
+    return {
+        "checks": checks,
+        "rejected": rejected,
+        "ns_per_check": round(sum(batch_seconds) / checks * 1e9, 1) if checks else None,
+        "ns_per_check_p99": _ns(_percentile(batch_seconds, 0.99)),
+        "tracked_keys": tracked,
+        "retained_kib": round(retained / 1024, 1),
+    }
+
+
+def run_store(
+    store: Any,
+    schedule: list[str],
+    *,
+    limit: int,
+    window: float,
+    span: float,
+) -> dict[str, Any]:
+    tick = window * span / max(1, len(schedule))
+    batches: list[float] = []
+    rejected = 0
+    for offset in range(0, len(schedule), BATCH):
+        start = time.perf_counter()
+        for index, key in enumerate(schedule[offset : offset + BATCH], offset):
+            if store.hit(key, limit=limit, period=window, now=index * tick):
+                rejected += 1
+        batches.append(time.perf_counter() - start)
+    # La memoria se mide aparte para no inflar los tiempos con tracemalloc.
+    tracemalloc.start()
+    fresh = type(store)()
+    for index, key in enumerate(schedule):
+        fresh.hit(key, limit=limit, period=window, now=index * tick)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return summarize(
+        batches,
+        checks=len(schedule),
+        rejected=rejected,
+        tracked=len(store),
+        retained=retained,
+    )
+
+
+async def run_redis(
+    url: str, schedule: list[str], *, limit: int, window: float
+) -> dict[str, Any]:
+    import redis.asyncio as redis
+
+    from backend.core.rate_limit import _REDIS_GCRA
+
+    client = redis.from_url(url)
+    try:
+        batches: list[float] = []
+        rejected = 0
+        for offset in range(0, len(schedule), BATCH):
+            start = time.perf_counter()
+            for key in schedule[offset : offset + BATCH]:
+                wait = await _REDIS_GCRA.hit(
+                    client, f"rate-limit:bench:{key}", limit=limit, period=window
+                )
+                rejected += bool(wait)
+            batches.append(time.perf_counter() - start)
+        keys = [key async for key in client.scan_iter("rate-limit:bench:*")]
+        for offset in range(0, len(keys), BATCH):
+            await client.delete(*keys[offset : offset + BATCH])
+    finally:
+        await client.aclose()
+    return summarize(
+        batches,
+        checks=len(schedule),
+        rejected=rejected,
+        tracked=len(keys),
+        retained=0,
+    )
+
+
+def run_benchmark(options: argparse.Namespace) -> dict[str, Any]:
+    from backend.core.rate_limit import GCRAMemoryStore
+
+    schedule = build_schedule(options.keys, options.rounds)
+    engines: dict[str, Any] = {"gcra": GCRAMemoryStore, "legacy": LegacyListStore}
+    reports = []
+    for name, factory in engines.items():
+        summary = run_store(
+            factory(),
+            schedule,
+            limit=options.limit,
+            window=options.window,
+            span=options.span,
+        )
+        reports.append({"engine": name, **summary})
+    if options.redis_url:
+        summary = asyncio.run(
+            run_redis(
+                options.redis_url,
+                schedule,
+                limit=options.limit,
+                window=options.window,
+            )
+        )
+        reports.append({"engine": "redis-lua", **summary})
+    return {"keys": options.keys, "rounds": options.rounds, "engines": reports}
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(f"keys={report['keys']} rounds={report['rounds']}")
+    header = ("engine", "checks", "rejected", "ns/check", "p99", "keys", "KiB")
+    print("{:<11}{:>10}{:>10}{:>10}{:>10}{:>10}{:>10}".format(*header))
+    for summary in report["engines"]:
+        print(
+            "{:<11}{:>10}{:>10}{:>10}{:>10}{:>10}{:>10}".format(
+                summary["engine"],
+                summary["checks"],
+                summary["rejected"],
+                str(summary["ns_per_check"]),
+                str(summary["ns_per_check_p99"]),
+                summary["tracked_keys"],
+                str(summary["retained_kib"]),
+            )
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--window", type=float, default=60.0)
+    parser.add_argument("--span", type=float, default=4.0, help="ventanas simuladas")
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--json", action="store_true", help="imprime el reporte JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    report = run_benchmark(options)
+    if options.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,614 @@
+#!/usr/bin/env python
+"""Fan-out benchmark for the realtime, notification and alert WebSockets.
+
+Boots the FastAPI app in a child process (uvicorn + temporary SQLite and an
+in-process Redis stand-in), opens ``--clients`` simulated sockets split by
+``--mix`` and drives broadcasts through ``NotificationDispatcher``, the
+notification/alert managers and the conflated price topic. Prints fan-out
+latency percentiles, dropped messages per channel and server memory per
+connection.
+
+Usage:
+    PYTHONPATH=. python backend/scripts/ws_benchmark.py --clients 500 \
+        --mix realtime=0.5,compact=0.2,notifications=0.2,alerts=0.1 \
+        --slow-ratio 0.1 --broadcasts 50 --price-rate 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+CLIENT_KINDS = ("realtime", "compact", "notifications", "alerts")
+DEFAULT_MIX = "realtime=0.5,compact=0.2,notifications=0.2,alerts=0.1"
+
+
+# ---------------------------------------------------------------------------
+# Servidor (proceso hijo)
+# ---------------------------------------------------------------------------
+class InProcessRedis:
+    """Minimal asyncio Redis stand-in for key/value, counters and publish.
+
+    Commands outside this subset (streams, scripts) raise so that the
+    outbox and the rate limiter take their documented in-memory fallbacks.
+    """
+
+    def __init__(self) -> None:
+        self._data: dict[str, Any] = {}
+        self.published = 0
+
+    def __await__(self):  # redis.from_url() se usa con y sin await
+        async def _self() -> InProcessRedis:
+            return self
+
+        return _self().__await__()
+
+    async def ping(self) -> bool:
+        return True
+
+    async def get(self, key: str) -> Any:
+        return self._data.get(key)
+
+    async def set(self, key: str, value: Any, *args: Any, **kwargs: Any) -> bool:
+        self._data[key] = value
+        return True
+
+    async def setex(self, key: str, _ttl: int, value: Any) -> bool:
+        self._data[key] = value
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = int(self._data.get(key, 0)) + amount
+        self._data[key] = value
+        return value
+
+    async def expire(self, *_args: Any, **_kwargs: Any) -> bool:
+        return True
+
+    async def keys(self, _pattern: str = "*") -> list[str]:
+        return list(self._data)
+
+    async def publish(self, _channel: str, _message: Any) -> int:
+        self.published += 1
+        return 0
+
+    async def close(self) -> None:
+        return None
+
+    async def aclose(self) -> None:
+        return None
+
+    def __getattr__(self, name: str) -> Any:
+        async def _unsupported(*_args: Any, **_kwargs: Any) -> Any:
+            raise RuntimeError(f"InProcessRedis does not implement {name}")
+
+        return _unsupported
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/status", encoding="utf-8") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _raise_fd_limit() -> None:
+    try:
+        import resource
+
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):  # pragma: no cover - no POSIX
+        pass
+
+
+def _percentile(samples: list[float], fraction: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _drive(app: Any, options: dict[str, Any]) -> dict[str, Any]:
+    from backend.schemas.notifications import NotificationEvent
+    from backend.services.notification_dispatcher import (
+        manager,
+        notification_dispatcher,
+    )
+
+    alerts_manager = app.state.alerts_ws_manager
+    realtime_service = app.state.realtime_service
+
+    async def broadcasts() -> list[float]:
+        durations: list[float] = []
+        for seq in range(options["broadcasts"]):
+            sent_at = repr(time.time())
+            started = time.perf_counter()
+            await asyncio.gather(
+                notification_dispatcher.broadcast_event(
+                    "bench", {"message": "bench", "bench_seq": seq, "ts": sent_at}
+                ),
+                manager.broadcast(
+                    NotificationEvent(
+                        title="bench",
+                        body="bench",
+                        meta={"bench_seq": seq, "ts": sent_at},
+                    )
+                ),
+                alerts_manager.broadcast(
+                    {"type": "bench", "bench_seq": seq, "ts": sent_at}
+                ),
+            )
+            durations.append(time.perf_counter() - started)
+            await asyncio.sleep(options["interval"])
+        return durations
+
+    async def prices() -> int:
+        rate = options["price_rate"]
+        if rate <= 0:
+            return 0
+        symbols = [f"SYM{index}" for index in range(options["symbols"])]
+        deadline = time.monotonic() + options["duration"]
+        published = 0
+        while time.monotonic() < deadline:
+            for symbol in symbols:
+                await realtime_service.publish(
+                    "price",
+                    symbol,
+                    {
+                        "type": "price",
+                        "symbol": symbol,
+                        "price": round(random.uniform(80.0, 120.0), 2),
+                        "ts": repr(time.time()),
+                    },
+                )
+                published += 1
+            await asyncio.sleep(1 / rate)
+        return published
+
+    durations, published = await asyncio.gather(broadcasts(), prices())
+    return {
+        "dispatch_p50_ms": _ms(_percentile(durations, 0.5)),
+        "dispatch_p99_ms": _ms(_percentile(durations, 0.99)),
+        "price_updates_published": published,
+    }
+
+
+async def _serve(conn: Any, port: int) -> None:
+    import uvicorn
+
+    import backend.main as main_module
+
+    async def _skip_report() -> None:
+        return None
+
+    # QA: sin llamadas a APIs externas durante el benchmark
+    main_module.log_api_integration_report = _skip_report
+    app = main_module.app
+
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app,
+            host="127.0.0.1",
+            port=port,
+            log_level="warning",
+            lifespan="on",
+            backlog=4096,
+        )
+    )
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if serve_task.done():
+            conn.send(("error", repr(serve_task.exception())))
+            return
+        await asyncio.sleep(0.05)
+    conn.send(("ready", _rss_bytes()))
+
+    loop = asyncio.get_running_loop()
+    while True:
+        command, payload = await loop.run_in_executor(None, conn.recv)
+        if command == "rss":
+            conn.send(("rss", _rss_bytes()))
+        elif command == "drive":
+            conn.send(("drive", await _drive(app, payload)))
+        elif command == "stop":
+            server.should_exit = True
+            await serve_task
+            conn.send(("stopped", None))
+            return
+
+
+def _server_process(conn: Any, port: int, env: dict[str, str]) -> None:
+    os.environ.update(env)
+    # QA: sin REDIS_URL las cachés de IA y mercado usan memoria local
+    os.environ.pop("REDIS_URL", None)
+    _raise_fd_limit()
+
+    import redis.asyncio as redis_asyncio
+
+    # QA: Redis en proceso; debe parchearse antes de importar backend.main
+    shared = InProcessRedis()
+    redis_asyncio.from_url = lambda *_args, **_kwargs: shared  # type: ignore[assignment]
+
+    asyncio.run(_serve(conn, port))
+
+
+# ---------------------------------------------------------------------------
+# Clientes simulados (proceso padre)
+# ---------------------------------------------------------------------------
+@dataclass
+class ClientStats:
+    kind: str
+    slow: bool
+    connected: bool = False
+    closed_early: bool = False
+    bench_seqs: set[int] = field(default_factory=set)
+    bench_latencies: list[float] = field(default_factory=list)
+    price_frames: int = 0
+    price_updates: int = 0
+    price_latencies: list[float] = field(default_factory=list)
+
+
+def _bench_marker(message: dict[str, Any]) -> tuple[int, str] | None:
+    for container in (message, message.get("payload"), message.get("meta")):
+        if isinstance(container, dict) and "bench_seq" in container:
+            return int(container["bench_seq"]), str(container.get("ts"))
+    return None
+
+
+def _price_entries(message: dict[str, Any]) -> list[dict[str, Any]]:
+    if message.get("t") == "batch" and message.get("topic") == "price":
+        return [entry[1] for entry in message.get("u", [])]
+    if message.get("type") == "price":
+        return [message]
+    return []
+
+
+async def _run_client(
+    url: str, stats: ClientStats, slow_delay: float, stop: asyncio.Event
+) -> None:
+    import websockets
+
+    try:
+        async with websockets.connect(
+            url, ping_interval=None, max_queue=None, open_timeout=30
+        ) as ws:
+            stats.connected = True
+            while not stop.is_set():
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                except TimeoutError:
+                    continue
+                received_at = time.time()
+                try:
+                    message = json.loads(raw)
+                except (TypeError, ValueError):
+                    continue
+                if not isinstance(message, dict):
+                    continue
+                marker = _bench_marker(message)
+                if marker is not None:
+                    seq, sent_at = marker
+                    if seq not in stats.bench_seqs:
+                        stats.bench_seqs.add(seq)
+                        stats.bench_latencies.append(received_at - float(sent_at))
+                entries = _price_entries(message)
+                if entries:
+                    stats.price_frames += 1
+                    stats.price_updates += len(entries)
+                    for entry in entries:
+                        if "ts" in entry:
+                            stats.price_latencies.append(
+                                received_at - float(entry["ts"])
+                            )
+                if stats.slow and slow_delay:
+                    await asyncio.sleep(slow_delay)
+    except Exception:
+        if stats.connected:
+            stats.closed_early = True
+
+
+def parse_mix(raw: str) -> dict[str, float]:
+    """Parse ``kind=weight`` pairs into normalised client ratios."""
+
+    weights: dict[str, float] = {}
+    for chunk in raw.split(","):
+        name, _, value = chunk.partition("=")
+        name = name.strip()
+        if name not in CLIENT_KINDS:
+            continue
+        try:
+            weights[name] = max(0.0, float(value))
+        except ValueError:
+            continue
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError(f"mix sin pesos válidos: {raw!r}")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def _client_urls(base: str, kind: str, index: int) -> str:
+    if kind == "realtime":
+        return f"{base}/api/realtime/ws"
+    if kind == "compact":
+        return f"{base}/api/realtime/ws?format=compact"
+    if kind == "alerts":
+        return f"{base}/ws/alerts"
+    from backend.core.security import create_access_token
+
+    return f"{base}/ws/notifications?token={create_access_token(f'bench-{index}')}"
+
+
+def _ms(value: float | None) -> float | None:
+    return None if value is None else round(value * 1000, 2)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(conn: Any, command: str, payload: Any = None, timeout: float = 600):
+    conn.send((command, payload))
+    if not conn.poll(timeout):
+        raise TimeoutError(f"benchmark server did not answer {command!r}")
+    return conn.recv()
+
+
+async def _open_clients(
+    base: str,
+    plan: list[ClientStats],
+    slow_delay: float,
+    stop: asyncio.Event,
+    connect_concurrency: int,
+) -> list[asyncio.Task]:
+    gate = asyncio.Semaphore(connect_concurrency)
+    tasks: list[asyncio.Task] = []
+
+    for index, stats in enumerate(plan):
+        url = _client_urls(base, stats.kind, index)
+        await gate.acquire()
+        task = asyncio.create_task(_run_client(url, stats, slow_delay, stop))
+        tasks.append(task)
+
+        async def _release(current: ClientStats = stats, pending=task) -> None:
+            while not current.connected and not pending.done():
+                await asyncio.sleep(0.01)
+            gate.release()
+
+        asyncio.create_task(_release())
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if all(
+            stats.connected or task.done()
+            for stats, task in zip(plan, tasks, strict=False)
+        ):
+            break
+        await asyncio.sleep(0.05)
+    return tasks
+
+
+def _summarise(
+    plan: list[ClientStats], options: argparse.Namespace
+) -> dict[str, dict[str, Any]]:
+    channels: dict[str, dict[str, Any]] = {}
+    for kind in CLIENT_KINDS:
+        members = [stats for stats in plan if stats.kind == kind]
+        if not members:
+            continue
+        latencies = [value for stats in members for value in stats.bench_latencies]
+        connected = [stats for stats in members if stats.connected]
+        summary: dict[str, Any] = {
+            "clients": len(members),
+            "connected": len(connected),
+            "slow": sum(1 for stats in members if stats.slow),
+            "closed_early": sum(1 for stats in members if stats.closed_early),
+            "dropped": sum(
+                options.broadcasts - len(stats.bench_seqs) for stats in connected
+            ),
+            "p50_ms": _ms(_percentile(latencies, 0.5)),
+            "p95_ms": _ms(_percentile(latencies, 0.95)),
+            "p99_ms": _ms(_percentile(latencies, 0.99)),
+        }
+        if kind in {"realtime", "compact"}:
+            price_latencies = [
+                value for stats in members for value in stats.price_latencies
+            ]
+            frames = sum(stats.price_frames for stats in members)
+            summary.update(
+                {
+                    "price_frames": frames,
+                    "price_updates": sum(stats.price_updates for stats in members),
+                    "price_p50_ms": _ms(_percentile(price_latencies, 0.5)),
+                    "price_p99_ms": _ms(_percentile(price_latencies, 0.99)),
+                }
+            )
+        channels[kind] = summary
+    return channels
+
+
+async def run_benchmark(options: argparse.Namespace) -> dict[str, Any]:
+    """Run one benchmark round and return the report as a dict."""
+
+    _raise_fd_limit()
+    mix = parse_mix(options.mix)
+    rng = random.Random(options.seed)
+    kinds = list(mix)
+    plan = [
+        ClientStats(
+            kind=rng.choices(kinds, weights=[mix[k] for k in kinds])[0],
+            slow=rng.random() < options.slow_ratio,
+        )
+        for _ in range(options.clients)
+    ]
+
+    workdir = tempfile.mkdtemp(prefix="bullbear-wsbench-")
+    env = {
+        "APP_ENV": "local",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "BULLBEAR_LOG_LEVEL": os.getenv("BULLBEAR_LOG_LEVEL", "WARNING"),
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+        "REALTIME_CONFLATION_TICK_MS": str(options.conflation_ms),
+    }
+    port = options.port or _free_port()
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe()
+    process = context.Process(
+        target=_server_process, args=(child_conn, port, env), daemon=True
+    )
+    process.start()
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    tasks: list[asyncio.Task] = []
+    try:
+        status, idle_rss = await loop.run_in_executor(
+            None, lambda: parent_conn.recv() if parent_conn.poll(120) else ("", 0)
+        )
+        if status != "ready":
+            raise RuntimeError(f"benchmark server failed to start: {idle_rss}")
+
+        started = time.perf_counter()
+        tasks = await _open_clients(
+            f"ws://127.0.0.1:{port}",
+            plan,
+            options.slow_delay_ms / 1000,
+            stop,
+            options.connect_concurrency,
+        )
+        connect_seconds = time.perf_counter() - started
+        await asyncio.sleep(options.settle)
+        _, connected_rss = await loop.run_in_executor(
+            None, _request, parent_conn, "rss"
+        )
+        connected = sum(1 for stats in plan if stats.connected)
+
+        _, server_stats = await loop.run_in_executor(
+            None,
+            _request,
+            parent_conn,
+            "drive",
+            {
+                "broadcasts": options.broadcasts,
+                "interval": options.interval_ms / 1000,
+                "price_rate": options.price_rate,
+                "symbols": options.symbols,
+                "duration": max(
+                    options.broadcasts * options.interval_ms / 1000, options.settle
+                ),
+            },
+        )
+        await asyncio.sleep(options.drain)
+    finally:
+        stop.set()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if process.is_alive():
+            try:
+                await loop.run_in_executor(
+                    None, _request, parent_conn, "stop", None, 30
+                )
+            except Exception:
+                process.terminate()
+        process.join(timeout=10)
+
+    return {
+        "clients": options.clients,
+        "connected": connected,
+        "connect_seconds": round(connect_seconds, 2),
+        "server_rss_idle_mb": round(idle_rss / 2**20, 1),
+        "server_rss_connected_mb": round(connected_rss / 2**20, 1),
+        "memory_per_connection_kb": (
+            round((connected_rss - idle_rss) / connected / 1024, 1)
+            if connected
+            else None
+        ),
+        "server": server_stats,
+        "channels": _summarise(plan, options),
+    }
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(
+        f"clients={report['connected']}/{report['clients']} "
+        f"connect={report['connect_seconds']}s "
+        f"rss={report['server_rss_idle_mb']}→{report['server_rss_connected_mb']}MB "
+        f"per_conn={report['memory_per_connection_kb']}KB"
+    )
+    server = report["server"]
+    print(
+        f"dispatch p50={server['dispatch_p50_ms']}ms p99={server['dispatch_p99_ms']}ms "
+        f"price_updates={server['price_updates_published']}"
+    )
+    header = ("channel", "clients", "slow", "dropped", "p50", "p95", "p99", "frames")
+    print("{:<14}{:>8}{:>6}{:>9}{:>10}{:>10}{:>10}{:>8}".format(*header))
+    for kind, summary in report["channels"].items():
+        print(
+            "{:<14}{:>8}{:>6}{:>9}{:>10}{:>10}{:>10}{:>8}".format(
+                kind,
+                summary["connected"],
+                summary["slow"],
+                summary["dropped"],
+                str(summary["p50_ms"]),
+                str(summary["p95_ms"]),
+                str(summary["p99_ms"]),
+                summary.get("price_frames", "-"),
+            )
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--slow-ratio", type=float, default=0.0)
+    parser.add_argument("--slow-delay-ms", type=float, default=50.0)
+    parser.add_argument("--broadcasts", type=int, default=20)
+    parser.add_argument("--interval-ms", type=float, default=100.0)
+    parser.add_argument("--price-rate", type=float, default=10.0)
+    parser.add_argument("--symbols", type=int, default=5)
+    parser.add_argument("--conflation-ms", type=int, default=250)
+    parser.add_argument("--connect-concurrency", type=int, default=100)
+    parser.add_argument("--settle", type=float, default=1.0)
+    parser.add_argument("--drain", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="imprime el reporte JSON")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    report = asyncio.run(run_benchmark(options))
+    if options.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
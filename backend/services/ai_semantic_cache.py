@@ -0,0 +1,204 @@
+"""Prompt canonicalization and a local similarity index for the AI cache."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+# Sólo se pliegan los signos de pregunta/exclamación de los extremos.
+_EDGE_PUNCTUATION = "¿?¡! "
+_TYPED_TICKER_RE = re.compile(r"\b[A-Z]{2,6}\b")
+
+# Flags de intención de ``AIService._analyze_message`` en orden estable.
+_INTENT_FLAGS = (
+    ("use_market_data", "m"),
+    ("need_indicators", "i"),
+    ("need_news", "n"),
+    ("need_alerts", "a"),
+)
+
+
+def normalize_prompt_text(text: str) -> str:
+    """Casefold, collapse whitespace and trim leading/trailing ``¿?¡!``.
+
+    Everything else is meaningful and kept: ``BTC > 50000`` and
+    ``BTC < 50000``, ``-5%`` and ``5%`` or ``1.5`` and ``15`` must not share
+    a cache key.
+    """
+
+    folded = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(folded.split()).strip(_EDGE_PUNCTUATION)
+
+
+def _digest(value: Any) -> str:
+    if not value:
+        return ""
+    raw = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+class PromptIdentity(str):
+    """Canonical cache key of a prompt, usable anywhere a ``str`` key is.
+
+    ``scope`` groups prompts that may share an answer (same symbols, intent,
+    caller context and market time bucket) and ``text`` is the normalized
+    wording the similarity index compares.
+    """
+
+    scope: str
+    text: str
+
+    def __new__(cls, key: str, *, scope: str, text: str) -> PromptIdentity:
+        identity = super().__new__(cls, key)
+        identity.scope = scope
+        identity.text = text
+        return identity
+
+
+def canonical_prompt(
+    message: str,
+    decision: Mapping[str, Any] | None = None,
+    *,
+    context: Mapping[str, Any] | None = None,
+    known_symbols: Iterable[str] = (),
+    bucket_seconds: int = 60,
+    now: float | None = None,
+) -> PromptIdentity:
+    """Build the canonical cache identity for ``message``.
+
+    ``decision`` is the output of ``AIService._analyze_message``. Its symbol
+    list contains every short word, so only symbols that are known assets,
+    forex pairs or typed as uppercase tickers enter the scope. Live market
+    data is not part of the key: prompts that depend on it are bucketed by
+    ``bucket_seconds`` instead, so answers are reused within a bucket and
+    expire with it.
+    """
+
+    decision = decision or {}
+    text = normalize_prompt_text(message)
+    trusted = set(known_symbols) | set(_TYPED_TICKER_RE.findall(message or ""))
+    trusted |= {str(pair).upper() for pair in decision.get("forex_pairs") or []}
+    extracted = {str(symbol).upper() for symbol in decision.get("symbols") or []}
+    symbols = ",".join(sorted(extracted & trusted))
+    intent = "".join(flag for name, flag in _INTENT_FLAGS if decision.get(name)) or "-"
+    interval = str(decision.get("interval") or "")
+    bucket = ""
+    if decision.get("use_market_data") and bucket_seconds > 0:
+        current = time.time() if now is None else now
+        bucket = str(int(current // bucket_seconds))
+
+    scope = "|".join(
+        ("v2", intent, symbols, interval, bucket, _digest(dict(context or {})))
+    )
+    return PromptIdentity(f"{scope}|{text}", scope=scope, text=text)
+
+
+def _hashed_ngram_vector(text: str, dim: int) -> dict[int, float]:
+    padded = f" {text} "
+    features = [padded[i : i + 3] for i in range(max(0, len(padded) - 2))]
+    features.extend(f"w:{word}" for word in text.split())
+
+    vector: dict[int, float] = {}
+    for feature in features:
+        hashed = zlib.crc32(feature.encode())
+        index = hashed % dim
+        sign = 1.0 if (hashed >> 31) & 1 else -1.0
+        vector[index] = vector.get(index, 0.0) + sign
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if not norm:
+        return {}
+    return {index: value / norm for index, value in vector.items() if value}
+
+
+def _cosine(left: dict[int, float], right: dict[int, float]) -> float:
+    if len(left) > len(right):
+        left, right = right, left
+    return sum(value * right.get(index, 0.0) for index, value in left.items())
+
+
+class SemanticPromptIndex:
+    """CPU-only near-duplicate index over hashed character n-gram vectors.
+
+    Entries only match inside the same ``(route, scope)`` so that similar
+    wording about a different symbol or time bucket never shares an answer.
+    Scopes and entries are both LRU-bounded.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = 0.92,
+        dim: int = 1024,
+        max_entries_per_scope: int = 256,
+        max_scopes: int = 512,
+    ) -> None:
+        self.threshold = threshold
+        self._dim = dim
+        self._max_entries = max(1, max_entries_per_scope)
+        self._max_scopes = max(1, max_scopes)
+        self._scopes: OrderedDict[
+            tuple[str, str], OrderedDict[str, tuple[dict[int, float], float]]
+        ] = OrderedDict()
+
+    def add(self, route: str, identity: PromptIdentity, ttl: int) -> None:
+        vector = _hashed_ngram_vector(identity.text, self._dim)
+        if not vector:
+            return
+        scope_key = (route, identity.scope)
+        entries = self._scopes.get(scope_key)
+        if entries is None:
+            entries = self._scopes[scope_key] = OrderedDict()
+            while len(self._scopes) > self._max_scopes:
+                self._scopes.popitem(last=False)
+        self._scopes.move_to_end(scope_key)
+        entries[str(identity)] = (vector, time.monotonic() + ttl)
+        entries.move_to_end(str(identity))
+        while len(entries) > self._max_entries:
+            entries.popitem(last=False)
+
+    def query(self, route: str, identity: PromptIdentity) -> tuple[str, float] | None:
+        """Return ``(key, score)`` of the closest entry above the threshold."""
+
+        entries = self._scopes.get((route, identity.scope))
+        if not entries:
+            return None
+        vector = _hashed_ngram_vector(identity.text, self._dim)
+        if not vector:
+            return None
+
+        now = time.monotonic()
+        best: tuple[str, float] | None = None
+        for key, (candidate, expires_at) in list(entries.items()):
+            if expires_at < now:
+                entries.pop(key, None)
+                continue
+            if key == identity:
+                continue
+            score = _cosine(vector, candidate)
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+    def discard(self, route: str, identity: PromptIdentity, key: str) -> None:
+        entries = self._scopes.get((route, identity.scope))
+        if entries is not None:
+            entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._scopes.clear()
+
+
+__all__ = [
+    "PromptIdentity",
+    "SemanticPromptIndex",
+    "canonical_prompt",
+    "normalize_prompt_text",
+]
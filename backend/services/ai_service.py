@@ -4,14 +4,15 @@ import hashlib
 import inspect
 import json
 import logging
+import math
 import os
 import re
 import time
-from collections.abc import Awaitable, Callable
-from dataclasses import dataclass
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
 from time import perf_counter
 from typing import Any
-from urllib.parse import urljoin
 
 import aiohttp
 
@@ -21,8 +22,13 @@ from backend.metrics.ai_metrics import (
     ai_cache_hit_total,
     ai_cache_miss_total,
     ai_conversations_active_total,
+    ai_enrichment_duration_seconds,
     ai_failures_total,
     ai_fallbacks_total,
+    ai_hedge_provider_calls_total,
+    ai_hedge_provider_seconds_total,
+    ai_hedge_wasted_seconds,
+    ai_hedged_requests_total,
     ai_insight_duration_seconds,
     ai_insight_failures_total,
     ai_insights_generated_total,
@@ -34,6 +40,7 @@ from backend.metrics.ai_metrics import (
     ai_provider_requests_total,
     ai_requests_total,
     ai_stream_duration_seconds,
+    ai_stream_first_token_seconds,
     ai_stream_tokens_total,
 )
 from backend.services.notification_dispatcher import notification_dispatcher
@@ -43,10 +50,42 @@ import backend.services.context_service as context_service
 import backend.services.sentiment_service as sentiment_service
 
 from .ai_route_context import get_current_route, reset_route, set_route
+from .ai_semantic_cache import canonical_prompt
 from .cache_service import AICacheService, CacheService, ai_cache_hits_total, cache
+from .market_indicators_service import (
+    IndicatorBundle,
+    IndicatorRequest,
+    indicator_service,
+)
 from .mistral_service import mistral_service
+from .provider_http import model_availability, provider_clients
 
 MOCK_RESPONSE = "respuesta simulada"
+# Chunk de control con el que termina todo stream completado sin errores.
+STREAM_DONE_CHUNK = json.dumps({"error": False, "done": True})
+# Ventana por defecto tras un 503 de HuggingFace sin ``estimated_time``.
+_HF_LOADING_DEFAULT_SECONDS = 5.0
+
+
+class StreamErrorChunk(str):
+    """JSON error chunk ending a failed stream.
+
+    SSE clients receive the same ``{"error": true, ...}`` text as before;
+    in-process consumers detect it with ``isinstance`` rather than by
+    parsing, so a provider token can never be mistaken for an error.
+    """
+
+    message: str
+
+    def __new__(cls, message: str) -> "StreamErrorChunk":
+        chunk = super().__new__(cls, json.dumps({"error": True, "message": message}))
+        chunk.message = message
+        return chunk
+
+
+class StreamProvidersUnavailableError(RuntimeError):
+    """Every configured streaming provider failed or was cooling down."""
+
 
 try:  # pragma: no cover - optional imports depending on entrypoint
     from backend.services.market_service import market_service
@@ -100,23 +139,16 @@ def _should_decorate_market() -> bool:
     return bool(getattr(Config, "AI_DECORATE_MARKET", True))
 
 
-# ✅ Codex fix: módulo de caché IA
-def get_cached_response(model: str, prompt: str | None):
-    if not prompt:
-        return None
-    cache_key = f"ai:{model}:{hashlib.sha256(prompt.encode()).hexdigest()}"
-    backend = _select_cache_backend()
-    cached = backend.get(cache_key)
+def _provider_cache_key(model: str, prompt: str) -> str:
+    return f"ai:{model}:{hashlib.sha256(prompt.encode()).hexdigest()}"
+
+
+def _coerce_cached_response(model: str, cached: Any) -> dict | None:
     if cached is None:
         ai_cache_miss_total.labels(model=model).inc()
         return None
-    if isinstance(cached, bytes | bytearray):
-        cached = cached.decode()
     if isinstance(cached, str):
-        try:
-            cached = json.loads(cached)
-        except json.JSONDecodeError:
-            cached = {"text": cached}
+        cached = {"text": cached}
     if not isinstance(cached, dict):
         ai_cache_miss_total.labels(model=model).inc()
         return None
@@ -132,25 +164,69 @@ def get_cached_response(model: str, prompt: str | None):
     return cached
 
 
+# ✅ Codex fix: módulo de caché IA
+async def get_cached_response(model: str, prompt: str | None):
+    if not prompt:
+        return None
+    backend = _select_cache_backend()
+    cached = await backend.get(_provider_cache_key(model, prompt))
+    return _coerce_cached_response(model, cached)
+
+
+async def prefetch_cached_responses(
+    models: list[str], prompt: str | None
+) -> dict[str, Any]:
+    """Raw cached payloads for every model in a single round trip.
+
+    Metrics are not touched here; callers pass each entry through
+    ``_coerce_cached_response`` once they actually consult that provider.
+    """
+
+    if not prompt or not models:
+        return {}
+    backend = _select_cache_backend()
+    values = await backend.get_many(
+        [_provider_cache_key(model, prompt) for model in models]
+    )
+    return dict(zip(models, values, strict=True))
+
+
 # ✅ Codex fix: almacenamiento de respuestas IA en caché
-def store_response_in_cache(
+async def store_response_in_cache(
     model: str, prompt: str | None, response: dict | None
 ) -> None:
     if not prompt or not response:
         return
     ttl = 600 if len(prompt) > 500 else 300
-    cache_key = f"ai:{model}:{hashlib.sha256(prompt.encode()).hexdigest()}"
-    payload = json.dumps(response)
+    cache_key = _provider_cache_key(model, prompt)
     backend = _select_cache_backend()
-    backend.set(cache_key, payload, ex=ttl)
+    await backend.set(cache_key, response, ex=ttl)
     if backend is not cache:
-        cache.set(cache_key, payload, ex=ttl)
+        await cache.set(cache_key, response, ex=ttl)
+
+
+def _parse_source_timeouts(raw: str | None) -> dict[str, float]:
+    """Parse ``source=ms`` pairs (``prices=1500,news=2000``) into seconds."""
+
+    timeouts: dict[str, float] = {}
+    for chunk in (raw or "").split(","):
+        name, _, value = chunk.partition("=")
+        try:
+            millis = int(value.strip())
+        except ValueError:
+            continue
+        if name.strip() and millis > 0:
+            timeouts[name.strip()] = millis / 1000
+    return timeouts
 
 
 def timestamp() -> float:  # ✅ Codex fix: helper for structured logs
     return time.time()
 
 
+# Muestras de latencia por proveedor usadas para el p90 del hedging.
+LATENCY_WINDOW = 50
+
 PROVIDER_TIMEOUTS: dict[str, float] = {  # ✅ Codex fix: adaptive timeouts por proveedor
     "mistral": 6.0,
     "huggingface": 8.0,
@@ -168,6 +244,37 @@ class CircuitBreakerState:  # ✅ Codex fix: estado del circuit breaker
     last_error: str | None = None
 
 
+@dataclass
+class _StreamTap:
+    """Chunks of an in-flight stream that deduplicated requests follow live."""
+
+    chunks: list[str] = field(default_factory=list)
+    done: bool = False
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def push(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._wake()
+
+    def close(self) -> None:
+        self.done = True
+        self._wake()
+
+    def _wake(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                return
+            await self.changed.wait()
+
+
 @dataclass
 class AIResponsePayload:
     text: str
@@ -199,11 +306,15 @@ class AIService:
     INDICATOR_KEYWORDS = {"rsi", "macd", "vwap", "atr", "indicador", "bollinger"}
     NEWS_KEYWORDS = {"news", "noticia", "noticias", "headline", "titular"}
     ALERT_KEYWORDS = {"alerta", "alertas"}
+    # Símbolos de cripto comunes
+    CRYPTO_SYMBOLS = frozenset(
+        {"BTC", "ETH", "BNB", "XRP", "ADA", "SOL", "DOT", "AVAX", "MATIC", "DOGE"}
+    )
 
     def __init__(self):
         self.market_service = market_service
         self.use_real_ai = True  # Mantener compatibilidad con otros servicios
-        self._api_base_url = Config.API_BASE_URL.rstrip("/")
+        self._indicators = indicator_service
         # [Codex] nuevo - base para indicadores
         self._circuit_breakers: dict[str, CircuitBreakerState] = {}
         self._circuit_breaker_threshold = 3  # ✅ Codex fix: umbral de fallos
@@ -216,7 +327,9 @@ class AIService:
         self._ai_cache_service = AICacheService(cache_backend)
         self._last_test_cache_id: str | None = None
         self._pending_prompts: dict[str, asyncio.Task[Any]] = {}
+        self._pending_streams: dict[str, _StreamTap] = {}
         self._latency_stats: dict[str, dict[str, float]] = {}
+        self._latency_samples: dict[str, deque[float]] = {}
 
     def _huggingface_available(self) -> bool:
         token = getattr(Config, "HUGGINGFACE_API_KEY", None) or os.getenv(
@@ -269,6 +382,14 @@ class AIService:
             alpha = 0.3
             stats["avg"] = alpha * elapsed + (1 - alpha) * stats["avg"]
         stats["count"] = min(count + 1, 20.0)
+        # QA: ventana móvil para el p90 que decide cuándo cubrir con otro proveedor
+        samples = self._latency_samples.setdefault(
+            provider, deque(maxlen=LATENCY_WINDOW)
+        )
+        samples.append(elapsed)
+        ordered = sorted(samples)
+        stats["p90"] = ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+        stats["samples"] = float(len(ordered))
         return stats["avg"]
 
     def _handle_adaptive_timeout(
@@ -408,6 +529,7 @@ class AIService:
         """Procesar mensaje del usuario y generar respuesta enriquecida."""
 
         context = dict(context or {})
+        caller_context = dict(context)
         route = get_current_route()
         cache_service = self._get_ai_cache()
         self._pending_prompts = getattr(self, "_pending_prompts", self._pending_prompts)
@@ -451,92 +573,87 @@ class AIService:
         sources: list[str] = []
         enrichment: dict[str, list[str]] = {}
 
-        # Market data (precios)
-        market_context: dict[str, Any] = {}
+        # QA: todas las fuentes de contexto corren en paralelo bajo un presupuesto
+        fetchers: dict[str, Callable[[], Awaitable[Any]]] = {}
         if decision["use_market_data"]:
-            try:
-                market_context = await self.get_market_context(message)
-                if market_context:
-                    context.update(market_context)
-                    price_lines = self._summarize_market_context(market_context)
-                    if price_lines:
-                        enrichment.setdefault("prices", []).extend(price_lines)
-                        used_data = True
-                        if "prices" not in sources:
-                            sources.append("prices")
-            except Exception:
-                logger.exception("Error collecting market context")
+            fetchers["prices"] = lambda: self.get_market_context(message)
+        if decision["need_indicators"]:
+            fetchers["indicators"] = lambda: self._collect_indicator_snapshots(message)
+        if decision["need_news"]:
+            fetchers["news"] = lambda: self._collect_news_highlights(symbols)
+        if decision["need_alerts"] and symbols:
+            fetchers["alerts"] = lambda: self._collect_alert_suggestions(
+                symbols, interval
+            )
+        if decision["forex_pairs"]:
+            fetchers["forex"] = lambda: self._collect_forex_quotes(
+                decision["forex_pairs"]
+            )
+        gathered = await self._gather_enrichment(fetchers)
+
+        def _add_source(section: str, lines: list[str], source: str) -> None:
+            nonlocal used_data
+            if not lines:
+                return
+            enrichment.setdefault(section, []).extend(lines)
+            used_data = True
+            if source not in sources:
+                sources.append(source)
+
+        # Market data (precios)
+        market_context = gathered.get("prices")
+        if market_context:
+            context.update(market_context)
+            _add_source(
+                "prices", self._summarize_market_context(market_context), "prices"
+            )
 
         # Indicadores técnicos
-        if decision["need_indicators"]:
-            try:
-                indicator_context = await self._collect_indicator_snapshots(message)
-                if indicator_context:
-                    context["indicator_data"] = indicator_context
-                    indicator_lines = self._summarize_indicators(indicator_context)
-                    if indicator_lines:
-                        enrichment.setdefault("indicators", []).extend(indicator_lines)
-                        used_data = True
-                        if "indicators" not in sources:
-                            sources.append("indicators")
-            except Exception:
-                logger.exception("Error collecting indicator snapshots")
+        indicator_context = gathered.get("indicators")
+        if indicator_context:
+            context["indicator_data"] = indicator_context
+            _add_source(
+                "indicators",
+                self._summarize_indicators(indicator_context),
+                "indicators",
+            )
 
         # Noticias
-        if decision["need_news"]:
-            try:
-                news_items = await self._collect_news_highlights(symbols)
-                if news_items:
-                    context["news"] = news_items
-                    news_lines = self._summarize_news(news_items)
-                    if news_lines:
-                        enrichment.setdefault("news", []).extend(news_lines)
-                        used_data = True
-                        if "news" not in sources:
-                            sources.append("news")
-            except Exception:
-                logger.exception("Error collecting news highlights")
+        news_items = gathered.get("news")
+        if news_items:
+            context["news"] = news_items
+            _add_source("news", self._summarize_news(news_items), "news")
 
         # Alertas sugeridas
-        if decision["need_alerts"] and symbols:
-            try:
-                alert_suggestions = await self._collect_alert_suggestions(
-                    symbols, interval
-                )
-                if alert_suggestions:
-                    context["alert_suggestions"] = alert_suggestions
-                    alert_lines = self._summarize_alerts(alert_suggestions)
-                    if alert_lines:
-                        enrichment.setdefault("alerts", []).extend(alert_lines)
-                        used_data = True
-                        if "alerts" not in sources:
-                            sources.append("alerts")
-            except Exception:
-                logger.exception("Error collecting alert suggestions")
+        alert_suggestions = gathered.get("alerts")
+        if alert_suggestions:
+            context["alert_suggestions"] = alert_suggestions
+            _add_source("alerts", self._summarize_alerts(alert_suggestions), "alerts")
 
         # Cotizaciones forex específicas
-        if decision["forex_pairs"]:
-            try:
-                forex_lines = await self._collect_forex_quotes(decision["forex_pairs"])
-                if forex_lines:
-                    enrichment.setdefault("prices", []).extend(forex_lines)
-                    used_data = True
-                    if "prices" not in sources:
-                        sources.append("prices")
-            except Exception:
-                logger.exception("Error collecting forex quotes")
+        _add_source("prices", gathered.get("forex") or [], "prices")
 
         enrichment_text = self._build_enrichment_summary(enrichment)
         if enrichment_text:
             context["enrichment_summary"] = enrichment_text
 
         prompt_for_cache: str | None = None  # ✅ Codex fix: prompt base para caché
+        built_prompt = ""
         try:
-            prompt_for_cache = self._build_prompt(message, context)
+            built_prompt = self._build_prompt(message, context)
         except ValueError as exc:
             return await _local_response(str(exc) or "prompt_invalid", False)
         except Exception:
-            prompt_for_cache = None
+            built_prompt = ""
+        if built_prompt:
+            # QA: la clave de caché usa el prompt canónico, no los datos en vivo
+            prompt_for_cache = canonical_prompt(
+                message,
+                decision,
+                context=caller_context,
+                known_symbols=self.CRYPTO_SYMBOLS,
+                bucket_seconds=Config.AI_CACHE_MARKET_BUCKET_SECONDS,
+            )
 
         provider_mode = os.getenv("AI_PROVIDER", "mistral").lower()
         providers_config: list[tuple[str, Callable[[], Awaitable[str]]]] = []
@@ -705,9 +822,13 @@ class AIService:
                 cache_fallback_text: str | None = None
                 cache_fallback_provider: str | None = None
                 if prompt_for_cache:
+                    prefetched = await prefetch_cached_responses(
+                        [provider_name for provider_name, _ in providers],
+                        prompt_for_cache,
+                    )
                     for provider_name, _ in providers:
-                        cached_payload = get_cached_response(
-                            provider_name, prompt_for_cache
+                        cached_payload = _coerce_cached_response(
+                            provider_name, prefetched.get(provider_name)
                         )
                         if cached_payload and cached_payload.get("text"):
                             cache_fallback_text = cached_payload["text"]
@@ -750,7 +871,7 @@ class AIService:
 
             if testing_mode:
                 if prompt_for_cache and provider and ai_text:
-                    store_response_in_cache(
+                    await store_response_in_cache(
                         provider,
                         prompt_for_cache,
                         {"text": ai_text, "provider": provider},
@@ -761,7 +882,7 @@ class AIService:
                         "used_data": used_data,
                         "sources": list(sources),
                     }
-                    ttl = 3600 if len(prompt_for_cache) < 100 else 600
+                    ttl = 3600 if len(built_prompt) < 100 else 600
                     await cache_service.set(route, prompt_for_cache, payload_dict, ttl)
                 return AIResponsePayload(
                     text=raw_text,
@@ -783,7 +904,7 @@ class AIService:
             if (
                 prompt_for_cache and provider and ai_text
             ):  # ✅ Codex fix: persistencia en caché
-                store_response_in_cache(
+                await store_response_in_cache(
                     provider,
                     prompt_for_cache,
                     {"text": ai_text, "provider": provider},
@@ -820,7 +941,7 @@ class AIService:
                 )
 
             if prompt_for_cache:
-                ttl = 3600 if len(prompt_for_cache) < 100 else 600
+                ttl = 3600 if len(built_prompt) < 100 else 600
                 await cache_service.set(route, prompt_for_cache, payload_dict, ttl)
                 logger.info(
                     json.dumps(
@@ -909,12 +1030,20 @@ class AIService:
         last_error: Exception | None = None
         total_providers = len(providers)
         route = get_current_route()
+        attempted: set[str] = set()
+        # QA: una sola ida a la caché para todos los proveedores candidatos
+        prefetched = await prefetch_cached_responses(
+            [provider_name for provider_name, _ in providers], prompt_for_cache
+        )
         for index, (provider_name, provider) in enumerate(providers):
+            if provider_name in attempted:
+                continue
             self._last_provider_attempted = provider_name
-            backoff = 1
             provider_label = self._get_provider_label(provider_name)
             if prompt_for_cache:
-                cached_payload = get_cached_response(provider_name, prompt_for_cache)
+                cached_payload = _coerce_cached_response(
+                    provider_name, prefetched.get(provider_name)
+                )
                 if cached_payload and cached_payload.get("text"):
                     cached_text = cached_payload["text"]
                     cached_provider = cached_payload.get("provider", provider_name)
@@ -939,10 +1068,8 @@ class AIService:
                     self._record_provider_fallback(provider_name, next_provider, route)
                 continue
 
-            cooldown_key = (provider_label, route)
-            now = time.monotonic()
-            cooldown_until = self._cooldowns.get(cooldown_key, 0.0)
-            if now < cooldown_until:
+            cooldown_until = self._cooldown_until(provider_label, route)
+            if cooldown_until is not None:
                 fallback_used = index < total_providers - 1
                 self._log_provider_call(provider_name, False, 0.0, fallback_used)
                 self._record_provider_status(provider_name, route, "skipped")
@@ -969,103 +1096,291 @@ class AIService:
                     self._record_provider_fallback(provider_name, next_provider, route)
                 continue
 
-            for attempt in range(1, self._max_retries + 1):
-                start = perf_counter()
-                try:
-                    timeout_seconds = PROVIDER_TIMEOUTS.get(provider_name, 10.0)
-                    response = await asyncio.wait_for(
-                        provider(), timeout=timeout_seconds
+            attempted.add(provider_name)
+            hedge_delay = self._hedge_delay(provider_label)
+            hedge = (
+                self._hedge_candidate(providers, index, attempted, route)
+                if hedge_delay is not None
+                else None
+            )
+            try:
+                if hedge is None:
+                    response = await self._attempt_provider(
+                        provider_name, provider, index, total_providers, route
                     )
-                    if response and response.strip():
-                        elapsed = perf_counter() - start
-                        duration_ms = elapsed * 1000
-                        ai_latency_seconds.labels(provider=provider_name).observe(
-                            duration_ms / 1000
-                        )
-                        ai_requests_total.labels(outcome="success").inc()
-                        self._record_provider_status(provider_name, route, "success")
-                        self._reset_circuit(provider_name)
-                        self._log_provider_call(
-                            provider_name,
-                            True,
-                            duration_ms,
-                            index > 0,
-                        )
-                        self._handle_adaptive_timeout(
-                            provider_name, provider_label, elapsed, route
-                        )
-                        return response, provider_name
-                    raise ValueError(f"Respuesta vacía de {provider_name}")
-                except asyncio.CancelledError:
-                    raise
-                except Exception as exc:
-                    last_error = exc
+                    return response, provider_name
+                return await self._hedged_attempt(
+                    (index, provider_name, provider),
+                    hedge,
+                    hedge_delay,
+                    total_providers,
+                    route,
+                    attempted,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                last_error = exc
+
+            if index < total_providers - 1:
+                AI_PROVIDER_FAILOVER_TOTAL.labels(provider=provider_name).inc()
+                next_provider = providers[index + 1][0]
+                ai_fallbacks_total.labels(
+                    from_provider=provider_name,
+                    to_provider=next_provider,
+                ).inc()
+                self._record_provider_fallback(provider_name, next_provider, route)
+
+        if last_error:
+            raise last_error
+        raise RuntimeError("No providers available")
+
+    def _cooldown_until(self, provider_label: str, route: str) -> float | None:
+        cooldown_until = self._cooldowns.get((provider_label, route), 0.0)
+        if time.monotonic() < cooldown_until:
+            return cooldown_until
+        return None
+
+    def _hedge_delay(self, provider_label: str) -> float | None:
+        """Seconds to wait on ``provider_label`` before hedging, if enabled."""
+
+        if not Config.AI_HEDGE_ENABLED:
+            return None
+        stats = self._latency_stats.get(provider_label) or {}
+        p90 = stats.get("p90")
+        if not p90 or stats.get("samples", 0.0) < Config.AI_HEDGE_MIN_SAMPLES:
+            return None
+        return max(p90, Config.AI_HEDGE_MIN_DELAY_SECONDS)
+
+    def _hedge_candidate(
+        self,
+        providers: list[tuple[str, Callable[[], Awaitable[str]]]],
+        index: int,
+        attempted: set[str],
+        route: str,
+    ) -> tuple[int, tuple[str, Callable[[], Awaitable[str]]]] | None:
+        for candidate_index in range(index + 1, len(providers)):
+            candidate = providers[candidate_index]
+            name = candidate[0]
+            if name in attempted:
+                continue
+            circuit = self._get_circuit(name)
+            if circuit.state == "open" and timestamp() < circuit.next_retry_time:
+                continue
+            if self._cooldown_until(self._get_provider_label(name), route):
+                continue
+            return candidate_index, candidate
+        return None
+
+    async def _hedged_attempt(
+        self,
+        primary: tuple[int, str, Callable[[], Awaitable[str]]],
+        hedge: tuple[int, tuple[str, Callable[[], Awaitable[str]]]],
+        delay: float,
+        total_providers: int,
+        route: str,
+        attempted: set[str],
+    ) -> tuple[str, str]:
+        """Race ``primary`` against ``hedge`` once it runs past ``delay``.
+
+        The hedge is only launched if the primary is still pending after
+        ``delay`` seconds (its rolling p90), and only then is it added to
+        ``attempted``; a primary that fails earlier leaves the hedge for the
+        caller's normal fallback. The first successful answer wins and the
+        other call is cancelled; if both fail the last error is raised so the
+        caller keeps falling back in order.
+        """
+
+        primary_index, primary_name, primary_provider = primary
+        hedge_index, (hedge_name, hedge_provider) = hedge
+        started: dict[asyncio.Task, float] = {}
+        tasks: dict[asyncio.Task, tuple[str, str]] = {}
+
+        def _launch(
+            name: str, provider: Callable[[], Awaitable[str]], index: int, role: str
+        ) -> None:
+            task = asyncio.create_task(
+                self._attempt_provider(name, provider, index, total_providers, route)
+            )
+            tasks[task] = (name, role)
+            started[task] = perf_counter()
+
+        def _account(task: asyncio.Task, outcome: str) -> float:
+            name, role = tasks.pop(task)
+            elapsed = perf_counter() - started.pop(task)
+            ai_hedge_provider_calls_total.labels(
+                provider=name, role=role, outcome=outcome
+            ).inc()
+            ai_hedge_provider_seconds_total.labels(
+                provider=name, role=role, outcome=outcome
+            ).inc(elapsed)
+            return elapsed
+
+        _launch(primary_name, primary_provider, primary_index, "primary")
+        hedged = False
+        last_error: BaseException | None = None
+        try:
+            done, _ = await asyncio.wait(set(tasks), timeout=delay)
+            if not done:
+                self._last_provider_attempted = hedge_name
+                ai_hedged_requests_total.labels(
+                    provider=hedge_name, outcome="launched"
+                ).inc()
+                logger.info(
+                    json.dumps(
+                        {
+                            "ai_event": "provider_hedged",
+                            "primary": primary_name,
+                            "hedge": hedge_name,
+                            "route": route,
+                            "delay": round(delay, 4),
+                        }
+                    )
+                )
+                _launch(hedge_name, hedge_provider, hedge_index, "hedge")
+                attempted.add(hedge_name)
+                hedged = True
+            while tasks:
+                done, _ = await asyncio.wait(
+                    set(tasks), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    name = tasks[task][0]
+                    error = task.exception()
+                    if error is None:
+                        _account(task, "won")
+                        if hedged:
+                            ai_hedged_requests_total.labels(
+                                provider=name, outcome="won"
+                            ).inc()
+                        return task.result(), name
+                    _account(task, "failed")
+                    last_error = error
+        finally:
+            pending = list(tasks)
+            for task in pending:
+                task.cancel()
+                name = tasks[task][0]
+                ai_hedged_requests_total.labels(
+                    provider=name, outcome="cancelled"
+                ).inc()
+                ai_hedge_wasted_seconds.labels(provider=name).observe(
+                    _account(task, "cancelled")
+                )
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        assert last_error is not None
+        raise last_error
+
+    async def _attempt_provider(
+        self,
+        provider_name: str,
+        provider: Callable[[], Awaitable[str]],
+        index: int,
+        total_providers: int,
+        route: str,
+    ) -> str:
+        """Call one provider with retries and backoff, honouring its circuit."""
+
+        provider_label = self._get_provider_label(provider_name)
+        cooldown_key = (provider_label, route)
+        last_error: Exception | None = None
+        backoff = 1
+        for attempt in range(1, self._max_retries + 1):
+            start = perf_counter()
+            try:
+                timeout_seconds = PROVIDER_TIMEOUTS.get(provider_name, 10.0)
+                response = await asyncio.wait_for(provider(), timeout=timeout_seconds)
+                if response and response.strip():
                     elapsed = perf_counter() - start
                     duration_ms = elapsed * 1000
                     ai_latency_seconds.labels(provider=provider_name).observe(
                         duration_ms / 1000
                     )
-                    ai_requests_total.labels(outcome="error").inc()
-                    ai_failures_total.labels(
-                        provider=provider_name,
-                        error_type=exc.__class__.__name__,
-                    ).inc()
-                    self._record_provider_status(provider_name, route, "error")
-                    circuit = self._register_failure(provider_name, exc)
-                    reason = getattr(exc, "ai_reason", None)
-                    if reason == "rate_limited":
-                        cooldown_seconds = self._cooldown_durations.get(route, 5.0)
-                        self._cooldowns[cooldown_key] = (
-                            time.monotonic() + cooldown_seconds
-                        )
-                    logger.warning(
-                        "Provider %s attempt %d failed: %s",
-                        provider_name,
-                        attempt,
-                        exc,
-                    )
-                    fallback_flag = (
-                        attempt >= self._max_retries and index < total_providers - 1
-                    )
+                    ai_requests_total.labels(outcome="success").inc()
+                    self._record_provider_status(provider_name, route, "success")
+                    self._reset_circuit(provider_name)
                     self._log_provider_call(
                         provider_name,
-                        False,
+                        True,
                         duration_ms,
-                        fallback_flag,
+                        index > 0,
                     )
-                    if circuit.state == "open":
-                        logger.error(
-                            "Provider %s circuit breaker opened after %d failures",
-                            provider_name,
-                            circuit.failure_count,
-                        )
-                        break
                     self._handle_adaptive_timeout(
                         provider_name, provider_label, elapsed, route
                     )
-                    if attempt < self._max_retries:
-                        await asyncio.sleep(backoff)
-                        backoff *= 2
-                    else:
-                        logger.error(
-                            "Provider %s exhausted retries after %d attempts",
-                            provider_name,
-                            attempt,
-                        )
-                        break
-
-            if index < total_providers - 1:
-                AI_PROVIDER_FAILOVER_TOTAL.labels(provider=provider_name).inc()
-                next_provider = providers[index + 1][0]
-                ai_fallbacks_total.labels(
-                    from_provider=provider_name,
-                    to_provider=next_provider,
+                    return response
+                raise ValueError(f"Respuesta vacía de {provider_name}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                last_error = exc
+                elapsed = perf_counter() - start
+                duration_ms = elapsed * 1000
+                ai_latency_seconds.labels(provider=provider_name).observe(
+                    duration_ms / 1000
+                )
+                ai_requests_total.labels(outcome="error").inc()
+                ai_failures_total.labels(
+                    provider=provider_name,
+                    error_type=exc.__class__.__name__,
                 ).inc()
-                self._record_provider_fallback(provider_name, next_provider, route)
+                self._record_provider_status(provider_name, route, "error")
+                circuit = self._register_failure(provider_name, exc)
+                reason = getattr(exc, "ai_reason", None)
+                if reason == "rate_limited":
+                    cooldown_seconds = self._cooldown_durations.get(route, 5.0)
+                    self._cooldowns[cooldown_key] = time.monotonic() + cooldown_seconds
+                logger.warning(
+                    "Provider %s attempt %d failed: %s",
+                    provider_name,
+                    attempt,
+                    exc,
+                )
+                fallback_flag = (
+                    attempt >= self._max_retries and index < total_providers - 1
+                )
+                self._log_provider_call(
+                    provider_name,
+                    False,
+                    duration_ms,
+                    fallback_flag,
+                )
+                if circuit.state == "open":
+                    logger.error(
+                        "Provider %s circuit breaker opened after %d failures",
+                        provider_name,
+                        circuit.failure_count,
+                    )
+                    break
+                self._handle_adaptive_timeout(
+                    provider_name, provider_label, elapsed, route
+                )
+                if attempt < self._max_retries:
+                    await asyncio.sleep(backoff)
+                    backoff *= 2
+                else:
+                    logger.error(
+                        "Provider %s exhausted retries after %d attempts",
+                        provider_name,
+                        attempt,
+                    )
+                    break
+        if last_error is None:
+            raise RuntimeError(f"{provider_name} was not attempted")
+        raise last_error
 
-        if last_error:
-            raise last_error
-        raise RuntimeError("No providers available")
+    @staticmethod
+    def _huggingface_loading_seconds(body: str) -> float:
+        """Skip window for a 503, from the ``estimated_time`` HF reports."""
+
+        try:
+            estimated = float(json.loads(body).get("estimated_time"))
+        except (AttributeError, TypeError, ValueError):
+            estimated = _HF_LOADING_DEFAULT_SECONDS
+        if not math.isfinite(estimated):
+            estimated = _HF_LOADING_DEFAULT_SECONDS
+        return min(max(estimated, 0.0), model_availability.ttl_seconds)
 
     async def _call_huggingface(self, message: str, context: dict[str, Any]) -> str:
         if not Config.HUGGINGFACE_API_KEY:
@@ -1091,10 +1406,18 @@ class AIService:
 
         provider_label = "HuggingFace"
         route = get_current_route()
+        if model_availability.is_unavailable(f"huggingface:{model}"):
+            ai_provider_failures_total.labels(
+                provider_label, "model_unavailable", route
+            ).inc()
+            error = RuntimeError(f"Modelo {model} no disponible en HuggingFace")
+            error.ai_reason = "model_unavailable"
+            error.ai_status_code = 503
+            raise error
         start = time.perf_counter()
         data: Any | None = None
         try:
-            async with aiohttp.ClientSession() as session:
+            async with provider_clients.session("huggingface") as session:
                 async with session.post(
                     url, headers=headers, json=payload, timeout=30
                 ) as response:
@@ -1102,6 +1425,15 @@ class AIService:
                     if status_code != 200:
                         error_body = await response.text()
                         reason = self._map_http_reason(status_code)
+                        if status_code == 404:
+                            # QA: modelo inexistente; evitar reintentos durante el TTL
+                            model_availability.mark_unavailable(f"huggingface:{model}")
+                        elif status_code == 503:
+                            # Cargándose o saturado: sólo lo que HF estima que tarda.
+                            model_availability.mark_unavailable(
+                                f"huggingface:{model}",
+                                seconds=self._huggingface_loading_seconds(error_body),
+                            )
                         duration = time.perf_counter() - start
                         ai_provider_latency_seconds.labels(
                             provider_label, route
@@ -1267,20 +1599,13 @@ class AIService:
         model = Config.OLLAMA_MODEL or "llama3"
         prompt = self._build_prompt(message, context)
 
-        async with aiohttp.ClientSession() as session:
-            # Verificar que el servidor de Ollama esté disponible y que el modelo exista
-            async with session.get(f"{host}/api/tags", timeout=5) as response:
-                if response.status != 200:
-                    body = await response.text()
-                    raise RuntimeError(f"Ollama disponibilidad fallida: {body}")
-
-                tags = await response.json()
-                models = tags.get("models") if isinstance(tags, dict) else None
-                if isinstance(models, list) and not any(
-                    isinstance(item, dict) and item.get("name") == model
-                    for item in models
-                ):
-                    raise RuntimeError(f"Modelo {model} no disponible en Ollama")
+        async with provider_clients.session("ollama") as session:
+            # Verificar que el modelo exista (listado cacheado con TTL por host)
+            available = await model_availability.models(
+                f"ollama:{host}", lambda: self._list_ollama_models(host)
+            )
+            if available is not None and model not in available:
+                raise RuntimeError(f"Modelo {model} no disponible en Ollama")
 
             payload = {
                 "model": model,
@@ -1303,6 +1628,63 @@ class AIService:
 
         raise ValueError("Respuesta vacía de Ollama")
 
+    async def _list_ollama_models(self, host: str) -> frozenset[str] | None:
+        async with provider_clients.session("ollama") as session:
+            async with session.get(f"{host}/api/tags", timeout=5) as response:
+                if response.status != 200:
+                    body = await response.text()
+                    raise RuntimeError(f"Ollama disponibilidad fallida: {body}")
+
+                tags = await response.json()
+        models = tags.get("models") if isinstance(tags, dict) else None
+        if not isinstance(models, list):
+            return None
+        return frozenset(
+            item["name"]
+            for item in models
+            if isinstance(item, dict) and isinstance(item.get("name"), str)
+        )
+
+    async def _stream_ollama(
+        self, message: str, context: dict[str, Any]
+    ) -> AsyncIterator[str]:
+        """Consume la respuesta NDJSON de Ollama (``stream: True``) por partes."""
+        host = (
+            Config.OLLAMA_HOST.rstrip("/")
+            if Config.OLLAMA_HOST
+            else "http://localhost:11434"
+        )
+        payload = {
+            "model": Config.OLLAMA_MODEL or "llama3",
+            "prompt": self._build_prompt(message, context),
+            "stream": True,
+        }
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=5, sock_read=30)
+
+        async with provider_clients.session("ollama") as session:
+            async with session.post(
+                f"{host}/api/generate", json=payload, timeout=timeout
+            ) as response:
+                if response.status != 200:
+                    body = await response.text()
+                    raise RuntimeError(f"Error generando respuesta de Ollama: {body}")
+
+                async for raw_line in response.content:
+                    line = raw_line.strip()
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if data.get("error"):
+                        raise RuntimeError(f"Ollama: {data['error']}")
+                    token = data.get("response")
+                    if token:
+                        yield token
+                    if data.get("done"):
+                        break
+
     def _build_prompt(self, message: str, context: dict[str, Any]) -> str:
         if not (message or "").strip():
             raise ValueError("El mensaje no puede estar vacío")
@@ -1322,11 +1704,28 @@ class AIService:
                     f"Indicadores técnicos: {indicator_data}"
                 )  # [Codex] nuevo
 
+            history_summary = context.get("history_summary")
+            if history_summary:
+                prompt_lines.append(f"Resumen de la conversación:\n{history_summary}")
+
+            history = context.get("history")
+            if isinstance(history, list) and history:
+                prompt_lines.append("Historial reciente:")
+                prompt_lines.extend(
+                    (
+                        f"{item.get('role', 'user')}: {item.get('content', '')}"
+                        if isinstance(item, dict)
+                        else str(item)
+                    )
+                    for item in history
+                )
+
             other_context = {
                 key: value
                 for key, value in context.items()
-                if key not in {"market_data", "indicator_data"}
-                # [Codex] cambiado - excluir indicadores ya agregados
+                if key
+                not in {"market_data", "indicator_data", "history", "history_summary"}
+                # [Codex] cambiado - excluir indicadores e historial ya agregados
             }
             if other_context:
                 prompt_lines.append(f"Contexto adicional: {other_context}")
@@ -1388,6 +1787,80 @@ class AIService:
             "use_market_data": use_market_data,
         }
 
+    async def _gather_enrichment(
+        self, fetchers: dict[str, Callable[[], Awaitable[Any]]]
+    ) -> dict[str, Any]:
+        """Run every context fetcher concurrently under one latency budget.
+
+        Each source also has its own deadline. Whatever finished when the
+        budget expires is returned; late or failing sources are dropped.
+        """
+
+        if not fetchers:
+            return {}
+        budget = max(Config.AI_ENRICHMENT_BUDGET_MS, 1) / 1000
+        deadlines = _parse_source_timeouts(Config.AI_ENRICHMENT_SOURCE_TIMEOUTS_MS)
+        tasks = {
+            asyncio.create_task(
+                self._timed_enrichment(
+                    source, fetch, min(deadlines.get(source, budget), budget)
+                )
+            ): source
+            for source, fetch in fetchers.items()
+        }
+        done: set[asyncio.Task] = set()
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=budget)
+        finally:
+            # También si cancelan al llamador: ninguna fuente queda huérfana.
+            pending = [task for task in tasks if task not in done]
+            for task in pending:
+                task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.info(
+                json.dumps(
+                    {
+                        "ai_event": "enrichment_budget_exceeded",
+                        "sources": sorted(tasks[task] for task in pending),
+                        "budget_ms": round(budget * 1000),
+                    }
+                )
+            )
+        return {
+            tasks[task]: task.result()
+            for task in done
+            if not task.cancelled() and task.result() is not None
+        }
+
+    async def _timed_enrichment(
+        self, source: str, fetch: Callable[[], Awaitable[Any]], timeout: float
+    ) -> Any:
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            result = await asyncio.wait_for(fetch(), timeout=timeout)
+            if not result:
+                outcome = "empty"
+            return result
+        except asyncio.CancelledError:
+            outcome = "budget_exceeded"
+            raise
+        except TimeoutError:
+            outcome = "timeout"
+            logger.warning(
+                "Enrichment source %s timed out after %.2fs", source, timeout
+            )
+            return None
+        except Exception:
+            outcome = "error"
+            logger.exception("Error collecting %s context", source)
+            return None
+        finally:
+            ai_enrichment_duration_seconds.labels(
+                source=source, outcome=outcome
+            ).observe(time.perf_counter() - started)
+
     async def get_market_context(self, message: str) -> dict[str, Any]:
         """Obtener contexto de mercado relevante"""
         if not self.market_service:
@@ -1397,21 +1870,27 @@ class AIService:
         symbols = self.extract_symbols(message)
 
         if symbols:
-            market_data = {}
-            for symbol in symbols:
+            market_service = self.market_service
+
+            async def _quote(symbol: str) -> dict[str, Any] | None:
                 try:
-                    asset_type = await self.market_service.detect_asset_type(symbol)
-                    price_data = await self.market_service.get_price(symbol, asset_type)
-                    if price_data:
-                        market_data[symbol] = {
-                            "price": price_data.get("price", "N/A"),
-                            "change": price_data.get("change", "N/A"),
-                            "raw_price": price_data.get("raw_price", 0),
-                            "raw_change": price_data.get("raw_change", 0),
-                        }
+                    asset_type = await market_service.detect_asset_type(symbol)
+                    return await market_service.get_price(symbol, asset_type)
                 except Exception as e:
                     print(f"Error getting price for {symbol}: {e}")
-                    continue
+                    return None
+
+            # QA: cotizaciones de todos los símbolos en paralelo
+            quotes = await asyncio.gather(*(_quote(symbol) for symbol in symbols))
+            market_data = {}
+            for symbol, price_data in zip(symbols, quotes, strict=True):
+                if price_data:
+                    market_data[symbol] = {
+                        "price": price_data.get("price", "N/A"),
+                        "change": price_data.get("change", "N/A"),
+                        "raw_price": price_data.get("raw_price", 0),
+                        "raw_change": price_data.get("raw_change", 0),
+                    }
 
             if market_data:
                 context["market_data"] = market_data
@@ -1420,7 +1899,7 @@ class AIService:
         return context
 
     async def _collect_indicator_snapshots(self, message: str) -> dict[str, Any]:
-        """Busca símbolos + intervalos y consulta /api/markets/indicators con datos reales."""
+        """Busca símbolos + intervalos y calcula indicadores en proceso."""
         # [Codex] nuevo
         interval = self._extract_interval(message)
         if not interval:
@@ -1430,76 +1909,59 @@ class AIService:
         if not symbols:
             return {}
 
-        tasks = []
-        prepared: list[tuple[str, str]] = []
-
-        session_timeout = aiohttp.ClientTimeout(total=20)
-        async with aiohttp.ClientSession(timeout=session_timeout) as session:
-            for symbol in symbols[:2]:
-                # [Codex] nuevo - limitamos a dos símbolos para evitar latencia
-                asset_type = await self._resolve_asset_type(symbol)
-                if asset_type is None:
-                    continue
-                normalized = self._normalize_symbol_for_indicators(asset_type, symbol)
-                url = urljoin(self._api_base_url + "/", "api/markets/indicators")
-                params = {
-                    "type": asset_type,
-                    "symbol": normalized,
-                    "interval": interval,
-                    "limit": "300",
-                    "include_atr": "true",
-                    "atr_period": "14",
-                    "include_stoch_rsi": "true",
-                    "stoch_rsi_period": "14",
-                    "stoch_rsi_k": "3",
-                    "stoch_rsi_d": "3",
-                    "include_ichimoku": "true",
-                    "ichimoku_conversion": "9",
-                    "ichimoku_base": "26",
-                    "ichimoku_span_b": "52",
-                    "include_vwap": "true",
-                }
-                tasks.append(self._fetch_indicator_snapshot(session, url, params))
-                prepared.append((symbol.upper(), asset_type))
+        # [Codex] nuevo - limitamos a dos símbolos para evitar latencia
+        candidates = symbols[:2]
+        asset_types = await asyncio.gather(
+            *(self._resolve_asset_type(symbol) for symbol in candidates)
+        )
 
-            if not tasks:
-                return {}
+        requests: list[tuple[str, IndicatorRequest]] = []
+        for symbol, asset_type in zip(candidates, asset_types, strict=True):
+            if asset_type is None:
+                continue
+            # QA: sin loopback HTTP; comparte velas cacheadas con /api/markets
+            requests.append(
+                (
+                    symbol.upper(),
+                    IndicatorRequest(
+                        asset_type=asset_type,
+                        symbol=self._normalize_symbol_for_indicators(
+                            asset_type, symbol
+                        ),
+                        interval=interval,
+                        limit=300,
+                        include_atr=True,
+                        include_stoch_rsi=True,
+                        include_ichimoku=True,
+                        include_vwap=True,
+                    ),
+                )
+            )
+        if not requests:
+            return {}
 
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(
+            *(self._indicators.get_bundle(request) for _, request in requests),
+            return_exceptions=True,
+        )
 
         indicator_map: dict[str, Any] = {}
-        for (symbol_key, asset_type), result in zip(prepared, results, strict=False):
+        for (symbol_key, request), result in zip(requests, results, strict=True):
             if isinstance(result, Exception):
                 logger.warning(
                     "Indicator snapshot failed for %s: %s", symbol_key, result
                 )
                 continue
-            if not isinstance(result, dict):
+            if not isinstance(result, IndicatorBundle):
                 continue
             indicator_map[symbol_key] = {
-                "asset_type": asset_type,
-                "interval": result.get("interval"),
-                "source": result.get("source"),
-                "indicators": result.get("indicators", {}),
+                "asset_type": request.asset_type,
+                "interval": result.interval,
+                "source": result.source,
+                "indicators": result.indicators,
             }
         return indicator_map
 
-    async def _fetch_indicator_snapshot(
-        self,
-        session: aiohttp.ClientSession,
-        url: str,
-        params: dict[str, str],
-    ) -> dict[str, Any]:
-        """Realiza la llamada HTTP para recuperar indicadores técnicos."""
-        # [Codex] nuevo
-        async with session.get(url, params=params) as response:
-            if response.status != 200:
-                body = await response.text()
-                raise RuntimeError(
-                    f"Indicadores {params.get('symbol')} -> {response.status}: {body[:200]}"
-                )
-            return await response.json()
-
     async def _collect_news_highlights(
         self, symbols: list[str], limit: int = 3
     ) -> list[dict[str, Any]]:
@@ -1554,28 +2016,36 @@ class AIService:
         except ImportError:  # pragma: no cover - evitar fallos en modo standalone
             return []
 
+        candidates = symbols[:2]
+        results = await asyncio.gather(
+            *(
+                shared_alert_service.suggest_alert_condition(symbol, interval)
+                for symbol in candidates
+            ),
+            return_exceptions=True,
+        )
         suggestions: list[dict[str, str]] = []
-        for symbol in symbols[:2]:
-            try:
-                result = await shared_alert_service.suggest_alert_condition(
-                    symbol, interval
-                )
-                if result:
-                    payload = {"symbol": symbol, **result}
-                    suggestions.append(payload)
-            except Exception as exc:
-                logger.warning("Alert suggestion failed for %s: %s", symbol, exc)
+        for symbol, result in zip(candidates, results, strict=True):
+            if isinstance(result, Exception):
+                logger.warning("Alert suggestion failed for %s: %s", symbol, result)
+                continue
+            if result:
+                payload = {"symbol": symbol, **result}
+                suggestions.append(payload)
         return suggestions
 
     async def _collect_forex_quotes(self, pairs: list[str]) -> list[str]:
         if forex_service is None:
             return []
+        candidates = pairs[:3]
+        quotes = await asyncio.gather(
+            *(forex_service.get_quote(pair) for pair in candidates),
+            return_exceptions=True,
+        )
         summaries: list[str] = []
-        for pair in pairs[:3]:
-            try:
-                quote = await forex_service.get_quote(pair)
-            except Exception as exc:
-                logger.warning("Forex quote failed for %s: %s", pair, exc)
+        for pair, quote in zip(candidates, quotes, strict=True):
+            if isinstance(quote, Exception):
+                logger.warning("Forex quote failed for %s: %s", pair, quote)
                 continue
             if not quote:
                 continue
@@ -1793,19 +2263,7 @@ class AIService:
 
     def extract_symbols(self, message: str) -> list:
         """Extraer símbolos de activos del mensaje"""
-        # Símbolos de cripto comunes
-        crypto_symbols = {
-            "BTC",
-            "ETH",
-            "BNB",
-            "XRP",
-            "ADA",
-            "SOL",
-            "DOT",
-            "AVAX",
-            "MATIC",
-            "DOGE",
-        }
+        crypto_symbols = self.CRYPTO_SYMBOLS
 
         # Patrones regex para detectar símbolos
         patterns = [
@@ -2065,7 +2523,7 @@ Mientras tanto, te sugiero:
                     cached_result = await pending_prompts[pending_key]
 
         async def _execute_context() -> dict[str, Any]:
-            sentiment = sentiment_service.analyze_sentiment(message)
+            sentiment = await sentiment_service.analyze_sentiment_batched(message)
             base_context: dict[str, Any] | None = None
             if history_context:
                 base_context = {"history": history_context}
@@ -2140,136 +2598,168 @@ Mientras tanto, te sugiero:
 
         return cached_result
 
+    def _streaming_providers(
+        self, prompt: str
+    ) -> list[tuple[str, Callable[[], AsyncIterator[str]]]]:
+        provider_mode = os.getenv("AI_PROVIDER", "mistral").lower()
+        if provider_mode == "mock":
+            return []
+        providers: list[tuple[str, Callable[[], AsyncIterator[str]]]] = []
+        # A diferencia de _mistral_available, aquí exigimos credenciales reales.
+        if getattr(mistral_service, "api_key", None):
+            providers.append(
+                ("mistral", lambda: mistral_service.stream_financial_response(prompt))
+            )
+        if Config.OLLAMA_HOST:
+            providers.append(("ollama", lambda: self._stream_ollama(prompt, {})))
+        return providers
+
+    async def _stream_provider_tokens(
+        self, prompt: str
+    ) -> AsyncIterator[tuple[str, str]]:
+        """Yield ``(provider, token)`` pairs as the first working provider emits them.
+
+        Providers are only swapped before their first token; a failure after
+        that propagates. Without streaming providers the prompt is chunked
+        locally, as before; when configured providers all fail or are cooling
+        down :class:`StreamProvidersUnavailableError` is raised instead.
+        """
+
+        providers = self._streaming_providers(prompt)
+        previous: str | None = None
+        for provider, open_stream in providers:
+            if not self._ready_for_attempt(provider):
+                self._record_provider_fallback(provider, "cooldown_skip", "stream")
+                continue
+            if previous is not None:
+                self._record_provider_fallback(previous, provider, "stream")
+            stream = open_stream()
+            emitted = False
+            try:
+                async for token in stream:
+                    emitted = True
+                    yield provider, token
+                if not emitted:
+                    raise ValueError(f"Respuesta vacía de {provider}")
+            except Exception as exc:
+                self._register_failure(provider, exc)
+                if emitted:
+                    raise
+                logger.warning(
+                    json.dumps(
+                        {
+                            "ai_event": "stream_provider_failed",
+                            "provider": provider,
+                            "error_type": exc.__class__.__name__,
+                            "message": str(exc),
+                        }
+                    )
+                )
+                previous = provider
+                continue
+            finally:
+                await stream.aclose()
+            self._reset_circuit(provider)
+            return
+
+        if providers:
+            # Nunca devolvemos el propio prompt como si fuera la respuesta.
+            raise StreamProvidersUnavailableError(
+                "No hay proveedores de streaming disponibles"
+            )
+        segments = re.findall(r"\S+\s*", prompt) or [prompt]
+        for token in segments:
+            yield "local", token
+
+    @staticmethod
+    def _log_stream_chunk(token: str, start_time: float, **extra: Any) -> str:
+        elapsed_ms = (perf_counter() - start_time) * 1000.0
+        logger.info(
+            json.dumps(
+                {
+                    "ai_event": "stream_chunk",
+                    "length": len(token),
+                    "elapsed_ms": round(elapsed_ms, 2),
+                    **extra,
+                }
+            )
+        )
+        ai_stream_tokens_total.inc(len(token))
+        return token
+
     async def stream_generate(self, prompt: str):
-        """Simular generación de texto en streaming."""
+        """Emitir la respuesta en streaming a medida que el proveedor genera tokens."""
 
         start_time = perf_counter()
         ai_conversations_active_total.inc()
         cache_service = self._get_ai_cache()
         route = "stream"
-        pending_prompts = getattr(self, "_pending_prompts", self._pending_prompts)
-        self._pending_prompts = pending_prompts
+        pending_streams = self._pending_streams
         prompt_key = (prompt or "").strip()
-        pending_key = f"{route}:{prompt_key}" if prompt_key else None
+        cache_identity = (
+            canonical_prompt(
+                prompt_key,
+                self._analyze_message(prompt_key),
+                known_symbols=self.CRYPTO_SYMBOLS,
+                bucket_seconds=Config.AI_CACHE_MARKET_BUCKET_SECONDS,
+            )
+            if prompt_key
+            else None
+        )
+        pending_key = f"{route}:{cache_identity}" if cache_identity else None
         chunks_collected: list[str] = []
-        used_cache = False
-        future: asyncio.Future[dict[str, Any]] | None = None
+        completed = False
+        tap: _StreamTap | None = None
 
         try:
             if not prompt_key:
                 raise ValueError("El mensaje no puede estar vacío")
 
-            if prompt_key:
-                cached_stream = await cache_service.get(route, prompt_key)
-                if (
-                    cached_stream
-                    and isinstance(cached_stream, dict)
-                    and isinstance(cached_stream.get("chunks"), list)
-                ):
-                    logger.info(
-                        json.dumps(
-                            {
-                                "ai_event": "cache_hit",
-                                "route": route,
-                            }
-                        )
-                    )
-                    used_cache = True
-                    for token in cached_stream["chunks"]:
-                        await asyncio.sleep(0.05)
-                        elapsed_ms = (perf_counter() - start_time) * 1000.0
-                        logger.info(
-                            json.dumps(
-                                {
-                                    "ai_event": "stream_chunk",
-                                    "length": len(token),
-                                    "elapsed_ms": round(elapsed_ms, 2),
-                                }
-                            )
-                        )
-                        ai_stream_tokens_total.inc(len(token))
-                        yield token
-                    return
+            cached_stream = await cache_service.get(route, cache_identity)
+            if (
+                cached_stream
+                and isinstance(cached_stream, dict)
+                and isinstance(cached_stream.get("chunks"), list)
+            ):
+                logger.info(json.dumps({"ai_event": "cache_hit", "route": route}))
+                for token in cached_stream["chunks"]:
+                    yield self._log_stream_chunk(token, start_time)
+                return
+            logger.info(json.dumps({"ai_event": "cache_miss", "route": route}))
+
+            if pending_key in pending_streams:
                 logger.info(
                     json.dumps(
                         {
-                            "ai_event": "cache_miss",
+                            "ai_event": "deduplicated_request",
                             "route": route,
+                            "prompt": prompt_key[:50],
                         }
                     )
                 )
-                if pending_key and pending_key in pending_prompts:
-                    logger.info(
-                        json.dumps(
-                            {
-                                "ai_event": "deduplicated_request",
-                                "route": route,
-                                "prompt": prompt_key[:50],
-                            }
-                        )
-                    )
-                    cached_stream = await pending_prompts[pending_key]
-                    used_cache = True
-                    for token in cached_stream.get("chunks", []):
-                        await asyncio.sleep(0.05)
-                        elapsed_ms = (perf_counter() - start_time) * 1000.0
-                        logger.info(
-                            json.dumps(
-                                {
-                                    "ai_event": "stream_chunk",
-                                    "length": len(token),
-                                    "elapsed_ms": round(elapsed_ms, 2),
-                                }
-                            )
-                        )
-                        ai_stream_tokens_total.inc(len(token))
-                        yield token
-                    return
-
-            if pending_key:
-                future = asyncio.get_running_loop().create_future()
-                pending_prompts[pending_key] = future
-
-            segments = re.findall(r"\S+\s*", prompt)
-            if not segments:
-                segments = [prompt]
-
-            for token in segments:
-                await asyncio.sleep(0.05)
-                elapsed_ms = (perf_counter() - start_time) * 1000.0
-                logger.info(
-                    json.dumps(
-                        {
-                            "ai_event": "stream_chunk",
-                            "length": len(token),
-                            "elapsed_ms": round(elapsed_ms, 2),
-                        }
+                # QA: seguimos el stream en curso en vivo en lugar de esperar a que termine
+                async for token in pending_streams[pending_key].follow():
+                    yield self._log_stream_chunk(token, start_time)
+                return
+
+            tap = pending_streams[pending_key] = _StreamTap()
+            async for provider, token in self._stream_provider_tokens(prompt_key):
+                if not chunks_collected:
+                    ai_stream_first_token_seconds.labels(provider=provider).observe(
+                        perf_counter() - start_time
                     )
-                )
-                ai_stream_tokens_total.inc(len(token))
                 chunks_collected.append(token)
-                yield token
-
-            completion_chunk = json.dumps({"error": False, "done": True})
-            ai_stream_tokens_total.inc(len(completion_chunk))
-            elapsed_ms = (perf_counter() - start_time) * 1000.0
-            logger.info(
-                json.dumps(
-                    {
-                        "ai_event": "stream_chunk",
-                        "length": len(completion_chunk),
-                        "elapsed_ms": round(elapsed_ms, 2),
-                        "type": "completion",
-                    }
-                )
+                tap.push(token)
+                yield self._log_stream_chunk(token, start_time)
+
+            completed = True
+            chunks_collected.append(STREAM_DONE_CHUNK)
+            tap.push(STREAM_DONE_CHUNK)
+            yield self._log_stream_chunk(
+                STREAM_DONE_CHUNK, start_time, type="completion"
             )
-            chunks_collected.append(completion_chunk)
-            yield completion_chunk
-
-            if future and not future.done():
-                future.set_result({"chunks": list(chunks_collected)})
 
-        except (TimeoutError, ValueError) as exc:
+        except (TimeoutError, ValueError, StreamProvidersUnavailableError) as exc:
             logger.warning(
                 json.dumps(
                     {
@@ -2279,13 +2769,11 @@ Mientras tanto, te sugiero:
                     }
                 )
             )
-            error_chunk = json.dumps({"error": True, "message": str(exc)})
+            error_chunk = StreamErrorChunk(str(exc))
             ai_stream_tokens_total.inc(len(error_chunk))
-            chunks_collected.append(error_chunk)
-            if future and not future.done():
-                future.set_result({"chunks": list(chunks_collected)})
+            if tap is not None:
+                tap.push(error_chunk)
             yield error_chunk
-            used_cache = True
             return
 
         except Exception as exc:  # pragma: no cover - defensivo
@@ -2299,26 +2787,27 @@ Mientras tanto, te sugiero:
                 ),
                 exc_info=True,
             )
-            error_chunk = json.dumps(
-                {"error": True, "message": "Error inesperado generando respuesta"}
-            )
+            error_chunk = StreamErrorChunk("Error inesperado generando respuesta")
             ai_stream_tokens_total.inc(len(error_chunk))
-            chunks_collected.append(error_chunk)
-            if future and not future.done():
-                future.set_result({"chunks": list(chunks_collected)})
+            if tap is not None:
+                tap.push(error_chunk)
             yield error_chunk
-            used_cache = True
             return
 
         finally:
             total_duration = perf_counter() - start_time
             ai_conversations_active_total.dec()
             ai_stream_duration_seconds.observe(total_duration)
-            if not used_cache and prompt_key and chunks_collected:
+            if tap is not None:
+                tap.close()
+                if pending_streams.get(pending_key) is tap:
+                    pending_streams.pop(pending_key, None)
+            # Sólo se cachean streams completos; nunca respuestas cortadas.
+            if completed:
                 ttl = 3600 if len(prompt_key) < 100 else 600
                 await cache_service.set(
                     route,
-                    prompt_key,
+                    cache_identity,
                     {"chunks": list(chunks_collected)},
                     ttl,
                 )
@@ -2331,10 +2820,6 @@ Mientras tanto, te sugiero:
                         }
                     )
                 )
-            if pending_key and pending_key in pending_prompts:
-                if future and not future.done():
-                    future.set_result({"chunks": list(chunks_collected)})
-                pending_prompts.pop(pending_key, None)
 
     async def generate_insight(self, symbol: str, timeframe: str, profile: str):
         """
@@ -2346,12 +2831,14 @@ Mientras tanto, te sugiero:
 
         try:
             from backend.services.market_service import MarketService
-            from backend.services.sentiment_service import analyze_sentiment
+            from backend.services.sentiment_service import analyze_sentiment_batched
 
             market = MarketService()
             ohlc = await market.get_historical(symbol, timeframe=timeframe)
 
-            sentiment = analyze_sentiment(f"Análisis de {symbol} en {timeframe}")
+            sentiment = await analyze_sentiment_batched(
+                f"Análisis de {symbol} en {timeframe}"
+            )
 
             prompt = (
                 f"Analiza {symbol} ({timeframe}) para un perfil {profile}.\n"
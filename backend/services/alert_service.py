@@ -27,6 +27,7 @@ except ImportError:
     from backend.models import Alert  # type: ignore[no-redef]
     from backend.utils.config import Config  # type: ignore[no-redef]
 
+from backend.database import async_session_factory_for
 from backend.metrics.ai_metrics import alert_notifications_total
 from backend.services import forex_service, market_service
 from backend.services.ai_service import (  # ✅ fix import path (QA 2.0): corregimos namespace para ejecución en Docker
@@ -81,6 +82,7 @@ class AlertService:
         self._job = None
         self._interval = interval_seconds
         self._websocket_manager = None
+        self._outbox = None
         self.is_running = False
         self._telegram_token = telegram_bot_token or Config.TELEGRAM_BOT_TOKEN
         self._telegram_bot = (
@@ -94,6 +96,14 @@ class AlertService:
         """Permite enviar notificaciones en tiempo real mediante websockets."""
         self._websocket_manager = manager
 
+    def register_outbox(self, outbox) -> None:
+        """Entrega los mensajes de Telegram a través de la cola de notificaciones."""
+        self._outbox = outbox
+        outbox.register_channel("telegram", self._handle_telegram_message)
+
+    async def _handle_telegram_message(self, message: dict[str, Any]) -> None:
+        await self._send_telegram_message(message["chat_id"], message["message"])
+
     async def start(self) -> None:
         """Inicia el scheduler si hay base de datos disponible."""
         if self._session_factory is None:
@@ -124,7 +134,7 @@ class AlertService:
         if self._session_factory is None:
             return
 
-        alerts = await asyncio.to_thread(self._fetch_alerts)
+        alerts = await self._fetch_alerts_async()
         if not alerts:
             return
 
@@ -152,6 +162,14 @@ class AlertService:
                 session.expunge(alert)
             return result
 
+    async def _fetch_alerts_async(self) -> list[Alert]:
+        async_factory = async_session_factory_for(self._session_factory)
+        if async_factory is None:
+            return await asyncio.to_thread(self._fetch_alerts)
+        async with async_factory() as session:
+            result = await session.scalars(select(Alert).where(Alert.active.is_(True)))
+            return list(result.all())
+
     async def _resolve_price(self, symbol: str) -> float | None:
         stock = await market_service.get_stock_price(symbol)
         price = _to_float_or_none(stock.get("price") if stock else None)
@@ -196,6 +214,7 @@ class AlertService:
             "comparison": alert.condition,
             "message": message,
         }
+        owner_id = getattr(alert, "user_id", None)
         try:
             await notification_dispatcher.broadcast_event(
                 "alert",
@@ -206,6 +225,8 @@ class AlertService:
                     "message": message,
                     "symbol": alert.asset,
                 },
+                # QA: la alerta sólo llega a su dueño cuando lo conocemos
+                user_ids=[owner_id] if owner_id is not None else None,
             )
             alert_notifications_total.inc()
         except Exception as exc:  # pragma: no cover - avoid breaking alert flow
@@ -219,7 +240,11 @@ class AlertService:
 
         if self._websocket_manager is not None:
             try:
-                await self._websocket_manager.broadcast(payload)
+                if owner_id is not None:
+                    # QA: nunca difundir la alerta de un usuario a otros sockets
+                    await self._websocket_manager.send_to_users([owner_id], payload)
+                else:
+                    await self._websocket_manager.broadcast(payload)
             except Exception as exc:
                 LOGGER.warning("AlertService: error notificando por WebSocket: %s", exc)
 
@@ -261,6 +286,10 @@ class AlertService:
         chat_id = Config.TELEGRAM_DEFAULT_CHAT_ID
         if not chat_id:
             return
+        if self._outbox is not None and await self._outbox.enqueue(
+            "telegram", {"chat_id": chat_id, "message": message}
+        ):
+            return
         try:
             await self._send_telegram_message(chat_id, message)
         except Exception as exc:
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import operator
 import os
 from collections.abc import Callable, Iterable
@@ -11,7 +12,7 @@ from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.orm import Session, sessionmaker
 
-from backend.database import SessionLocal
+from backend.database import SessionLocal, async_session_factory_for
 from backend.models import Alert, AlertDeliveryMethod, PushSubscription, User
 from backend.services import indicators_service
 from backend.services.push_service import push_service
@@ -439,6 +440,18 @@ class AlertsService:
                 session.expunge(alert)
             return results
 
+    async def list_alerts_for_user_async(self, user_id: UUID) -> list[Alert]:
+        async_factory = async_session_factory_for(self._session_factory)
+        if async_factory is None:
+            return await asyncio.to_thread(self.list_alerts_for_user, user_id)
+        async with async_factory() as session:
+            results = await session.scalars(
+                select(Alert)
+                .where(Alert.user_id == user_id)
+                .order_by(Alert.created_at.asc())
+            )
+            return list(results.all())
+
     def toggle_alert(self, user_id: UUID, alert_id: UUID, *, active: bool) -> Alert:
         with self._session_factory() as session:
             alert = self._get_alert(session, user_id, alert_id)
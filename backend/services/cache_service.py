@@ -4,20 +4,49 @@
 # ruff: noqa: I001  # 🧩 Codex fix
 import hashlib  # 🧩 Codex fix
 import json  # 🧩 Codex fix
+import logging
 import os
 import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
 from typing import Any
 
 # ✅ Codex fix: soporte opcional para redis
 try:  # pragma: no cover - redis puede no estar instalado en los tests
-    import redis
+    import redis.asyncio as redis
 except ImportError:  # pragma: no cover
     redis = None  # type: ignore
 
+# QA: serialización/compresión opcionales; json + zlib como respaldo
+try:  # pragma: no cover - dependencia opcional
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None  # type: ignore
+
+try:  # pragma: no cover - dependencia opcional
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
 from backend.metrics.ai_metrics import (  # 🧩 Codex fix
     ai_cache_hit_total as _prom_cache_hit_total,
+    ai_cache_latency_seconds,
+    ai_cache_lookups_total,
     ai_cache_miss_total as _prom_cache_miss_total,
 )
+from backend.services.ai_semantic_cache import PromptIdentity, SemanticPromptIndex
+from backend.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Cabecera de payloads codificados: marcador + serializador + compresión.
+_MAGIC = b"\x01"
+_REDIS_RETRY_SECONDS = 30.0
+_DELETE_IF_LUA = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then "
+    "return redis.call('del', KEYS[1]) end return 0"
+)
 
 
 class _ValueProxy:  # 🧩 Codex fix
@@ -53,47 +82,266 @@ ai_cache_misses_total = _CounterProxy(
 )  # 🧩 Codex fix
 
 
+def encode_payload(value: Any, *, compress_min_bytes: int | None = None) -> bytes:
+    """Serialize ``value`` (msgpack or JSON) and compress it when large."""
+
+    threshold = (
+        Config.AI_CACHE_COMPRESS_MIN_BYTES
+        if compress_min_bytes is None
+        else compress_min_bytes
+    )
+    if msgpack is not None:
+        serializer, body = b"m", msgpack.packb(value, use_bin_type=True)
+    else:
+        serializer, body = b"j", json.dumps(value, ensure_ascii=False).encode()
+
+    codec = b"0"
+    if threshold > 0 and len(body) >= threshold:
+        if zstandard is not None:
+            codec, body = b"s", zstandard.ZstdCompressor(level=3).compress(body)
+        else:
+            codec, body = b"z", zlib.compress(body, 6)
+    return _MAGIC + serializer + codec + body
+
+
+def decode_payload(raw: Any) -> Any:
+    """Inverse of :func:`encode_payload`; plain strings pass through as JSON."""
+
+    if raw is None:
+        return None
+    if isinstance(raw, bytes | bytearray) and raw[:1] == _MAGIC:
+        serializer, codec, body = raw[1:2], raw[2:3], bytes(raw[3:])
+        if codec == b"s":
+            if zstandard is None:  # pragma: no cover - entorno sin zstd
+                return None
+            body = zstandard.ZstdDecompressor().decompress(body)
+        elif codec == b"z":
+            body = zlib.decompress(body)
+        if serializer == b"m":
+            if msgpack is None:  # pragma: no cover - entorno sin msgpack
+                return None
+            return msgpack.unpackb(body, raw=False)
+        return json.loads(body)
+
+    # Compatibilidad con entradas previas guardadas como JSON en texto plano.
+    if isinstance(raw, bytes | bytearray):
+        raw = raw.decode("utf-8", errors="replace")
+    if isinstance(raw, str):
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return raw
+    return raw
+
+
+class _LRUStore(OrderedDict):
+    """Bounded TTL map; evicts the least recently used entry when full."""
+
+    def __init__(self, max_entries: int) -> None:
+        super().__init__()
+        self.max_entries = max(1, max_entries)
+
+    def read(self, key: str) -> Any:
+        entry = super().get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            self.pop(key, None)
+            return None
+        self.move_to_end(key)
+        return value
+
+    def write(self, key: str, value: Any, ex: int | None) -> None:
+        expires_at = time.monotonic() + ex if ex else None
+        self[key] = (expires_at, value)
+        self.move_to_end(key)
+        while len(self) > self.max_entries:
+            self.popitem(last=False)
+
+
 class CacheService:  # ✅ Codex fix: servicio dual Redis/memoria
-    def __init__(self) -> None:
-        url = os.getenv("REDIS_URL", None)
+    """Async cache with pipelined Redis access and a bounded LRU fallback.
+
+    Values are stored encoded (see :func:`encode_payload`) in both backends,
+    so callers always get an independent copy back. When Redis errors the
+    service serves from memory and retries Redis after a short cool-down.
+    """
+
+    def __init__(
+        self, *, url: str | None = None, max_entries: int | None = None
+    ) -> None:
+        url = url if url is not None else os.getenv("REDIS_URL", None)
         testing_mode = bool(os.getenv("PYTEST_CURRENT_TEST"))
+        self.client: _LRUStore = _LRUStore(
+            max_entries if max_entries is not None else Config.AI_CACHE_MAX_ENTRIES
+        )
+        self._redis = None
+        self._redis_retry_at = 0.0
         if url and redis is not None and not testing_mode:
-            self.client = redis.from_url(url, decode_responses=True)
-            self.backend = "redis"
-        else:
-            self.client: dict[str, dict[str, Any]] = {}
-            self.backend = "memory"
-
-    def get(self, key: str):  # ✅ Codex fix: lectura con expiración
-        if self.backend == "redis":
-            return self.client.get(key)
-        entry = self.client.get(key)
-        if not entry:
-            return None
-        expires_at = entry.get("expires_at")
-        if expires_at and expires_at < time.time():
-            self.client.pop(key, None)
+            try:
+                self._redis = redis.from_url(url, decode_responses=False)
+            except Exception as exc:  # pragma: no cover - URL inválida
+                logger.warning("ai_cache_redis_unavailable: %s", exc)
+        self.backend = "redis" if self._redis is not None else "memory"
+
+    def _active_redis(self):
+        if self._redis is None or time.monotonic() < self._redis_retry_at:
             return None
-        return entry.get("value")
+        return self._redis
+
+    def _redis_failed(self, operation: str, exc: Exception) -> None:
+        self._redis_retry_at = time.monotonic() + _REDIS_RETRY_SECONDS
+        logger.warning(
+            json.dumps(
+                {
+                    "ai_event": "cache_redis_error",
+                    "operation": operation,
+                    "error": str(exc),
+                }
+            )
+        )
+
+    async def get_many(self, keys: Iterable[str]) -> list[Any]:
+        """Fetch several keys in a single round trip (``MGET``)."""
+
+        keys = list(keys)
+        if not keys:
+            return []
+        started = time.perf_counter()
+        client = self._active_redis()
+        backend = "redis" if client is not None else "memory"
+        raw_values: list[Any] | None = None
+        if client is not None:
+            try:
+                raw_values = await client.mget(keys)
+            except Exception as exc:
+                self._redis_failed("get", exc)
+                backend = "memory"
+        if raw_values is None:
+            raw_values = [self.client.read(key) for key in keys]
+        values = [decode_payload(raw) for raw in raw_values]
+        ai_cache_latency_seconds.labels(operation="get", backend=backend).observe(
+            time.perf_counter() - started
+        )
+        return values
+
+    async def set_many(self, items: Mapping[str, Any], ex: int | None = None) -> None:
+        """Store several keys in one pipelined round trip."""
 
-    def set(
+        if not items:
+            return
+        started = time.perf_counter()
+        encoded = {key: encode_payload(value) for key, value in items.items()}
+        client = self._active_redis()
+        backend = "memory"
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key, payload in encoded.items():
+                        pipe.set(key, payload, ex=ex)
+                    await pipe.execute()
+                backend = "redis"
+            except Exception as exc:
+                self._redis_failed("set", exc)
+        if backend == "memory":
+            for key, payload in encoded.items():
+                self.client.write(key, payload, ex)
+        ai_cache_latency_seconds.labels(operation="set", backend=backend).observe(
+            time.perf_counter() - started
+        )
+
+    async def get(self, key: str):  # ✅ Codex fix: lectura con expiración
+        (value,) = await self.get_many([key])
+        return value
+
+    async def set(
         self, key: str, value, ex: int | None = None
     ) -> None:  # ✅ Codex fix: escritura con TTL
-        if self.backend == "redis":
-            self.client.set(key, value, ex=ex)
-        else:
-            expires_at = time.time() + ex if ex else None
-            self.client[key] = {"value": value, "expires_at": expires_at}
+        await self.set_many({key: value}, ex=ex)
+
+    async def delete(self, key: str) -> None:
+        client = self._active_redis()
+        if client is not None:
+            try:
+                await client.delete(key)
+            except Exception as exc:
+                self._redis_failed("delete", exc)
+        self.client.pop(key, None)
+
+    async def add(self, key: str, value: Any, ex: float) -> bool:
+        """Store ``value`` only when ``key`` is absent (``SET NX PX``).
+
+        Used as a lease between workers; without Redis it only covers this
+        process.
+        """
+
+        payload = encode_payload(value)
+        client = self._active_redis()
+        if client is not None:
+            try:
+                return bool(
+                    await client.set(key, payload, nx=True, px=max(1, int(ex * 1000)))
+                )
+            except Exception as exc:
+                self._redis_failed("add", exc)
+        if self.client.read(key) is not None:
+            return False
+        self.client.write(key, payload, ex)
+        return True
+
+    async def delete_if(self, key: str, value: Any) -> bool:
+        """Delete ``key`` only while it still holds ``value`` (lease release)."""
+
+        payload = encode_payload(value)
+        client = self._active_redis()
+        if client is not None:
+            try:
+                return bool(await client.eval(_DELETE_IF_LUA, 1, key, payload))
+            except Exception as exc:
+                self._redis_failed("delete", exc)
+        if self.client.read(key) != payload:
+            return False
+        self.client.pop(key, None)
+        return True
+
+    async def incr(self, key: str) -> int:
+        """Atomically increment the integer counter at ``key`` (``INCR``)."""
+
+        client = self._active_redis()
+        if client is not None:
+            try:
+                return int(await client.incr(key))
+            except Exception as exc:
+                self._redis_failed("incr", exc)
+        value = int(decode_payload(self.client.read(key)) or 0) + 1
+        self.client.write(key, encode_payload(value), None)
+        return value
 
 
 cache = CacheService()  # ✅ Codex fix: instancia compartida
 
 
 class AICacheService:
-    """High-level cache helper used by AIService."""
+    """High-level cache helper used by AIService.
+
+    Level 1 is an exact lookup by prompt key. When the prompt is a
+    :class:`PromptIdentity` and a semantic index is configured, a miss falls
+    back to the closest near-duplicate prompt seen in the same scope.
+    """
 
-    def __init__(self, backend: CacheService | None = None) -> None:
+    def __init__(
+        self,
+        backend: CacheService | None = None,
+        *,
+        semantic_index: SemanticPromptIndex | None = None,
+    ) -> None:
         self._cache = backend or cache
+        if semantic_index is None and Config.AI_SEMANTIC_CACHE_ENABLED:
+            semantic_index = SemanticPromptIndex(
+                threshold=Config.AI_SEMANTIC_CACHE_THRESHOLD
+            )
+        self._semantic = semantic_index
 
     @staticmethod
     def _compose_key(route: str, prompt: str) -> str:
@@ -103,22 +351,31 @@ class AICacheService:
 
     async def get(self, route: str, prompt: str):
         key = self._compose_key(route, prompt)
-        payload = self._cache.get(key)
+        payload = await self._cache.get(key)
+        outcome = "hit_exact"
+        if (
+            payload is None
+            and self._semantic is not None
+            and isinstance(prompt, PromptIdentity)
+        ):
+            match = self._semantic.query(route, prompt)
+            if match is not None:
+                payload = await self._cache.get(self._compose_key(route, match[0]))
+                if payload is None:
+                    self._semantic.discard(route, prompt, match[0])
+                else:
+                    outcome = "hit_semantic"
+
         if payload is None:
             ai_cache_misses_total.inc()
+            ai_cache_lookups_total.labels(route=route, outcome="miss").inc()
             return None
         ai_cache_hits_total.inc()
-        if isinstance(payload, str):
-            try:
-                return json.loads(payload)
-            except json.JSONDecodeError:
-                return payload
+        ai_cache_lookups_total.labels(route=route, outcome=outcome).inc()
         return payload
 
     async def set(self, route: str, prompt: str, response, ttl: int) -> None:
         key = self._compose_key(route, prompt)
-        if isinstance(response, dict | list):
-            payload = json.dumps(response)
-        else:
-            payload = response
-        self._cache.set(key, payload, ex=ttl)
+        await self._cache.set(key, response, ex=ttl)
+        if self._semantic is not None and isinstance(prompt, PromptIdentity):
+            self._semantic.add(route, prompt, ttl)
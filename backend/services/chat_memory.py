@@ -0,0 +1,105 @@
+"""Token-budgeted chat history: recent window plus a rolling summary."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from typing import Protocol
+
+# Aproximación barata (~4 caracteres por token) suficiente para presupuestar.
+CHARS_PER_TOKEN = 4
+SUMMARY_LINE_CHARS = 160
+
+
+class HistoryMessage(Protocol):
+    role: str
+    content: str
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used to keep prompts under a budget."""
+
+    if not text:
+        return 0
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+def _summary_line(message: HistoryMessage) -> str:
+    content = " ".join((message.content or "").split())
+    if len(content) > SUMMARY_LINE_CHARS:
+        content = content[: SUMMARY_LINE_CHARS - 1].rstrip() + "…"
+    return f"{message.role}: {content}"
+
+
+def fold_into_summary(
+    summary: str | None,
+    messages: Iterable[HistoryMessage],
+    *,
+    token_budget: int,
+) -> str:
+    """Append ``messages`` to ``summary`` as one short line each.
+
+    Lines are condensed to ``SUMMARY_LINE_CHARS`` and the oldest ones are
+    dropped once the summary exceeds ``token_budget``, so the summary can be
+    refreshed incrementally without ever re-reading the whole session.
+    """
+
+    lines = [line for line in (summary or "").splitlines() if line.strip()]
+    lines.extend(_summary_line(message) for message in messages if message.content)
+    while lines and estimate_tokens("\n".join(lines)) > token_budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def split_history(
+    messages: Sequence[HistoryMessage], *, token_budget: int
+) -> tuple[int, list[dict[str, str]]]:
+    """Return ``(start, window)`` for the newest ``messages`` within ``token_budget``.
+
+    ``start`` is the index of the oldest message in ``window`` (``len(messages)``
+    when nothing fits); everything before it is left out of the prompt and
+    belongs in the summary.
+    """
+
+    window: list[dict[str, str]] = []
+    remaining = token_budget
+    start = len(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        if not message.content:
+            continue
+        cost = estimate_tokens(message.content)
+        if cost > remaining:
+            if not window and remaining > 0:
+                window.append(
+                    {
+                        "role": message.role,
+                        "content": message.content[: remaining * CHARS_PER_TOKEN],
+                    }
+                )
+                start = index
+            break
+        window.append({"role": message.role, "content": message.content})
+        remaining -= cost
+        start = index
+    window.reverse()
+    return start, window
+
+
+def window_history(
+    messages: Sequence[HistoryMessage], *, token_budget: int
+) -> list[dict[str, str]]:
+    """Keep the most recent ``messages`` that fit in ``token_budget``.
+
+    Messages are expected oldest first; the newest message is always kept
+    (truncated if it alone exceeds the budget).
+    """
+
+    return split_history(messages, token_budget=token_budget)[1]
+
+
+__all__ = [
+    "estimate_tokens",
+    "fold_into_summary",
+    "split_history",
+    "window_history",
+]
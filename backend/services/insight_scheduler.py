@@ -0,0 +1,542 @@
+"""Market-driven precompute of AI insights served from a versioned store."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from dataclasses import dataclass, replace
+from typing import Any
+
+from backend.metrics.ai_metrics import ai_insight_refresh_total, ai_insight_served_total
+from backend.services.cache_service import CacheService, cache
+from backend.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+MARKET_SYMBOL = "MARKET"
+MARKET_PROMPT = "Genera un insight breve del mercado actual"
+# Cada cuánto un worker sin lease revisa si el líder ya guardó la versión.
+_LEADER_POLL_SECONDS = 0.25
+
+
+class InsightGenerationError(RuntimeError):
+    """Raised when the generator could not produce an insight."""
+
+
+@dataclass(frozen=True)
+class InsightKey:
+    symbol: str
+    timeframe: str = "1d"
+    profile: str = "investor"
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "symbol", self.symbol.strip().upper())
+        object.__setattr__(self, "timeframe", self.timeframe.strip().lower())
+        object.__setattr__(self, "profile", self.profile.strip().lower())
+
+    @property
+    def cache_key(self) -> str:
+        return f"ai:insight:{self.symbol}:{self.timeframe}:{self.profile}"
+
+
+# Insight general que consume el canal realtime de insights.
+MARKET_INSIGHT_KEY = InsightKey(MARKET_SYMBOL, "1h", "general")
+
+
+@dataclass(frozen=True)
+class InsightRecord:
+    key: InsightKey
+    version: int
+    payload: dict[str, Any]
+    reference_price: float | None
+    generated_at: float
+
+    def to_cache(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "payload": self.payload,
+            "reference_price": self.reference_price,
+            "generated_at": self.generated_at,
+        }
+
+    @classmethod
+    def from_cache(cls, key: InsightKey, raw: Any) -> InsightRecord | None:
+        if not isinstance(raw, dict) or not isinstance(raw.get("payload"), dict):
+            return None
+        try:
+            return cls(
+                key=key,
+                version=int(raw["version"]),
+                payload=raw["payload"],
+                reference_price=raw.get("reference_price"),
+                generated_at=float(raw["generated_at"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+InsightGenerator = Callable[[InsightKey], Awaitable[dict[str, Any]]]
+PriceSource = Callable[[str], Awaitable[float | None]]
+
+
+TokenSink = Callable[[str], Awaitable[None]]
+TokenListener = Callable[[InsightKey, int, str], Awaitable[None]]
+
+
+async def generate_insight_payload(
+    key: InsightKey, on_token: TokenSink | None = None
+) -> dict[str, Any]:
+    """Default generator: the market-wide stream or ``AIService.generate_insight``.
+
+    ``on_token`` receives each token of the market stream as it arrives.
+    """
+
+    from backend.services.ai_service import (
+        STREAM_DONE_CHUNK,
+        StreamErrorChunk,
+        ai_service,
+    )
+
+    if key.symbol != MARKET_SYMBOL:
+        result = await ai_service.generate_insight(
+            symbol=key.symbol, timeframe=key.timeframe, profile=key.profile
+        )
+        if not isinstance(result, dict) or result.get("error"):
+            error = result.get("error") if isinstance(result, dict) else result
+            raise InsightGenerationError(str(error))
+        return result
+
+    chunks: list[str] = []
+    async for chunk in ai_service.stream_generate(MARKET_PROMPT):
+        if chunk == STREAM_DONE_CHUNK:
+            break
+        if isinstance(chunk, StreamErrorChunk):
+            raise InsightGenerationError(chunk.message)
+        chunks.append(chunk)
+        if on_token is not None:
+            await on_token(chunk)
+    return {"symbol": MARKET_SYMBOL, "insight": "".join(chunks).strip()}
+
+
+async def fetch_reference_price(symbol: str) -> float | None:
+    from backend.services.market_service import market_service
+
+    data = await market_service.get_price(symbol)
+    raw_price = data.get("raw_price") if isinstance(data, dict) else None
+    try:
+        return float(raw_price) if raw_price is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class InsightScheduler:
+    """Regenerates tracked insights when their market moves, not per request.
+
+    Keys become tracked when ``/api/ai/insights`` or the realtime channel ask
+    for them and are dropped after ``idle_seconds`` without demand. Every
+    ``poll_seconds`` the scheduler fetches one reference price per symbol and
+    regenerates an insight only when the price moved ``min_move_pct`` since
+    it was generated or it is older than ``max_age_seconds``. Readers always
+    get the stored version; a cold key is generated once (single-flight).
+
+    Workers coordinate through the shared backend: a per-key lease
+    (``SET NX PX``) elects the one worker that generates, versions come from
+    a shared ``INCR`` and the stored version is re-read under the lease, so
+    one market move costs one generation however many workers noticed it.
+    The others adopt the stored record.
+    """
+
+    def __init__(
+        self,
+        generator: InsightGenerator = generate_insight_payload,
+        price_source: PriceSource = fetch_reference_price,
+        *,
+        backend: CacheService | None = None,
+        poll_seconds: float | None = None,
+        min_move_pct: float | None = None,
+        max_age_seconds: float | None = None,
+        idle_seconds: float | None = None,
+        max_tracked: int | None = None,
+        market_reference: str | None = None,
+        lease_seconds: float | None = None,
+    ) -> None:
+        self._generator = generator
+        self._price_source = price_source
+        self._backend = backend if backend is not None else cache
+        self.poll_seconds = (
+            Config.INSIGHT_POLL_SECONDS if poll_seconds is None else poll_seconds
+        )
+        self.min_move_pct = (
+            Config.INSIGHT_MIN_MOVE_PCT if min_move_pct is None else min_move_pct
+        )
+        self.max_age_seconds = (
+            Config.INSIGHT_MAX_AGE_SECONDS
+            if max_age_seconds is None
+            else max_age_seconds
+        )
+        self.idle_seconds = (
+            Config.INSIGHT_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        )
+        self._max_tracked = max(
+            1, Config.INSIGHT_MAX_TRACKED if max_tracked is None else max_tracked
+        )
+        self._market_reference = (
+            market_reference or Config.INSIGHT_MARKET_REFERENCE
+        ).upper()
+        self.lease_seconds = max(
+            1.0,
+            Config.INSIGHT_LEASE_SECONDS if lease_seconds is None else lease_seconds,
+        )
+        self._records: dict[InsightKey, InsightRecord] = {}
+        self._demand: OrderedDict[InsightKey, float] = OrderedDict()
+        self._inflight: dict[InsightKey, asyncio.Task] = {}
+        self._token_listeners: list[TokenListener] = []
+        self._waiters: dict[InsightKey, list[asyncio.Future]] = {}
+        self._background: set[asyncio.Task] = set()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def track(self, key: InsightKey) -> None:
+        self._demand[key] = time.monotonic()
+        self._demand.move_to_end(key)
+        while len(self._demand) > self._max_tracked:
+            self._demand.popitem(last=False)
+
+    def latest(self, key: InsightKey) -> InsightRecord | None:
+        return self._records.get(key)
+
+    def add_token_listener(self, listener: TokenListener) -> None:
+        """Receive ``(key, version, token)`` while this worker generates."""
+
+        self._token_listeners.append(listener)
+
+    def remove_token_listener(self, listener: TokenListener) -> None:
+        with suppress(ValueError):
+            self._token_listeners.remove(listener)
+
+    async def get(self, key: InsightKey) -> InsightRecord:
+        """Latest stored insight for ``key``, generating it on first demand."""
+
+        self.track(key)
+        record = await self._stored(key)
+        if record is None:
+            ai_insight_served_total.labels(source="generated").inc()
+            return await self.refresh(key, reason="cold")
+
+        ai_insight_served_total.labels(source="store").inc()
+        if not self.running and self._is_stale(record):
+            # Sin planificador activo, el propio lector dispara la renovación.
+            self._spawn_refresh(key, "stale")
+        return record
+
+    async def next_version(
+        self, key: InsightKey, *, after: int, timeout: float
+    ) -> InsightRecord | None:
+        """Return the first stored version newer than ``after`` within ``timeout``."""
+
+        self.track(key)
+        record = await self._stored(key)
+        if record is not None and record.version > after:
+            return record
+        if record is None:
+            self._spawn_refresh(key, "cold")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, []).append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout=timeout)
+        except TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(key, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+
+    async def refresh(
+        self,
+        key: InsightKey,
+        *,
+        reason: str,
+        reference_price: float | None = None,
+    ) -> InsightRecord:
+        pending = self._inflight.get(key)
+        if pending is None:
+            # Tarea propia: cancelar a un lector no cancela a los demás.
+            pending = asyncio.create_task(
+                self._refresh_shared(key, reason, reference_price)
+            )
+            self._inflight[key] = pending
+            pending.add_done_callback(
+                lambda task, key=key: self._refresh_done(key, task)
+            )
+        return await asyncio.shield(pending)
+
+    async def _refresh_shared(
+        self, key: InsightKey, reason: str, reference_price: float | None
+    ) -> InsightRecord:
+        known = self._records.get(key)
+        seen = known.version if known else 0
+        lease_key = f"{key.cache_key}:lease"
+        token = uuid.uuid4().hex
+        if not await self._backend.add(lease_key, token, ex=self.lease_seconds):
+            return await self._await_leader(key, lease_key, seen)
+        try:
+            shared = await self._shared(key)
+            if shared is not None and shared.version > seen:
+                # Otro worker ya la regeneró desde nuestra última lectura.
+                return self._adopt(shared)
+            version = max(
+                await self._backend.incr(f"{key.cache_key}:version"),
+                (shared.version if shared else 0) + 1,
+            )
+            payload = await self._generate(key, version)
+            record = InsightRecord(
+                key=key,
+                version=version,
+                payload=payload,
+                reference_price=reference_price,
+                generated_at=time.time(),
+            )
+            self._records[key] = record
+            ai_insight_refresh_total.labels(reason=reason).inc()
+            try:
+                await self._backend.set(
+                    key.cache_key,
+                    record.to_cache(),
+                    ex=int(max(self.max_age_seconds, self.idle_seconds)),
+                )
+            except Exception as exc:  # pragma: no cover - caché best-effort
+                logger.warning("insight_store_failed: %s", exc)
+            self._notify(record)
+            return record
+        finally:
+            with suppress(Exception):
+                await self._backend.delete_if(lease_key, token)
+
+    async def _await_leader(
+        self, key: InsightKey, lease_key: str, seen: int
+    ) -> InsightRecord:
+        deadline = time.monotonic() + self.lease_seconds
+        while True:
+            raw, lease = await self._backend.get_many([key.cache_key, lease_key])
+            record = InsightRecord.from_cache(key, raw)
+            if record is not None and record.version > seen:
+                return self._adopt(record)
+            if lease is None or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(_LEADER_POLL_SECONDS)
+        # El líder falló o tardó demasiado: servimos lo que ya teníamos.
+        known = self._records.get(key)
+        if known is not None:
+            return known
+        raise InsightGenerationError(f"insight {key.cache_key} not generated")
+
+    async def _generate(self, key: InsightKey, version: int) -> dict[str, Any]:
+        listeners = list(self._token_listeners)
+        streams = "on_token" in inspect.signature(self._generator).parameters
+        if not listeners or not streams:
+            return await self._generator(key)
+
+        async def _on_token(token: str) -> None:
+            for listener in listeners:
+                try:
+                    await listener(key, version, token)
+                except Exception as exc:  # pragma: no cover - listener defensivo
+                    logger.debug("insight_token_listener_failed: %s", exc)
+
+        return await self._generator(key, on_token=_on_token)
+
+    def _refresh_done(self, key: InsightKey, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Evita "exception was never retrieved" cuando nadie más esperaba.
+            task.exception()
+
+    async def run_once(self) -> int:
+        """Check the market once and refresh the insights that moved."""
+
+        now = time.monotonic()
+        for key, last_seen in list(self._demand.items()):
+            if now - last_seen > self.idle_seconds:
+                self._demand.pop(key, None)
+        keys = list(self._demand)
+        if not keys:
+            return 0
+
+        await self._adopt_shared(keys)
+        symbols = sorted({self._reference_symbol(key) for key in keys})
+        prices = dict(
+            zip(
+                symbols,
+                await asyncio.gather(*(self._safe_price(s) for s in symbols)),
+                strict=True,
+            )
+        )
+
+        due: list[tuple[InsightKey, str, float | None]] = []
+        for key in keys:
+            price = prices[self._reference_symbol(key)]
+            record = await self._stored(key)
+            if (
+                record is not None
+                and record.reference_price is None
+                and not self._is_stale(record)
+            ):
+                # Generado bajo demanda sin precio: fijamos la referencia sin regenerar.
+                self._records[key] = replace(record, reference_price=price)
+                continue
+            reason = self._refresh_reason(record, price)
+            if reason is not None:
+                due.append((key, reason, price))
+
+        results = await asyncio.gather(
+            *(
+                self.refresh(key, reason=reason, reference_price=price)
+                for key, reason, price in due
+            ),
+            return_exceptions=True,
+        )
+        refreshed = 0
+        for (key, _, _), result in zip(due, results, strict=True):
+            if isinstance(result, Exception):
+                logger.warning(
+                    json.dumps(
+                        {
+                            "ai_event": "insight_refresh_failed",
+                            "symbol": key.symbol,
+                            "error": str(result),
+                        }
+                    )
+                )
+            else:
+                refreshed += 1
+        return refreshed
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._loop(), name="insight-scheduler")
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._task, *self._background) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._background.clear()
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._demand.clear()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pragma: no cover - resiliencia del bucle
+                logger.warning("insight_scheduler_error: %s", exc)
+            await asyncio.sleep(self.poll_seconds)
+
+    async def _stored(self, key: InsightKey) -> InsightRecord | None:
+        record = self._records.get(key)
+        if record is not None:
+            return record
+        # Otro worker pudo haberlo generado: lo adoptamos desde la caché compartida.
+        record = await self._shared(key)
+        if record is not None:
+            self._records[key] = record
+        return record
+
+    async def _shared(self, key: InsightKey) -> InsightRecord | None:
+        try:
+            raw = await self._backend.get(key.cache_key)
+        except Exception:  # pragma: no cover - caché best-effort
+            return None
+        return InsightRecord.from_cache(key, raw)
+
+    async def _adopt_shared(self, keys: list[InsightKey]) -> None:
+        """Pick up versions other workers stored since the last poll."""
+
+        try:
+            raws = await self._backend.get_many([key.cache_key for key in keys])
+        except Exception:  # pragma: no cover - caché best-effort
+            return
+        for key, raw in zip(keys, raws, strict=True):
+            record = InsightRecord.from_cache(key, raw)
+            known = self._records.get(key)
+            if record is not None and (known is None or record.version > known.version):
+                self._adopt(record)
+
+    def _adopt(self, record: InsightRecord) -> InsightRecord:
+        self._records[record.key] = record
+        self._notify(record)
+        return record
+
+    def _refresh_reason(
+        self, record: InsightRecord | None, price: float | None
+    ) -> str | None:
+        if record is None:
+            return "cold"
+        if self._is_stale(record):
+            return "max_age"
+        previous = record.reference_price
+        if price is not None and previous:
+            move_pct = abs(price - previous) / abs(previous) * 100
+            if move_pct >= self.min_move_pct:
+                return "market_move"
+        return None
+
+    def _is_stale(self, record: InsightRecord) -> bool:
+        return time.time() - record.generated_at >= self.max_age_seconds
+
+    def _reference_symbol(self, key: InsightKey) -> str:
+        return self._market_reference if key.symbol == MARKET_SYMBOL else key.symbol
+
+    async def _safe_price(self, symbol: str) -> float | None:
+        try:
+            return await asyncio.wait_for(self._price_source(symbol), timeout=5)
+        except Exception as exc:
+            logger.debug("insight_price_unavailable %s: %s", symbol, exc)
+            return None
+
+    def _spawn_refresh(self, key: InsightKey, reason: str) -> None:
+        if key in self._inflight:
+            return
+
+        async def _run() -> None:
+            with suppress(Exception):
+                await self.refresh(key, reason=reason)
+
+        task = asyncio.create_task(_run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _notify(self, record: InsightRecord) -> None:
+        for waiter in self._waiters.pop(record.key, []):
+            if not waiter.done():
+                waiter.set_result(record)
+
+
+insight_scheduler = InsightScheduler()
+
+__all__ = [
+    "MARKET_INSIGHT_KEY",
+    "InsightGenerationError",
+    "InsightKey",
+    "InsightRecord",
+    "InsightScheduler",
+    "insight_scheduler",
+]
@@ -0,0 +1,317 @@
+"""In-process technical indicator bundles shared by the API and the AI service."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from backend.metrics.market_metrics import indicator_cache_lookups_total
+from backend.services.timeseries_service import get_closes
+from backend.utils.config import Config
+from backend.utils.indicators import (
+    average_true_range,
+    bollinger,
+    ema,
+    ichimoku_cloud,
+    macd,
+    rsi,
+    stochastic_rsi,
+    volume_weighted_average_price,
+)
+
+MIN_HISTORY = 30
+
+
+class InsufficientIndicatorData(ValueError):
+    """Raised when the candle history is too short to compute indicators."""
+
+
+@dataclass(frozen=True)
+class IndicatorRequest:
+    """Parameters of an indicator bundle; hashable so it can key the cache."""
+
+    asset_type: str
+    symbol: str
+    interval: str = "1h"
+    limit: int = 300
+    rsi_period: int = 14
+    ema_periods: tuple[int, ...] = (20, 50)
+    macd_fast: int = 12
+    macd_slow: int = 26
+    macd_signal: int = 9
+    bb_period: int = 20
+    bb_mult: float = 2.0
+    include_atr: bool = False
+    atr_period: int = 14
+    include_stoch_rsi: bool = False
+    stoch_rsi_period: int = 14
+    stoch_rsi_k: int = 3
+    stoch_rsi_d: int = 3
+    include_ichimoku: bool = False
+    ichimoku_conversion: int = 9
+    ichimoku_base: int = 26
+    ichimoku_span_b: int = 52
+    include_vwap: bool = False
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "asset_type", self.asset_type.lower())
+        object.__setattr__(self, "symbol", self.symbol.upper())
+        object.__setattr__(self, "interval", self.interval.lower())
+        object.__setattr__(self, "ema_periods", tuple(self.ema_periods))
+
+    @property
+    def candle_key(self) -> tuple[str, str, str, int]:
+        return (self.asset_type, self.symbol, self.interval, self.limit)
+
+
+@dataclass(frozen=True)
+class IndicatorBundle:
+    """Indicators computed over one candle series.
+
+    Bundles are cached and shared between callers, so treat them as
+    read-only; :meth:`to_dict` returns an independent copy.
+    """
+
+    symbol: str
+    asset_type: str
+    interval: str
+    count: int
+    source: str | None
+    note: str | None
+    indicators: dict[str, Any] = field(default_factory=dict)
+    series: dict[str, list[float]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        payload = asdict(self)
+        return {
+            "symbol": payload["symbol"],
+            "type": payload["asset_type"],
+            "interval": payload["interval"],
+            "count": payload["count"],
+            "source": payload["source"],
+            "note": payload["note"],
+            "indicators": payload["indicators"],
+            "series": payload["series"],
+        }
+
+
+@dataclass
+class _CandleEntry:
+    expires_at: float
+    closes: list[float]
+    meta: dict[str, Any]
+    bundles: dict[IndicatorRequest, IndicatorBundle] = field(default_factory=dict)
+
+
+def compute_indicator_bundle(
+    request: IndicatorRequest, closes: list[float], meta: dict[str, Any]
+) -> IndicatorBundle:
+    """Compute the indicators described by ``request`` over ``closes``."""
+
+    if not closes or len(closes) < MIN_HISTORY:
+        raise InsufficientIndicatorData(
+            "No hay suficientes datos para calcular indicadores"
+        )
+
+    indicators: dict[str, Any] = {"last_close": closes[-1]}
+    highs = meta.get("highs") or []
+    lows = meta.get("lows") or []
+    volumes = meta.get("volumes") or []
+
+    rsi_val = rsi(closes, request.rsi_period)
+    if rsi_val is not None:
+        indicators["rsi"] = {"period": request.rsi_period, "value": rsi_val}
+
+    ema_list = []
+    for period in request.ema_periods:
+        val = ema(closes, period)
+        if val is not None:
+            ema_list.append({"period": period, "value": val})
+    if ema_list:
+        indicators["ema"] = ema_list
+
+    macd_obj = macd(
+        closes,
+        fast=request.macd_fast,
+        slow=request.macd_slow,
+        signal=request.macd_signal,
+    )
+    if macd_obj:
+        indicators["macd"] = {
+            "fast": request.macd_fast,
+            "slow": request.macd_slow,
+            "signal": request.macd_signal,
+            **macd_obj,
+        }
+
+    bb_obj = bollinger(closes, period=request.bb_period, mult=request.bb_mult)
+    if bb_obj:
+        indicators["bollinger"] = {
+            "period": request.bb_period,
+            "mult": request.bb_mult,
+            **bb_obj,
+        }
+
+    if request.include_atr:
+        atr_val = average_true_range(highs, lows, closes, period=request.atr_period)
+        if atr_val is not None:
+            indicators["atr"] = {"period": request.atr_period, "value": atr_val}
+
+    if request.include_stoch_rsi:
+        stoch_val = stochastic_rsi(
+            closes,
+            period=request.stoch_rsi_period,
+            smooth_k=request.stoch_rsi_k,
+            smooth_d=request.stoch_rsi_d,
+        )
+        if stoch_val:
+            indicators["stochastic_rsi"] = {
+                "period": request.stoch_rsi_period,
+                "smooth_k": request.stoch_rsi_k,
+                "smooth_d": request.stoch_rsi_d,
+                **stoch_val,
+            }
+
+    if request.include_ichimoku:
+        ichimoku_vals = ichimoku_cloud(
+            highs,
+            lows,
+            closes,
+            conversion_period=request.ichimoku_conversion,
+            base_period=request.ichimoku_base,
+            span_b_period=request.ichimoku_span_b,
+        )
+        if ichimoku_vals:
+            indicators["ichimoku"] = {
+                "conversion": request.ichimoku_conversion,
+                "base": request.ichimoku_base,
+                "span_b": request.ichimoku_span_b,
+                **ichimoku_vals,
+            }
+
+    if request.include_vwap:
+        vwap_val = volume_weighted_average_price(highs, lows, closes, volumes)
+        if vwap_val is not None:
+            indicators["vwap"] = {"value": vwap_val}
+
+    return IndicatorBundle(
+        symbol=request.symbol,
+        asset_type=request.asset_type,
+        interval=request.interval,
+        count=len(closes),
+        source=meta.get("source"),
+        note=meta.get("note"),
+        indicators=indicators,
+        series={
+            "closes": closes,
+            "highs": highs,
+            "lows": lows,
+            "volumes": volumes,
+        },
+    )
+
+
+class MarketIndicatorService:
+    """Candle + indicator cache used by ``/api/markets/indicators`` and the AI.
+
+    Candle series are cached per ``(type, symbol, interval, limit)`` for a
+    short TTL and concurrent misses share one upstream fetch. Bundles are
+    memoized on their candle entry, so they expire together with the data
+    they were computed from. Failures are never cached.
+    """
+
+    def __init__(
+        self, *, ttl_seconds: float | None = None, max_entries: int | None = None
+    ) -> None:
+        self._ttl = (
+            Config.MARKET_INDICATORS_CACHE_TTL_SECONDS
+            if ttl_seconds is None
+            else ttl_seconds
+        )
+        self._max_entries = max(
+            1,
+            (
+                Config.MARKET_INDICATORS_CACHE_MAX_ENTRIES
+                if max_entries is None
+                else max_entries
+            ),
+        )
+        self._entries: OrderedDict[tuple[str, str, str, int], _CandleEntry] = (
+            OrderedDict()
+        )
+        self._inflight: dict[tuple[str, str, str, int], asyncio.Task] = {}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_bundle(self, request: IndicatorRequest) -> IndicatorBundle:
+        entry = await self._get_candles(request)
+        bundle = entry.bundles.get(request)
+        if bundle is not None:
+            indicator_cache_lookups_total.labels(layer="bundle", outcome="hit").inc()
+            return bundle
+        indicator_cache_lookups_total.labels(layer="bundle", outcome="miss").inc()
+        bundle = compute_indicator_bundle(request, entry.closes, entry.meta)
+        entry.bundles[request] = bundle
+        return bundle
+
+    async def _get_candles(self, request: IndicatorRequest) -> _CandleEntry:
+        key = request.candle_key
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                indicator_cache_lookups_total.labels(
+                    layer="candles", outcome="hit"
+                ).inc()
+                return entry
+            self._entries.pop(key, None)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            indicator_cache_lookups_total.labels(
+                layer="candles", outcome="coalesced"
+            ).inc()
+        else:
+            indicator_cache_lookups_total.labels(layer="candles", outcome="miss").inc()
+            # QA: la descarga vive en su propia tarea; cancelar a quien la inició
+            # (p. ej. un wait_for con presupuesto) no cancela a los demás.
+            pending = asyncio.create_task(self._fetch_candles(key))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda task, key=key: self._fetch_done(key, task))
+        return await asyncio.shield(pending)
+
+    async def _fetch_candles(self, key: tuple[str, str, str, int]) -> _CandleEntry:
+        closes, meta = await get_closes(*key)
+        entry = _CandleEntry(
+            expires_at=time.monotonic() + self._ttl,
+            closes=list(closes or []),
+            meta=dict(meta or {}),
+        )
+        if self._ttl > 0:
+            self._entries[key] = entry
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _fetch_done(self, key: tuple[str, str, str, int], task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Evita "exception was never retrieved" cuando nadie más esperaba.
+            task.exception()
+
+
+indicator_service = MarketIndicatorService()
+
+__all__ = [
+    "IndicatorBundle",
+    "IndicatorRequest",
+    "InsufficientIndicatorData",
+    "MarketIndicatorService",
+    "compute_indicator_bundle",
+    "indicator_service",
+]
@@ -4,6 +4,7 @@ import logging
 import os
 import time
 from collections import defaultdict
+from collections.abc import AsyncIterator
 from typing import Any
 
 import aiohttp
@@ -13,8 +14,12 @@ from backend.metrics.ai_metrics import (
     ai_provider_failures_total,
     ai_provider_latency_seconds,
     ai_provider_requests_total,
+    ai_sentiment_batch_size,
 )
 from backend.services.ai_route_context import get_current_route
+from backend.services.provider_http import provider_clients
+from backend.utils.batching import MicroBatcher
+from backend.utils.config import Config
 
 load_dotenv()
 
@@ -51,6 +56,15 @@ class MistralService:
         self.retryable_statuses = {429} | set(range(500, 600))
         self.metrics = {"attempts": 0, "model_attempts": defaultdict(int)}
         self._last_reason: str | None = None
+        # QA: noticias concurrentes se puntúan en un único prompt
+        self._sentiment_batcher: MicroBatcher[str, dict[str, Any] | None] = (
+            MicroBatcher(
+                self._score_sentiment_batch,
+                max_batch=Config.SENTIMENT_BATCH_MAX_SIZE,
+                max_wait_ms=Config.SENTIMENT_BATCH_MAX_WAIT_MS,
+                cache_size=Config.SENTIMENT_CACHE_MAX_ENTRIES,
+            )
+        )
 
     async def chat_completion(
         self, messages: list, model: str = "medium"
@@ -71,7 +85,7 @@ class MistralService:
         last_error: MistralAPIError | None = None
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with provider_clients.session("mistral") as session:
                 for model_name in models_to_try:
                     try:
                         return await self._attempt_model(
@@ -258,6 +272,131 @@ class MistralService:
             runtime_error.ai_status_code = None
             raise runtime_error from exc
 
+    async def stream_chat_completion(
+        self, messages: list, model: str = "medium"
+    ) -> AsyncIterator[str]:
+        """
+        Emitir los fragmentos de texto de Mistral (SSE) a medida que llegan.
+
+        El fallback entre modelos sólo aplica antes del primer fragmento; una
+        vez emitido texto, cualquier error se propaga al consumidor.
+        """
+        if not self.api_key:
+            raise ValueError("Mistral API key no configurada")
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream",
+        }
+        last_error: MistralAPIError | None = None
+
+        async with provider_clients.session("mistral") as session:
+            for model_name in self._build_model_fallback(model):
+                self.metrics["attempts"] += 1
+                self.metrics["model_attempts"][model_name] += 1
+                payload = {
+                    "model": self.models[model_name],
+                    "messages": messages,
+                    "temperature": 0.1,
+                    "max_tokens": 1000,
+                    "stream": True,
+                }
+                emitted = False
+                try:
+                    async for delta in self._stream_request(session, headers, payload):
+                        emitted = True
+                        yield delta
+                    return
+                except MistralAPIError as exc:
+                    if emitted or exc.status not in self.retryable_statuses:
+                        raise
+                    last_error = exc
+                    logger.warning(str(exc))
+
+        if last_error:
+            raise last_error
+
+    async def _stream_request(
+        self,
+        session: aiohttp.ClientSession,
+        headers: dict[str, str],
+        payload: dict[str, Any],
+    ) -> AsyncIterator[str]:
+        route = get_current_route()
+        start = time.perf_counter()
+        # Sin límite total: la respuesta dura lo que dure la generación.
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
+        try:
+            async with session.post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=timeout,
+            ) as response:
+                status_code = response.status
+                if status_code != 200:
+                    error_body = await response.text()
+                    reason = self._map_reason(status_code)
+                    self._record_stream_call(route, start, status_code, reason)
+                    error = MistralAPIError(status_code, error_body, payload["model"])
+                    error.ai_reason = reason
+                    error.ai_status_code = status_code
+                    raise error
+
+                async for raw_line in response.content:
+                    line = raw_line.decode("utf-8", errors="replace").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:") :].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        event = json.loads(data)
+                        delta = event["choices"][0]["delta"].get("content")
+                    except (ValueError, KeyError, IndexError, AttributeError):
+                        continue
+                    if delta:
+                        yield delta
+                self._record_stream_call(route, start, status_code, None)
+        except TimeoutError as exc:
+            self._record_stream_call(route, start, 408, "timeout")
+            timeout_error = TimeoutError("Mistral stream timed out")
+            timeout_error.ai_reason = "timeout"
+            timeout_error.ai_status_code = 408
+            raise timeout_error from exc
+        except aiohttp.ClientError as exc:
+            self._record_stream_call(route, start, None, "unknown")
+            runtime_error = RuntimeError(f"Error comunicándose con Mistral: {exc}")
+            runtime_error.ai_reason = "unknown"
+            runtime_error.ai_status_code = None
+            raise runtime_error from exc
+
+    def _record_stream_call(
+        self, route: str, start: float, http_status: int | None, reason: str | None
+    ) -> None:
+        duration = time.perf_counter() - start
+        ai_provider_latency_seconds.labels(PROVIDER_NAME, route).observe(duration)
+        if reason is None:
+            ai_provider_requests_total.labels(PROVIDER_METRIC, "success").inc()
+        else:
+            ai_provider_failures_total.labels(PROVIDER_NAME, reason, route).inc()
+            ai_provider_requests_total.labels(PROVIDER_METRIC, "error").inc()
+        self._last_reason = reason
+        event = {
+            "ai_event": "provider_call",
+            "provider": PROVIDER_NAME,
+            "route": route,
+            "latency_ms": round(duration * 1000, 2),
+            "status": "ok" if reason is None else "error",
+            "http_status": http_status,
+            "streaming": True,
+        }
+        if reason is not None:
+            event["reason"] = reason
+        log = logger.info if reason is None else logger.warning
+        log(json.dumps(event))
+
     @staticmethod
     def _map_reason(status_code: int | None) -> str:
         if status_code == 408:
@@ -319,6 +458,19 @@ class MistralService:
 
         return response
 
+    async def stream_financial_response(
+        self, user_message: str, context: dict[str, Any] | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Versión en streaming de :meth:`generate_financial_response`.
+        """
+        messages = [
+            {"role": "system", "content": self._create_system_prompt(context)},
+            {"role": "user", "content": user_message},
+        ]
+        async for delta in self.stream_chat_completion(messages, model="medium"):
+            yield delta
+
     def _create_system_prompt(self, context: dict[str, Any] = None) -> str:
         """
         Crear prompt del sistema especializado en finanzas
@@ -356,38 +508,88 @@ class MistralService:
         """
         Analizar sentimiento de noticias financieras
         """
+        result = await self._sentiment_batcher.submit(news_text[:1000])
+        if result is None:
+            return {"sentiment_score": 0.0, "confidence": 0.0, "keywords": []}
+        return dict(result)
+
+    async def _score_sentiment_batch(
+        self, texts: list[str]
+    ) -> list[dict[str, Any] | None]:
+        ai_sentiment_batch_size.labels(backend="mistral").observe(len(texts))
+        if len(texts) == 1:
+            return [await self._score_sentiment(texts[0])]
+
+        news = "\n".join(f"{index}. {text}" for index, text in enumerate(texts, 1))
         prompt = f"""
-        Analiza el sentimiento de esta noticia financiera y devuelve SOLO un JSON con:
+        Analiza el sentimiento de cada noticia financiera numerada y devuelve SOLO un
+        array JSON con un objeto por noticia, en el mismo orden, con:
         - sentiment_score: float entre -1 (muy negativo) y 1 (muy positivo)
         - confidence: float entre 0 y 1
         - keywords: array de palabras clave importantes
 
-        Noticia: {news_text[:1000]}  # Limitar longitud
+        Noticias:
+        {news}
         """
+        try:
+            response = await self.chat_completion(
+                self._sentiment_messages(prompt), model="small"
+            )
+            parsed = json.loads(response.strip()) if response else None
+        except (TimeoutError, MistralAPIError) as exc:
+            logger.error("Error analyzing market sentiment batch: %s", exc)
+            return [None] * len(texts)
+        except Exception:
+            parsed = None
+
+        if (
+            isinstance(parsed, list)
+            and len(parsed) == len(texts)
+            and all(isinstance(item, dict) for item in parsed)
+        ):
+            return parsed
+        # Respuesta de lote inválida: puntuar cada noticia por separado.
+        return list(await asyncio.gather(*(self._score_sentiment(t) for t in texts)))
+
+    async def _score_sentiment(self, news_text: str) -> dict[str, Any] | None:
+        prompt = f"""
+        Analiza el sentimiento de esta noticia financiera y devuelve SOLO un JSON con:
+        - sentiment_score: float entre -1 (muy negativo) y 1 (muy positivo)
+        - confidence: float entre 0 y 1
+        - keywords: array de palabras clave importantes
 
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "Eres un analista de sentimiento financiero. Devuelve SOLO JSON válido."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ]
+        Noticia: {news_text}
+        """
 
         try:
-            response = await self.chat_completion(messages, model="small")
+            response = await self.chat_completion(
+                self._sentiment_messages(prompt), model="small"
+            )
         except (TimeoutError, MistralAPIError) as exc:
             logger.error("Error analyzing market sentiment: %s", exc)
-            return {"sentiment_score": 0.0, "confidence": 0.0, "keywords": []}
+            return None
 
         try:
             if response:
-                return json.loads(response.strip())
+                parsed = json.loads(response.strip())
+                if isinstance(parsed, dict):
+                    return parsed
         except Exception:
             pass
 
-        return {"sentiment_score": 0.0, "confidence": 0.0, "keywords": []}
+        return None
+
+    @staticmethod
+    def _sentiment_messages(prompt: str) -> list[dict[str, str]]:
+        return [
+            {
+                "role": "system",
+                "content": (
+                    "Eres un analista de sentimiento financiero. Devuelve SOLO JSON válido."
+                ),
+            },
+            {"role": "user", "content": prompt},
+        ]
 
 
 # Singleton instance
@@ -6,6 +6,7 @@ import asyncio
 import inspect  # CODEx: detectar comportamiento síncrono/asíncrono en canales push
 import json
 from asyncio import Lock  # 🧩 Bloque 9A
+from collections.abc import Iterable
 from typing import Any  # 🧩 Bloque 9A
 
 from fastapi import WebSocket  # 🧩 Bloque 9A
@@ -54,39 +55,54 @@ class NotificationDispatcher:
         realtime_service: RealtimeService,
         push_service_channel: Any,
         audit_service: AuditService,
+        connection_manager: Any | None = None,
     ) -> None:
         self.realtime = realtime_service
+        # QA: None -> se usa el ``manager`` global de /ws/notifications
+        self.connection_manager = connection_manager
         self.push = push_service_channel
         self.push_service = getattr(
             push_service_channel, "_service", push_service_channel
         )
         self.audit = audit_service
+        self.outbox: Any | None = None
         self._logger = get_logger(service="notification_dispatcher")
         self._logger.info(
             f"🔌 Redis conectado en {REDIS_URL}"
         )  # QA 2.0: verificado conexión configurada
 
-    async def broadcast_event(self, event_type: str, payload: dict[str, Any]) -> None:
+    def attach_outbox(self, outbox: Any) -> None:
+        """Deliver realtime/push through ``outbox`` workers while it is running."""
+
+        self.outbox = outbox
+        # QA: realtime entrega a los sockets de este proceso; su cola no se comparte
+        outbox.register_channel("realtime", self._handle_realtime_message, local=True)
+        outbox.register_channel("push", self._handle_push_message)
+
+    async def broadcast_event(
+        self,
+        event_type: str,
+        payload: dict[str, Any],
+        *,
+        user_ids: Iterable[Any] | None = None,
+    ) -> None:
+        """Deliver an event; ``user_ids`` restricts realtime/push to those owners."""
+
         envelope = self._build_envelope(event_type, payload)
         payload_size = len(json.dumps(envelope.get("payload", {}), default=str))
         push_payload = self._build_push_payload(event_type, payload, envelope)
+        targets = (
+            sorted({str(user_id) for user_id in user_ids})
+            if user_ids is not None
+            else None
+        )
 
-        try:
-            await redis_client.publish(
-                "notifications", json.dumps(envelope, default=str)
-            )
-            self._logger.info(
-                f"📡 Evento publicado en Redis {REDIS_URL}"
-            )  # QA 2.0: difusión en canal Redis
-        except Exception as exc:  # pragma: no cover - Redis opcional en tests
-            self._logger.warning(
-                {
-                    "service": "notification_dispatcher",
-                    "event": "redis_publish_error",
-                    "type": event_type,
-                    "error": str(exc),
-                }
-            )
+        outbox = self.outbox
+        realtime_queued = outbox is not None and await outbox.enqueue(
+            "realtime", {"type": event_type, "envelope": envelope, "user_ids": targets}
+        )
+        if not realtime_queued and targets is None:
+            await self._publish_redis(event_type, envelope)
 
         self._logger.info(
             {
@@ -97,20 +113,23 @@ class NotificationDispatcher:
             }
         )
 
-        realtime_status = "skipped"
-        try:
-            await self.realtime.broadcast(envelope)
-            realtime_status = "sent"
-        except Exception as exc:  # pragma: no cover - defensive logging
-            realtime_status = f"error:{exc}"
-            self._logger.warning(
-                {
-                    "service": "notification_dispatcher",
-                    "event": "realtime_error",
-                    "type": event_type,
-                    "error": str(exc),
-                }
-            )
+        if realtime_queued:
+            realtime_status = "queued"
+        else:
+            realtime_status = "skipped"
+            try:
+                await self._send_realtime(event_type, envelope, targets)
+                realtime_status = "sent"
+            except Exception as exc:  # pragma: no cover - defensive logging
+                realtime_status = f"error:{exc}"
+                self._logger.warning(
+                    {
+                        "service": "notification_dispatcher",
+                        "event": "realtime_error",
+                        "type": event_type,
+                        "error": str(exc),
+                    }
+                )
 
         push_status = "skipped"
         has_keys = getattr(self.push_service, "has_vapid_keys", None)
@@ -122,34 +141,13 @@ class NotificationDispatcher:
                     "type": event_type,
                 }
             )
+        elif outbox is not None and await outbox.enqueue(
+            "push", {"type": event_type, "payload": push_payload, "user_ids": targets}
+        ):
+            push_status = "queued"
         else:
             try:
-                push_callable = None
-                if callable(getattr(self.push, "broadcast", None)):
-                    push_callable = self.push.broadcast
-                elif callable(getattr(self.push_service, "broadcast", None)):
-                    push_callable = self.push_service.broadcast
-
-                if push_callable is None:
-                    self._logger.info(
-                        {
-                            "service": "notification_dispatcher",
-                            "event": "push_skipped_missing_callable",
-                            "type": event_type,
-                        }
-                    )
-                elif inspect.iscoroutinefunction(
-                    push_callable
-                ) or asyncio.iscoroutinefunction(push_callable):
-                    await push_callable(
-                        push_payload
-                    )  # CODEx: compatibilidad con canales asíncronos usados en tests
-                    push_status = "sent"
-                else:
-                    await asyncio.to_thread(
-                        push_callable, push_payload
-                    )  # CODEx: mantener envío síncrono sin bloquear el loop
-                    push_status = "sent"
+                push_status = await self._send_push(event_type, push_payload, targets)
             except Exception as exc:  # pragma: no cover - defensive logging
                 self._logger.warning(
                     {
@@ -186,6 +184,115 @@ class NotificationDispatcher:
                 }
             )
 
+    async def _publish_redis(self, event_type: str, envelope: dict[str, Any]) -> None:
+        try:
+            await redis_client.publish(
+                "notifications", json.dumps(envelope, default=str)
+            )
+            self._logger.info(
+                f"📡 Evento publicado en Redis {REDIS_URL}"
+            )  # QA 2.0: difusión en canal Redis
+        except Exception as exc:  # pragma: no cover - Redis opcional en tests
+            self._logger.warning(
+                {
+                    "service": "notification_dispatcher",
+                    "event": "redis_publish_error",
+                    "type": event_type,
+                    "error": str(exc),
+                }
+            )
+
+    async def _send_realtime(
+        self,
+        event_type: str,
+        envelope: dict[str, Any],
+        user_ids: list[str] | None,
+    ) -> None:
+        if user_ids is None:
+            await self.realtime.broadcast(envelope)
+            return
+
+        event = NotificationEvent(
+            title=str(envelope.get("title") or ""),
+            body=str(envelope.get("body") or ""),
+            meta={"type": event_type, "payload": envelope.get("payload", {})},
+        )
+        connections = self.connection_manager or manager
+        await connections.send_to_users(user_ids, event)
+
+    async def _send_push(
+        self,
+        event_type: str,
+        push_payload: dict[str, Any],
+        user_ids: list[str] | None = None,
+    ) -> str:
+        if user_ids is not None:
+            return await self._send_targeted_push(event_type, push_payload, user_ids)
+
+        push_callable = None
+        if callable(getattr(self.push, "broadcast", None)):
+            push_callable = self.push.broadcast
+        elif callable(getattr(self.push_service, "broadcast", None)):
+            push_callable = self.push_service.broadcast
+
+        if push_callable is None:
+            self._logger.info(
+                {
+                    "service": "notification_dispatcher",
+                    "event": "push_skipped_missing_callable",
+                    "type": event_type,
+                }
+            )
+            return "skipped"
+        if inspect.iscoroutinefunction(push_callable) or asyncio.iscoroutinefunction(
+            push_callable
+        ):
+            await push_callable(
+                push_payload
+            )  # CODEx: compatibilidad con canales asíncronos usados en tests
+        else:
+            await asyncio.to_thread(
+                push_callable, push_payload
+            )  # CODEx: mantener envío síncrono sin bloquear el loop
+        return "sent"
+
+    async def _send_targeted_push(
+        self, event_type: str, push_payload: dict[str, Any], user_ids: list[str]
+    ) -> str:
+        # QA: nunca caemos al broadcast global para eventos dirigidos a un usuario
+        push_callable = getattr(self.push_service, "broadcast_to_users", None)
+        if not callable(push_callable):
+            self._logger.info(
+                {
+                    "service": "notification_dispatcher",
+                    "event": "push_skipped_missing_callable",
+                    "type": event_type,
+                }
+            )
+            return "skipped"
+        await asyncio.to_thread(
+            push_callable,
+            user_ids,
+            push_payload,
+            category=push_payload.get("category"),
+        )
+        return "sent"
+
+    async def _handle_realtime_message(self, message: dict[str, Any]) -> None:
+        # QA: los errores se propagan para que la cola reintente la entrega
+        event_type = message.get("type", "")
+        # QA: el canal global "notifications" sólo lleva eventos sin destinatario
+        if message.get("user_ids") is None:
+            await self._publish_redis(event_type, message["envelope"])
+        await self._send_realtime(
+            event_type, message["envelope"], message.get("user_ids")
+        )
+
+    async def _handle_push_message(self, message: dict[str, Any]) -> None:
+        await self._send_push(
+            message.get("type", ""), message["payload"], message.get("user_ids")
+        )
+
     async def broadcast_test(self, payload: dict[str, Any]) -> None:
         """Helper used by scripts/tests to emit a test notification."""
 
@@ -239,49 +346,87 @@ __all__ = [
 
 # 🧩 Bloque 9A
 class ConnectionManager:
-    def __init__(self) -> None:
+    """Per-user WebSocket registry with concurrent, targeted delivery."""
+
+    def __init__(self, send_timeout: float = 5.0) -> None:
         # user_id -> set de websockets
         self.active_connections: dict[str, set[WebSocket]] = {}
+        # QA: índice inverso websocket -> user_id para limpiar sockets muertos
+        self._owners: dict[WebSocket, str] = {}
+        self._send_timeout = send_timeout
         self._lock = Lock()
 
     async def connect(self, user_id: str, websocket: WebSocket) -> None:
         await websocket.accept()
         async with self._lock:
             self.active_connections.setdefault(user_id, set()).add(websocket)
+            self._owners[websocket] = user_id
 
     async def disconnect(self, user_id: str, websocket: WebSocket) -> None:
         async with self._lock:
-            conns: set[WebSocket] | None = self.active_connections.get(
-                user_id
-            )  # 🧩 Bloque 9A
-            if not conns:
-                return
-            conns.discard(websocket)
-            if not conns:
-                self.active_connections.pop(user_id, None)
+            self._discard(user_id, websocket)
+
+    def _discard(self, user_id: str | None, websocket: WebSocket) -> None:
+        owner = self._owners.pop(websocket, None) or user_id
+        if owner is None:
+            return
+        conns: set[WebSocket] | None = self.active_connections.get(
+            owner
+        )  # 🧩 Bloque 9A
+        if not conns:
+            return
+        conns.discard(websocket)
+        if not conns:
+            self.active_connections.pop(owner, None)
 
     async def send_personal(self, user_id: str, event: NotificationEvent) -> None:
-        payload = json.dumps(event.model_dump(), default=str)
-        for ws in list(self.active_connections.get(user_id, set())):
-            try:
-                await ws.send_text(payload)
-            except Exception:
-                # Intentar limpiar conexiones muertas
-                await self.disconnect(user_id, ws)
+        await self.send_to_users([user_id], event)
+
+    async def send_to_users(
+        self, user_ids: Iterable[Any], event: NotificationEvent | dict[str, Any]
+    ) -> int:
+        """Serialize ``event`` once and deliver it to every socket of ``user_ids``."""
 
-    async def broadcast(self, event: NotificationEvent) -> None:
-        payload = json.dumps(event.model_dump(), default=str)
+        async with self._lock:
+            targets = [
+                ws
+                for user_id in {str(user_id) for user_id in user_ids}
+                for ws in self.active_connections.get(user_id, ())
+            ]
+        return await self._deliver(targets, event)
+
+    async def broadcast(self, event: NotificationEvent | dict[str, Any]) -> int:
         # Copia para evitar mutaciones concurrentes
-        all_conns = []
         async with self._lock:
-            for conns in self.active_connections.values():
-                all_conns.extend(list(conns))
-        for ws in all_conns:
-            try:
-                await ws.send_text(payload)
-            except Exception:
-                # No conocemos user_id aquí, el WS se limpiará al siguiente intento
-                pass
+            targets = list(self._owners)
+        return await self._deliver(targets, event)
+
+    async def _deliver(
+        self, targets: list[WebSocket], event: NotificationEvent | dict[str, Any]
+    ) -> int:
+        if not targets:
+            return 0
+
+        payload = self._serialize(event)
+        results = await asyncio.gather(
+            *(self._send(ws, payload) for ws in targets), return_exceptions=True
+        )
+        dead = [ws for ws, ok in zip(targets, results, strict=True) if ok is not True]
+        if dead:
+            # Intentar limpiar conexiones muertas
+            async with self._lock:
+                for ws in dead:
+                    self._discard(None, ws)
+        return len(targets) - len(dead)
+
+    async def _send(self, websocket: WebSocket, payload: str) -> bool:
+        await asyncio.wait_for(websocket.send_text(payload), self._send_timeout)
+        return True
+
+    @staticmethod
+    def _serialize(event: NotificationEvent | dict[str, Any]) -> str:
+        data = event.model_dump() if isinstance(event, NotificationEvent) else event
+        return json.dumps(data, default=str)
 
 
 # 🧩 Bloque 9A
@@ -0,0 +1,591 @@
+"""Durable outbound notification queue with per-channel consumer workers."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from backend.core.logging_config import get_logger
+from backend.metrics.notification_metrics import (
+    notification_outbox_depth,
+    notification_outbox_lag_seconds,
+    notification_outbox_messages_total,
+)
+from backend.utils.config import Config
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:  # pragma: no cover - redis es opcional
+    aioredis = None  # type: ignore[assignment]
+
+ChannelHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+_CONSUMER_GROUP = "notification-dispatchers"
+
+
+def parse_channel_concurrency(raw: str | None) -> dict[str, int]:
+    """Parse ``"realtime=4,push=2"`` into ``{"realtime": 4, "push": 2}``."""
+
+    concurrency: dict[str, int] = {}
+    for chunk in (raw or "").split(","):
+        name, _, value = chunk.partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            concurrency[name] = max(1, int(value))
+        except ValueError:
+            concurrency[name] = 1
+    return concurrency
+
+
+@dataclass
+class OutboxMessage:
+    """Single delivery unit for one channel."""
+
+    channel: str
+    payload: dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.time)
+    # Identificador propio del backend (p. ej. id de entrada en el stream Redis)
+    receipt: str | None = None
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "id": self.id,
+                "channel": self.channel,
+                "payload": self.payload,
+                "attempts": self.attempts,
+                "enqueued_at": self.enqueued_at,
+            },
+            default=str,
+        )
+
+    @classmethod
+    def from_json(cls, raw: str, *, receipt: str | None = None) -> OutboxMessage:
+        data = json.loads(raw)
+        return cls(
+            channel=data["channel"],
+            payload=data.get("payload") or {},
+            id=data.get("id") or uuid.uuid4().hex,
+            attempts=int(data.get("attempts", 0)),
+            enqueued_at=float(data.get("enqueued_at", time.time())),
+            receipt=receipt,
+        )
+
+
+class InMemoryOutboxStore:
+    """Process-local fallback store; survives handler errors but not restarts."""
+
+    durable = False
+
+    def __init__(self) -> None:
+        self._queues: dict[str, asyncio.Queue[OutboxMessage]] = {}
+
+    def _queue(self, channel: str) -> asyncio.Queue[OutboxMessage]:
+        queue = self._queues.get(channel)
+        if queue is None:
+            queue = self._queues[channel] = asyncio.Queue()
+        return queue
+
+    async def prepare(self, channels: list[str]) -> None:
+        for channel in channels:
+            self._queue(channel)
+
+    async def add(self, message: OutboxMessage) -> None:
+        self._queue(message.channel).put_nowait(message)
+
+    async def read(
+        self, channel: str, consumer: str, timeout: float
+    ) -> OutboxMessage | None:
+        try:
+            return await asyncio.wait_for(self._queue(channel).get(), timeout)
+        except TimeoutError:
+            return None
+
+    async def ack(self, message: OutboxMessage) -> None:
+        return None
+
+    async def depth(self, channel: str) -> int:
+        return self._queue(channel).qsize()
+
+    async def reclaim(
+        self, channel: str, consumer: str, min_idle: float
+    ) -> list[OutboxMessage]:
+        return []
+
+    async def close(self) -> None:
+        return None
+
+
+class RedisStreamOutboxStore:
+    """Redis Streams store: entries stay pending until acknowledged.
+
+    Entries delivered to a consumer that died are claimed back by the
+    remaining workers once they have been idle for the visibility timeout,
+    which gives at-least-once delivery across restarts.
+    """
+
+    durable = True
+
+    def __init__(self, client: Any, *, prefix: str = "notifications:outbox") -> None:
+        self._client = client
+        self._prefix = prefix
+
+    def _key(self, channel: str) -> str:
+        return f"{self._prefix}:{channel}"
+
+    async def prepare(self, channels: list[str]) -> None:
+        await self._client.ping()
+        for channel in channels:
+            try:
+                await self._client.xgroup_create(
+                    self._key(channel), _CONSUMER_GROUP, id="0", mkstream=True
+                )
+            except Exception as exc:
+                if "BUSYGROUP" not in str(exc):
+                    raise
+
+    async def add(self, message: OutboxMessage) -> None:
+        await self._client.xadd(self._key(message.channel), {"data": message.to_json()})
+
+    async def read(
+        self, channel: str, consumer: str, timeout: float
+    ) -> OutboxMessage | None:
+        response = await self._client.xreadgroup(
+            _CONSUMER_GROUP,
+            consumer,
+            {self._key(channel): ">"},
+            count=1,
+            block=max(1, int(timeout * 1000)),
+        )
+        for _stream, entries in response or []:
+            for entry_id, fields in entries:
+                return OutboxMessage.from_json(fields["data"], receipt=entry_id)
+        return None
+
+    async def ack(self, message: OutboxMessage) -> None:
+        key = self._key(message.channel)
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.xack(key, _CONSUMER_GROUP, message.receipt)
+        pipeline.xdel(key, message.receipt)
+        await pipeline.execute()
+
+    async def depth(self, channel: str) -> int:
+        return int(await self._client.xlen(self._key(channel)))
+
+    async def reclaim(
+        self, channel: str, consumer: str, min_idle: float
+    ) -> list[OutboxMessage]:
+        response = await self._client.xautoclaim(
+            self._key(channel),
+            _CONSUMER_GROUP,
+            consumer,
+            min_idle_time=int(min_idle * 1000),
+            start_id="0-0",
+            count=50,
+        )
+        entries = response[1] if len(response) > 1 else []
+        return [
+            OutboxMessage.from_json(fields["data"], receipt=entry_id)
+            for entry_id, fields in entries
+            if fields
+        ]
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class NotificationOutbox:
+    """Queue notifications per channel and deliver them from a worker pool.
+
+    Producers call :meth:`enqueue`; a ``False`` return value is the
+    backpressure signal (queue saturated or store unavailable) and callers are
+    expected to deliver inline instead, which slows them down without losing
+    the notification.
+
+    Channels registered with ``local=True`` deliver to state owned by this
+    process (e.g. its WebSocket clients), so they always use an in-process
+    queue drained by a single worker, which keeps their events in order and
+    prevents another worker from claiming them.
+    """
+
+    def __init__(
+        self,
+        *,
+        redis_url: str | None = None,
+        concurrency: dict[str, int] | None = None,
+        max_pending: int = 10_000,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 0.5,
+        visibility_timeout: float = 60.0,
+        enqueue_timeout: float = 0.25,
+        handler_timeout: float = 30.0,
+    ) -> None:
+        self._redis_url = redis_url
+        self._concurrency = dict(concurrency or {})
+        self._max_pending = max(1, max_pending)
+        self._max_attempts = max(1, max_attempts)
+        self._retry_base = max(0.0, retry_base_seconds)
+        self._visibility_timeout = max(1.0, visibility_timeout)
+        self._enqueue_timeout = max(0.0, enqueue_timeout)
+        self._handler_timeout = handler_timeout
+        self._handlers: dict[str, ChannelHandler] = {}
+        self._local: set[str] = set()
+        self._store: InMemoryOutboxStore | RedisStreamOutboxStore | None = None
+        self._local_store: InMemoryOutboxStore | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._retry_tasks: set[asyncio.Task[None]] = set()
+        self._depths: dict[str, int] = {}
+        self._consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._logger = get_logger(service="notification_outbox")
+
+    @property
+    def running(self) -> bool:
+        return self._store is not None
+
+    @property
+    def durable(self) -> bool:
+        return bool(self._store is not None and self._store.durable)
+
+    def register_channel(
+        self,
+        channel: str,
+        handler: ChannelHandler,
+        *,
+        concurrency: int | None = None,
+        local: bool = False,
+    ) -> None:
+        """Attach the coroutine that delivers messages for ``channel``.
+
+        ``local`` channels stay in this process with one ordered consumer.
+        """
+
+        self._handlers[channel] = handler
+        if local:
+            self._local.add(channel)
+            self._concurrency[channel] = 1
+        elif concurrency is not None:
+            self._concurrency[channel] = max(1, concurrency)
+        else:
+            self._concurrency.setdefault(channel, 1)
+
+    def handles(self, channel: str) -> bool:
+        return self.running and channel in self._handlers
+
+    def saturation(self, channel: str) -> float:
+        """Last observed queue depth as a fraction of ``max_pending``."""
+
+        return self._depths.get(channel, 0) / self._max_pending
+
+    async def start(self) -> None:
+        if self.running:
+            return
+
+        channels = list(self._handlers)
+        local = [channel for channel in channels if channel in self._local]
+        shared = [channel for channel in channels if channel not in self._local]
+        self._store = await self._open_store(shared)
+        if self._store.durable:
+            self._local_store = InMemoryOutboxStore()
+            await self._local_store.prepare(local)
+        else:
+            await self._store.prepare(local)
+            self._local_store = self._store
+        for channel in channels:
+            for index in range(self._concurrency.get(channel, 1)):
+                self._tasks.append(
+                    asyncio.create_task(
+                        self._worker(channel), name=f"outbox-{channel}-{index}"
+                    )
+                )
+            if self._channel_store(channel).durable:
+                self._tasks.append(
+                    asyncio.create_task(
+                        self._reclaimer(channel), name=f"outbox-{channel}-reclaim"
+                    )
+                )
+        self._logger.info(
+            {
+                "service": "notification_outbox",
+                "event": "outbox_started",
+                "store": "redis" if self._store.durable else "memory",
+                "channels": {c: self._concurrency.get(c, 1) for c in channels},
+                "local_channels": local,
+            }
+        )
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """Stop workers, giving in-memory queues ``drain_timeout`` to empty."""
+
+        store = self._store
+        if store is None:
+            return
+
+        pending = [
+            channel
+            for channel in self._handlers
+            if not self._channel_store(channel).durable
+        ]
+        deadline = time.monotonic() + drain_timeout
+        while pending and time.monotonic() < deadline:
+            depths = [
+                await self._channel_store(channel).depth(channel) for channel in pending
+            ]
+            if not any(depths):
+                break
+            await asyncio.sleep(0.05)
+
+        tasks = [*self._tasks, *self._retry_tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._retry_tasks.clear()
+        self._store = None
+        self._local_store = None
+        try:
+            await store.close()
+        except Exception:  # pragma: no cover - cierre defensivo
+            pass
+
+    async def enqueue(
+        self,
+        channel: str,
+        payload: dict[str, Any],
+        *,
+        timeout: float | None = None,
+    ) -> bool:
+        """Queue ``payload`` for ``channel``; ``False`` means deliver it inline."""
+
+        if self._store is None or channel not in self._handlers:
+            return False
+        store = self._channel_store(channel)
+
+        wait_budget = self._enqueue_timeout if timeout is None else timeout
+        deadline = time.monotonic() + wait_budget
+        try:
+            depth = await store.depth(channel)
+            while depth >= self._max_pending:
+                if time.monotonic() >= deadline:
+                    self._record_depth(channel, depth)
+                    notification_outbox_messages_total.labels(
+                        channel=channel, outcome="rejected"
+                    ).inc()
+                    return False
+                await asyncio.sleep(0.02)
+                depth = await store.depth(channel)
+            await store.add(OutboxMessage(channel=channel, payload=payload))
+        except Exception as exc:
+            self._logger.warning(
+                {
+                    "service": "notification_outbox",
+                    "event": "enqueue_failed",
+                    "channel": channel,
+                    "error": str(exc),
+                }
+            )
+            notification_outbox_messages_total.labels(
+                channel=channel, outcome="enqueue_error"
+            ).inc()
+            return False
+
+        self._record_depth(channel, depth + 1)
+        notification_outbox_messages_total.labels(
+            channel=channel, outcome="enqueued"
+        ).inc()
+        return True
+
+    def _channel_store(
+        self, channel: str
+    ) -> InMemoryOutboxStore | RedisStreamOutboxStore:
+        if channel in self._local and self._local_store is not None:
+            return self._local_store
+        assert self._store is not None
+        return self._store
+
+    async def _open_store(
+        self, channels: list[str]
+    ) -> InMemoryOutboxStore | RedisStreamOutboxStore:
+        if self._redis_url and aioredis is not None:
+            client = aioredis.from_url(self._redis_url, decode_responses=True)
+            store = RedisStreamOutboxStore(client)
+            try:
+                await store.prepare(channels)
+                return store
+            except Exception as exc:
+                self._logger.warning(
+                    {
+                        "service": "notification_outbox",
+                        "event": "redis_unavailable_fallback_memory",
+                        "error": str(exc),
+                    }
+                )
+                try:
+                    await client.aclose()
+                except Exception:  # pragma: no cover - cierre defensivo
+                    pass
+
+        memory_store = InMemoryOutboxStore()
+        await memory_store.prepare(channels)
+        return memory_store
+
+    async def _worker(self, channel: str) -> None:
+        while True:
+            if self._store is None:
+                return
+            store = self._channel_store(channel)
+            try:
+                message = await store.read(channel, self._consumer, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._logger.warning(
+                    {
+                        "service": "notification_outbox",
+                        "event": "read_failed",
+                        "channel": channel,
+                        "error": str(exc),
+                    }
+                )
+                await asyncio.sleep(1.0)
+                continue
+            if message is not None:
+                await self._process(message)
+
+    async def _reclaimer(self, channel: str) -> None:
+        interval = self._visibility_timeout / 2
+        while True:
+            await asyncio.sleep(interval)
+            if self._store is None:
+                return
+            store = self._channel_store(channel)
+            try:
+                messages = await store.reclaim(
+                    channel, self._consumer, self._visibility_timeout
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._logger.warning(
+                    {
+                        "service": "notification_outbox",
+                        "event": "reclaim_failed",
+                        "channel": channel,
+                        "error": str(exc),
+                    }
+                )
+                continue
+            for message in messages:
+                notification_outbox_messages_total.labels(
+                    channel=channel, outcome="reclaimed"
+                ).inc()
+                await self._process(message)
+
+    async def _process(self, message: OutboxMessage) -> None:
+        channel = message.channel
+        handler = self._handlers.get(channel)
+        if self._store is None or handler is None:
+            return
+        store = self._channel_store(channel)
+
+        notification_outbox_lag_seconds.labels(channel=channel).observe(
+            max(0.0, time.time() - message.enqueued_at)
+        )
+        try:
+            await asyncio.wait_for(handler(message.payload), self._handler_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            await self._handle_failure(store, message, exc)
+        else:
+            await store.ack(message)
+            notification_outbox_messages_total.labels(
+                channel=channel, outcome="acked"
+            ).inc()
+        self._record_depth(channel, await store.depth(channel))
+
+    async def _handle_failure(
+        self,
+        store: InMemoryOutboxStore | RedisStreamOutboxStore,
+        message: OutboxMessage,
+        error: Exception,
+    ) -> None:
+        attempts = message.attempts + 1
+        if attempts >= self._max_attempts:
+            await store.ack(message)
+            notification_outbox_messages_total.labels(
+                channel=message.channel, outcome="dead_lettered"
+            ).inc()
+            self._logger.error(
+                {
+                    "service": "notification_outbox",
+                    "event": "message_dead_lettered",
+                    "channel": message.channel,
+                    "message_id": message.id,
+                    "attempts": attempts,
+                    "error": str(error),
+                }
+            )
+            return
+
+        notification_outbox_messages_total.labels(
+            channel=message.channel, outcome="retried"
+        ).inc()
+        delay = self._retry_base * (2 ** (attempts - 1))
+        task = asyncio.create_task(self._retry_later(store, message, attempts, delay))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _retry_later(
+        self,
+        store: InMemoryOutboxStore | RedisStreamOutboxStore,
+        message: OutboxMessage,
+        attempts: int,
+        delay: float,
+    ) -> None:
+        await asyncio.sleep(delay)
+        retry = OutboxMessage(
+            channel=message.channel,
+            payload=message.payload,
+            id=message.id,
+            attempts=attempts,
+            enqueued_at=message.enqueued_at,
+        )
+        # QA: se re-encola antes de confirmar el original; si el proceso muere en
+        # medio, el original sigue pendiente y se reclama (at-least-once).
+        await store.add(retry)
+        await store.ack(message)
+
+    def _record_depth(self, channel: str, depth: int) -> None:
+        self._depths[channel] = depth
+        notification_outbox_depth.labels(channel=channel).set(depth)
+
+
+notification_outbox = NotificationOutbox(
+    redis_url=Config.REDIS_URL,
+    concurrency=parse_channel_concurrency(Config.NOTIFICATION_OUTBOX_CONCURRENCY),
+    max_pending=Config.NOTIFICATION_OUTBOX_MAX_PENDING,
+    max_attempts=Config.NOTIFICATION_OUTBOX_MAX_ATTEMPTS,
+    visibility_timeout=Config.NOTIFICATION_OUTBOX_VISIBILITY_TIMEOUT,
+    enqueue_timeout=Config.NOTIFICATION_OUTBOX_ENQUEUE_TIMEOUT_MS / 1000,
+)
+
+
+__all__ = [
+    "InMemoryOutboxStore",
+    "NotificationOutbox",
+    "OutboxMessage",
+    "RedisStreamOutboxStore",
+    "notification_outbox",
+    "parse_channel_concurrency",
+]
@@ -5,16 +5,24 @@ import string
 from pathlib import Path
 from threading import RLock
 
+from backend.services.password_index import PasswordIndex, is_index_file, sha1_digest
 from backend.utils.config import Config
 
 
 class PasswordBreachDetector:
-    """Offline detector that checks passwords against a local dataset."""
+    """Offline detector that checks passwords against a local dataset.
+
+    ``dataset_path`` may be a text file (plain passwords or SHA-1 hashes, one
+    per line), loaded into Python sets, or an index built by
+    ``backend/scripts/build_password_index.py``, which is memory-mapped and
+    shared between workers through the page cache.
+    """
 
     def __init__(self, dataset_path: str | None = None) -> None:
         self._dataset_path = dataset_path
         self._plain_passwords: set[str] | None = None
         self._sha1_passwords: set[str] | None = None
+        self._index: PasswordIndex | None = None
         self._lock = RLock()
 
     def configure(self, dataset_path: str | None) -> None:
@@ -22,6 +30,8 @@ class PasswordBreachDetector:
             self._dataset_path = dataset_path
             self._plain_passwords = None
             self._sha1_passwords = None
+            # Sin close(): un is_compromised en curso puede seguir leyendo el mmap.
+            self._index = None
 
     def _load_dataset(self) -> tuple[set[str], set[str]]:
         plain: set[str] = set()
@@ -55,6 +65,13 @@ class PasswordBreachDetector:
         with self._lock:
             if self._plain_passwords is not None and self._sha1_passwords is not None:
                 return
+            if self._dataset_path and is_index_file(self._dataset_path):
+                try:
+                    self._index = PasswordIndex(self._dataset_path)
+                except (OSError, ValueError):
+                    self._index = None
+                self._plain_passwords, self._sha1_passwords = set(), set()
+                return
             plain, hashed = self._load_dataset()
             self._plain_passwords = plain
             self._sha1_passwords = hashed
@@ -70,6 +87,14 @@ class PasswordBreachDetector:
         if not candidate:
             return False
 
+        index = self._index
+        if index is not None:
+            # Las entradas en claro se indexan por su SHA-1 al compilar.
+            return index.contains_digest(sha1_digest(candidate)) or (
+                candidate.lower() != candidate
+                and index.contains_digest(sha1_digest(candidate.lower()))
+            )
+
         if (
             candidate in self._plain_passwords
             or candidate.lower() in self._plain_passwords
@@ -0,0 +1,180 @@
+"""Precompiled on-disk index of breached password hashes.
+
+File layout (little endian)::
+
+    header   magic "BBPWIDX1", version, width, bloom_k, count, bloom_bits
+    records  ``count`` sorted, unique SHA-1 digest prefixes of ``width`` bytes
+    bloom    ``bloom_bits`` bit Bloom filter over the full SHA-1 digests
+
+:class:`PasswordIndex` maps the file read-only, so every worker process shares
+the same pages through the OS page cache instead of holding its own Python
+sets. A lookup tests ``bloom_k`` bits first (most passwords are not breached
+and stop there) and only then binary-searches the records. Indexes are built
+by ``backend/scripts/build_password_index.py``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import string
+import struct
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+MAGIC = b"BBPWIDX1"
+VERSION = 1
+_HEADER = struct.Struct("<8sHHHHQQ")
+# 10 bytes (80 bits) del SHA-1: colisiones despreciables incluso con 1e9 entradas.
+DEFAULT_WIDTH = 10
+DEFAULT_BITS_PER_ENTRY = 10
+DEFAULT_BLOOM_K = 7
+_HEXDIGITS = frozenset(string.hexdigits)
+
+
+def sha1_digest(password: str) -> bytes:
+    return hashlib.sha1(  # nosec B324: HIBP lookup only, not for security
+        password.encode("utf-8")
+    ).digest()
+
+
+def dataset_digests(lines: Iterable[str]) -> Iterator[bytes]:
+    """SHA-1 digests for a text dataset of plain passwords or HIBP hashes.
+
+    Accepts the same format as the plain-text detector: one entry per line,
+    an optional ``:count`` suffix, and either a 40-char SHA-1 hex digest or
+    the password itself.
+    """
+
+    for line in lines:
+        token = line.strip()
+        if not token:
+            continue
+        token = token.split(":", 1)[0]
+        if len(token) == 40 and _HEXDIGITS.issuperset(token):
+            yield bytes.fromhex(token)
+        else:
+            yield sha1_digest(token)
+
+
+def _bloom_positions(digest: bytes, bits: int, k: int) -> Iterator[int]:
+    # Doble hashing (Kirsch–Mitzenmacher) sobre un digest ya uniforme.
+    h1 = int.from_bytes(digest[0:8], "little")
+    h2 = int.from_bytes(digest[8:16], "little") | 1
+    for i in range(k):
+        yield (h1 + i * h2) % bits
+
+
+def build_index(
+    digests: Iterable[bytes],
+    output: str | os.PathLike[str],
+    *,
+    width: int = DEFAULT_WIDTH,
+    bits_per_entry: int = DEFAULT_BITS_PER_ENTRY,
+    bloom_k: int = DEFAULT_BLOOM_K,
+) -> int:
+    """Write an index for ``digests`` to ``output`` and return its entry count.
+
+    The file is written next to ``output`` and renamed into place, so workers
+    mapping the previous version never see a half-written index.
+    """
+
+    if not 4 <= width <= 20:
+        raise ValueError("width must be between 4 and 20 bytes")
+    full = sorted(set(digests))
+    records = sorted({digest[:width] for digest in full})
+    bloom_bits = max(64, len(full) * max(1, bits_per_entry))
+    bloom_bits += -bloom_bits % 8
+    bloom = bytearray(bloom_bits // 8)
+    for digest in full:
+        for position in _bloom_positions(digest, bloom_bits, bloom_k):
+            bloom[position >> 3] |= 1 << (position & 7)
+
+    target = Path(output)
+    partial = target.with_name(f".{target.name}.partial")
+    with partial.open("wb") as handle:
+        handle.write(
+            _HEADER.pack(MAGIC, VERSION, width, bloom_k, 0, len(records), bloom_bits)
+        )
+        handle.write(b"".join(records))
+        handle.write(bloom)
+    os.replace(partial, target)
+    return len(records)
+
+
+def is_index_file(path: str | os.PathLike[str]) -> bool:
+    try:
+        with open(path, "rb") as handle:
+            return handle.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class PasswordIndex:
+    """Read-only, memory-mapped view over an index built by :func:`build_index`."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = str(path)
+        with open(self.path, "rb") as handle:
+            self._mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, width, bloom_k, _, count, bloom_bits = _HEADER.unpack_from(
+                self._mm, 0
+            )
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.path} is not a password index")
+            self.width = width
+            self.bloom_k = bloom_k
+            self.count = count
+            self.bloom_bits = bloom_bits
+            self._records_at = _HEADER.size
+            self._bloom_at = self._records_at + count * width
+            if len(self._mm) < self._bloom_at + bloom_bits // 8:
+                raise ValueError(f"{self.path} is truncated")
+        except Exception:
+            self._mm.close()
+            raise
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def might_contain(self, digest: bytes) -> bool:
+        mm, base = self._mm, self._bloom_at
+        for position in _bloom_positions(digest, self.bloom_bits, self.bloom_k):
+            if not mm[base + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def contains_digest(self, digest: bytes) -> bool:
+        if not self.might_contain(digest):
+            return False
+        key = digest[: self.width]
+        mm, width, start = self._mm, self.width, self._records_at
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            offset = start + mid * width
+            record = mm[offset : offset + width]
+            if record < key:
+                low = mid + 1
+            elif record > key:
+                high = mid
+            else:
+                return True
+        return False
+
+    def contains(self, password: str) -> bool:
+        return self.contains_digest(sha1_digest(password))
+
+
+__all__ = [
+    "PasswordIndex",
+    "build_index",
+    "dataset_digests",
+    "is_index_file",
+    "sha1_digest",
+]
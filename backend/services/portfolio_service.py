@@ -12,7 +12,7 @@ from uuid import UUID
 from sqlalchemy import delete, select
 from sqlalchemy.orm import Session, selectinload, sessionmaker
 
-from backend.database import SessionLocal
+from backend.database import SessionLocal, async_session_factory_for
 from backend.models.portfolio import Portfolio, Position
 from backend.schemas.portfolio import PortfolioCreate, PositionCreate
 from backend.utils.config import Config
@@ -104,6 +104,20 @@ def list_portfolios(user_id: UUID) -> list[Portfolio]:
         return portfolios
 
 
+async def list_portfolios_async(user_id: UUID) -> list[Portfolio]:
+    async_factory = async_session_factory_for(SessionLocal)
+    if async_factory is None:
+        return await asyncio.to_thread(list_portfolios, user_id)
+    async with async_factory() as session:
+        portfolios = await session.scalars(
+            select(Portfolio)
+            .options(selectinload(Portfolio.positions))
+            .where(Portfolio.user_id == user_id)
+            .order_by(Portfolio.created_at)
+        )
+        return list(portfolios.unique().all())
+
+
 def get_portfolio_owned(user_id: UUID, portfolio_id: UUID) -> Portfolio:
     with _session_scope() as session:
         portfolio = session.scalar(
@@ -119,6 +133,21 @@ def get_portfolio_owned(user_id: UUID, portfolio_id: UUID) -> Portfolio:
         return portfolio
 
 
+async def get_portfolio_owned_async(user_id: UUID, portfolio_id: UUID) -> Portfolio:
+    async_factory = async_session_factory_for(SessionLocal)
+    if async_factory is None:
+        return await asyncio.to_thread(get_portfolio_owned, user_id, portfolio_id)
+    async with async_factory() as session:
+        portfolio = await session.scalar(
+            select(Portfolio)
+            .options(selectinload(Portfolio.positions))
+            .where(Portfolio.id == portfolio_id, Portfolio.user_id == user_id)
+        )
+    if portfolio is None:
+        raise ValueError("Portfolio not found")
+    return portfolio
+
+
 def add_position(portfolio_id: UUID, data: PositionCreate) -> Position:
     symbol = _normalize_symbol(data.symbol)
     quantity = _to_decimal(data.quantity)
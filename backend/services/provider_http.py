@@ -0,0 +1,186 @@
+"""Shared HTTP sessions and model availability cache for AI providers."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+import aiohttp
+
+from backend.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderHTTPClients:
+    """One keep-alive ``aiohttp.ClientSession`` per AI provider.
+
+    Sessions are opened lazily after :meth:`start` (called from the app
+    lifespan) and reused for every call, so TLS handshakes and connection
+    setup are paid once per provider instead of once per request. Before
+    ``start`` or after :meth:`close` each call gets a short-lived session, which
+    keeps scripts and tests that never run the lifespan working unchanged.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_limit: int | None = None,
+        keepalive_seconds: float | None = None,
+    ) -> None:
+        self._pool_limit = (
+            Config.AI_HTTP_POOL_LIMIT if pool_limit is None else pool_limit
+        )
+        self._keepalive = (
+            Config.AI_HTTP_KEEPALIVE_SECONDS
+            if keepalive_seconds is None
+            else keepalive_seconds
+        )
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    async def start(self) -> None:
+        self._started = True
+
+    async def close(self) -> None:
+        self._started = False
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            try:
+                await session.close()
+            except Exception as exc:  # pragma: no cover - cierre defensivo
+                logger.debug("provider_session_close_failed: %s", exc)
+
+    def _shared(self, provider: str) -> aiohttp.ClientSession:
+        session = self._sessions.get(provider)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_limit,
+                keepalive_timeout=self._keepalive,
+                ttl_dns_cache=300,
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            self._sessions[provider] = session
+        return session
+
+    @asynccontextmanager
+    async def session(
+        self, provider: str, **kwargs: Any
+    ) -> AsyncIterator[aiohttp.ClientSession]:
+        """Yield the provider session; ``kwargs`` only apply to one-off sessions."""
+
+        if self._started:
+            yield self._shared(provider)
+            return
+        async with aiohttp.ClientSession(**kwargs) as session:
+            yield session
+
+
+class ModelAvailabilityCache:
+    """TTL cache of the models each provider host can serve.
+
+    Fresh listings are answered from memory. Stale ones are still used while
+    a single background task refreshes them, so only the very first call for
+    a host waits on the listing request. Models reported as missing can also
+    be remembered for a while to fail fast instead of calling the provider.
+    """
+
+    def __init__(self, ttl_seconds: float | None = None) -> None:
+        self.ttl_seconds = (
+            Config.AI_MODEL_AVAILABILITY_TTL_SECONDS
+            if ttl_seconds is None
+            else ttl_seconds
+        )
+        self._listings: dict[str, tuple[float, frozenset[str] | None]] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._unavailable: dict[str, float] = {}
+
+    def clear(self) -> None:
+        self._listings.clear()
+        self._unavailable.clear()
+
+    async def models(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[frozenset[str] | None]],
+    ) -> frozenset[str] | None:
+        """Return the cached listing for ``key`` (``None`` if the host has none)."""
+
+        cached = self._listings.get(key)
+        if cached is not None:
+            fetched_at, listing = cached
+            if time.monotonic() - fetched_at >= self.ttl_seconds:
+                self._refresh(key, loader, background=True)
+            return listing
+        return await asyncio.shield(self._refresh(key, loader, background=False))
+
+    def _refresh(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[frozenset[str] | None]],
+        *,
+        background: bool,
+    ) -> asyncio.Task:
+        task = self._refreshing.get(key)
+        if task is not None:
+            return task
+
+        async def _load() -> frozenset[str] | None:
+            try:
+                listing = await loader()
+            except Exception as exc:
+                # Sin listado válido: la próxima llamada vuelve a comprobar en línea.
+                self._listings.pop(key, None)
+                if background:
+                    logger.warning("model_availability_refresh_failed %s: %s", key, exc)
+                    return None
+                raise
+            else:
+                self._listings[key] = (time.monotonic(), listing)
+                return listing
+            finally:
+                self._refreshing.pop(key, None)
+
+        task = asyncio.create_task(_load())
+        if background:
+            task.add_done_callback(_consume_result)
+        self._refreshing[key] = task
+        return task
+
+    def mark_unavailable(self, key: str, seconds: float | None = None) -> None:
+        ttl = self.ttl_seconds if seconds is None else seconds
+        self._unavailable[key] = time.monotonic() + max(ttl, 0.0)
+
+    def is_unavailable(self, key: str) -> bool:
+        until = self._unavailable.get(key)
+        if until is None:
+            return False
+        if time.monotonic() >= until:
+            self._unavailable.pop(key, None)
+            return False
+        return True
+
+
+def _consume_result(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+provider_clients = ProviderHTTPClients()
+model_availability = ModelAvailabilityCache()
+
+__all__ = [
+    "ModelAvailabilityCache",
+    "ProviderHTTPClients",
+    "model_availability",
+    "provider_clients",
+]
@@ -6,15 +6,18 @@ import hashlib
 import json
 import logging
 import time
-from collections.abc import Iterable
+import uuid
+from collections.abc import Iterable, Iterator
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
 from pywebpush import WebPushException, webpush
+from sqlalchemy import func, select, update
 
 from backend.core.config import settings
 from backend.models.push_preference import PushNotificationPreference
 from backend.models.push_subscription import PushSubscription
+from backend.utils.config import Config
 
 
 # QA: resolver SessionLocal dinámicamente para convivir con recargas en tests/xDIST
@@ -40,6 +43,91 @@ def endpoint_fingerprint(endpoint: str) -> str:
 PRUNE_FAIL_THRESHOLD = 5
 PRUNE_GRACE_HOURS = 24
 
+# QA: marcador para distinguir "preferencias no precargadas" de "sin preferencias"
+_PREFERENCES_UNSET: Any = object()
+
+
+class _DeliveryOutcomeBatch:
+    """Accumulate delivery outcomes and persist them as bulk UPDATE statements.
+
+    Outcomes are merged per subscription so that a failure followed by a
+    successful retry ends in the same state the row-by-row path produced. The
+    batch flushes itself after ``max_size`` pending subscriptions or once
+    ``max_interval_ms`` elapsed since the previous flush.
+    """
+
+    def __init__(self, *, max_size: int, max_interval_ms: int) -> None:
+        self._max_size = max(1, max_size)
+        self._max_interval = max(0, max_interval_ms) / 1000
+        self._last_flush = time.monotonic()
+        # subscription_id -> [reset, failures, mark_pruning]
+        self._pending: dict[Any, list[Any]] = {}
+        self.statements = 0
+
+    def record_failure(self, subscription_id: Any, *, mark_pruning: bool) -> None:
+        state = self._pending.setdefault(subscription_id, [False, 0, False])
+        state[1] += 1
+        state[2] = state[2] or mark_pruning
+        self._maybe_flush()
+
+    def record_success(self, subscription_id: Any) -> None:
+        self._pending[subscription_id] = [True, 0, False]
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if len(self._pending) >= self._max_size or (
+            time.monotonic() - self._last_flush >= self._max_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write every pending outcome, grouping rows that share the same update."""
+
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        session_factory = _get_session_factory()
+        if session_factory is None:
+            return
+
+        groups: dict[tuple[bool, int, bool], list[Any]] = {}
+        for subscription_id, (reset, failures, pruning) in pending.items():
+            groups.setdefault((reset, failures, pruning), []).append(subscription_id)
+
+        now = datetime.now(UTC)
+        with session_factory() as session:  # type: ignore[misc]
+            for (reset, failures, pruning), ids in groups.items():
+                if failures == 0:
+                    values: dict[str, Any] = {
+                        "fail_count": 0,
+                        "last_fail_at": None,
+                        "pruning_marked": False,
+                    }
+                elif reset:
+                    values = {
+                        "fail_count": failures,
+                        "last_fail_at": now,
+                        "pruning_marked": pruning,
+                    }
+                else:
+                    values = {
+                        "fail_count": func.coalesce(PushSubscription.fail_count, 0)
+                        + failures,
+                        "last_fail_at": now,
+                    }
+                    if pruning:
+                        values["pruning_marked"] = True
+                session.execute(
+                    update(PushSubscription)
+                    .where(PushSubscription.id.in_(ids))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                self.statements += 1
+            session.commit()
+
 
 class PushService:
     """Encapsulates Web Push subscription handling and delivery."""
@@ -69,6 +157,84 @@ class PushService:
         with session_factory() as session:  # type: ignore[misc]
             return session.query(PushSubscription).all()
 
+    def iter_subscriptions_with_preferences(
+        self,
+        *,
+        page_size: int | None = None,
+        user_ids: Iterable[uuid.UUID] | None = None,
+    ) -> Iterator[tuple[PushSubscription, PushNotificationPreference | None]]:
+        """Yield every subscription with its owner's preferences, page by page.
+
+        Rows are read with keyset pagination over the primary key joined to
+        ``push_notification_preferences``, so memory stays bounded by one page
+        and no cursor (nor its locks) is held open while pushes are sent.
+        """
+
+        session_factory = _get_session_factory()
+        if session_factory is None:
+            return
+
+        size = max(1, page_size or Config.PUSH_BROADCAST_PAGE_SIZE)
+        owners = list(user_ids) if user_ids is not None else []
+        if user_ids is not None and not owners:
+            return
+        last_id = None
+        while True:
+            statement = (
+                select(PushSubscription, PushNotificationPreference)
+                .outerjoin(
+                    PushNotificationPreference,
+                    PushNotificationPreference.user_id == PushSubscription.user_id,
+                )
+                .order_by(PushSubscription.id)
+                .limit(size)
+            )
+            if user_ids is not None:
+                statement = statement.where(PushSubscription.user_id.in_(owners))
+            if last_id is not None:
+                statement = statement.where(PushSubscription.id > last_id)
+
+            with session_factory() as session:  # type: ignore[misc]
+                rows = session.execute(statement).all()
+                session.expunge_all()
+
+            yield from ((row[0], row[1]) for row in rows)
+            if len(rows) < size:
+                return
+            last_id = rows[-1][0].id
+
+    def _load_preferences(
+        self, user_ids: Iterable[Any]
+    ) -> dict[Any, PushNotificationPreference] | None:
+        """Fetch preferences for ``user_ids`` with a single query."""
+
+        session_factory = _get_session_factory()
+        if session_factory is None:
+            return None
+
+        unique_ids = {user_id for user_id in user_ids if user_id is not None}
+        if not unique_ids:
+            return {}
+
+        with session_factory() as session:  # type: ignore[misc]
+            rows = (
+                session.execute(
+                    select(PushNotificationPreference).where(
+                        PushNotificationPreference.user_id.in_(unique_ids)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+            session.expunge_all()
+        return {row.user_id: row for row in rows}
+
+    def _new_outcome_batch(self) -> _DeliveryOutcomeBatch:
+        return _DeliveryOutcomeBatch(
+            max_size=Config.PUSH_OUTCOME_FLUSH_SIZE,
+            max_interval_ms=Config.PUSH_OUTCOME_FLUSH_INTERVAL_MS,
+        )
+
     def _resolve_vapid_keys(
         self,
         *,
@@ -167,9 +333,20 @@ class PushService:
         *,
         vapid_private: str,
         vapid_public: str,
+        outcomes: _DeliveryOutcomeBatch | None = None,
     ) -> bool:
         fingerprint = endpoint_fingerprint(subscription.endpoint)
         attempts = 0
+        mark_failure = (
+            outcomes.record_failure
+            if outcomes is not None
+            else self._mark_delivery_failure
+        )
+        reset_state = (
+            outcomes.record_success
+            if outcomes is not None
+            else self._reset_subscription_state
+        )
 
         while True:
             subscription_info = {
@@ -190,7 +367,7 @@ class PushService:
                 mark_pruning = status_code in {404, 410}
                 message = getattr(response, "text", "") or str(exc)
                 reason = message.strip().replace("\n", " ")[:160]
-                self._mark_delivery_failure(subscription.id, mark_pruning=mark_pruning)
+                mark_failure(subscription.id, mark_pruning=mark_pruning)
                 self.logger.warning(
                     "webpush_error endpoint=%s status=%s attempt=%s pruning=%s reason=%s",
                     fingerprint,
@@ -217,7 +394,7 @@ class PushService:
                 attempts += 1
                 continue
             except Exception as exc:  # pragma: no cover - defensive logging
-                self._mark_delivery_failure(subscription.id, mark_pruning=False)
+                mark_failure(subscription.id, mark_pruning=False)
                 self.logger.warning(
                     "webpush_exception endpoint=%s attempt=%s error=%s",
                     fingerprint,
@@ -226,7 +403,7 @@ class PushService:
                 )
                 break
             else:
-                self._reset_subscription_state(subscription.id)
+                reset_state(subscription.id)
                 self.logger.debug(
                     "webpush_delivered endpoint=%s attempts=%s",
                     fingerprint,
@@ -239,11 +416,30 @@ class PushService:
         return False
 
     def _is_category_allowed(
-        self, subscription: PushSubscription, category: str | None
+        self,
+        subscription: PushSubscription,
+        category: str | None,
+        preferences: PushNotificationPreference | None = _PREFERENCES_UNSET,
     ) -> bool:
         if category is None:
             return True
 
+        if preferences is _PREFERENCES_UNSET:
+            preferences = self._lookup_preferences(subscription)
+
+        if preferences is None:
+            return True
+
+        mapping = {
+            "alerts": preferences.alerts_enabled,
+            "news": preferences.news_enabled,
+            "system": preferences.system_enabled,
+        }
+        return mapping.get(category, True)
+
+    def _lookup_preferences(
+        self, subscription: PushSubscription
+    ) -> PushNotificationPreference | None:
         user = getattr(subscription, "user", None)
         preferences: PushNotificationPreference | None = None
         if user is not None:
@@ -261,16 +457,7 @@ class PushService:
                         )
                         .one_or_none()
                     )
-
-        if preferences is None:
-            return True
-
-        mapping = {
-            "alerts": preferences.alerts_enabled,
-            "news": preferences.news_enabled,
-            "system": preferences.system_enabled,
-        }
-        return mapping.get(category, True)
+        return preferences
 
     def broadcast_to_subscriptions(
         self,
@@ -286,25 +473,102 @@ class PushService:
             self.logger.warning("VAPID keys missing — skipping push")
             return 0
 
+        targets = list(subscriptions)
+        preferences_by_user = (
+            self._load_preferences(
+                getattr(subscription, "user_id", None) for subscription in targets
+            )
+            if category is not None and targets
+            else None
+        )
+
+        def _with_preferences() -> Iterator[tuple[PushSubscription, Any]]:
+            for subscription in targets:
+                if preferences_by_user is None:
+                    yield subscription, _PREFERENCES_UNSET
+                else:
+                    yield subscription, preferences_by_user.get(
+                        getattr(subscription, "user_id", None)
+                    )
+
+        return self._deliver(
+            _with_preferences(),
+            payload,
+            category=category,
+            vapid_private=vapid_private,
+            vapid_public=vapid_public,
+        )
+
+    def _deliver(
+        self,
+        targets: Iterable[tuple[PushSubscription, Any]],
+        payload: dict[str, Any],
+        *,
+        category: str | None,
+        vapid_private: str,
+        vapid_public: str,
+    ) -> int:
+        outcomes = self._new_outcome_batch()
         delivered = 0
-        for subscription in subscriptions:
-            if self.should_prune_subscription(subscription):
-                self.logger.debug(
-                    "skip_pruned_subscription endpoint=%s",
-                    endpoint_fingerprint(subscription.endpoint),
+        try:
+            for subscription, preferences in targets:
+                if self.should_prune_subscription(subscription):
+                    self.logger.debug(
+                        "skip_pruned_subscription endpoint=%s",
+                        endpoint_fingerprint(subscription.endpoint),
+                    )
+                    continue
+                if not self._is_category_allowed(subscription, category, preferences):
+                    continue
+                if self._send_with_retries(
+                    subscription,
+                    payload,
+                    vapid_private=vapid_private,
+                    vapid_public=vapid_public,
+                    outcomes=outcomes,
+                ):
+                    delivered += 1
+        finally:
+            # QA: persistimos los resultados pendientes aunque el envío se interrumpa
+            try:
+                outcomes.flush()
+            except Exception as exc:  # pragma: no cover - defensive logging
+                self.logger.warning("push_outcome_flush_failed error=%s", exc)
+
+        return delivered
+
+    def broadcast_to_users(
+        self,
+        user_ids: Iterable[Any],
+        payload: dict[str, Any],
+        *,
+        category: str | None = None,
+    ) -> int:
+        """Send ``payload`` only to the subscriptions owned by ``user_ids``."""
+
+        vapid_private, vapid_public = self._resolve_vapid_keys()
+        if not vapid_public or not vapid_private:
+            self.logger.warning("VAPID keys missing — skipping push")
+            return 0
+
+        owners: list[uuid.UUID] = []
+        for user_id in user_ids:
+            try:
+                owners.append(
+                    user_id
+                    if isinstance(user_id, uuid.UUID)
+                    else uuid.UUID(str(user_id))
                 )
+            except (TypeError, ValueError):
                 continue
-            if not self._is_category_allowed(subscription, category):
-                continue
-            if self._send_with_retries(
-                subscription,
-                payload,
-                vapid_private=vapid_private,
-                vapid_public=vapid_public,
-            ):
-                delivered += 1
 
-        return delivered
+        return self._deliver(
+            self.iter_subscriptions_with_preferences(user_ids=owners),
+            payload,
+            category=category,
+            vapid_private=vapid_private,
+            vapid_public=vapid_public,
+        )
 
     def broadcast(
         self,
@@ -334,18 +598,24 @@ class PushService:
             self.logger.warning("VAPID keys missing — skipping push")
             return 0
 
-        target_subscriptions = (
-            list(subscriptions)
-            if subscriptions is not None
-            else self.get_all_subscriptions()
-        )
-        if not target_subscriptions:
-            return 0
-
         effective_category = category
         if effective_category is None and isinstance(payload, dict):
             effective_category = payload.get("category")
 
+        if subscriptions is None:
+            # QA: recorrido paginado con preferencias unidas; sin cargar toda la tabla
+            return self._deliver(
+                self.iter_subscriptions_with_preferences(),
+                payload,
+                category=effective_category,
+                vapid_private=vapid_private,
+                vapid_public=vapid_public,
+            )
+
+        target_subscriptions = list(subscriptions)
+        if not target_subscriptions:
+            return 0
+
         return self.broadcast_to_subscriptions(
             target_subscriptions,
             payload,
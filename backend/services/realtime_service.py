@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+from contextlib import suppress
 from typing import Any
 
 from fastapi import WebSocket
@@ -14,23 +15,108 @@ from backend.metrics.realtime_metrics import (
     ws_errors_total,
     ws_messages_sent_total,
 )
+from backend.utils.config import Config
+
+
+class DeltaEncoder:
+    """Per-client compact encoder for conflated topics.
+
+    Frames batch every updated key of a topic. Numeric fields travel as the
+    difference from the value previously sent to this client and unchanged
+    fields are omitted. Each entry is ``[key, fields, absolute]``; the
+    encoder tracks the value the client reconstructs (previous + rounded
+    delta), so rounding never accumulates drift, and every
+    ``keyframe_interval`` frames it resends absolute values (``absolute=1``).
+    """
+
+    def __init__(self, *, keyframe_interval: int = 50, precision: int = 8) -> None:
+        self._keyframe_interval = max(1, keyframe_interval)
+        self._precision = precision
+        self._state: dict[tuple[str, str], dict[str, Any]] = {}
+        self._frames: dict[str, int] = {}
+
+    def encode(self, topic: str, updates: dict[str, dict[str, Any]]) -> dict[str, Any]:
+        seq = self._frames.get(topic, 0)
+        self._frames[topic] = seq + 1
+        keyframe = seq % self._keyframe_interval == 0
+
+        entries: list[list[Any]] = []
+        for key, message in updates.items():
+            previous = self._state.get((topic, key))
+            if keyframe or previous is None:
+                self._state[(topic, key)] = dict(message)
+                entries.append([key, dict(message), 1])
+                continue
+
+            changes: dict[str, Any] = {}
+            for field, value in message.items():
+                old = previous.get(field)
+                if value == old and field in previous:
+                    continue
+                if self._is_number(value) and self._is_number(old):
+                    delta = round(value - old, self._precision)
+                    if delta == 0:
+                        continue
+                    changes[field] = delta
+                    previous[field] = round(old + delta, self._precision)
+                else:
+                    changes[field] = value
+                    previous[field] = value
+            if changes:
+                entries.append([key, changes, 0])
+
+        return {"t": "batch", "topic": topic, "seq": seq, "u": entries}
+
+    @staticmethod
+    def _is_number(value: Any) -> bool:
+        return isinstance(value, int | float) and not isinstance(value, bool)
 
 
 class RealtimeService:
     """Administra clientes WebSocket y facilita envíos tipo broadcast."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        *,
+        conflation_tick: float | None = None,
+        keyframe_interval: int = 50,
+        send_timeout: float | None = None,
+    ) -> None:
         # ✅ Codex fix: estructura segura para compartir conexiones WebSocket
         self._connections: set[WebSocket] = set()
         self._lock = asyncio.Lock()
         self._logger = get_logger(service="realtime_service")
+        # QA: conflación por (topic, key) y codificación compacta opcional
+        self._conflation_tick = (
+            conflation_tick
+            if conflation_tick is not None
+            else Config.REALTIME_CONFLATION_TICK_MS / 1000
+        )
+        self._keyframe_interval = keyframe_interval
+        # QA: un socket lento no puede frenar el tick del resto de clientes
+        self._send_timeout = (
+            send_timeout
+            if send_timeout is not None
+            else Config.REALTIME_SEND_TIMEOUT_MS / 1000
+        )
+        self._encoders: dict[WebSocket, DeltaEncoder] = {}
+        self._pending: dict[str, dict[str, dict[str, Any]]] = {}
+        self._flush_task: asyncio.Task[None] | None = None
 
-    async def register(self, websocket: WebSocket) -> None:
-        """Registra una conexión y actualiza métricas de actividad."""
+    async def register(self, websocket: WebSocket, *, compact: bool = False) -> None:
+        """Registra una conexión y actualiza métricas de actividad.
+
+        ``compact`` clients receive conflated topics as batched delta frames
+        (see :class:`DeltaEncoder`) instead of one JSON dict per update.
+        """
 
         # ✅ Codex fix: almacenar la conexión aceptada y reflejarla en las métricas
         async with self._lock:
             self._connections.add(websocket)
+            if compact:
+                self._encoders[websocket] = DeltaEncoder(
+                    keyframe_interval=self._keyframe_interval
+                )
             ws_connections_active_total.set(len(self._connections))
 
     async def unregister(self, websocket: WebSocket) -> None:
@@ -39,8 +125,115 @@ class RealtimeService:
         # ✅ Codex fix: eliminar conexiones cerradas y mantener el gauge sincronizado
         async with self._lock:
             self._connections.discard(websocket)
+            self._encoders.pop(websocket, None)
             ws_connections_active_total.set(len(self._connections))
 
+    async def publish(self, topic: str, key: str, message: dict[str, Any]) -> None:
+        """Queue ``message`` as the latest value of ``(topic, key)``.
+
+        Updates published within the same tick replace each other, so clients
+        only receive the most recent value per key when the tick flushes.
+        """
+
+        self._pending.setdefault(topic, {})[key] = message
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def flush(self) -> int:
+        """Send every conflated update now; returns the number of frames sent.
+
+        Each client gets ``send_timeout`` seconds for its frames; clients
+        that exceed it are dropped and closed instead of stalling the tick.
+        """
+
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        async with self._lock:
+            recipients = list(self._connections)
+            encoders = dict(self._encoders)
+        if not recipients:
+            return 0
+
+        # Los clientes legacy reciben cada valor como JSON completo, serializado una vez
+        legacy_frames = [
+            self._serialize(message)
+            for updates in pending.values()
+            for message in updates.values()
+        ]
+
+        async def _send_all(connection: WebSocket) -> int:
+            encoder = encoders.get(connection)
+            if encoder is None:
+                frames = legacy_frames
+            else:
+                frames = [
+                    self._serialize(encoder.encode(topic, updates))
+                    for topic, updates in pending.items()
+                ]
+            for frame in frames:
+                await connection.send_text(frame)
+            return len(frames)
+
+        results = await asyncio.gather(
+            *(
+                asyncio.wait_for(_send_all(connection), timeout=self._send_timeout)
+                for connection in recipients
+            ),
+            return_exceptions=True,
+        )
+        sent = 0
+        disconnected: list[WebSocket] = []
+        slow: list[WebSocket] = []
+        for connection, result in zip(recipients, results, strict=True):
+            if isinstance(result, BaseException):
+                ws_errors_total.inc()
+                disconnected.append(connection)
+                if isinstance(result, TimeoutError):
+                    slow.append(connection)
+            else:
+                sent += result
+        if sent:
+            ws_messages_sent_total.inc(sent)
+        if disconnected:
+            await asyncio.gather(
+                *(self.unregister(connection) for connection in disconnected)
+            )
+        if slow:
+            log_event(
+                self._logger,
+                service="realtime_service",
+                event="slow_clients_dropped",
+                level="warning",
+                clients=len(slow),
+                timeout_ms=round(self._send_timeout * 1000),
+            )
+            # Cerramos para que el cliente reconecte en vez de quedar mudo.
+            await asyncio.gather(*(self._close_slow(connection) for connection in slow))
+        return sent
+
+    async def _close_slow(self, connection: WebSocket) -> None:
+        with suppress(Exception):
+            await asyncio.wait_for(
+                connection.close(code=1013), timeout=self._send_timeout
+            )
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self._conflation_tick)
+            try:
+                await self.flush()
+            except Exception as exc:  # pragma: no cover - resiliencia del flusher
+                ws_errors_total.inc()
+                log_event(
+                    self._logger,
+                    service="realtime_service",
+                    event="conflation_flush_error",
+                    level="warning",
+                    error=str(exc),
+                )
+
     async def broadcast(self, message: dict[str, Any]) -> None:
         """Envía un mensaje a todos los clientes registrados."""
 
@@ -82,6 +275,12 @@ class RealtimeService:
         """Cierra todas las conexiones activas (usado en shutdown/tests)."""
 
         # ✅ Codex fix: cierre ordenado de conexiones en escenarios de apagado
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._flush_task
+            self._flush_task = None
+        self._pending.clear()
         recipients = await self._snapshot()
         for connection in recipients:
             try:
@@ -104,8 +303,13 @@ class RealtimeService:
     async def _clear_all(self) -> None:
         async with self._lock:
             self._connections.clear()
+            self._encoders.clear()
             ws_connections_active_total.set(0)
 
+    @staticmethod
+    def _serialize(message: dict[str, Any]) -> str:
+        return json.dumps(message, separators=(",", ":"), default=str)
+
     @staticmethod
     def _build_preview(message: dict[str, Any]) -> str:
         # ✅ Codex fix: generar un resumen compacto del mensaje para logs
@@ -116,4 +320,4 @@ class RealtimeService:
         return serialized[:200]
 
 
-__all__ = ["RealtimeService"]
+__all__ = ["DeltaEncoder", "RealtimeService"]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 from typing import Any
@@ -9,6 +10,8 @@ from typing import Any
 import aiohttp
 
 from backend.core.logging_config import get_logger
+from backend.metrics.ai_metrics import ai_sentiment_batch_size
+from backend.utils.batching import MicroBatcher
 
 ENV = os.getenv("APP_ENV", "local")
 
@@ -16,7 +19,9 @@ if ENV == "local":
 
     # 🧩 Codex fix: stub del pipeline en entornos locales para evitar dependencias pesadas
     def pipeline(task_name: str = "sentiment-analysis", **kwargs):
-        return lambda text: [{"label": "neutral", "score": 0.5}]
+        return lambda text: [{"label": "neutral", "score": 0.5}] * (
+            len(text) if isinstance(text, list) else 1
+        )
 
 else:  # pragma: no cover - solo se ejecuta en entornos reales
     from transformers import pipeline
@@ -57,6 +62,12 @@ class SentimentService:
         self.text_cache = text_cache or CacheClient("sentiment-text", ttl=120)
         self._session_factory = session_factory
         self._timeout = aiohttp.ClientTimeout(total=10)
+        # QA: textos concurrentes comparten una sola llamada a HuggingFace
+        self._text_batcher: MicroBatcher[str, dict[str, Any] | None] = MicroBatcher(
+            self._score_texts,
+            max_batch=Config.SENTIMENT_BATCH_MAX_SIZE,
+            max_wait_ms=Config.SENTIMENT_BATCH_MAX_WAIT_MS,
+        )
 
     async def get_market_sentiment(self) -> dict[str, Any] | None:
         """Obtiene el índice Fear & Greed de Alternative.me."""
@@ -93,11 +104,23 @@ class SentimentService:
         if cached is not None:
             return cached
 
+        result = await self._text_batcher.submit(normalized)
+        if result is not None:
+            await self.text_cache.set(cache_key, result)
+        return result
+
+    async def analyze_texts(self, texts: list[str]) -> list[dict[str, Any] | None]:
+        """Analiza varios textos; los que no están en caché viajan en un lote."""
+
+        return list(await asyncio.gather(*(self.analyze_text(text) for text in texts)))
+
+    async def _score_texts(self, texts: list[str]) -> list[dict[str, Any] | None]:
+        ai_sentiment_batch_size.labels(backend="huggingface").observe(len(texts))
         headers = {"Content-Type": "application/json"}
         if Config.HUGGINGFACE_API_KEY:
             headers["Authorization"] = f"Bearer {Config.HUGGINGFACE_API_KEY}"
 
-        payload = json.dumps({"inputs": normalized})
+        payload = json.dumps({"inputs": texts})
         url = f"{Config.HUGGINGFACE_API_URL}/{Config.HUGGINGFACE_SENTIMENT_MODEL}"
 
         async with (
@@ -105,29 +128,32 @@ class SentimentService:
             session.post(url, data=payload, headers=headers) as response,
         ):
             if response.status >= 400:
-                return None
+                return [None] * len(texts)
             data = await response.json()
 
-        if isinstance(data, list) and data:
-            candidate = data[0]
+        if isinstance(data, dict) and "label" in data and len(texts) == 1:
+            candidates: list[Any] = [data]
+        elif isinstance(data, list) and len(data) == len(texts):
+            candidates = data
+        else:
+            candidates = [None] * len(texts)
+
+        results: list[dict[str, Any] | None] = []
+        for candidate in candidates:
             sentiment = (
                 candidate[0] if isinstance(candidate, list) and candidate else candidate
             )
-        elif isinstance(data, dict) and "label" in data:
-            sentiment = data
-        else:
-            sentiment = None
-
-        if sentiment is None:
-            return None
-
-        result = {
-            "label": sentiment.get("label"),
-            "score": sentiment.get("score"),
-            "model": Config.HUGGINGFACE_SENTIMENT_MODEL,
-        }
-        await self.text_cache.set(cache_key, result)
-        return result
+            if not isinstance(sentiment, dict):
+                results.append(None)
+                continue
+            results.append(
+                {
+                    "label": sentiment.get("label"),
+                    "score": sentiment.get("score"),
+                    "model": Config.HUGGINGFACE_SENTIMENT_MODEL,
+                }
+            )
+        return results
 
     async def get_sentiment(
         self, symbol: str, *, text: str | None = None
@@ -160,3 +186,43 @@ def analyze_sentiment(text: str) -> dict[str, Any]:
 
     logger.info({"ai_event": "sentiment_analysis", "label": label, "score": score})
     return {"label": label, "score": score}
+
+
+def analyze_sentiments(texts: list[str]) -> list[dict[str, Any]]:
+    """Batched :func:`analyze_sentiment`: one pipeline call for all ``texts``."""
+
+    try:
+        if not _sentiment_analyzer:
+            raise OSError("sentiment model unavailable")
+        results = _sentiment_analyzer([text[:500] for text in texts])
+        if len(results) != len(texts):
+            raise ValueError("pipeline returned a different number of results")
+        scored = [{"label": item["label"], "score": item["score"]} for item in results]
+    except Exception:  # pragma: no cover - defensive fallback
+        scored = [{"label": "unknown", "score": 0.0} for _ in texts]
+
+    logger.info({"ai_event": "sentiment_analysis", "batch": len(texts)})
+    return scored
+
+
+async def _score_local_batch(texts: list[str]) -> list[dict[str, Any] | None]:
+    ai_sentiment_batch_size.labels(backend="local").observe(len(texts))
+    # El pipeline es CPU-bound: un solo forward pass fuera del event loop.
+    results = await asyncio.to_thread(analyze_sentiments, texts)
+    # "unknown" no se cachea para reintentar cuando el modelo esté disponible.
+    return [None if item["label"] == "unknown" else item for item in results]
+
+
+_local_batcher: MicroBatcher[str, dict[str, Any] | None] = MicroBatcher(
+    _score_local_batch,
+    max_batch=Config.SENTIMENT_BATCH_MAX_SIZE,
+    max_wait_ms=Config.SENTIMENT_BATCH_MAX_WAIT_MS,
+    cache_size=Config.SENTIMENT_CACHE_MAX_ENTRIES,
+)
+
+
+async def analyze_sentiment_batched(text: str) -> dict[str, Any]:
+    """Async :func:`analyze_sentiment` that shares pipeline calls across callers."""
+
+    result = await _local_batcher.submit(text[:500])
+    return dict(result) if result is not None else {"label": "unknown", "score": 0.0}
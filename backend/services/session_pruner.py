@@ -0,0 +1,169 @@
+"""Background pruning of expired access sessions and refresh tokens.
+
+Rows in ``sessions`` and ``refresh_tokens`` used to be deleted only on
+rotation, logout or eviction, so both tables (and every query filtering on
+``expires_at``) grew with the number of logins ever made. :class:`SessionPruner`
+deletes expired rows in batches of ``batch_size`` primary keys, committing
+after each batch so locks stay short, and stops after ``max_batches`` per run;
+whatever is left is picked up on the next tick. Each run also refreshes the
+row-count gauges.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import and_, delete, func, or_, select, text
+from sqlalchemy.orm import Session as OrmSession
+
+from backend.database import SessionLocal
+from backend.metrics.db_metrics import db_rows_pruned_total, db_table_rows
+from backend.models import Session as SessionModel
+from backend.models.refresh_token import RefreshToken
+from backend.services.user_service import REFRESH_TOKEN_TTL
+from backend.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPruner:
+    """Deletes expired ``sessions``/``refresh_tokens`` rows in bounded batches."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], OrmSession] | None = None,
+        *,
+        interval_seconds: float | None = None,
+        batch_size: int | None = None,
+        max_batches: int | None = None,
+        grace_seconds: float | None = None,
+    ) -> None:
+        self._session_factory = session_factory or SessionLocal
+        self.interval_seconds = max(
+            1.0,
+            float(
+                Config.SESSION_PRUNE_INTERVAL_SECONDS
+                if interval_seconds is None
+                else interval_seconds
+            ),
+        )
+        self.batch_size = max(
+            1, Config.SESSION_PRUNE_BATCH_SIZE if batch_size is None else batch_size
+        )
+        self.max_batches = max(
+            1, Config.SESSION_PRUNE_MAX_BATCHES if max_batches is None else max_batches
+        )
+        self.grace = timedelta(
+            seconds=max(
+                0.0,
+                float(
+                    Config.SESSION_PRUNE_GRACE_SECONDS
+                    if grace_seconds is None
+                    else grace_seconds
+                ),
+            )
+        )
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def prune_once(self, now: datetime | None = None) -> dict[str, int]:
+        """Delete expired rows (bounded) and return how many per table."""
+
+        now = now or datetime.now(UTC)
+        cutoff = now - self.grace
+        targets: dict[str, tuple[Any, Any]] = {
+            "sessions": (SessionModel, SessionModel.expires_at < cutoff),
+            # Filas antiguas sin expires_at: caducan con el TTL del JWT de refresco.
+            "refresh_tokens": (
+                RefreshToken,
+                or_(
+                    RefreshToken.expires_at < cutoff,
+                    and_(
+                        RefreshToken.expires_at.is_(None),
+                        RefreshToken.created_at < cutoff - REFRESH_TOKEN_TTL,
+                    ),
+                ),
+            ),
+        }
+        pruned: dict[str, int] = {}
+        with self._session_factory() as db:
+            for table, (model, expired) in targets.items():
+                pruned[table] = self._prune_table(db, model, expired)
+                if pruned[table]:
+                    db_rows_pruned_total.labels(table=table).inc(pruned[table])
+                db_table_rows.labels(table=table).set(self._table_rows(db, model))
+        return pruned
+
+    def _prune_table(self, db: OrmSession, model: Any, expired: Any) -> int:
+        total = 0
+        for _ in range(self.max_batches):
+            ids = db.scalars(
+                select(model.id).where(expired).limit(self.batch_size)
+            ).all()
+            if not ids:
+                break
+            db.execute(
+                delete(model)
+                .where(model.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            total += len(ids)
+            if len(ids) < self.batch_size:
+                break
+        return total
+
+    @staticmethod
+    def _table_rows(db: OrmSession, model: Any) -> int:
+        if db.get_bind().dialect.name == "postgresql":
+            # count(*) recorre la tabla entera; la estimación del planner basta.
+            estimate = db.execute(
+                text(
+                    "SELECT reltuples::bigint FROM pg_class "
+                    "WHERE oid = CAST(:t AS regclass)"
+                ),
+                {"t": model.__tablename__},
+            ).scalar()
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+        return int(db.scalar(select(func.count()).select_from(model)) or 0)
+
+    async def run_once(self) -> dict[str, int]:
+        pruned = await asyncio.to_thread(self.prune_once)
+        if any(pruned.values()):
+            logger.info("session_pruner_pruned: %s", pruned)
+        return pruned
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._loop(), name="session-pruner")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pragma: no cover - resiliencia del bucle
+                logger.warning("session_pruner_error: %s", exc)
+            await asyncio.sleep(self.interval_seconds)
+
+
+session_pruner = SessionPruner()
+
+__all__ = ["SessionPruner", "session_pruner"]
@@ -1,9 +1,11 @@
 # ruff: noqa: I001
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import logging
 import os
+import time
 from collections.abc import Iterable
 from contextlib import contextmanager
 from datetime import UTC, datetime, timedelta
@@ -17,14 +19,20 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session as OrmSession, selectinload, sessionmaker
 
 import pyotp
+from backend.core.auth_cache import (
+    AuthPrincipal,
+    AuthPrincipalCache,
+    auth_principal_cache,
+)
 from backend.core.logging_config import log_event
+from backend.core.password_hashing import password_hasher
 from backend.core.security import (
     create_access_token as core_create_access_token,
     create_refresh_token as core_create_refresh_token,
     decode_access,
     decode_refresh,
 )
-from backend.database import SessionLocal
+from backend.database import SessionLocal, async_session_factory_for
 from backend.models import Alert, AlertDeliveryMethod, Session as SessionModel, User
 from backend.models.refresh_token import RefreshToken
 
@@ -93,13 +101,19 @@ class UserService:
         secret_key: str | None = None,
         algorithm: str | None = None,
         default_session_ttl: timedelta = DEFAULT_SESSION_TTL,
+        principal_cache: AuthPrincipalCache | None = None,
     ):
         self._session_factory = session_factory
+        self._principal_cache = principal_cache or auth_principal_cache
         self._jwt_secret_key = secret_key or Config.JWT_SECRET_KEY
         self._jwt_algorithm = algorithm or Config.JWT_ALGORITHM
         self._default_session_ttl = default_session_ttl
         self._in_memory_refresh_tokens: dict[str, SimpleNamespace] = {}
 
+    @property
+    def _async_session_factory(self) -> Any:
+        return async_session_factory_for(self._session_factory)
+
     @contextmanager
     def _session_scope(self) -> Iterable[OrmSession]:
         session = self._session_factory()
@@ -126,18 +140,20 @@ class UserService:
         )
         return self._detach_entity(session, user)
 
-    def create_user(
-        self, email: str, password: str, *, risk_profile: str | None = None
+    @staticmethod
+    def _normalize_risk_profile(risk_profile: str | None) -> str | None:
+        if not risk_profile:
+            return None
+        candidate = risk_profile.lower()
+        # 🧩 Sustituido RiskProfile Enum por conjunto estático de valores válidos (QA fix)
+        valid_values = {"conservador", "moderado", "agresivo", "analista", "fund"}
+        if candidate not in valid_values:
+            raise ValueError(f"Invalid risk profile: {risk_profile}")
+        return candidate
+
+    def _insert_user(
+        self, email: str, hashed_password: str, risk_profile: str | None
     ) -> User:
-        hashed_password = password_context.hash(password)
-        normalized_profile: str | None = None
-        if risk_profile:
-            candidate = risk_profile.lower()
-            # 🧩 Sustituido RiskProfile Enum por conjunto estático de valores válidos (QA fix)
-            valid_values = {"conservador", "moderado", "agresivo", "analista", "fund"}
-            if candidate not in valid_values:
-                raise ValueError(f"Invalid risk profile: {risk_profile}")
-            normalized_profile = candidate
         with self._session_scope() as session:
             if session.query(User).filter(User.email == email).first():
                 raise UserAlreadyExistsError("Email ya está registrado")
@@ -145,12 +161,30 @@ class UserService:
             user = User(
                 email=email,
                 password_hash=hashed_password,
-                risk_profile=normalized_profile,  # [Codex] nuevo
+                risk_profile=risk_profile,  # [Codex] nuevo
             )
             session.add(user)  # ✅ se añade a la sesión
             session.flush()  # ✅ se asegura de generar el ID
             return self._user_with_relationships(session, user)
 
+    def create_user(
+        self, email: str, password: str, *, risk_profile: str | None = None
+    ) -> User:
+        hashed_password = password_context.hash(password)
+        normalized_profile = self._normalize_risk_profile(risk_profile)
+        return self._insert_user(email, hashed_password, normalized_profile)
+
+    async def create_user_async(
+        self, email: str, password: str, *, risk_profile: str | None = None
+    ) -> User:
+        """Like :meth:`create_user` but hashes on the bounded executor."""
+
+        normalized_profile = self._normalize_risk_profile(risk_profile)
+        hashed_password = await password_hasher.hash(password)
+        return await asyncio.to_thread(
+            self._insert_user, email, hashed_password, normalized_profile
+        )
+
     def create_user_with_id(
         self,
         *,
@@ -209,6 +243,15 @@ class UserService:
             session.expunge(user)  # ✅ suficiente
             return user
 
+    async def get_user_by_email_async(self, email: str) -> User | None:
+        """Load only the user row (no relationships) without blocking the loop."""
+
+        async_factory = self._async_session_factory
+        if async_factory is None:
+            return await asyncio.to_thread(self.get_user_by_email, email)
+        async with async_factory() as session:
+            return await session.scalar(select(User).where(User.email == email))
+
     def get_user_by_id(self, user_id: UUID) -> User | None:
         with self._session_scope() as session:
             user = session.get(User, user_id)
@@ -228,6 +271,46 @@ class UserService:
             raise InvalidCredentialsError("Credenciales inválidas")
         return user
 
+    async def authenticate_user_async(self, email: str, password: str) -> User:
+        """Verify credentials off the event loop and upgrade stale hashes.
+
+        When the stored hash uses a deprecated scheme or fewer rounds than
+        ``password_context`` now requires, the freshly computed hash is
+        persisted so the user is migrated transparently on login.
+        """
+
+        user = await self.get_user_by_email_async(email)
+        if not user:
+            # QA: mismo coste que un usuario real para no filtrar emails por timing.
+            await password_hasher.verify(password, _FAKE_PASSWORD_HASH)
+            raise InvalidCredentialsError("Credenciales inválidas")
+        valid, new_hash = await password_hasher.verify_and_update(
+            password, user.password_hash
+        )
+        if not valid:
+            raise InvalidCredentialsError("Credenciales inválidas")
+        if new_hash:
+            await asyncio.to_thread(self._upgrade_password_hash, user, new_hash)
+        return user
+
+    def _upgrade_password_hash(self, user: User, new_hash: str) -> None:
+        try:
+            with self._session_scope() as session:
+                stored = session.get(User, user.id)
+                if stored is not None:
+                    stored.password_hash = new_hash
+        except Exception as exc:  # noqa: BLE001 - el login no debe fallar por esto
+            LOGGER.warning("password_hash_upgrade_failed user=%s: %s", user.id, exc)
+            return
+        user.password_hash = new_hash
+        log_event(
+            LOGGER,
+            service="user_service",
+            event="password_hash_upgraded",
+            level="info",
+            user_id=str(user.id),
+        )
+
     def _compute_expiration(self, expires_in: timedelta | None) -> datetime:
         delta = expires_in or self._default_session_ttl
         return _utcnow() + delta
@@ -335,29 +418,79 @@ class UserService:
                 session.expunge(sess)
             return sessions
 
-    def get_current_user(self, token: str) -> User:
+    def _session_user_statement(self, token: str) -> tuple[Any, str | None]:
         payload = self._decode_token(token)
         user_id, email = self._extract_identity(payload)
-
-        with self._session_scope() as session:
-            session_record = (
-                session.query(SessionModel)
-                .filter(
-                    SessionModel.token == token,
-                    SessionModel.user_id == user_id,
-                    SessionModel.expires_at > _utcnow(),
-                )
-                .order_by(SessionModel.expires_at.desc())
-                .first()
+        # QA: una sola consulta sesión+usuario; sin refrescar relaciones.
+        statement = (
+            select(User, SessionModel.expires_at)
+            .join(SessionModel, SessionModel.user_id == User.id)
+            .where(
+                SessionModel.token == token,
+                SessionModel.user_id == user_id,
+                SessionModel.expires_at > _utcnow(),
             )
-            if not session_record:
-                raise InvalidTokenError("Token inválido")
+            .order_by(SessionModel.expires_at.desc())
+            .limit(1)
+        )
+        return statement, email
 
-            user = session.get(User, user_id)
-            if not user or (email is not None and user.email != email):
-                raise InvalidTokenError("Token inválido")
+    @staticmethod
+    def _session_user_from_row(row: Any, email: str | None) -> tuple[User, datetime]:
+        if row is None:
+            raise InvalidTokenError("Token inválido")
+        user, expires_at = row
+        if email is not None and user.email != email:
+            raise InvalidTokenError("Token inválido")
+        return user, _as_aware_utc(expires_at) or expires_at
 
-            return self._user_with_relationships(session, user)
+    def _find_session_user(
+        self, session: OrmSession, token: str
+    ) -> tuple[User, datetime]:
+        statement, email = self._session_user_statement(token)
+        return self._session_user_from_row(session.execute(statement).first(), email)
+
+    def get_current_user(self, token: str) -> User:
+        """Return the token's user without loading its relationships.
+
+        Callers that need alerts, sessions or refresh tokens must load them
+        explicitly (e.g. :meth:`get_alerts_for_user`).
+        """
+
+        with self._session_scope() as session:
+            user, _ = self._find_session_user(session, token)
+            session.expunge(user)
+            return user
+
+    def resolve_principal(self, token: str) -> tuple[AuthPrincipal, datetime]:
+        with self._session_scope() as session:
+            user, expires_at = self._find_session_user(session, token)
+            return AuthPrincipal.from_user(user), expires_at
+
+    async def resolve_principal_async(
+        self, token: str
+    ) -> tuple[AuthPrincipal, datetime]:
+        async_factory = self._async_session_factory
+        if async_factory is None:
+            return await asyncio.to_thread(self.resolve_principal, token)
+        statement, email = self._session_user_statement(token)
+        async with async_factory() as session:
+            row = (await session.execute(statement)).first()
+            user, expires_at = self._session_user_from_row(row, email)
+            return AuthPrincipal.from_user(user), expires_at
+
+    async def get_current_principal(self, token: str) -> AuthPrincipal:
+        """Authenticate ``token`` through the principal cache."""
+
+        principal = await self._principal_cache.get(token)
+        if principal is not None:
+            return principal
+        cached_at = time.time()
+        principal, expires_at = await self.resolve_principal_async(token)
+        await self._principal_cache.set(
+            token, principal, expires_at=expires_at, cached_at=cached_at
+        )
+        return principal
 
     def revoke_refresh_token(self, token: str) -> None:
         self._in_memory_refresh_tokens.pop(token, None)
@@ -369,6 +502,7 @@ class UserService:
             db.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete()
             db.commit()
         self.revoke_all_refresh_tokens(user_id)
+        self._principal_cache.invalidate_user(user_id)
 
     def rotate_refresh_token(self, token_str: str) -> tuple[User, str, datetime]:
         """Rota un refresh token utilizando almacenamiento en base de datos."""
@@ -410,6 +544,7 @@ class UserService:
                 )
             )
             db.commit()
+            self._principal_cache.invalidate_user(user_id)
 
             new_payload = decode_refresh(new_refresh)
             refresh_expires = datetime.fromtimestamp(int(new_payload["exp"]), tz=UTC)
@@ -505,6 +640,7 @@ class UserService:
                     evicted_session = active_sessions[0]
                     db.delete(evicted_session)
                     db.flush()
+                    self._principal_cache.revoke_token(evicted_session.token)
                     user_hash = hashlib.sha256(
                         str(user_id).encode("utf-8")
                     ).hexdigest()[:8]
@@ -656,6 +792,15 @@ class UserService:
             return deleted
 
 
+async def resolve_current_user(service: Any, token: str) -> Any:
+    """Authenticate ``token`` via the principal cache when ``service`` has one."""
+
+    resolver = getattr(service, "get_current_principal", None)
+    if resolver is not None:
+        return await resolver(token)
+    return await asyncio.to_thread(service.get_current_user, token)
+
+
 user_service = UserService()
 
 try:
@@ -4,7 +4,9 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections.abc import Iterable
 from contextlib import suppress
+from typing import Any
 
 from fastapi import WebSocket
 
@@ -16,26 +18,51 @@ class AlertWebSocketManager:
 
     def __init__(self) -> None:
         self._connections: set[WebSocket] = set()
+        # QA: user_id -> sockets, para entregar cada alerta sólo a su dueño
+        self._by_user: dict[str, set[WebSocket]] = {}
+        self._owners: dict[WebSocket, str] = {}
         self._lock = asyncio.Lock()
 
-    async def connect(self, websocket: WebSocket) -> None:
+    async def connect(self, websocket: WebSocket, user_id: Any | None = None) -> None:
         await websocket.accept()
         async with self._lock:
             self._connections.add(websocket)
+            if user_id is not None:
+                owner = str(user_id)
+                self._by_user.setdefault(owner, set()).add(websocket)
+                self._owners[websocket] = owner
 
     async def disconnect(self, websocket: WebSocket) -> None:
         async with self._lock:
             self._connections.discard(websocket)
+            owner = self._owners.pop(websocket, None)
+            if owner is None:
+                return
+            sockets = self._by_user.get(owner)
+            if sockets is not None:
+                sockets.discard(websocket)
+                if not sockets:
+                    self._by_user.pop(owner, None)
 
     async def _snapshot(self) -> list[WebSocket]:
         async with self._lock:
             return list(self._connections)
 
     async def broadcast(self, payload: dict) -> None:
-        recipients = await self._snapshot()
-        if not recipients:
-            return
+        await self._deliver(await self._snapshot(), payload)
+
+    async def send_to_users(self, user_ids: Iterable[Any], payload: dict) -> None:
+        """Deliver ``payload`` only to the sockets authenticated as ``user_ids``."""
 
+        async with self._lock:
+            recipients = [
+                connection
+                for user_id in {str(user_id) for user_id in user_ids}
+                for connection in self._by_user.get(user_id, ())
+            ]
+        await self._deliver(recipients, payload)
+
+    async def _deliver(self, recipients: list[WebSocket], payload: dict) -> None:
         for connection in recipients:
             try:
                 await connection.send_json(payload)
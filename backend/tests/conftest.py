@@ -19,6 +19,7 @@ from httpx import ASGITransport, AsyncClient
 
 from backend.core.rate_limit import reset_rate_limiter_cache
 from backend.database import Base, engine
+from backend.services.provider_http import model_availability
 from backend.tests.test_alerts_endpoints import DummyUserService
 
 from backend.main import app  # isort: skip
@@ -66,6 +67,14 @@ def reset_rate_limits() -> None:
     reset_rate_limiter_cache()
 
 
+@pytest.fixture(autouse=True)
+def reset_model_availability() -> None:
+    # QA: los modelos marcados como no disponibles son estado global del módulo
+    model_availability.clear()
+    yield
+    model_availability.clear()
+
+
 @pytest_asyncio.fixture()
 async def async_client() -> AsyncClient:
     """Create an AsyncClient bound to the FastAPI app for integration tests."""
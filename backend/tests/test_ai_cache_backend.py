@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.services.cache_service import CacheService, decode_payload, encode_payload
+
+
+class FakePipeline:
+    def __init__(self, client: FakeRedis) -> None:
+        self._client = client
+        self._ops: list[tuple[str, bytes, int | None]] = []
+
+    async def __aenter__(self) -> FakePipeline:
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        return None
+
+    def set(self, key: str, value: bytes, ex: int | None = None) -> None:
+        self._ops.append((key, value, ex))
+
+    async def execute(self) -> None:
+        self._client.round_trips += 1
+        for key, value, _ex in self._ops:
+            self._client.data[key] = value
+
+
+class FakeRedis:
+    def __init__(self, *, broken: bool = False) -> None:
+        self.data: dict[str, bytes] = {}
+        self.round_trips = 0
+        self.broken = broken
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        if self.broken:
+            raise ConnectionError("redis down")
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+
+    async def set(
+        self, key: str, value: bytes, nx: bool = False, px: int | None = None
+    ) -> bool | None:
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, _script: str, _numkeys: int, key: str, value: bytes) -> int:
+        if self.data.get(key) != value:
+            return 0
+        del self.data[key]
+        return 1
+
+    async def incr(self, key: str) -> int:
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        if self.broken:
+            raise ConnectionError("redis down")
+        return FakePipeline(self)
+
+
+def _redis_backed(client: FakeRedis) -> CacheService:
+    service = CacheService(url="")
+    service._redis = client
+    service.backend = "redis"
+    return service
+
+
+def test_payload_roundtrip_compresses_long_responses() -> None:
+    short = {"text": "hola", "provider": "mistral"}
+    long = {"text": "mercado alcista " * 200}
+
+    assert decode_payload(encode_payload(short)) == short
+    encoded = encode_payload(long, compress_min_bytes=256)
+    assert encoded[2:3] in {b"z", b"s"}
+    assert len(encoded) < len("mercado alcista " * 200)
+    assert decode_payload(encoded) == long
+    # Entradas antiguas en texto plano siguen siendo legibles
+    assert decode_payload('{"text": "legacy"}') == {"text": "legacy"}
+
+
+@pytest.mark.asyncio
+async def test_memory_fallback_is_bounded_lru() -> None:
+    service = CacheService(url="", max_entries=2)
+
+    await service.set("a", 1)
+    await service.set("b", 2)
+    assert await service.get("a") == 1
+    await service.set("c", 3)
+
+    assert await service.get_many(["a", "b", "c"]) == [1, None, 3]
+    assert len(service.client) == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_pipelines_and_degrades_to_memory() -> None:
+    client = FakeRedis()
+    service = _redis_backed(client)
+
+    await service.set_many({"ai:x": {"text": "x"}, "ai:y": {"text": "y"}}, ex=60)
+    values = await service.get_many(["ai:x", "ai:y", "ai:z"])
+
+    assert values == [{"text": "x"}, {"text": "y"}, None]
+    assert client.round_trips == 2
+
+    client.broken = True
+    await service.set("ai:w", {"text": "w"}, ex=60)
+    assert await service.get("ai:w") == {"text": "w"}
+    assert service._active_redis() is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("redis_backed", [False, True])
+async def test_lease_and_counter_primitives(redis_backed: bool) -> None:
+    service = _redis_backed(FakeRedis()) if redis_backed else CacheService(url="")
+
+    assert await service.add("lease", "worker-a", ex=5)
+    assert not await service.add("lease", "worker-b", ex=5)
+    assert not await service.delete_if("lease", "worker-b")
+    assert await service.delete_if("lease", "worker-a")
+    assert await service.add("lease", "worker-b", ex=5)
+
+    assert [await service.incr("version") for _ in range(3)] == [1, 2, 3]
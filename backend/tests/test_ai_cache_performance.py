@@ -14,6 +14,7 @@ from backend.services.cache_service import (
     ai_cache_hits_total,
     ai_cache_misses_total,
 )
+from backend.utils.config import Config
 
 
 @pytest.mark.asyncio
@@ -24,6 +25,8 @@ async def test_process_message_cache_hit_and_miss(monkeypatch, caplog):
         return "respuesta generada", "mistral"
 
     monkeypatch.setattr(service, "_call_with_backoff", fake_backoff)
+    # Sin cubetas de mercado: ambas llamadas no deben caer en minutos distintos.
+    monkeypatch.setattr(Config, "AI_CACHE_MARKET_BUCKET_SECONDS", 0)
     service._ai_cache_service = AICacheService()
 
     hits_before = ai_cache_hits_total._value.get()
@@ -68,12 +68,15 @@ async def test_ai_cache_hit_miss(monkeypatch: pytest.MonkeyPatch) -> None:
     assert hit_after == hit_before + 1  # ✅ Codex fix: segundo acceso registra hit
 
 
-def test_store_response_in_cache_dynamic_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+@pytest.mark.asyncio
+async def test_store_response_in_cache_dynamic_ttl(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
     """Verificar que el TTL cambia dinámicamente según el tamaño del prompt."""
 
     recorded: dict[str, object] = {}
 
-    def fake_set(key, value, ex=None):  # ✅ Codex fix: captura de parámetros TTL
+    async def fake_set(key, value, ex=None):  # ✅ Codex fix: captura de parámetros TTL
         recorded["key"] = key
         recorded["value"] = value
         recorded["ex"] = ex
@@ -81,7 +84,7 @@ def test_store_response_in_cache_dynamic_ttl(monkeypatch: pytest.MonkeyPatch) ->
     monkeypatch.setattr(ai_service_module.cache, "set", fake_set)
 
     long_prompt = "x" * 501
-    store_response_in_cache(
+    await store_response_in_cache(
         "mistral", long_prompt, {"text": "ok", "provider": "mistral"}
     )
 
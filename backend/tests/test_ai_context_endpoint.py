@@ -7,6 +7,14 @@ sentiment_module = importlib.import_module("backend.services.sentiment_service")
 context_module = importlib.import_module("backend.services.context_service")
 
 
+@pytest.fixture(autouse=True)
+def _clear_sentiment_cache():
+    # QA: los sentimientos simulados no deben quedar en el LRU del módulo.
+    sentiment_module._local_batcher.clear()
+    yield
+    sentiment_module._local_batcher.clear()
+
+
 @pytest.mark.asyncio
 async def test_ai_context_basic_flow(monkeypatch, async_client: AsyncClient):
     async def fake_process_message(self, message, context=None):
@@ -18,8 +26,8 @@ async def test_ai_context_basic_flow(monkeypatch, async_client: AsyncClient):
 
     monkeypatch.setattr(
         sentiment_module,
-        "analyze_sentiment",
-        lambda text: {"label": "positive", "score": 0.9},
+        "analyze_sentiments",
+        lambda texts: [{"label": "positive", "score": 0.9} for _ in texts],
     )
     monkeypatch.setattr(context_module, "get_history", lambda session_id: [])
     monkeypatch.setattr(context_module, "save_message", lambda *args, **kwargs: None)
@@ -47,8 +55,8 @@ async def test_ai_context_handles_sentiment_error(
 ):
     monkeypatch.setattr(
         sentiment_module,
-        "analyze_sentiment",
-        lambda text: {"label": "unknown", "score": 0.0},
+        "analyze_sentiments",
+        lambda texts: [{"label": "unknown", "score": 0.0} for _ in texts],
     )
     monkeypatch.setattr(context_module, "get_history", lambda session_id: [])
     monkeypatch.setattr(context_module, "save_message", lambda *args, **kwargs: None)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from backend.metrics.ai_metrics import ai_enrichment_duration_seconds
+from backend.services import ai_service as ai_service_module
+from backend.services.ai_service import AIService, _parse_source_timeouts
+
+
+def _observations(source: str, outcome: str) -> float:
+    histogram = ai_enrichment_duration_seconds.labels(source=source, outcome=outcome)
+    return sum(bucket.get() for bucket in histogram._buckets)
+
+
+def test_parse_source_timeouts() -> None:
+    assert _parse_source_timeouts("prices=1500, news=x,forex=0,,alerts=250") == {
+        "prices": 1.5,
+        "alerts": 0.25,
+    }
+
+
+@pytest.mark.asyncio
+async def test_enrichment_runs_sources_concurrently_and_keeps_partials(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(ai_service_module.Config, "AI_ENRICHMENT_BUDGET_MS", 300)
+    monkeypatch.setattr(
+        ai_service_module.Config, "AI_ENRICHMENT_SOURCE_TIMEOUTS_MS", "news=100"
+    )
+    service = AIService()
+    outcomes = [("news", "timeout"), ("alerts", "error"), ("forex", "budget_exceeded")]
+    before = {key: _observations(*key) for key in outcomes}
+
+    async def slow(value, delay: float):  # type: ignore[no-untyped-def]
+        await asyncio.sleep(delay)
+        return value
+
+    async def broken():  # type: ignore[no-untyped-def]
+        raise RuntimeError("boom")
+
+    started = time.perf_counter()
+    gathered = await service._gather_enrichment(
+        {
+            "prices": lambda: slow({"market_data": {"BTC": {}}}, 0.15),
+            "indicators": lambda: slow({"BTC": {}}, 0.15),
+            "news": lambda: slow([{"title": "tarde"}], 0.2),
+            "alerts": broken,
+            "forex": lambda: slow(["EUR/USD"], 5),
+        }
+    )
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.6
+    assert gathered == {
+        "prices": {"market_data": {"BTC": {}}},
+        "indicators": {"BTC": {}},
+    }
+    assert {key: _observations(*key) - before[key] for key in outcomes} == {
+        key: 1 for key in outcomes
+    }
+
+
+@pytest.mark.asyncio
+async def test_process_message_uses_partial_enrichment(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(ai_service_module.Config, "AI_ENRICHMENT_BUDGET_MS", 200)
+    service = AIService()
+
+    async def market_context(_message: str):  # type: ignore[no-untyped-def]
+        return {"market_data": {"BTC": {"raw_price": 50000.0, "raw_change": 1.0}}}
+
+    async def stalled_news(_symbols):  # type: ignore[no-untyped-def]
+        await asyncio.sleep(5)
+        return [{"title": "nunca llega"}]
+
+    async def fake_backoff(*_args, **_kwargs):  # type: ignore[no-untyped-def]
+        return "análisis", "mistral"
+
+    monkeypatch.setattr(service, "get_market_context", market_context)
+    monkeypatch.setattr(service, "_collect_news_highlights", stalled_news)
+    monkeypatch.setattr(service, "_call_with_backoff", fake_backoff)
+
+    result = await service.process_message("precio y noticias de BTC")
+
+    assert result.used_data is True
+    assert result.sources == ["prices"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_cancels_enrichment_sources(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(ai_service_module.Config, "AI_ENRICHMENT_BUDGET_MS", 5000)
+    service = AIService()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def stalled():  # type: ignore[no-untyped-def]
+        started.set()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(service._gather_enrichment({"news": stalled}))
+    await started.wait()
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
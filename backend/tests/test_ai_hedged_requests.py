@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend.metrics.ai_metrics import (
+    ai_hedge_provider_calls_total,
+    ai_hedge_provider_seconds_total,
+    ai_hedged_requests_total,
+)
+from backend.services.ai_service import AIService
+from backend.utils.config import Config
+
+
+@pytest.fixture(autouse=True)
+def fast_hedging(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(Config, "AI_HEDGE_ENABLED", True)
+    monkeypatch.setattr(Config, "AI_HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(Config, "AI_HEDGE_MIN_DELAY_SECONDS", 0.01)
+
+
+def _warm_latency(service: AIService, label: str, seconds: float = 0.02) -> None:
+    for _ in range(5):
+        service._update_latency_average(label, seconds)
+
+
+def _hedge_count(provider: str, outcome: str) -> float:
+    return ai_hedged_requests_total.labels(
+        provider=provider, outcome=outcome
+    )._value.get()
+
+
+def _call_cost(provider: str, role: str, outcome: str) -> tuple[float, float]:
+    labels = {"provider": provider, "role": role, "outcome": outcome}
+    return (
+        ai_hedge_provider_calls_total.labels(**labels)._value.get(),
+        ai_hedge_provider_seconds_total.labels(**labels)._value.get(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled() -> None:
+    service = AIService()
+    _warm_latency(service, "Mistral")
+    cancelled = asyncio.Event()
+    won_before = _hedge_count("huggingface", "won")
+    cancelled_before = _call_cost("mistral", "primary", "cancelled")
+    hedge_before = _call_cost("huggingface", "hedge", "won")
+
+    async def slow_mistral() -> str:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "tarde"
+
+    async def fast_huggingface() -> str:
+        return "respuesta cubierta"
+
+    result = await asyncio.wait_for(
+        service._call_with_backoff(
+            [("mistral", slow_mistral), ("huggingface", fast_huggingface)]
+        ),
+        timeout=1,
+    )
+
+    assert result == ("respuesta cubierta", "huggingface")
+    assert cancelled.is_set()
+    assert _hedge_count("huggingface", "won") == won_before + 1
+    # Coste por proveedor: la primaria cancelada también consumió tiempo.
+    calls, seconds = _call_cost("mistral", "primary", "cancelled")
+    assert calls == cancelled_before[0] + 1
+    assert seconds - cancelled_before[1] >= 0.01
+    assert _call_cost("huggingface", "hedge", "won")[0] == hedge_before[0] + 1
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_never_launches_hedge() -> None:
+    service = AIService()
+    _warm_latency(service, "Mistral", seconds=0.5)
+    calls: list[str] = []
+
+    async def mistral() -> str:
+        calls.append("mistral")
+        return "rápido"
+
+    async def huggingface() -> str:
+        calls.append("huggingface")
+        return "no debería usarse"
+
+    result = await service._call_with_backoff(
+        [("mistral", mistral), ("huggingface", huggingface)]
+    )
+
+    assert result == ("rápido", "mistral")
+    assert calls == ["mistral"]
+
+
+@pytest.mark.asyncio
+async def test_hedge_respects_open_circuit_and_keeps_falling_back(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = AIService()
+    service._max_retries = 1
+    _warm_latency(service, "Mistral")
+    for _ in range(service._circuit_breaker_threshold):
+        service._register_failure("huggingface", RuntimeError("down"))
+    calls: list[str] = []
+
+    async def slow_failing_mistral() -> str:
+        calls.append("mistral")
+        await asyncio.sleep(0.05)
+        raise RuntimeError("mistral timeout")
+
+    async def huggingface() -> str:
+        calls.append("huggingface")
+        return "circuito abierto"
+
+    async def ollama() -> str:
+        calls.append("ollama")
+        return "local"
+
+    result = await service._call_with_backoff(
+        [
+            ("mistral", slow_failing_mistral),
+            ("huggingface", huggingface),
+            ("ollama", ollama),
+        ]
+    )
+
+    assert result == ("local", "ollama")
+    # Ollama cubre a Mistral; HuggingFace nunca se llama con el circuito abierto.
+    assert calls == ["mistral", "ollama"]
+
+
+@pytest.mark.asyncio
+async def test_primary_failing_before_hedge_delay_still_falls_back() -> None:
+    service = AIService()
+    service._max_retries = 1
+    _warm_latency(service, "Mistral", seconds=0.5)
+    calls: list[str] = []
+
+    async def failing_mistral() -> str:
+        calls.append("mistral")
+        raise RuntimeError("401")
+
+    async def huggingface() -> str:
+        calls.append("huggingface")
+        return "respaldo"
+
+    result = await service._call_with_backoff(
+        [("mistral", failing_mistral), ("huggingface", huggingface)]
+    )
+
+    assert result == ("respaldo", "huggingface")
+    assert calls == ["mistral", "huggingface"]
@@ -6,9 +6,29 @@ from backend.metrics.ai_metrics import (
     ai_insight_failures_total,
     ai_insights_generated_total,
 )
-from backend.services.ai_service import AIResponsePayload, AIService
+from backend.services.ai_service import AIResponsePayload, AIService, ai_service
+from backend.services.cache_service import cache
+from backend.services.insight_scheduler import insight_scheduler
 from backend.services.market_service import MarketService
 
+sentiment_module = importlib.import_module("backend.services.sentiment_service")
+
+
+def _reset_shared_state() -> None:
+    sentiment_module._local_batcher.clear()
+    insight_scheduler.clear()
+    cache.client.clear()
+    ai_service._circuit_breakers.clear()
+    ai_service._cooldowns.clear()
+
+
+@pytest.fixture(autouse=True)
+def _isolated_insights():
+    # QA: el scheduler, las cachés y el singleton de IA son globales al proceso.
+    _reset_shared_state()
+    yield
+    _reset_shared_state()
+
 
 @pytest.mark.asyncio
 async def test_ai_insights_endpoint_success(async_client, monkeypatch):
@@ -22,17 +42,24 @@ async def test_ai_insights_endpoint_success(async_client, monkeypatch):
 
     monkeypatch.setattr(MarketService, "get_historical", fake_get_historical)
 
-    def fake_analyze_sentiment(_: str):
-        return {"label": "positive", "score": 0.85}
+    def fake_analyze_sentiments(texts: list[str]):
+        return [{"label": "positive", "score": 0.85} for _ in texts]
 
-    sentiment_module = importlib.import_module("backend.services.sentiment_service")
-    monkeypatch.setattr(sentiment_module, "analyze_sentiment", fake_analyze_sentiment)
+    monkeypatch.setattr(sentiment_module, "analyze_sentiments", fake_analyze_sentiments)
 
     async def fake_process_message(self, prompt: str):
         return AIResponsePayload(text="Recomendamos compra", provider="mock")
 
     monkeypatch.setattr(AIService, "process_message", fake_process_message)
 
+    async def fresh_generator(key):
+        # Instancia nueva: el parche de clase no choca con el singleton.
+        return await AIService().generate_insight(
+            symbol=key.symbol, timeframe=key.timeframe, profile=key.profile
+        )
+
+    monkeypatch.setattr(insight_scheduler, "_generator", fresh_generator)
+
     baseline = ai_insights_generated_total._value.get()
 
     response = await async_client.post(
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.metrics.ai_metrics import ai_cache_lookups_total
+from backend.services.ai_semantic_cache import SemanticPromptIndex, canonical_prompt
+from backend.services.ai_service import AIService
+from backend.services.cache_service import AICacheService, CacheService
+
+
+def _identity(message: str, *, now: float = 120.0):  # type: ignore[no-untyped-def]
+    service = AIService()
+    return canonical_prompt(
+        message,
+        service._analyze_message(message),
+        known_symbols=AIService.CRYPTO_SYMBOLS,
+        bucket_seconds=60,
+        now=now,
+    )
+
+
+def _lookups(route: str, outcome: str) -> float:
+    return ai_cache_lookups_total.labels(route=route, outcome=outcome)._value.get()
+
+
+def test_canonical_prompt_ignores_case_spacing_and_edge_punctuation() -> None:
+    assert _identity("precio de BTC?") == _identity("Precio de  btc")
+    assert _identity("¿Cuál es el precio de BTC?") == _identity(
+        "cuál es el precio de btc"
+    )
+    assert _identity("precio de BTC?") != _identity("precio de ETH?")
+
+
+@pytest.mark.parametrize(
+    ("left", "right"),
+    [
+        ("alerta si BTC > 50000", "alerta si BTC < 50000"),
+        ("BTC cayó -5%", "BTC cayó 5%"),
+        ("BTC cayó 5%", "BTC cayó 5"),
+        ("comprar 1.5 BTC", "comprar 15 BTC"),
+        ("comprar 1.5 BTC", "comprar 1 5 BTC"),
+    ],
+)
+def test_canonical_prompt_keeps_operators_signs_and_decimals(
+    left: str, right: str
+) -> None:
+    assert _identity(left) != _identity(right)
+
+
+def test_canonical_prompt_buckets_market_time_and_caller_context() -> None:
+    assert _identity("precio de BTC", now=120) == _identity("precio de BTC", now=179)
+    assert _identity("precio de BTC", now=120) != _identity("precio de BTC", now=180)
+
+    decision = AIService()._analyze_message("precio de BTC")
+    plain = canonical_prompt("precio de BTC", decision, now=120)
+    profiled = canonical_prompt(
+        "precio de BTC", decision, context={"risk_profile": "trader"}, now=120
+    )
+    assert plain != profiled
+
+
+def test_semantic_index_matches_only_within_scope() -> None:
+    index = SemanticPromptIndex(threshold=0.9)
+    stored = _identity("cual es el precio de BTC hoy")
+    index.add("sync", stored, ttl=60)
+
+    match = index.query("sync", _identity("Cual es el precio de BTC hoy dia"))
+    assert match is not None and match[0] == stored
+    assert index.query("sync", _identity("cual es el precio de ETH hoy")) is None
+    assert index.query("stream", _identity("cual es el precio de BTC hoy dia")) is None
+
+
+@pytest.mark.asyncio
+async def test_ai_cache_reports_exact_and_semantic_hits_per_route() -> None:
+    cache = AICacheService(
+        CacheService(url=""), semantic_index=SemanticPromptIndex(threshold=0.9)
+    )
+    route = "semantic-test"
+    before = {o: _lookups(route, o) for o in ("hit_exact", "hit_semantic", "miss")}
+
+    assert await cache.get(route, _identity("cual es el precio de BTC hoy")) is None
+    await cache.set(route, _identity("cual es el precio de BTC hoy"), {"text": "x"}, 60)
+
+    assert await cache.get(route, _identity("Cual es el precio de btc hoy?")) == {
+        "text": "x"
+    }
+    assert await cache.get(route, _identity("cual es el precio de BTC hoy dia")) == {
+        "text": "x"
+    }
+
+    assert _lookups(route, "miss") == before["miss"] + 1
+    assert _lookups(route, "hit_exact") == before["hit_exact"] + 1
+    assert _lookups(route, "hit_semantic") == before["hit_semantic"] + 1
@@ -1,30 +1,9 @@
 from __future__ import annotations
 
-from typing import Any
-
 import pytest
 
-from backend.services import ai_service as ai_service_module
 from backend.services.ai_service import AIService
-
-
-class _DummySession:
-    """Minimal async context manager emulating :class:`aiohttp.ClientSession`."""
-
-    def __init__(
-        self, *args: Any, **kwargs: Any
-    ) -> None:  # noqa: D401 - signature mirrors aiohttp
-        self.args = args
-        self.kwargs = kwargs
-        self.closed = False
-
-    async def __aenter__(self) -> _DummySession:
-        return self
-
-    async def __aexit__(
-        self, exc_type, exc, tb
-    ) -> None:  # noqa: D401 - standard context manager
-        self.closed = True
+from backend.services.market_indicators_service import IndicatorBundle, IndicatorRequest
 
 
 @pytest.mark.asyncio
@@ -33,32 +12,28 @@ async def test_collect_indicator_snapshots_filters_failures(
 ) -> None:
     service = AIService()
 
-    # Aseguramos URL base consistente para validar parámetros enviados
-    monkeypatch.setattr(
-        ai_service_module.Config, "API_BASE_URL", "http://example.com", raising=False
-    )
-
     async def fake_resolve(self: AIService, symbol: str) -> str | None:
         mapping = {"btc": "crypto", "eurusd": "forex"}
         return mapping.get(symbol.lower())
 
-    captured_params: list[dict[str, str]] = []
-
-    async def fake_fetch(
-        self: AIService, session: Any, url: str, params: dict[str, str]
-    ) -> dict[str, Any]:
-        captured_params.append(params.copy())
-        if params["symbol"] == "BTCUSDT":
-            return {
-                "interval": params["interval"],
-                "source": "stub",
-                "indicators": {"rsi": {"value": 55.0}},
-            }
+    captured: list[IndicatorRequest] = []
+
+    async def fake_bundle(request: IndicatorRequest) -> IndicatorBundle:
+        captured.append(request)
+        if request.symbol == "BTCUSDT":
+            return IndicatorBundle(
+                symbol=request.symbol,
+                asset_type=request.asset_type,
+                interval=request.interval,
+                count=300,
+                source="stub",
+                note=None,
+                indicators={"rsi": {"value": 55.0}},
+            )
         raise RuntimeError("downstream failure")
 
     monkeypatch.setattr(AIService, "_resolve_asset_type", fake_resolve)
-    monkeypatch.setattr(AIService, "_fetch_indicator_snapshot", fake_fetch)
-    monkeypatch.setattr(ai_service_module.aiohttp, "ClientSession", _DummySession)
+    monkeypatch.setattr(service._indicators, "get_bundle", fake_bundle)
 
     result = await service._collect_indicator_snapshots("Analiza BTC y EURUSD en 1h")
 
@@ -71,7 +46,9 @@ async def test_collect_indicator_snapshots_filters_failures(
         }
     }
 
-    assert captured_params[0]["symbol"] == "BTCUSDT"
+    assert captured[0].symbol == "BTCUSDT"
+    assert captured[0].include_ichimoku is True
+    assert captured[0].limit == 300
 
 
 def test_merge_indicator_response_appends_summary() -> None:
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from backend.services import (
+    ai_service as ai_service_module,
+    mistral_service as mistral_module,
+)
+from backend.services.ai_service import STREAM_DONE_CHUNK, AIService, StreamErrorChunk
+from backend.services.insight_scheduler import (
+    MARKET_INSIGHT_KEY,
+    InsightGenerationError,
+    generate_insight_payload,
+)
+from backend.services.mistral_service import MistralService
+
+
+class _StreamContent:
+    def __init__(self, lines: list[bytes]) -> None:
+        self._lines = lines
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for line in self._lines:
+            await asyncio.sleep(0)
+            yield line
+
+
+class _StreamResponse:
+    def __init__(self, status: int, lines: list[bytes], text: str = "") -> None:
+        self.status = status
+        self.content = _StreamContent(lines)
+        self._text = text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def text(self) -> str:
+        return self._text
+
+
+class _StreamSession:
+    def __init__(self, responses: list[_StreamResponse]) -> None:
+        self._responses = responses
+        self.payloads: list[dict] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def post(self, url, headers, json, timeout):  # noqa: A002 - firma de aiohttp
+        self.payloads.append(json)
+        return self._responses.pop(0)
+
+
+def _sse(delta: str) -> bytes:
+    event = {"choices": [{"delta": {"content": delta}}]}
+    return f"data: {json.dumps(event)}\n".encode()
+
+
+@pytest.mark.asyncio
+async def test_mistral_stream_yields_deltas_and_falls_back_before_first_token(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = MistralService()
+    service.api_key = "test-key"
+    session = _StreamSession(
+        [
+            _StreamResponse(429, [], text="Too Many Requests"),
+            _StreamResponse(
+                200,
+                [
+                    b": keep-alive\n",
+                    _sse("Hola"),
+                    b"\n",
+                    _sse(" mundo"),
+                    b"data: [DONE]\n",
+                    _sse("ignorado"),
+                ],
+            ),
+        ]
+    )
+    monkeypatch.setattr(mistral_module.aiohttp, "ClientSession", lambda: session)
+
+    deltas = [
+        delta
+        async for delta in service.stream_chat_completion(
+            [{"role": "user", "content": "hola"}]
+        )
+    ]
+
+    assert deltas == ["Hola", " mundo"]
+    assert [payload["model"] for payload in session.payloads] == [
+        "mistral-medium-latest",
+        "mistral-small-latest",
+    ]
+    assert all(payload["stream"] is True for payload in session.payloads)
+
+
+@pytest.mark.asyncio
+async def test_stream_generate_forwards_tokens_before_provider_finishes(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = AIService()
+    release = asyncio.Event()
+    calls = 0
+
+    async def slow_provider():
+        nonlocal calls
+        calls += 1
+        yield "Primer "
+        await release.wait()
+        yield "token"
+
+    monkeypatch.setattr(
+        service, "_streaming_providers", lambda prompt: [("mistral", slow_provider)]
+    )
+
+    stream = service.stream_generate("analiza el mercado")
+    first = await asyncio.wait_for(stream.__anext__(), timeout=1)
+    assert first == "Primer "
+
+    release.set()
+    rest = [chunk async for chunk in stream]
+    assert rest == ["token", STREAM_DONE_CHUNK]
+
+    replay = [chunk async for chunk in service.stream_generate("analiza el mercado")]
+    assert replay == ["Primer ", "token", STREAM_DONE_CHUNK]
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_generate_falls_back_and_skips_caching_partial_streams(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = AIService()
+
+    async def broken_provider():
+        raise RuntimeError("upstream down")
+        yield  # pragma: no cover - convierte la función en generador
+
+    async def ollama_provider():
+        for token in ("uno ", "dos ", "tres"):
+            yield token
+
+    monkeypatch.setattr(
+        service,
+        "_streaming_providers",
+        lambda prompt: [("mistral", broken_provider), ("ollama", ollama_provider)],
+    )
+
+    stream = service.stream_generate("resumen btc")
+    assert await stream.__anext__() == "uno "
+    await stream.aclose()
+
+    chunks = [chunk async for chunk in service.stream_generate("resumen btc")]
+    assert chunks == ["uno ", "dos ", "tres", STREAM_DONE_CHUNK]
+    assert service._get_circuit("mistral").failure_count == 2
+
+
+@pytest.mark.asyncio
+async def test_duplicate_stream_follows_leader_live(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = AIService()
+    release = asyncio.Event()
+
+    async def provider():
+        yield "a"
+        await release.wait()
+        yield "b"
+
+    monkeypatch.setattr(
+        service, "_streaming_providers", lambda prompt: [("mistral", provider)]
+    )
+
+    leader = service.stream_generate("mismo prompt")
+    assert await leader.__anext__() == "a"
+
+    follower = service.stream_generate("mismo prompt")
+    assert await asyncio.wait_for(follower.__anext__(), timeout=1) == "a"
+
+    release.set()
+    leader_rest = [chunk async for chunk in leader]
+    follower_rest = [chunk async for chunk in follower]
+    assert leader_rest == follower_rest == ["b", STREAM_DONE_CHUNK]
+
+
+@pytest.mark.asyncio
+async def test_stream_errors_are_typed_chunks_not_text_prefixes(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = AIService()
+
+    async def dies_mid_stream():
+        yield '{"error": true es texto del modelo'
+        raise RuntimeError("conexión cortada")
+
+    monkeypatch.setattr(
+        service, "_streaming_providers", lambda prompt: [("mistral", dies_mid_stream)]
+    )
+
+    chunks = [chunk async for chunk in service.stream_generate("prompt roto")]
+
+    assert not isinstance(chunks[0], StreamErrorChunk)
+    assert isinstance(chunks[1], StreamErrorChunk)
+    assert json.loads(chunks[1])["error"] is True
+
+    async def literal_token_stream(prompt: str):
+        for chunk in ('{"error": true', " no es un error", STREAM_DONE_CHUNK):
+            yield chunk
+
+    monkeypatch.setattr(
+        ai_service_module.ai_service, "stream_generate", literal_token_stream
+    )
+    payload = await generate_insight_payload(MARKET_INSIGHT_KEY)
+    assert payload["insight"] == '{"error": true no es un error'
+
+    async def failing_stream(prompt: str):
+        yield "parcial"
+        yield StreamErrorChunk("proveedor caído")
+
+    monkeypatch.setattr(ai_service_module.ai_service, "stream_generate", failing_stream)
+    with pytest.raises(InsightGenerationError, match="proveedor caído"):
+        await generate_insight_payload(MARKET_INSIGHT_KEY)
+
+
+@pytest.mark.asyncio
+async def test_failing_providers_do_not_echo_the_prompt(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = AIService()
+    healthy = False
+
+    async def flaky_provider():
+        if not healthy:
+            raise RuntimeError("upstream down")
+        yield "BTC sube"
+
+    monkeypatch.setattr(
+        service, "_streaming_providers", lambda prompt: [("mistral", flaky_provider)]
+    )
+
+    chunks = [chunk async for chunk in service.stream_generate("precio de BTC hoy")]
+    assert len(chunks) == 1 and isinstance(chunks[0], StreamErrorChunk)
+
+    # Nada quedó en caché: cuando el proveedor vuelve, responde él.
+    healthy = True
+    chunks = [chunk async for chunk in service.stream_generate("precio de BTC hoy")]
+    assert chunks == ["BTC sube", STREAM_DONE_CHUNK]
+
+    # Sin proveedores configurados se mantiene el troceado local.
+    monkeypatch.setattr(service, "_streaming_providers", lambda prompt: [])
+    chunks = [chunk async for chunk in service.stream_generate("hola mundo")]
+    assert chunks == ["hola ", "mundo", STREAM_DONE_CHUNK]
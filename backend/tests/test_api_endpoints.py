@@ -37,6 +37,9 @@ from backend.routers import (  # noqa: E402  # isort: skip
     auth as auth_router,
     markets as markets_router,
 )
+from backend.services import (  # noqa: E402  # isort: skip
+    market_indicators_service as indicators_module,
+)
 from backend.services.alert_service import alert_service  # noqa: E402  # isort: skip
 from backend.services.forex_service import forex_service  # noqa: E402  # isort: skip
 from backend.services.market_service import market_service  # noqa: E402  # isort: skip
@@ -916,18 +919,21 @@ async def test_indicators_endpoint_exposes_requested_signals(
     }
 
     monkeypatch.setattr(
-        markets_router,
+        markets_router, "indicator_service", indicators_module.MarketIndicatorService()
+    )
+    monkeypatch.setattr(
+        indicators_module,
         "get_closes",
         AsyncMock(return_value=(closes, meta)),
     )
-    monkeypatch.setattr(markets_router, "rsi", lambda values, period: 55.5)
+    monkeypatch.setattr(indicators_module, "rsi", lambda values, period: 55.5)
     monkeypatch.setattr(
-        markets_router,
+        indicators_module,
         "ema",
         lambda values, period: round(120 + period * 0.1, 2),
     )
     monkeypatch.setattr(
-        markets_router,
+        indicators_module,
         "macd",
         lambda values, fast, slow, signal: {
             "macd": 1.23,
@@ -936,7 +942,7 @@ async def test_indicators_endpoint_exposes_requested_signals(
         },
     )
     monkeypatch.setattr(
-        markets_router,
+        indicators_module,
         "bollinger",
         lambda values, period, mult: {
             "middle": 123.4,
@@ -946,17 +952,17 @@ async def test_indicators_endpoint_exposes_requested_signals(
         },
     )
     monkeypatch.setattr(
-        markets_router,
+        indicators_module,
         "average_true_range",
         lambda highs_, lows_, closes_, period: 2.5,
     )
     monkeypatch.setattr(
-        markets_router,
+        indicators_module,
         "stochastic_rsi",
         lambda closes_, period, smooth_k, smooth_d: {"%K": 40.0, "%D": 35.0},
     )
     monkeypatch.setattr(
-        markets_router,
+        indicators_module,
         "ichimoku_cloud",
         lambda highs_, lows_, closes_, conversion_period, base_period, span_b_period: {
             "tenkan_sen": 110.0,
@@ -967,7 +973,7 @@ async def test_indicators_endpoint_exposes_requested_signals(
         },
     )
     monkeypatch.setattr(
-        markets_router,
+        indicators_module,
         "volume_weighted_average_price",
         lambda highs_, lows_, closes_, volumes_: 125.55,
     )
@@ -1015,7 +1021,10 @@ async def test_indicators_endpoint_validates_minimum_history(
     meta = {"source": "stub", "highs": [], "lows": [], "volumes": []}
 
     monkeypatch.setattr(
-        markets_router,
+        markets_router, "indicator_service", indicators_module.MarketIndicatorService()
+    )
+    monkeypatch.setattr(
+        indicators_module,
         "get_closes",
         AsyncMock(return_value=(short_series, meta)),
     )
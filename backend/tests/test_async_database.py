@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+from backend.database import (
+    AsyncSessionLocal,
+    SessionLocal,
+    async_session_factory_for,
+    get_async_database_url,
+)
+from backend.models import Alert, AlertDeliveryMethod, User
+from backend.services.alerts_service import alerts_service
+from backend.services.user_service import UserService
+
+
+def test_async_url_mapping() -> None:
+    assert get_async_database_url("sqlite:////tmp/app.db") == (
+        "sqlite+aiosqlite:////tmp/app.db"
+    )
+    assert get_async_database_url("sqlite:///:memory:") is None
+    assert get_async_database_url("sqlite://") is None
+    assert get_async_database_url(
+        "postgresql+psycopg2://u:p@db:5432/app?sslmode=require"
+    ) == ("postgresql+psycopg://u:p@db:5432/app?sslmode=require")
+    assert get_async_database_url("mysql://u@db/app") is None
+
+
+def test_only_default_factory_has_async_counterpart() -> None:
+    assert async_session_factory_for(SessionLocal) is AsyncSessionLocal
+    assert async_session_factory_for(object()) is None
+
+
+@pytest.mark.asyncio
+async def test_hot_reads_go_through_async_engine() -> None:
+    email = f"async_{uuid.uuid4().hex}@test.com"
+    with SessionLocal() as db:
+        user = User(email=email, password_hash="x")
+        db.add(user)
+        db.flush()
+        db.add(
+            Alert(
+                user_id=user.id,
+                name="BTC > 100",
+                condition={">": [{"var": "BTC"}, 100]},
+                delivery_method=AlertDeliveryMethod.PUSH,
+            )
+        )
+        db.commit()
+        user_id = user.id
+
+    loaded = await UserService(SessionLocal).get_user_by_email_async(email)
+    alerts = await alerts_service.list_alerts_for_user_async(user_id)
+
+    assert loaded is not None and loaded.id == user_id
+    assert [alert.name for alert in alerts] == ["BTC > 100"]
+    async with AsyncSessionLocal() as session:
+        assert session.bind.dialect.driver == "aiosqlite"
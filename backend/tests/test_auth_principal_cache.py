@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.core.auth_cache import AuthPrincipal, AuthPrincipalCache
+from backend.models import Base
+from backend.services import user_service as user_service_module
+from backend.services.user_service import InvalidTokenError, UserService
+from backend.utils.cache import CacheClient
+from backend.utils.config import Config
+
+
+def _cache(remote: CacheClient | None = None, **kwargs) -> AuthPrincipalCache:
+    remote = remote or CacheClient(f"auth-test-{uuid.uuid4().hex}", ttl=60)
+    return AuthPrincipalCache(
+        ttl=60, local_ttl=5, max_entries=100, remote=remote, **kwargs
+    )
+
+
+@pytest.fixture()
+def session_factory():
+    # StaticPool: get_current_principal consulta la BD desde un hilo.
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+        future=True,
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+    try:
+        yield factory
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+@pytest.fixture()
+def service(session_factory, monkeypatch: pytest.MonkeyPatch) -> UserService:
+    monkeypatch.setattr(user_service_module, "SessionLocal", session_factory)
+    return UserService(session_factory=session_factory, principal_cache=_cache())
+
+
+def _count_db_lookups(
+    service: UserService, monkeypatch: pytest.MonkeyPatch
+) -> list[str]:
+    calls: list[str] = []
+    original = service.resolve_principal
+
+    def counting(token: str):
+        calls.append(token)
+        return original(token)
+
+    monkeypatch.setattr(service, "resolve_principal", counting)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_principal_is_served_from_cache_until_invalidated(
+    service: UserService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    user = service.create_user("principal@example.com", "secret")
+    token, _ = service.create_session(user.id)
+    calls = _count_db_lookups(service, monkeypatch)
+
+    first = await service.get_current_principal(token)
+    second = await service.get_current_principal(token)
+
+    assert first == second
+    assert (first.id, first.email, first.mfa_enabled) == (user.id, user.email, False)
+    assert len(calls) == 1
+
+    service.revoke_all_tokens(user.id)
+    await service.get_current_principal(token)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_evicted_session_stops_authenticating(
+    service: UserService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(Config, "MAX_CONCURRENT_SESSIONS", 1)
+    user = service.create_user("evicted@example.com", "secret")
+    expires = datetime.now(UTC) + timedelta(minutes=15)
+    first_token = f"opaque-{uuid.uuid4().hex}"
+    service.register_external_session(user.id, first_token, expires)
+    monkeypatch.setattr(
+        service,
+        "_decode_token",
+        lambda token: {"sub": str(user.id), "email": user.email},
+    )
+    assert (await service.get_current_principal(first_token)).id == user.id
+
+    service.register_external_session(user.id, f"opaque-{uuid.uuid4().hex}", expires)
+
+    with pytest.raises(InvalidTokenError):
+        await service.get_current_principal(first_token)
+
+
+@pytest.mark.asyncio
+async def test_revocations_reach_other_workers_through_remote_layer() -> None:
+    remote = CacheClient(f"auth-test-{uuid.uuid4().hex}", ttl=60)
+    worker_a = _cache(remote)
+    worker_b = AuthPrincipalCache(ttl=60, local_ttl=0, remote=remote)
+    principal = AuthPrincipal(id=uuid.uuid4(), email="shared@example.com")
+    expires_at = datetime.now(UTC) + timedelta(minutes=5)
+    cached_at = datetime.now(UTC).timestamp()
+
+    await worker_a.set("tok", principal, expires_at=expires_at, cached_at=cached_at)
+    assert await worker_b.get("tok") == principal
+
+    worker_a.invalidate_user(principal.id)
+    await asyncio.sleep(0.01)  # deja correr la escritura remota programada
+
+    assert await worker_a.get("tok") is None
+    assert await worker_b.get("tok") is None
+    # Una resolución que empezó antes de la revocación no puede repoblar la caché.
+    await worker_b.set("tok", principal, expires_at=expires_at, cached_at=cached_at)
+    assert await worker_a.get("tok") is None
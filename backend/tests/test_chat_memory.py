@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.database import SessionLocal
+from backend.models import ChatMessage, ChatSession, User
+from backend.routers import ai as ai_router
+from backend.services.ai_service import AIService
+from backend.services.chat_memory import (
+    estimate_tokens,
+    fold_into_summary,
+    window_history,
+)
+from backend.utils.config import Config
+
+
+@dataclass
+class _Message:
+    role: str
+    content: str
+
+
+def test_window_keeps_newest_messages_within_budget() -> None:
+    messages = [_Message("user", "x" * 40) for _ in range(10)]
+    messages.append(_Message("assistant", "última respuesta"))
+
+    window = window_history(messages, token_budget=25)
+
+    assert window[-1] == {"role": "assistant", "content": "última respuesta"}
+    assert len(window) == 3
+    assert window_history([_Message("user", "y" * 400)], token_budget=10) == [
+        {"role": "user", "content": "y" * 40}
+    ]
+
+
+def test_summary_is_incremental_and_bounded() -> None:
+    summary = fold_into_summary(
+        None,
+        [_Message("user", "Hola   mundo"), _Message("assistant", "")],
+        token_budget=50,
+    )
+    assert summary == "user: Hola mundo"
+
+    for index in range(20):
+        summary = fold_into_summary(
+            summary, [_Message("user", f"pregunta {index} " * 5)], token_budget=50
+        )
+
+    assert estimate_tokens(summary) <= 50
+    assert summary.splitlines()[-1].startswith("user: pregunta 19")
+    assert "Hola mundo" not in summary
+
+
+@pytest.mark.asyncio
+async def test_chat_context_uses_window_and_rolling_summary(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(Config, "AI_CHAT_HISTORY_MAX_MESSAGES", 4)
+    start = datetime(2024, 1, 1)
+    with SessionLocal() as db:
+        user = User(email=f"memory_{uuid.uuid4().hex}@test.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        session = ChatSession(user_id=user.id)
+        db.add(session)
+        db.flush()
+        for index in range(10):
+            db.add(
+                ChatMessage(
+                    session_id=session.id,
+                    role="user" if index % 2 == 0 else "assistant",
+                    content=f"mensaje {index}",
+                    created_at=start + timedelta(minutes=index),
+                )
+            )
+        db.flush()
+
+        history = ai_router._load_history(db, session, limit=4)
+        ai_router._refresh_summary(db, session, history)
+        context = ai_router._prepare_context({}, history, session.summary)
+
+        assert session.summarized_count == 6
+        assert session.summary.splitlines() == [
+            f"{'user' if i % 2 == 0 else 'assistant'}: mensaje {i}" for i in range(6)
+        ]
+        assert [item["content"] for item in context["history"]] == [
+            f"mensaje {i}" for i in range(6, 10)
+        ]
+
+        db.add(
+            ChatMessage(
+                session_id=session.id,
+                role="user",
+                content="mensaje 10",
+                created_at=start + timedelta(minutes=10),
+            )
+        )
+        db.flush()
+        history = ai_router._load_history(db, session, limit=4)
+        ai_router._refresh_summary(db, session, history)
+        assert session.summarized_count == 7
+        assert session.summary.splitlines()[-1] == "user: mensaje 6"
+        db.rollback()
+
+    prompt = AIService()._build_prompt("¿Y ahora?", context)
+    assert "Resumen de la conversación:\nuser: mensaje 0" in prompt
+    assert "assistant: mensaje 9" in prompt
+    assert "history" not in prompt
+
+
+def _seed_session(db, count: int, start: datetime) -> ChatSession:
+    user = User(email=f"memory_{uuid.uuid4().hex}@test.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    session = ChatSession(user_id=user.id)
+    db.add(session)
+    db.flush()
+    for index in range(count):
+        db.add(
+            ChatMessage(
+                session_id=session.id,
+                role="user",
+                content=f"mensaje {index}",
+                created_at=start + timedelta(minutes=index),
+            )
+        )
+    db.flush()
+    return session
+
+
+def test_messages_trimmed_by_token_budget_are_summarized(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # "mensaje N" ~ 3 tokens: de la ventana de 4 sólo caben los 2 más nuevos.
+    monkeypatch.setattr(Config, "AI_CHAT_HISTORY_TOKEN_BUDGET", 6)
+    with SessionLocal() as db:
+        session = _seed_session(db, 10, datetime(2024, 1, 1))
+
+        history = ai_router._load_history(db, session, limit=4)
+        ai_router._refresh_summary(db, session, history)
+        context = ai_router._prepare_context({}, history, session.summary)
+
+        assert [item["content"] for item in context["history"]] == [
+            "mensaje 8",
+            "mensaje 9",
+        ]
+        assert session.summary.splitlines() == [f"user: mensaje {i}" for i in range(8)]
+        assert session.summarized_count == 8
+        assert session.summarized_until_id == history[1].id
+
+        # Sin mensajes nuevos no se vuelve a leer ni a duplicar nada.
+        ai_router._refresh_summary(db, session, history)
+        assert session.summarized_count == 8
+        db.rollback()
+
+
+def test_legacy_summarized_count_is_converted_to_cursor(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(Config, "AI_CHAT_HISTORY_TOKEN_BUDGET", 1000)
+    with SessionLocal() as db:
+        session = _seed_session(db, 8, datetime(2024, 1, 1))
+        session.summary = "user: mensaje 0\nuser: mensaje 1\nuser: mensaje 2"
+        session.summarized_count = 3
+
+        history = ai_router._load_history(db, session, limit=4)
+        ai_router._refresh_summary(db, session, history)
+
+        assert session.summary.splitlines() == [f"user: mensaje {i}" for i in range(4)]
+        assert session.summarized_count == 4
+        db.rollback()
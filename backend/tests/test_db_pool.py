@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, exc, text
+
+from backend.core.db_pool import (
+    InstrumentedQueuePool,
+    PoolAutoTuner,
+    install_idle_pre_ping,
+    instrument_engine,
+    pool_stats,
+    pool_status,
+)
+from backend.routers import health as health_module
+
+
+def _engine(tmp_path: Path, **pool_kwargs):
+    # Etiqueta única por test: las métricas son globales al proceso.
+    label = f"test-{uuid.uuid4().hex[:8]}"
+    pool_class = type(
+        "LabelledPool", (InstrumentedQueuePool,), {"metrics_label": label}
+    )
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=pool_class,
+        connect_args={"check_same_thread": False},
+        **pool_kwargs,
+    )
+    instrument_engine(engine, label)
+    return engine, label
+
+
+def _sample(name: str, labels: dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_checkout_latency_gauges_and_timeouts(tmp_path: Path) -> None:
+    engine, label = _engine(tmp_path, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    try:
+        with engine.connect() as held:
+            held.execute(text("SELECT 1"))
+            assert _sample("db_pool_checked_out", {"engine": label}) == 1
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+
+        assert _sample("db_pool_checkout_seconds_count", {"engine": label}) == 1
+        assert _sample("db_pool_timeouts_total", {"engine": label}) == 1
+        assert _sample("db_pool_idle", {"engine": label}) == 1
+        assert _sample("db_pool_overflow", {"engine": label}) == 0
+        assert (
+            _sample(
+                "db_pool_connection_events_total",
+                {"engine": label, "event": "connect"},
+            )
+            == 1
+        )
+
+        status = pool_status(engine, label)
+        assert status["size"] == 1 and status["checkedin"] == 1
+        assert status["checkouts"] == 1 and status["timeouts"] == 1
+        assert status["window_peak_in_use"] == 1
+    finally:
+        engine.dispose()
+
+
+def test_idle_pre_ping_only_pings_idle_connections(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    engine, label = _engine(tmp_path, pool_size=1, max_overflow=0)
+    pings: list[object] = []
+    failures = {"pending": 1}
+
+    def _do_ping(dbapi_connection) -> bool:
+        pings.append(dbapi_connection)
+        if failures["pending"]:
+            failures["pending"] -= 1
+            raise ConnectionError("server closed the connection")
+        return True
+
+    monkeypatch.setattr(engine.dialect, "do_ping", _do_ping)
+    install_idle_pre_ping(engine, label, idle_seconds=0.05)
+    try:
+        for _ in range(3):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        assert pings == []  # conexión nueva y luego reutilizada enseguida
+
+        time.sleep(0.06)
+        # Ping fallido: el pool descarta la conexión y abre otra.
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT 1")).scalar() == 1
+
+        assert len(pings) == 1
+        assert (
+            _sample("db_pool_pre_ping_total", {"engine": label, "result": "stale"}) == 1
+        )
+        assert (
+            _sample(
+                "db_pool_connection_events_total",
+                {"engine": label, "event": "invalidate"},
+            )
+            == 1
+        )
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_autotuner_resizes_within_connection_budget(tmp_path: Path) -> None:
+    engine, label = _engine(tmp_path, pool_size=8, max_overflow=2)
+    advisory = PoolAutoTuner(apply=False, min_size=2)
+    tuner = PoolAutoTuner(apply=True, min_size=2)
+    advisory.register(label, engine)
+    tuner.register(label, engine)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        pool_stats(label).peaks.extend([2, 2])
+
+        assert await advisory.run_once() == {}
+        assert engine.pool.size() == 8
+        assert _sample("db_pool_recommended_size", {"engine": label}) == 3
+
+        assert await tuner.run_once() == {label: 3}
+        assert engine.pool.size() == 3
+        assert engine.pool.size() + engine.pool._max_overflow == 10
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT 1")).scalar() == 1
+        # Histéresis: la recomendación ya coincide con el tamaño actual.
+        assert await tuner.run_once() == {}
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_health_reports_pool_stats() -> None:
+    result = await health_module._check_database()
+
+    assert result["status"] == "ok"
+    sync_pool = result["details"]["pool_stats"]["sync"]
+    assert sync_pool["size"] >= 1
+    assert {"checkedout", "checkouts", "timeouts", "avg_wait_ms"} <= set(sync_pool)
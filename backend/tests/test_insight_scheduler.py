@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend.services import insight_scheduler as scheduler_module
+from backend.services.cache_service import CacheService
+from backend.services.insight_scheduler import (
+    MARKET_INSIGHT_KEY,
+    InsightGenerationError,
+    InsightKey,
+    InsightScheduler,
+)
+
+
+class _Market:
+    def __init__(self) -> None:
+        self.prices: dict[str, float] = {"AAPL": 100.0, "BTC": 30_000.0}
+        self.generated: list[InsightKey] = []
+
+    async def generate(self, key: InsightKey) -> dict:
+        self.generated.append(key)
+        await asyncio.sleep(0.01)
+        return {"symbol": key.symbol, "insight": f"insight {len(self.generated)}"}
+
+    async def price(self, symbol: str) -> float | None:
+        return self.prices.get(symbol)
+
+
+def _scheduler(market: _Market, **overrides) -> InsightScheduler:
+    options = {
+        "backend": CacheService(),
+        "poll_seconds": 60,
+        "min_move_pct": 1.0,
+        "max_age_seconds": 600,
+        "idle_seconds": 600,
+    }
+    options.update(overrides)
+    return InsightScheduler(market.generate, market.price, **options)
+
+
+@pytest.mark.asyncio
+async def test_requests_are_served_from_store_with_single_generation() -> None:
+    market = _Market()
+    scheduler = _scheduler(market)
+    key = InsightKey("aapl", "1D", "Investor")
+
+    records = await asyncio.gather(*(scheduler.get(key) for _ in range(5)))
+    again = await scheduler.get(InsightKey("AAPL", "1d", "investor"))
+
+    assert market.generated == [key]
+    assert {record.version for record in records} == {1}
+    assert again.payload["insight"] == "insight 1"
+
+
+@pytest.mark.asyncio
+async def test_refresh_follows_market_moves_not_polls() -> None:
+    market = _Market()
+    scheduler = _scheduler(market)
+    key = InsightKey("AAPL")
+    await scheduler.get(key)
+
+    # Primera pasada: sólo fija el precio de referencia del insight en frío.
+    assert await scheduler.run_once() == 0
+    market.prices["AAPL"] = 100.5
+    assert await scheduler.run_once() == 0
+
+    market.prices["AAPL"] = 101.2
+    assert await scheduler.run_once() == 1
+    record = await scheduler.get(key)
+    assert record.version == 2
+    assert record.reference_price == pytest.approx(101.2)
+    assert len(market.generated) == 2
+
+
+@pytest.mark.asyncio
+async def test_idle_keys_stop_refreshing_and_stale_ones_expire() -> None:
+    market = _Market()
+    scheduler = _scheduler(market, max_age_seconds=0)
+    await scheduler.get(InsightKey("AAPL"))
+
+    assert await scheduler.run_once() == 1
+
+    scheduler.idle_seconds = 0
+    await asyncio.sleep(0.01)
+    assert await scheduler.run_once() == 0
+    assert len(market.generated) == 2
+
+
+@pytest.mark.asyncio
+async def test_next_version_waits_for_new_market_insight() -> None:
+    market = _Market()
+    scheduler = _scheduler(market)
+
+    first = await scheduler.next_version(MARKET_INSIGHT_KEY, after=0, timeout=1)
+    assert first is not None and first.version == 1
+    assert market.generated == [MARKET_INSIGHT_KEY]
+    assert (
+        await scheduler.next_version(MARKET_INSIGHT_KEY, after=1, timeout=0.05) is None
+    )
+
+    waiter = asyncio.create_task(
+        scheduler.next_version(MARKET_INSIGHT_KEY, after=1, timeout=1)
+    )
+    await asyncio.sleep(0)
+    await scheduler.refresh(MARKET_INSIGHT_KEY, reason="market_move")
+    second = await waiter
+    assert second is not None and second.version == 2
+
+
+@pytest.mark.asyncio
+async def test_store_is_shared_through_cache_backend() -> None:
+    market = _Market()
+    backend = CacheService()
+    await _scheduler(market, backend=backend).get(InsightKey("BTC"))
+
+    other_worker = _scheduler(market, backend=backend)
+    record = await other_worker.get(InsightKey("BTC"))
+
+    assert record.version == 1
+    assert len(market.generated) == 1
+
+
+@pytest.mark.asyncio
+async def test_generation_errors_are_not_stored() -> None:
+    calls = 0
+
+    async def failing(key: InsightKey) -> dict:
+        nonlocal calls
+        calls += 1
+        raise InsightGenerationError("provider failure")
+
+    async def no_price(_symbol: str) -> None:
+        return None
+
+    scheduler = InsightScheduler(failing, no_price, backend=CacheService())
+
+    for _ in range(2):
+        with pytest.raises(InsightGenerationError):
+            await scheduler.get(InsightKey("TSLA"))
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_share_one_generation_per_market_move(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(scheduler_module, "_LEADER_POLL_SECONDS", 0.01)
+    market = _Market()
+    backend = CacheService()
+    workers = [_scheduler(market, backend=backend) for _ in range(3)]
+    key = InsightKey("AAPL")
+    for worker in workers:
+        await worker.get(key)
+    await asyncio.gather(*(worker.run_once() for worker in workers))
+
+    market.prices["AAPL"] = 102.0
+    await asyncio.gather(*(worker.run_once() for worker in workers))
+
+    assert len(market.generated) == 2
+    records = [worker.latest(key) for worker in workers]
+    assert {record.version for record in records} == {2}
+    assert len({record.payload["insight"] for record in records}) == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_adopts_newer_shared_version_instead_of_generating() -> None:
+    market = _Market()
+    backend = CacheService()
+    first, second = (_scheduler(market, backend=backend) for _ in range(2))
+    key = InsightKey("BTC")
+    await first.get(key)
+    await second.get(key)
+
+    await first.refresh(key, reason="market_move")
+    record = await second.refresh(key, reason="market_move")
+
+    assert record.version == 2
+    assert len(market.generated) == 2
+
+
+@pytest.mark.asyncio
+async def test_token_listeners_receive_tokens_with_their_version() -> None:
+    async def streaming(key: InsightKey, on_token=None) -> dict:  # noqa: ANN001
+        for token in ("sube ", "BTC"):
+            if on_token is not None:
+                await on_token(token)
+        return {"symbol": key.symbol, "insight": "sube BTC"}
+
+    async def no_price(_symbol: str) -> None:
+        return None
+
+    scheduler = InsightScheduler(streaming, no_price, backend=CacheService())
+    received: list[tuple] = []
+
+    async def listener(key: InsightKey, version: int, token: str) -> None:
+        received.append((key.symbol, version, token))
+
+    scheduler.add_token_listener(listener)
+    record = await scheduler.refresh(MARKET_INSIGHT_KEY, reason="cold")
+    scheduler.remove_token_listener(listener)
+    await scheduler.refresh(MARKET_INSIGHT_KEY, reason="max_age")
+
+    assert record.version == 1
+    assert received == [("MARKET", 1, "sube "), ("MARKET", 1, "BTC")]
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.core.login_backoff import LoginBackoffManager, MemoryBackoffStore
+from backend.utils.cache import CacheClient
+
+WINDOWS = [60.0, 120.0]
+
+
+def _fail(store: MemoryBackoffStore, now: float, **overrides):
+    options = {
+        "now": now,
+        "start_after": 2,
+        "windows": WINDOWS,
+        "soft_lock_threshold": 0,
+        "cooldown_seconds": 0.0,
+    }
+    options.update(overrides)
+    return store.record_failure("user", **options)
+
+
+def test_record_failure_returns_full_state_in_one_call() -> None:
+    store = MemoryBackoffStore(ttl=1800)
+
+    first = _fail(store, 1000.0)
+    second = _fail(store, 1001.0)
+    third = _fail(store, 1002.0)
+    fourth = _fail(store, 1003.0)
+
+    assert (first.failures, first.backoff_seconds, first.locked_until) == (
+        1,
+        0.0,
+        None,
+    )
+    assert (second.backoff_seconds, second.locked_until) == (60.0, 1061.0)
+    assert third.backoff_seconds == 120.0
+    # Ventana máxima una vez agotada la lista.
+    assert (fourth.failures, fourth.backoff_seconds) == (4, 120.0)
+
+
+def test_soft_lock_only_extends_cooldown() -> None:
+    store = MemoryBackoffStore()
+
+    first = _fail(store, 0.0, soft_lock_threshold=2, cooldown_seconds=30)
+    second = _fail(store, 1.0, soft_lock_threshold=2, cooldown_seconds=30)
+    third = _fail(store, 2.0, soft_lock_threshold=2, cooldown_seconds=30)
+
+    assert not first.cooldown_activated and first.cooldown_until is None
+    assert second.cooldown_activated and second.cooldown_until == 31.0
+    assert third.cooldown_activated and third.cooldown_until == 32.0
+    assert not store.activate_cooldown("user", now=3.0, seconds=10)
+    assert store.activate_cooldown("user", now=3.0, seconds=60)
+
+
+def test_check_expires_windows_and_resets_served_lockouts() -> None:
+    store = MemoryBackoffStore()
+    _fail(store, 0.0)
+    _fail(store, 1.0)
+
+    locked = store.check("user", now=30.0, reset_after=2)
+    assert (locked.failures, locked.locked_until) == (2, 61.0)
+
+    # Sin reset_after solo se limpia la ventana vencida.
+    served = store.check("user", now=62.0, reset_after=-1)
+    assert (served.failures, served.locked_until) == (2, None)
+
+    reset = store.check("user", now=62.0, reset_after=2)
+    assert reset.failures == 0
+    assert len(store) == 0
+
+
+def test_entries_expire_after_ttl() -> None:
+    store = MemoryBackoffStore(ttl=10)
+    _fail(store, 0.0)
+    store.record_failure(
+        "other",
+        now=5.0,
+        start_after=1,
+        windows=WINDOWS,
+        soft_lock_threshold=0,
+        cooldown_seconds=0,
+    )
+
+    assert store.check("user", now=11.0, reset_after=-1).failures == 0
+    assert len(store) == 1
+
+
+class _BrokenScript:
+    async def __call__(self, **_kwargs):
+        raise ConnectionError("redis down")
+
+
+class _BrokenRedis:
+    def register_script(self, _script):
+        return _BrokenScript()
+
+
+@pytest.mark.asyncio
+async def test_manager_falls_back_to_memory_when_redis_fails(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cache = CacheClient("login-backoff-test")
+    monkeypatch.setattr(cache, "_redis", _BrokenRedis())
+    monkeypatch.setattr(
+        "backend.core.login_backoff.BACKOFF_WINDOWS", [5.0], raising=False
+    )
+    manager = LoginBackoffManager(cache)
+
+    state = await manager.record_failure(
+        "abc", start_after=1, soft_lock_threshold=1, cooldown_seconds=2
+    )
+
+    assert state.backoff_seconds == 5.0
+    assert state.cooldown_activated
+    assert (await manager.check("abc")).failures == 1
+    assert await manager.required_wait_seconds("abc") == 5
+    assert await manager.cooldown_remaining_seconds("abc") == 2
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend.services import market_indicators_service as indicators_module
+from backend.services.market_indicators_service import (
+    IndicatorRequest,
+    InsufficientIndicatorData,
+    MarketIndicatorService,
+)
+
+
+def _series(size: int = 120) -> tuple[list[float], dict]:
+    closes = [100 + idx * 0.5 for idx in range(size)]
+    meta = {
+        "source": "stub",
+        "highs": [price + 1 for price in closes],
+        "lows": [price - 1 for price in closes],
+        "volumes": [1000.0 + idx for idx in range(size)],
+    }
+    return closes, meta
+
+
+@pytest.fixture()
+def fetches(monkeypatch: pytest.MonkeyPatch) -> list[tuple]:
+    calls: list[tuple] = []
+
+    async def fake_get_closes(asset_type, symbol, interval, limit):  # type: ignore[no-untyped-def]
+        calls.append((asset_type, symbol, interval, limit))
+        await asyncio.sleep(0.01)
+        return _series()
+
+    monkeypatch.setattr(indicators_module, "get_closes", fake_get_closes)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_bundles_share_cached_candles(fetches: list[tuple]) -> None:
+    service = MarketIndicatorService(ttl_seconds=60)
+    api_request = IndicatorRequest("crypto", "btcusdt", "1H")
+    ai_request = IndicatorRequest(
+        "crypto", "BTCUSDT", "1h", include_atr=True, include_vwap=True
+    )
+
+    first = await service.get_bundle(api_request)
+    second = await service.get_bundle(ai_request)
+    again = await service.get_bundle(IndicatorRequest("crypto", "BTCUSDT", "1h"))
+
+    assert fetches == [("crypto", "BTCUSDT", "1h", 300)]
+    assert again is first
+    assert "atr" not in first.indicators
+    assert second.indicators["atr"]["period"] == 14
+    assert second.indicators["vwap"]["value"] > 0
+    payload = first.to_dict()
+    assert payload["type"] == "crypto"
+    assert payload["count"] == 120
+    payload["indicators"].clear()
+    assert first.indicators
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch(fetches: list[tuple]) -> None:
+    service = MarketIndicatorService(ttl_seconds=60)
+    request = IndicatorRequest("stock", "AAPL", "1d")
+
+    bundles = await asyncio.gather(*(service.get_bundle(request) for _ in range(5)))
+
+    assert len(fetches) == 1
+    assert all(bundle.count == 120 for bundle in bundles)
+
+
+@pytest.mark.asyncio
+async def test_failures_and_short_history_are_not_cached(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = MarketIndicatorService(ttl_seconds=60)
+    responses: list = [RuntimeError("upstream down"), _series()]
+
+    async def flaky_get_closes(*_args):  # type: ignore[no-untyped-def]
+        outcome = responses.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(indicators_module, "get_closes", flaky_get_closes)
+    request = IndicatorRequest("forex", "EURUSD", "4h")
+
+    with pytest.raises(RuntimeError):
+        await service.get_bundle(request)
+    bundle = await service.get_bundle(request)
+
+    assert bundle.source == "stub"
+    with pytest.raises(InsufficientIndicatorData):
+        indicators_module.compute_indicator_bundle(request, [1.0] * 10, {})
+
+
+@pytest.mark.asyncio
+async def test_zero_ttl_disables_caching(fetches: list[tuple]) -> None:
+    service = MarketIndicatorService(ttl_seconds=0)
+    request = IndicatorRequest("crypto", "ETHUSDT", "1h")
+
+    await service.get_bundle(request)
+    await service.get_bundle(request)
+
+    assert len(fetches) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_first_caller_keeps_the_shared_fetch(
+    fetches: list[tuple],
+) -> None:
+    service = MarketIndicatorService(ttl_seconds=60)
+    request = IndicatorRequest("crypto", "BTCUSDT", "1h")
+
+    owner = asyncio.create_task(service.get_bundle(request))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(service.get_bundle(request))
+    await asyncio.sleep(0)
+    # Como el presupuesto de enriquecimiento de la IA al vencer su wait_for.
+    owner.cancel()
+
+    bundle = await waiter
+    assert owner.cancelled()
+    assert bundle.count == 120
+    assert len(fetches) == 1
+    assert (await service.get_bundle(request)) is bundle
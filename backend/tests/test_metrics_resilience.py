@@ -1,21 +1,23 @@
 import asyncio
 
 import pytest
+from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
 from prometheus_client import CollectorRegistry, Counter, Histogram
 from starlette.requests import Request
 from starlette.responses import Response
 
 from backend.core import metrics
-from backend.core.metrics import MetricsMiddleware
 from backend.main import app
+from backend.middleware import observability
+from backend.middleware.observability import ObservabilityMiddleware
 
 
 @pytest.fixture(autouse=True)
 def reset_metrics(monkeypatch: pytest.MonkeyPatch) -> None:
     registry = CollectorRegistry()
     request_count = Counter(
-        "bullbearbroker_requests_total",
+        "http_requests_total",
         "Total HTTP requests",
         ["method", "path", "status"],
         registry=registry,
@@ -52,6 +54,8 @@ def reset_metrics(monkeypatch: pytest.MonkeyPatch) -> None:
     )
     monkeypatch.setattr(metrics, "REQUEST_COUNT", request_count)
     monkeypatch.setattr(metrics, "REQUEST_LATENCY", request_latency)
+    monkeypatch.setattr(observability, "REQUEST_COUNT", request_count)
+    monkeypatch.setattr(observability, "REQUEST_LATENCY", request_latency)
     monkeypatch.setattr(metrics, "LOGIN_ATTEMPTS_TOTAL", login_attempts)
     monkeypatch.setattr(metrics, "LOGIN_ATTEMPTS", login_attempts)
     monkeypatch.setattr(metrics, "LOGIN_RATE_LIMITED", login_rate_limited)
@@ -59,19 +63,6 @@ def reset_metrics(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(metrics, "AI_PROVIDER_FAILOVER_TOTAL", ai_failover)
 
 
-def _make_request(path: str = "/metrics") -> Request:
-    scope = {
-        "type": "http",
-        "method": "GET",
-        "path": path,
-        "headers": [],
-        "query_string": b"",
-        "server": ("testserver", 80),
-        "client": ("127.0.0.1", 12345),
-    }
-    return Request(scope)
-
-
 @pytest.fixture()
 def anyio_backend() -> str:  # pragma: no cover - used by pytest-asyncio
     return "asyncio"
@@ -89,24 +80,41 @@ def _histogram_sample_value(
     )
 
 
-@pytest.mark.anyio
-async def test_metrics_middleware_accumulates_counts_and_latency() -> None:
-    middleware = MetricsMiddleware(lambda scope, receive, send: None)  # type: ignore[arg-type]
-    request = _make_request("/resilience")
+def _instrumented_app() -> FastAPI:
+    inner = FastAPI()
 
-    async def call_next(_request):  # noqa: ANN001
+    @inner.get("/history/{symbol}")
+    async def history(symbol: str) -> Response:
         await asyncio.sleep(0)
         return Response(status_code=204)
 
-    await middleware.dispatch(request, call_next)
-    await middleware.dispatch(request, call_next)
+    @inner.get("/error")
+    async def error() -> None:
+        raise RuntimeError("boom")
+
+    inner.add_middleware(ObservabilityMiddleware)
+    return inner
+
+
+@pytest.mark.anyio
+async def test_metrics_middleware_accumulates_counts_and_latency() -> None:
+    async with AsyncClient(
+        transport=ASGITransport(app=_instrumented_app()), base_url="http://testserver"
+    ) as client:
+        first = await client.get("/history/BTC")
+        second = await client.get("/history/ETH", headers={"X-Request-ID": "abc-123"})
+
+    assert first.status_code == second.status_code == 204
+    assert first.headers["X-Request-ID"]
+    assert second.headers["X-Request-ID"] == "abc-123"
 
+    # Plantilla de ruta, no el path crudo: un label para todos los símbolos.
     counter = metrics.REQUEST_COUNT.labels(
-        method="GET", path="/resilience", status="204"
+        method="GET", path="/history/{symbol}", status="204"
     )
     assert counter._value.get() == pytest.approx(2.0)
 
-    labels = {"method": "GET", "path": "/resilience"}
+    labels = {"method": "GET", "path": "/history/{symbol}"}
     count_value = _histogram_sample_value(
         metrics.REQUEST_LATENCY, name_suffix="_count", labels=labels
     )
@@ -119,17 +127,20 @@ async def test_metrics_middleware_accumulates_counts_and_latency() -> None:
 
 @pytest.mark.anyio
 async def test_metrics_middleware_records_failures() -> None:
-    middleware = MetricsMiddleware(lambda scope, receive, send: None)  # type: ignore[arg-type]
-    request = _make_request("/error")
-
-    async def call_next(_request):  # noqa: ANN001
-        raise RuntimeError("boom")
-
-    with pytest.raises(RuntimeError):
-        await middleware.dispatch(request, call_next)
+    async with AsyncClient(
+        transport=ASGITransport(app=_instrumented_app()), base_url="http://testserver"
+    ) as client:
+        with pytest.raises(RuntimeError):
+            await client.get("/error")
+        missing = await client.get("/nope/1")
 
+    assert missing.status_code == 404
     counter = metrics.REQUEST_COUNT.labels(method="GET", path="/error", status="500")
     assert counter._value.get() == pytest.approx(1.0)
+    unmatched = metrics.REQUEST_COUNT.labels(
+        method="GET", path="unmatched", status="404"
+    )
+    assert unmatched._value.get() == pytest.approx(1.0)
 
     labels = {"method": "GET", "path": "/error"}
     count_value = _histogram_sample_value(
@@ -138,6 +149,38 @@ async def test_metrics_middleware_records_failures() -> None:
     assert count_value == pytest.approx(1.0)
 
 
+@pytest.mark.anyio
+async def test_rate_limit_hook_short_circuits_before_routing() -> None:
+    from fastapi import HTTPException
+
+    calls: list[str] = []
+
+    async def hook(request: Request, _response: Response) -> None:
+        calls.append(request.url.path)
+        if len(calls) > 1:
+            raise HTTPException(status_code=429, detail="slow down")
+
+    inner = FastAPI()
+
+    @inner.get("/ping")
+    async def ping() -> dict[str, bool]:
+        return {"ok": True}
+
+    inner.add_middleware(ObservabilityMiddleware, rate_limit_hooks=[hook])
+    async with AsyncClient(
+        transport=ASGITransport(app=inner), base_url="http://testserver"
+    ) as client:
+        allowed = await client.get("/ping")
+        limited = await client.get("/ping")
+
+    assert allowed.status_code == 200
+    assert limited.status_code == 429
+    assert limited.json() == {"detail": "slow down"}
+    assert limited.headers["X-Request-ID"]
+    counter = metrics.REQUEST_COUNT.labels(method="GET", path="unmatched", status="429")
+    assert counter._value.get() == pytest.approx(1.0)
+
+
 def test_duplicate_metric_registration_and_invalid_inputs() -> None:
     counter = metrics.REQUEST_COUNT.labels(method="GET", path="/dup", status="200")
     counter.inc()
@@ -163,3 +206,16 @@ async def test_metrics_endpoint_returns_plain_text() -> None:
     assert response.status_code == 200
     assert response.text.strip() != ""
     assert response.headers["content-type"].startswith("text/")
+
+
+@pytest.mark.asyncio()
+async def test_middleware_benchmark_helpers() -> None:
+    from backend.scripts.middleware_benchmark import build_app, drive, parse_stacks
+
+    assert parse_stacks("asgi, bogus,legacy,asgi") == ["asgi", "legacy"]
+    with pytest.raises(ValueError):
+        parse_stacks("bogus")
+
+    for stack in ("legacy", "asgi"):
+        summary = await drive(build_app(stack), requests=20, concurrency=5)
+        assert summary["ok"] == 20
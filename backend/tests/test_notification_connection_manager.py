@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from backend.models import Alert
+from backend.schemas.notifications import NotificationEvent
+from backend.services import notification_dispatcher as dispatcher_module
+from backend.services.alert_service import AlertService
+from backend.services.notification_dispatcher import (
+    ConnectionManager,
+    NotificationDispatcher,
+)
+from backend.services.websocket_manager import AlertWebSocketManager
+
+
+class FakeSocket:
+    def __init__(self, *, fail: bool = False, delay: float = 0.0) -> None:
+        self.fail = fail
+        self.delay = delay
+        self.sent: list[str] = []
+
+    async def accept(self) -> None:
+        return None
+
+    async def send_text(self, payload: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.sent.append(payload)
+
+    async def send_json(self, payload: dict) -> None:
+        await self.send_text(json.dumps(payload))
+
+
+@pytest.mark.asyncio
+async def test_send_to_users_targets_only_owners() -> None:
+    manager = ConnectionManager()
+    alice_web, alice_phone, bob = FakeSocket(), FakeSocket(), FakeSocket()
+    await manager.connect("alice", alice_web)
+    await manager.connect("alice", alice_phone)
+    await manager.connect("bob", bob)
+
+    event = NotificationEvent(title="BTC", body="objetivo alcanzado")
+    delivered = await manager.send_to_users(["alice", "carol"], event)
+
+    assert delivered == 2
+    assert alice_web.sent == alice_phone.sent
+    assert json.loads(alice_web.sent[0])["title"] == "BTC"
+    assert bob.sent == []
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_dead_and_slow_sockets() -> None:
+    manager = ConnectionManager(send_timeout=0.05)
+    healthy, broken, slow = FakeSocket(), FakeSocket(fail=True), FakeSocket(delay=1)
+    await manager.connect("alice", healthy)
+    await manager.connect("alice", broken)
+    await manager.connect("bob", slow)
+
+    delivered = await manager.broadcast({"title": "hola"})
+
+    assert delivered == 1
+    assert manager.active_connections == {"alice": {healthy}}
+    assert list(manager._owners) == [healthy]
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_targets_owner_instead_of_broadcasting(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    publish = AsyncMock()
+    monkeypatch.setattr(dispatcher_module.redis_client, "publish", publish)
+    realtime = SimpleNamespace(broadcast=AsyncMock())
+    push_service = SimpleNamespace(
+        broadcast=MagicMock(), broadcast_to_users=MagicMock(return_value=1)
+    )
+    connections = SimpleNamespace(send_to_users=AsyncMock(return_value=1))
+    dispatcher = NotificationDispatcher(
+        realtime, push_service, MagicMock(), connection_manager=connections
+    )
+
+    await dispatcher.broadcast_event(
+        "alert", {"message": "AAPL > 200", "category": "alerts"}, user_ids=[42]
+    )
+
+    realtime.broadcast.assert_not_awaited()
+    # Los eventos dirigidos no pasan por el canal pub/sub global.
+    publish.assert_not_awaited()
+    push_service.broadcast.assert_not_called()
+    user_ids, event = connections.send_to_users.await_args.args
+    assert user_ids == ["42"]
+    assert event.body == "AAPL > 200"
+    push_service.broadcast_to_users.assert_called_once()
+    assert push_service.broadcast_to_users.call_args.kwargs == {"category": "alerts"}
+
+
+@pytest.mark.asyncio
+async def test_triggered_alert_reaches_only_its_owner_socket(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        "backend.services.alert_service.notification_dispatcher.broadcast_event",
+        AsyncMock(),
+    )
+    alerts_ws = AlertWebSocketManager()
+    owner_id = uuid4()
+    owner, other, anonymous = FakeSocket(), FakeSocket(), FakeSocket()
+    await alerts_ws.connect(owner, user_id=owner_id)
+    await alerts_ws.connect(other, user_id=uuid4())
+    await alerts_ws.connect(anonymous)
+    service = AlertService(session_factory=None, telegram_bot_token=None)
+    service.register_websocket_manager(alerts_ws)
+    monkeypatch.setattr(service, "_notify_telegram", AsyncMock())
+    alert = Alert(
+        user_id=owner_id, title="BTC", asset="BTCUSDT", condition=">", value=1.0
+    )
+
+    await service._notify(alert, 2.0)
+
+    assert json.loads(owner.sent[0])["symbol"] == "BTCUSDT"
+    assert other.sent == [] and anonymous.sent == []
+
+    await alerts_ws.disconnect(owner)
+    await service._notify(alert, 3.0)
+    assert len(owner.sent) == 1
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from backend.services.notification_dispatcher import NotificationDispatcher
+from backend.services.notification_outbox import (
+    InMemoryOutboxStore,
+    NotificationOutbox,
+    parse_channel_concurrency,
+)
+
+
+async def _wait_for(predicate, timeout: float = 2.0) -> None:  # type: ignore[no-untyped-def]
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+def test_parse_channel_concurrency() -> None:
+    assert parse_channel_concurrency("realtime=4, push=2,telegram=x,,") == {
+        "realtime": 4,
+        "push": 2,
+        "telegram": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_outbox_delivers_with_memory_fallback() -> None:
+    delivered: list[dict] = []
+
+    async def handler(message: dict) -> None:
+        delivered.append(message)
+
+    outbox = NotificationOutbox(redis_url="redis://127.0.0.1:1/0")
+    outbox.register_channel("realtime", handler, concurrency=2)
+    await outbox.start()
+    try:
+        assert outbox.running
+        assert not outbox.durable
+        assert await outbox.enqueue("realtime", {"n": 1})
+        assert await outbox.enqueue("realtime", {"n": 2})
+        assert not await outbox.enqueue("unknown", {"n": 3})
+        await _wait_for(lambda: len(delivered) == 2)
+    finally:
+        await outbox.stop()
+
+    assert sorted(item["n"] for item in delivered) == [1, 2]
+    assert not outbox.running
+
+
+@pytest.mark.asyncio
+async def test_outbox_retries_then_dead_letters() -> None:
+    calls: dict[str, int] = {"flaky": 0, "broken": 0}
+
+    async def flaky(_message: dict) -> None:
+        calls["flaky"] += 1
+        if calls["flaky"] < 2:
+            raise RuntimeError("temporary")
+
+    async def broken(_message: dict) -> None:
+        calls["broken"] += 1
+        raise RuntimeError("permanent")
+
+    outbox = NotificationOutbox(max_attempts=3, retry_base_seconds=0.01)
+    outbox.register_channel("push", flaky)
+    outbox.register_channel("telegram", broken)
+    await outbox.start()
+    try:
+        await outbox.enqueue("push", {})
+        await outbox.enqueue("telegram", {})
+        await _wait_for(lambda: calls["flaky"] == 2 and calls["broken"] == 3)
+        await asyncio.sleep(0.1)
+    finally:
+        await outbox.stop()
+
+    assert calls == {"flaky": 2, "broken": 3}
+
+
+@pytest.mark.asyncio
+async def test_outbox_signals_backpressure_when_saturated() -> None:
+    release = asyncio.Event()
+
+    async def slow(_message: dict) -> None:
+        await release.wait()
+
+    outbox = NotificationOutbox(max_pending=1, enqueue_timeout=0.05)
+    outbox.register_channel("realtime", slow, concurrency=1)
+    await outbox.start()
+    try:
+        assert await outbox.enqueue("realtime", {"n": 1})
+        assert await outbox.enqueue("realtime", {"n": 2})
+        assert not await outbox.enqueue("realtime", {"n": 3})
+        assert outbox.saturation("realtime") >= 1.0
+    finally:
+        release.set()
+        await outbox.stop()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_routes_through_outbox_when_running() -> None:
+    realtime = SimpleNamespace(broadcast=AsyncMock())
+    push = SimpleNamespace(broadcast=AsyncMock(return_value=1))
+    dispatcher = NotificationDispatcher(realtime, push, MagicMock())
+    outbox = NotificationOutbox()
+    dispatcher.attach_outbox(outbox)
+
+    await outbox.start()
+    try:
+        await dispatcher.broadcast_event("alert", {"text": "BTC > 50k"})
+        await _wait_for(
+            lambda: realtime.broadcast.await_count == 1
+            and push.broadcast.await_count == 1
+        )
+    finally:
+        await outbox.stop()
+
+    envelope = realtime.broadcast.await_args.args[0]
+    assert envelope["type"] == "alert"
+    assert push.broadcast.await_args.args[0]["body"] == "BTC > 50k"
+
+
+class _SharedStore(InMemoryOutboxStore):
+    """Stands in for the Redis stream shared by every worker process."""
+
+    durable = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.channels: list[str] = []
+
+    async def add(self, message) -> None:  # type: ignore[no-untyped-def]
+        self.channels.append(message.channel)
+        await super().add(message)
+
+
+@pytest.mark.asyncio
+async def test_local_channels_stay_in_process_and_in_order() -> None:
+    shared = _SharedStore()
+    delivered: list[int] = []
+    pushed: list[dict] = []
+
+    async def realtime(message: dict) -> None:
+        # Un consumidor más rápido adelantaría a éste si hubiera varios.
+        await asyncio.sleep(0.01 if message["n"] == 0 else 0)
+        delivered.append(message["n"])
+
+    async def push(message: dict) -> None:
+        pushed.append(message)
+
+    class _Outbox(NotificationOutbox):
+        async def _open_store(self, channels):  # type: ignore[no-untyped-def]
+            await shared.prepare(channels)
+            return shared
+
+    outbox = _Outbox(concurrency={"realtime": 4})
+    outbox.register_channel("realtime", realtime, local=True)
+    outbox.register_channel("push", push)
+    await outbox.start()
+    try:
+        assert outbox.durable
+        for n in range(5):
+            assert await outbox.enqueue("realtime", {"n": n})
+        assert await outbox.enqueue("push", {})
+        await _wait_for(lambda: len(delivered) == 5 and len(pushed) == 1)
+    finally:
+        await outbox.stop()
+
+    assert delivered == [0, 1, 2, 3, 4]
+    assert shared.channels == ["push"]
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+from passlib.context import CryptContext
+
+import backend.core.password_hashing as password_hashing
+from backend.core.password_hashing import PasswordHasher
+from backend.database import SessionLocal
+from backend.models import User
+from backend.scripts.login_benchmark import parse_modes, summarize
+from backend.services.user_service import InvalidCredentialsError, UserService
+from backend.utils.config import password_context
+
+
+@pytest.mark.asyncio
+async def test_thread_hasher_hashes_and_verifies_off_loop() -> None:
+    hasher = PasswordHasher(mode="thread", workers=2)
+    try:
+        hashed = await hasher.hash("S3cure!pass")
+
+        assert await hasher.verify("S3cure!pass", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        assert await hasher.verify_and_update("S3cure!pass", "not-a-hash") == (
+            False,
+            None,
+        )
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hasher_caps_concurrent_work(monkeypatch: pytest.MonkeyPatch) -> None:
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_hash(password: str, submitted_at: float):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return f"h-{password}", time.time() - submitted_at
+
+    monkeypatch.setattr(password_hashing, "_hash", slow_hash)
+    hasher = PasswordHasher(mode="thread", workers=4, max_concurrency=2)
+    try:
+        results = await asyncio.gather(*(hasher.hash(str(i)) for i in range(6)))
+    finally:
+        hasher.shutdown()
+
+    assert results == [f"h-{i}" for i in range(6)]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_authenticate_async_upgrades_weak_hash(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    stricter = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__min_rounds=5)
+    monkeypatch.setattr(password_hashing, "password_context", stricter)
+    service = UserService(SessionLocal)
+    email = f"upgrade_{uuid.uuid4().hex}@test.com"
+    weak_hash = password_context.hash("Valid123!", rounds=4)
+    with SessionLocal() as db:
+        db.add(User(email=email, password_hash=weak_hash))
+        db.commit()
+
+    user = await service.authenticate_user_async(email, "Valid123!")
+
+    assert user.password_hash != weak_hash
+    stored = service.get_user_by_email(email)
+    assert stored.password_hash == user.password_hash
+    assert stricter.verify("Valid123!", stored.password_hash)
+    assert not stricter.needs_update(stored.password_hash)
+
+    with pytest.raises(InvalidCredentialsError):
+        await service.authenticate_user_async(email, "wrong")
+    with pytest.raises(InvalidCredentialsError):
+        await service.authenticate_user_async(f"missing_{email}", "Valid123!")
+
+
+def test_login_benchmark_helpers() -> None:
+    assert parse_modes("process, inline,bogus,inline") == ["process", "inline"]
+    with pytest.raises(ValueError):
+        parse_modes("bogus")
+
+    summary = summarize([0.001, 0.002, 0.050], elapsed=0.5, logins=10)
+
+    assert summary["logins_per_s"] == 20.0
+    assert summary["lag_p50_ms"] == 2.0
+    assert summary["lag_max_ms"] == 50.0
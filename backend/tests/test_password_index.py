@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from backend.services.password_guard import PasswordBreachDetector
+from backend.services.password_index import (
+    PasswordIndex,
+    build_index,
+    dataset_digests,
+    is_index_file,
+    sha1_digest,
+)
+
+
+def _sha1_hex(password: str) -> str:
+    return hashlib.sha1(password.encode("utf-8")).hexdigest()  # nosec B324
+
+
+def _build(tmp_path: Path, lines: list[str], **kwargs) -> Path:
+    output = tmp_path / "breached.idx"
+    build_index(dataset_digests(lines), output, **kwargs)
+    return output
+
+
+def test_index_matches_text_dataset_semantics(tmp_path: Path) -> None:
+    lines = [
+        "leaked-pass",
+        "",
+        f"{_sha1_hex('hibp-secret').upper()}:42",
+        "lowercase-only",
+    ]
+    text = tmp_path / "breached.txt"
+    text.write_text("\n".join(lines) + "\n")
+    index_path = _build(tmp_path, lines)
+
+    assert is_index_file(index_path)
+    assert not is_index_file(text)
+
+    candidates = {
+        "leaked-pass": True,
+        "  leaked-pass  ": True,
+        "hibp-secret": True,
+        "LOWERCASE-ONLY": True,
+        "StrongPass!1": False,
+        "": False,
+    }
+    for path in (text, index_path):
+        detector = PasswordBreachDetector(str(path))
+        for password, expected in candidates.items():
+            assert detector.is_compromised(password) is expected, (path, password)
+
+
+def test_index_lookup_and_bloom_rejections(tmp_path: Path) -> None:
+    passwords = [f"pw-{i}" for i in range(2000)]
+    index = PasswordIndex(_build(tmp_path, passwords, width=8))
+    try:
+        assert len(index) == 2000
+        assert all(index.contains(password) for password in passwords)
+
+        unknown = [sha1_digest(f"unknown-{i}") for i in range(2000)]
+        assert not any(index.contains_digest(digest) for digest in unknown)
+        # ~1% de falsos positivos con 10 bits/entrada y k=7.
+        bloom_passes = sum(index.might_contain(digest) for digest in unknown)
+        assert bloom_passes < 100
+    finally:
+        index.close()
+
+
+def test_detector_switches_between_index_and_text(tmp_path: Path) -> None:
+    index_path = _build(tmp_path, ["from-index"])
+    text = tmp_path / "plain.txt"
+    text.write_text("from-text\n")
+    detector = PasswordBreachDetector(str(index_path))
+
+    assert detector.is_compromised("from-index")
+
+    detector.configure(str(text))
+
+    assert detector.is_compromised("from-text")
+    assert not detector.is_compromised("from-index")
+
+
+def test_truncated_index_is_rejected(tmp_path: Path) -> None:
+    index_path = _build(tmp_path, [f"pw-{i}" for i in range(100)])
+    index_path.write_bytes(index_path.read_bytes()[:200])
+
+    with pytest.raises(ValueError):
+        PasswordIndex(index_path)
+    # El detector no tumba el registro: se degrada a dataset vacío.
+    assert PasswordBreachDetector(str(index_path)).is_compromised("pw-1") is False
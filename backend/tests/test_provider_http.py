@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from backend.services import ai_service as ai_service_module, provider_http
+from backend.services.ai_service import AIService
+from backend.services.provider_http import ModelAvailabilityCache, ProviderHTTPClients
+
+
+class _Response:
+    def __init__(self, payload: dict) -> None:
+        self.status = 200
+        self._payload = payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def json(self) -> dict:
+        return self._payload
+
+    async def text(self) -> str:
+        return ""
+
+
+class _ErrorResponse(_Response):
+    def __init__(self, status: int, body: str) -> None:
+        super().__init__({})
+        self.status = status
+        self._body = body
+
+    async def text(self) -> str:
+        return self._body
+
+
+class _HuggingFaceSession:
+    def __init__(self, responses: list[_ErrorResponse]) -> None:
+        self._responses = responses
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def post(self, url, headers, json, timeout):  # noqa: A002 - firma de aiohttp
+        return self._responses.pop(0)
+
+
+class _OllamaSession:
+    def __init__(self, calls: list[str]) -> None:
+        self.calls = calls
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def get(self, url, timeout):
+        self.calls.append(url)
+        return _Response({"models": [{"name": "llama3"}]})
+
+    def post(self, url, json, timeout):  # noqa: A002 - firma de aiohttp
+        self.calls.append(url)
+        return _Response({"response": "respuesta local"})
+
+
+@pytest.mark.asyncio
+async def test_started_clients_reuse_one_session_per_provider() -> None:
+    clients = ProviderHTTPClients(pool_limit=4, keepalive_seconds=5)
+    await clients.start()
+    try:
+        async with clients.session("ollama") as first:
+            pass
+        async with clients.session("ollama") as second:
+            pass
+        async with clients.session("mistral") as other:
+            pass
+        assert first is second
+        assert other is not first
+        assert not first.closed
+    finally:
+        await clients.close()
+    assert first.closed and other.closed
+
+
+@pytest.mark.asyncio
+async def test_ollama_listing_is_cached_between_generations(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[str] = []
+    monkeypatch.setattr(
+        ai_service_module.Config, "OLLAMA_HOST", "http://ollama.test", raising=False
+    )
+    monkeypatch.setattr(ai_service_module.Config, "OLLAMA_MODEL", "llama3")
+    monkeypatch.setattr(
+        provider_http.aiohttp, "ClientSession", lambda **_: _OllamaSession(calls)
+    )
+    monkeypatch.setattr(
+        ai_service_module, "model_availability", ModelAvailabilityCache(60)
+    )
+    service = AIService()
+
+    for _ in range(2):
+        assert await service._call_ollama("hola", {}) == "respuesta local"
+
+    assert calls == [
+        "http://ollama.test/api/tags",
+        "http://ollama.test/api/generate",
+        "http://ollama.test/api/generate",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stale_listing_is_served_while_refreshing() -> None:
+    cache = ModelAvailabilityCache(ttl_seconds=0)
+    release = asyncio.Event()
+    loads = 0
+
+    async def loader() -> frozenset[str]:
+        nonlocal loads
+        loads += 1
+        if loads > 1:
+            await release.wait()
+        return frozenset({f"model-{loads}"})
+
+    assert await cache.models("ollama:host", loader) == {"model-1"}
+    # Listado caducado: se responde al instante y se refresca una sola vez.
+    assert await cache.models("ollama:host", loader) == {"model-1"}
+    assert await cache.models("ollama:host", loader) == {"model-1"}
+    release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert loads == 2
+    assert await cache.models("ollama:host", loader) == {"model-2"}
+
+
+def test_unavailable_models_expire() -> None:
+    cache = ModelAvailabilityCache(ttl_seconds=60)
+
+    cache.mark_unavailable("huggingface:model-a")
+    cache.mark_unavailable("huggingface:model-b", seconds=0)
+
+    assert cache.is_unavailable("huggingface:model-a")
+    assert not cache.is_unavailable("huggingface:model-b")
+
+
+@pytest.mark.asyncio
+async def test_huggingface_503_skips_the_model_only_while_it_loads(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cache = ModelAvailabilityCache(ttl_seconds=300)
+    responses = [
+        _ErrorResponse(503, json.dumps({"error": "loading", "estimated_time": 20.0})),
+        _ErrorResponse(503, "Service Unavailable"),
+        _ErrorResponse(404, "Not Found"),
+    ]
+    monkeypatch.setattr(ai_service_module, "model_availability", cache)
+    monkeypatch.setattr(ai_service_module.Config, "HUGGINGFACE_API_KEY", "hf-token")
+    monkeypatch.setattr(ai_service_module.Config, "HUGGINGFACE_API_URL", "https://hf")
+    monkeypatch.setattr(
+        provider_http.aiohttp,
+        "ClientSession",
+        lambda **_: _HuggingFaceSession(responses),
+    )
+    service = AIService()
+    model = service._select_model_for_profile(None)
+    key = f"huggingface:{model}"
+
+    def remaining() -> float:
+        return cache._unavailable[key] - time.monotonic()
+
+    with pytest.raises(RuntimeError, match="503"):
+        await service._call_huggingface("hola", {})
+    assert 19 < remaining() <= 20
+
+    cache.clear()
+    with pytest.raises(RuntimeError, match="503"):
+        await service._call_huggingface("hola", {})
+    assert 0 < remaining() <= 5
+
+    cache.clear()
+    with pytest.raises(RuntimeError, match="404"):
+        await service._call_huggingface("hola", {})
+    assert 299 < remaining() <= 300
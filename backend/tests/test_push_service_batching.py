@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from backend import database as database_module
+from backend.models.push_preference import PushNotificationPreference
+from backend.models.push_subscription import PushSubscription
+from backend.services import push_service as push_module
+from backend.services.push_service import PushService
+
+
+@pytest.fixture()
+def service(monkeypatch: pytest.MonkeyPatch) -> PushService:
+    instance = PushService()
+    instance._vapid_private_key = "test-private"  # type: ignore[attr-defined]
+    instance._vapid_public_key = "test-public"  # type: ignore[attr-defined]
+    monkeypatch.setattr(push_module.settings, "VAPID_PRIVATE_KEY", None)
+    monkeypatch.setattr(push_module.settings, "VAPID_PUBLIC_KEY", None)
+    with database_module.SessionLocal() as session:
+        session.query(PushSubscription).delete()
+        session.query(PushNotificationPreference).delete()
+        session.commit()
+    return instance
+
+
+def _seed(count: int, *, user_id: uuid.UUID | None = None) -> list[uuid.UUID]:
+    owner = user_id or uuid.uuid4()
+    ids: list[uuid.UUID] = []
+    with database_module.SessionLocal() as session:
+        for index in range(count):
+            record = PushSubscription(
+                user_id=owner,
+                endpoint=f"https://push.example/{uuid.uuid4().hex}/{index}",
+                auth="auth",
+                p256dh="p256dh",
+                fail_count=2,
+                pruning_marked=False,
+            )
+            session.add(record)
+            session.flush()
+            ids.append(record.id)
+        session.commit()
+    return ids
+
+
+@contextmanager
+def _count_statements() -> Iterator[dict[str, int]]:
+    counters = {"select": 0, "update": 0}
+    engine = database_module.get_engine()
+
+    def _before_execute(_conn, _cursor, statement, *_args):  # type: ignore[no-untyped-def]
+        verb = statement.lstrip().split(" ", 1)[0].lower()
+        if verb in counters:
+            counters[verb] += 1
+
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    try:
+        yield counters
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_execute)
+
+
+def test_broadcast_flushes_outcomes_in_batches(
+    service: PushService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    ids = _seed(30)
+    failing = set(ids[:10])
+
+    def fake_webpush(**kwargs):  # type: ignore[no-untyped-def]
+        endpoint = kwargs["subscription_info"]["endpoint"]
+        if endpoint in failing_endpoints:
+            raise push_module.WebPushException(
+                "gone", response=SimpleNamespace(status_code=410, text="gone")
+            )
+
+    with database_module.SessionLocal() as session:
+        failing_endpoints = {
+            row.endpoint
+            for row in session.query(PushSubscription).filter(
+                PushSubscription.id.in_(failing)
+            )
+        }
+
+    monkeypatch.setattr(push_module, "webpush", fake_webpush)
+    monkeypatch.setattr(push_module.Config, "PUSH_BROADCAST_PAGE_SIZE", 8)
+    monkeypatch.setattr(push_module.Config, "PUSH_OUTCOME_FLUSH_SIZE", 25)
+    monkeypatch.setattr(push_module.Config, "PUSH_OUTCOME_FLUSH_INTERVAL_MS", 60_000)
+
+    with _count_statements() as counters:
+        delivered = service.broadcast({"title": "hi", "category": "alerts"})
+
+    assert delivered == 20
+    # 4 pages (8 + 8 + 8 + 6) y 2 flushes con un UPDATE por grupo de resultado
+    assert counters["select"] == 4
+    assert counters["update"] <= 4
+
+    with database_module.SessionLocal() as session:
+        rows = {row.id: row for row in session.query(PushSubscription).all()}
+    for subscription_id in ids:
+        record = rows[subscription_id]
+        if subscription_id in failing:
+            assert record.fail_count == 3
+            assert record.pruning_marked is True
+            assert record.last_fail_at is not None
+        else:
+            assert record.fail_count == 0
+            assert record.pruning_marked is False
+            assert record.last_fail_at is None
+
+
+def test_broadcast_to_subscriptions_prefetches_preferences_once(
+    service: PushService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    muted_user = uuid.uuid4()
+    _seed(3, user_id=muted_user)
+    _seed(2)
+    with database_module.SessionLocal() as session:
+        session.add(
+            PushNotificationPreference(user_id=muted_user, alerts_enabled=False)
+        )
+        session.commit()
+        subscriptions = session.query(PushSubscription).all()
+        session.expunge_all()
+
+    sent: list[str] = []
+    monkeypatch.setattr(
+        push_module,
+        "webpush",
+        lambda **kwargs: sent.append(kwargs["subscription_info"]["endpoint"]),
+    )
+
+    with _count_statements() as counters:
+        delivered = service.broadcast_to_subscriptions(
+            subscriptions, {"title": "alert"}, category="alerts"
+        )
+
+    assert delivered == 2
+    assert len(sent) == 2
+    assert counters["select"] == 1
+    assert counters["update"] == 1
+
+
+def test_outcome_batch_merges_retry_then_success() -> None:
+    batch = push_module._DeliveryOutcomeBatch(max_size=10, max_interval_ms=60_000)
+    subscription_id = uuid.uuid4()
+
+    batch.record_failure(subscription_id, mark_pruning=False)
+    batch.record_success(subscription_id)
+
+    assert batch._pending == {subscription_id: [True, 0, False]}
+
+
+def test_broadcast_to_users_only_reaches_owners(
+    service: PushService, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    owner = uuid.uuid4()
+    _seed(2, user_id=owner)
+    _seed(3)
+
+    sent: list[str] = []
+    monkeypatch.setattr(
+        push_module,
+        "webpush",
+        lambda **kwargs: sent.append(kwargs["subscription_info"]["endpoint"]),
+    )
+
+    delivered = service.broadcast_to_users(
+        [str(owner), "not-a-uuid"], {"title": "alert"}, category="alerts"
+    )
+
+    assert delivered == 2
+    assert len(sent) == 2
@@ -334,3 +334,82 @@ async def test_alert_dispatch_rate_limit() -> None:
         await alerts_router._dispatch_alert_rate_limit(request, response)
 
     assert excinfo.value.status_code == 429
+
+
+def test_gcra_store_is_constant_size_per_key_and_sweeps_idle_keys() -> None:
+    store = rate_limit_module.GCRAMemoryStore()
+
+    assert store.hit("a", limit=3, period=30, now=0.0) == 0.0
+    assert store.hit("a", limit=3, period=30, weight=2, now=0.0) == 0.0
+    assert store.hit("a", limit=3, period=30, now=0.0) == pytest.approx(10.0)
+    # Un intervalo de emisión después vuelve a caber exactamente un golpe.
+    assert store.hit("a", limit=3, period=30, now=10.0) == 0.0
+    assert store.hit("a", limit=3, period=30, weight=4, now=500.0) > 0
+
+    for index in range(1000):
+        store.hit(f"ip-{index}", limit=5, period=60, now=float(index))
+    # Cada golpe avanza el barrido: las claves inactivas no se acumulan.
+    assert len(store) < 200
+    remaining = len(store)
+    assert store.sweep(now=10_000.0) == remaining
+    assert len(store) == 0
+
+
+@pytest.mark.asyncio()
+async def test_record_hit_uses_redis_script_and_falls_back_to_memory(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls: list[tuple[list[str], list]] = []
+
+    class _FakeRedis:
+        def __init__(self, waits: list[int]) -> None:
+            self.waits = waits
+
+        def register_script(self, script: str):  # noqa: ANN201
+            assert "redis.call('TIME')" in script
+
+            async def _run(*, keys, args):  # noqa: ANN001
+                calls.append((keys, args))
+                if not self.waits:
+                    raise ConnectionError("redis offline")
+                return self.waits.pop(0)
+
+            return _run
+
+    limiter = rate_limit_module.SimpleRateLimiter()
+    limiter.configure("unit:redis", times=1, seconds=60)
+    monkeypatch.setattr(
+        rate_limit_module.FastAPILimiter, "redis", _FakeRedis([0, 1500]), raising=False
+    )
+
+    await limiter.record_hit(key="unit:redis", client_ip="203.0.113.9")
+    with pytest.raises(HTTPException) as excinfo:
+        await limiter.record_hit(key="unit:redis", client_ip="203.0.113.9")
+    assert excinfo.value.status_code == 429
+    assert calls[0][0] == ["rate-limit:203.0.113.9:unit:redis:1:60"]
+    assert calls[0][1] == [60000, 60000.0, 1]
+
+    # Redis caído: el límite se sigue aplicando con el almacén en memoria.
+    await limiter.record_hit(key="unit:redis", client_ip="203.0.113.9")
+    with pytest.raises(HTTPException):
+        await limiter.record_hit(key="unit:redis", client_ip="203.0.113.9")
+
+
+def test_rate_limit_benchmark_helpers() -> None:
+    from backend.scripts.rate_limit_benchmark import (
+        LegacyListStore,
+        build_schedule,
+        run_store,
+    )
+
+    schedule = build_schedule(200, 3)
+    assert len(schedule) == 600 and len(set(schedule)) == 200
+
+    gcra = run_store(
+        rate_limit_module.GCRAMemoryStore(), schedule, limit=2, window=60, span=4
+    )
+    legacy = run_store(LegacyListStore(), schedule, limit=2, window=60, span=4)
+
+    assert gcra["checks"] == legacy["checks"] == 600
+    assert legacy["tracked_keys"] == 200
+    assert gcra["tracked_keys"] < legacy["tracked_keys"]
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from backend.services.realtime_service import DeltaEncoder, RealtimeService
+
+
+class FakeSocket:
+    def __init__(self) -> None:
+        self.frames: list[dict] = []
+
+    async def send_text(self, payload: str) -> None:
+        self.frames.append(json.loads(payload))
+
+
+class StalledSocket(FakeSocket):
+    def __init__(self) -> None:
+        super().__init__()
+        self.close_codes: list[int] = []
+
+    async def send_text(self, payload: str) -> None:
+        await asyncio.sleep(60)
+
+    async def close(self, code: int = 1000) -> None:
+        self.close_codes.append(code)
+
+
+@pytest.mark.asyncio
+async def test_publish_conflates_updates_per_key() -> None:
+    service = RealtimeService(conflation_tick=60)
+    legacy = FakeSocket()
+    await service.register(legacy)
+
+    for price in (100.0, 101.5, 99.25):
+        await service.publish("price", "BTC", {"type": "price", "price": price})
+    await service.publish("price", "ETH", {"type": "price", "price": 10.0})
+
+    sent = await service.flush()
+    await service.close_all()
+
+    assert sent == 2
+    assert legacy.frames == [
+        {"type": "price", "price": 99.25},
+        {"type": "price", "price": 10.0},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_compact_clients_receive_batched_delta_frames() -> None:
+    service = RealtimeService(conflation_tick=60)
+    compact = FakeSocket()
+    await service.register(compact, compact=True)
+
+    await service.publish("price", "BTC", {"price": 100.0, "timestamp": "t0"})
+    await service.publish("price", "ETH", {"price": 10.0, "timestamp": "t0"})
+    await service.flush()
+    await service.publish("price", "BTC", {"price": 100.3, "timestamp": "t1"})
+    await service.publish("price", "ETH", {"price": 10.0, "timestamp": "t0"})
+    await service.flush()
+    await service.close_all()
+
+    keyframe, delta = compact.frames
+    assert keyframe["t"] == "batch"
+    assert keyframe["u"] == [
+        ["BTC", {"price": 100.0, "timestamp": "t0"}, 1],
+        ["ETH", {"price": 10.0, "timestamp": "t0"}, 1],
+    ]
+    assert delta["seq"] == 1
+    assert delta["u"] == [["BTC", {"price": pytest.approx(0.3), "timestamp": "t1"}, 0]]
+
+
+def test_delta_encoder_does_not_drift_and_resends_keyframes() -> None:
+    encoder = DeltaEncoder(keyframe_interval=3, precision=2)
+    client_value = 0.0
+    for step, value in enumerate([1.001, 1.004, 1.009, 1.013]):
+        frame = encoder.encode("price", {"X": {"price": value}})
+        entries = frame["u"]
+        if not entries:
+            continue
+        _key, fields, absolute = entries[0]
+        if "price" in fields:
+            client_value = (
+                fields["price"] if absolute else client_value + fields["price"]
+            )
+        assert abs(client_value - value) <= 0.01
+        assert absolute == (1 if step % 3 == 0 else 0)
+
+
+@pytest.mark.asyncio
+async def test_flush_drops_clients_that_exceed_the_send_timeout() -> None:
+    service = RealtimeService(conflation_tick=60, send_timeout=0.05)
+    fast = FakeSocket()
+    stalled = StalledSocket()
+    await service.register(fast)
+    await service.register(stalled)
+
+    await service.publish("price", "BTC", {"price": 100.0})
+    started = time.perf_counter()
+    sent = await service.flush()
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1
+    assert sent == 1
+    assert fast.frames == [{"price": 100.0}]
+    assert stalled.close_codes == [1013]
+    assert await service.connection_count() == 1
+    await service.close_all()
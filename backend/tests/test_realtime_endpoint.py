@@ -32,7 +32,7 @@ async def realtime_server(
             yield chunk
 
     monkeypatch.setattr(
-        "backend.routers.realtime.ai_service.stream_generate",
+        "backend.services.ai_service.ai_service.stream_generate",
         fake_stream_generate,
     )
 
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+
+import pytest
+
+from backend.services.mistral_service import MistralService
+from backend.services.sentiment_service import SentimentService
+from backend.utils.batching import MicroBatcher
+
+
+class _Cache:
+    def __init__(self) -> None:
+        self.values: dict[str, Any] = {}
+
+    async def get(self, key: str):
+        return self.values.get(key)
+
+    async def set(self, key: str, value: Any, ttl: Any = None):  # noqa: ARG002
+        self.values[key] = value
+
+
+class _Response:
+    def __init__(self, data: Any) -> None:
+        self.status = 200
+        self._data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def json(self):
+        return self._data
+
+
+class _Session:
+    def __init__(self, posts: list[list[str]]) -> None:
+        self.posts = posts
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def post(self, url, data, headers):
+        inputs = json.loads(data)["inputs"]
+        self.posts.append(inputs)
+        return _Response([[{"label": f"L-{text}", "score": 0.9}] for text in inputs])
+
+
+@pytest.mark.asyncio
+async def test_batcher_coalesces_deduplicates_and_caches() -> None:
+    batches: list[list[str]] = []
+
+    async def handler(items: list[str]) -> list[str]:
+        batches.append(items)
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(handler, max_batch=3, max_wait_ms=5, cache_size=10)
+
+    results = await asyncio.gather(
+        *(batcher.submit(item) for item in ["a", "b", "a", "c", "d"])
+    )
+    cached = await batcher.submit("d")
+
+    assert results == ["A", "B", "A", "C", "D"]
+    assert cached == "D"
+    # "c" completa el lote de 3 y "d" sale en el siguiente tras la espera.
+    assert batches == [["a", "b", "c"], ["d"]]
+
+
+@pytest.mark.asyncio
+async def test_batcher_propagates_handler_errors_to_every_caller() -> None:
+    async def handler(items: list[str]) -> list[str]:
+        raise RuntimeError("model down")
+
+    batcher = MicroBatcher(handler, max_wait_ms=1, cache_size=10)
+
+    results = await asyncio.gather(
+        batcher.submit("x"), batcher.submit("y"), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["model down", "model down"]
+
+
+@pytest.mark.asyncio
+async def test_sentiment_service_sends_one_request_per_batch() -> None:
+    posts: list[list[str]] = []
+    text_cache = _Cache()
+    service = SentimentService(
+        market_cache=_Cache(),
+        text_cache=text_cache,
+        session_factory=lambda timeout=None: _Session(posts),
+    )
+
+    results = await service.analyze_texts(["BTC sube", " ETH cae ", "BTC sube"])
+    again = await service.analyze_text("btc SUBE")
+
+    assert posts == [["BTC sube", "ETH cae"]]
+    assert [result["label"] for result in results] == [
+        "L-BTC sube",
+        "L-ETH cae",
+        "L-BTC sube",
+    ]
+    assert again["label"] == "L-BTC sube"
+    assert set(text_cache.values) == {"btc sube", "eth cae"}
+
+
+@pytest.mark.asyncio
+async def test_mistral_scores_concurrent_news_in_one_prompt(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    service = MistralService()
+    prompts: list[str] = []
+
+    async def fake_chat_completion(messages, model="medium"):  # noqa: ANN001
+        prompts.append(messages[-1]["content"])
+        return json.dumps(
+            [
+                {"sentiment_score": 0.5, "confidence": 0.8, "keywords": ["fed"]},
+                {"sentiment_score": -0.4, "confidence": 0.6, "keywords": ["sec"]},
+            ]
+        )
+
+    monkeypatch.setattr(service, "chat_completion", fake_chat_completion)
+
+    first, second = await asyncio.gather(
+        service.analyze_market_sentiment("La Fed recorta tipos"),
+        service.analyze_market_sentiment("La SEC demanda a un exchange"),
+    )
+
+    assert len(prompts) == 1
+    assert "1. La Fed recorta tipos" in prompts[0]
+    assert first["keywords"] == ["fed"]
+    assert second["sentiment_score"] == -0.4
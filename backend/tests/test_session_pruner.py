@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.models import Base, Session as SessionModel, User
+from backend.models.refresh_token import RefreshToken
+from backend.services.session_pruner import SessionPruner
+
+
+@pytest.fixture()
+def session_factory():
+    # StaticPool: run_once borra desde un hilo.
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+        future=True,
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+    try:
+        yield factory
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+def _metric(name: str, table: str) -> float:
+    return REGISTRY.get_sample_value(name, {"table": table}) or 0.0
+
+
+def _seed(factory, now: datetime) -> uuid.UUID:
+    with factory() as db:
+        user = User(email=f"prune_{uuid.uuid4().hex}@test.com", password_hash="x")
+        db.add(user)
+        db.flush()
+        for index in range(5):
+            db.add(
+                SessionModel(
+                    user_id=user.id,
+                    token=f"expired-{index}",
+                    expires_at=now - timedelta(hours=index + 1),
+                )
+            )
+            db.add(
+                RefreshToken(
+                    user_id=user.id,
+                    token=f"expired-refresh-{index}",
+                    expires_at=now - timedelta(days=1),
+                )
+            )
+        db.add(
+            SessionModel(
+                user_id=user.id, token="live", expires_at=now + timedelta(minutes=5)
+            )
+        )
+        db.add(
+            RefreshToken(
+                user_id=user.id,
+                token="live-refresh",
+                expires_at=now + timedelta(days=7),
+            )
+        )
+        # Filas antiguas sin expires_at: solo caducan pasado el TTL del JWT.
+        db.add(
+            RefreshToken(
+                user_id=user.id,
+                token="legacy-old",
+                created_at=now - timedelta(days=30),
+            )
+        )
+        db.add(RefreshToken(user_id=user.id, token="legacy-recent", created_at=now))
+        db.commit()
+        return user.id
+
+
+def _tokens(factory, model) -> set[str]:
+    with factory() as db:
+        return set(db.scalars(select(model.token)).all())
+
+
+def test_prune_deletes_expired_rows_in_bounded_batches(session_factory) -> None:
+    now = datetime.now(UTC)
+    _seed(session_factory, now)
+    pruner = SessionPruner(
+        session_factory, batch_size=2, max_batches=2, grace_seconds=0
+    )
+    pruned_before = _metric("db_rows_pruned_total", "sessions")
+
+    first = pruner.prune_once(now)
+
+    # 2 lotes de 2 por tabla y ejecución; el resto queda para la siguiente.
+    assert first == {"sessions": 4, "refresh_tokens": 4}
+    assert _metric("db_rows_pruned_total", "sessions") - pruned_before == 4
+    assert _metric("db_table_rows", "sessions") == 2
+
+    second = pruner.prune_once(now)
+
+    assert second == {"sessions": 1, "refresh_tokens": 2}
+    assert _tokens(session_factory, SessionModel) == {"live"}
+    assert _tokens(session_factory, RefreshToken) == {"live-refresh", "legacy-recent"}
+    assert _metric("db_table_rows", "refresh_tokens") == 2
+    assert pruner.prune_once(now) == {"sessions": 0, "refresh_tokens": 0}
+
+
+@pytest.mark.asyncio
+async def test_run_once_honours_grace_period(session_factory) -> None:
+    now = datetime.now(UTC)
+    _seed(session_factory, now)
+    pruner = SessionPruner(session_factory, grace_seconds=90 * 60)
+
+    pruned = await pruner.run_once()
+
+    # Solo las sesiones caducadas hace más de 90 minutos.
+    assert pruned["sessions"] == 4
+    with session_factory() as db:
+        remaining = db.scalar(select(func.count()).select_from(SessionModel))
+    assert remaining == 2
+
+
+def test_expiry_indexes_are_declared(session_factory) -> None:
+    engine = session_factory.kw["bind"]
+    inspector = inspect(engine)
+
+    session_indexes = {
+        index["name"]: index["column_names"]
+        for index in inspector.get_indexes("sessions")
+    }
+    refresh_indexes = {
+        index["name"]: index["column_names"]
+        for index in inspector.get_indexes("refresh_tokens")
+    }
+
+    assert session_indexes["ix_sessions_user_expires"] == ["user_id", "expires_at"]
+    assert refresh_indexes["ix_refresh_tokens_user_expires"] == [
+        "user_id",
+        "expires_at",
+    ]
+    assert refresh_indexes["ix_refresh_tokens_token"] == ["token"]
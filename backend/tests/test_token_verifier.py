@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from backend.core import token_verifier as token_verifier_module
+from backend.core.token_verifier import TokenVerifier, UnknownKeyIdError
+
+
+def _pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode("ascii")
+
+
+def _claims(ttl: int = 60, **extra) -> dict:
+    return {"sub": "user", "exp": int(time.time()) + ttl, **extra}
+
+
+def test_verified_claims_are_memoized(monkeypatch: pytest.MonkeyPatch) -> None:
+    verifier = TokenVerifier(secret="secret")
+    token = jwt.encode(_claims(), "secret", algorithm="HS256")
+    calls: list[str] = []
+    real_decode = jwt.decode
+
+    def _counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(token_verifier_module.jwt, "decode", _counting_decode)
+
+    first = verifier.decode(token)
+    first["sub"] = "mutated"
+    second = verifier.decode(token)
+
+    assert second["sub"] == "user"
+    assert len(calls) == 1
+    assert len(verifier) == 1
+
+
+class _FrozenDatetime:
+    def __init__(self, timestamp: float) -> None:
+        self._timestamp = timestamp
+
+    def now(self, tz=None):
+        from datetime import datetime
+
+        return datetime.fromtimestamp(self._timestamp, tz=tz)
+
+
+def test_cached_claims_expire_with_the_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    verifier = TokenVerifier(secret="secret")
+    token = verifier.encode(_claims(ttl=30))
+    verifier.decode(token)
+
+    later = time.time() + 31
+    monkeypatch.setattr(token_verifier_module.time, "time", lambda: later)
+    monkeypatch.setattr(jwt.api_jwt, "datetime", _FrozenDatetime(later))
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.decode(token)
+    assert len(verifier) == 0
+
+
+def test_cache_is_bounded_and_skips_tokens_without_exp() -> None:
+    verifier = TokenVerifier(secret="secret", cache_size=2)
+    tokens = [verifier.encode(_claims(jti=str(index))) for index in range(3)]
+    for token in tokens:
+        verifier.decode(token)
+
+    assert len(verifier) == 2
+    verifier.decode(verifier.encode({"sub": "no-exp"}))
+    assert len(verifier) == 2
+
+
+def test_invalid_signatures_are_rejected_and_not_cached() -> None:
+    verifier = TokenVerifier(secret="secret")
+    forged = jwt.encode(_claims(), "other-secret", algorithm="HS256")
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.decode(forged)
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.decode(forged)
+    assert len(verifier) == 0
+
+
+@pytest.mark.parametrize(
+    ("algorithm", "generate"),
+    [
+        ("EdDSA", ed25519.Ed25519PrivateKey.generate),
+        ("ES256", lambda: ec.generate_private_key(ec.SECP256R1())),
+    ],
+)
+def test_asymmetric_keys_rotate_by_kid(algorithm: str, generate) -> None:
+    old = TokenVerifier(algorithm=algorithm, private_key=_pem(generate()), key_id="k1")
+    new = TokenVerifier(algorithm=algorithm, private_key=_pem(generate()), key_id="k2")
+    jwks = {"keys": old.public_jwks()["keys"] + new.public_jwks()["keys"]}
+    # Verificador sin secreto ni clave privada, como un edge proxy.
+    edge = TokenVerifier(algorithm=algorithm, jwks=jwks)
+
+    assert all("d" not in entry for entry in jwks["keys"])
+    assert jwt.get_unverified_header(new.encode(_claims()))["kid"] == "k2"
+    assert edge.decode(old.encode(_claims()))["sub"] == "user"
+    assert edge.decode(new.encode(_claims()))["sub"] == "user"
+
+    stranger = TokenVerifier(
+        algorithm=algorithm, private_key=_pem(generate()), key_id="k3"
+    )
+    with pytest.raises(UnknownKeyIdError):
+        edge.decode(stranger.encode(_claims()))
+    with pytest.raises(jwt.InvalidTokenError):
+        edge.decode(jwt.encode(_claims(), "secret", algorithm="HS256"))
+    with pytest.raises(RuntimeError):
+        edge.encode(_claims())
+
+
+def test_unknown_kid_is_rejected_with_401(monkeypatch: pytest.MonkeyPatch) -> None:
+    from fastapi.testclient import TestClient
+
+    from backend.core import security
+    from backend.main import app
+
+    keys = [ed25519.Ed25519PrivateKey.generate() for _ in range(2)]
+    jwks = {
+        "keys": [
+            entry
+            for index, key in enumerate(keys)
+            for entry in TokenVerifier(
+                algorithm="EdDSA", private_key=_pem(key), key_id=f"k{index}"
+            ).public_jwks()["keys"]
+        ]
+    }
+    monkeypatch.setattr(
+        security, "access_verifier", TokenVerifier(algorithm="EdDSA", jwks=jwks)
+    )
+    forged = TokenVerifier(
+        algorithm="EdDSA",
+        private_key=_pem(ed25519.Ed25519PrivateKey.generate()),
+        key_id="intruso",
+    ).encode(_claims())
+    hmac_token = jwt.encode(_claims(), "secret", algorithm="HS256")
+
+    with TestClient(app) as client:
+        for token in (forged, hmac_token):
+            response = client.get(
+                "/api/auth/me", headers={"Authorization": f"Bearer {token}"}
+            )
+            assert response.status_code == 401
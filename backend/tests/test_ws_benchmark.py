@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.scripts.ws_benchmark import (
+    InProcessRedis,
+    _bench_marker,
+    _price_entries,
+    parse_mix,
+)
+
+
+def test_parse_mix_normalises_known_kinds() -> None:
+    mix = parse_mix("realtime=3, compact=1,unknown=5,alerts=x")
+
+    assert mix == {"realtime": 0.75, "compact": 0.25}
+    with pytest.raises(ValueError):
+        parse_mix("unknown=1")
+
+
+def test_client_decoders_cover_every_channel_format() -> None:
+    envelope = {"type": "bench", "payload": {"bench_seq": 3, "ts": "1.5"}}
+    event = {"title": "bench", "meta": {"bench_seq": 4, "ts": "2.5"}}
+    batch = {"t": "batch", "topic": "price", "u": [["A", {"ts": "1"}, 1]]}
+
+    assert _bench_marker(envelope) == (3, "1.5")
+    assert _bench_marker(event) == (4, "2.5")
+    assert _bench_marker({"type": "price"}) is None
+    assert _price_entries(batch) == [{"ts": "1"}]
+    assert _price_entries({"type": "price", "ts": "2"}) == [
+        {"type": "price", "ts": "2"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_in_process_redis_rejects_unsupported_commands() -> None:
+    client = await InProcessRedis()
+
+    assert await client.ping()
+    assert await client.incr("hits") == 1
+    with pytest.raises(RuntimeError):
+        await client.xadd("stream", {"a": 1})
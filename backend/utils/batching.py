@@ -0,0 +1,119 @@
+"""Micro-batching helper for inference calls that accept many inputs at once."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _Batch(Generic[K]):
+    __slots__ = ("loop", "futures", "timer")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.futures: OrderedDict[K, asyncio.Future] = OrderedDict()
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class MicroBatcher(Generic[K, V]):
+    """Coalesce concurrent single-item calls into one batched call.
+
+    Items submitted within ``max_wait_ms`` of the first one (or until
+    ``max_batch`` distinct items are queued) are handed to ``handler`` as a
+    single list; ``handler`` must return one result per item, in order.
+    Identical items in the same window share one slot, and non-``None``
+    results are kept in a bounded LRU when ``cache_size`` is set. A handler
+    error is propagated to every caller of that batch.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[list[K]], Awaitable[Sequence[V]]],
+        *,
+        max_batch: int = 16,
+        max_wait_ms: float = 10.0,
+        cache_size: int = 0,
+    ) -> None:
+        self._handler = handler
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._cache_size = max(0, cache_size)
+        self._cache: OrderedDict[K, V] = OrderedDict()
+        self._batch: _Batch[K] | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    async def submit(self, item: K) -> V:
+        if item in self._cache:
+            self._cache.move_to_end(item)
+            return self._cache[item]
+
+        loop = asyncio.get_running_loop()
+        batch = self._batch
+        if batch is None or batch.loop is not loop:
+            batch = self._batch = _Batch(loop)
+            batch.timer = loop.call_later(self.max_wait, self._flush, batch)
+
+        future = batch.futures.get(item)
+        if future is None:
+            future = batch.futures[item] = loop.create_future()
+            if len(batch.futures) >= self.max_batch:
+                self._flush(batch)
+        return await asyncio.shield(future)
+
+    def _flush(self, batch: _Batch[K]) -> None:
+        if self._batch is batch:
+            self._batch = None
+        if batch.timer is not None:
+            batch.timer.cancel()
+            batch.timer = None
+        if not batch.futures:
+            return
+        task = batch.loop.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _Batch[K]) -> None:
+        items = list(batch.futures)
+        try:
+            results = list(await self._handler(items))
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"batch handler returned {len(results)} results "
+                    f"for {len(items)} items"
+                )
+        except asyncio.CancelledError:
+            for future in batch.futures.values():
+                future.cancel()
+            raise
+        except Exception as exc:
+            logger.warning("micro_batch_failed size=%d: %s", len(items), exc)
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(exc)
+                    # Evita "exception was never retrieved" si el caller se canceló.
+                    future.exception()
+            return
+
+        for item, result in zip(items, results, strict=True):
+            if self._cache_size and result is not None:
+                self._cache[item] = result
+                self._cache.move_to_end(item)
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+            future = batch.futures[item]
+            if not future.done():
+                future.set_result(result)
+
+
+__all__ = ["MicroBatcher"]
@@ -37,6 +37,12 @@ class CacheClient:
             print(f"CacheClient: Redis no disponible ({exc})")
             return None
 
+    @property
+    def redis(self):
+        """Underlying ``redis.asyncio`` client, or ``None`` when running in memory."""
+
+        return self._redis
+
     def _format_key(self, key: str) -> str:
         return f"{self.namespace}:{key}".lower()
 
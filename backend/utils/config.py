@@ -134,6 +134,17 @@ def _env_int(key: str, default: int) -> int:
         return default
 
 
+def _env_float(key: str, default: float) -> float:
+    raw_value = os.getenv(key)
+    if raw_value is None:
+        return default
+    try:
+        return float(raw_value.strip())
+    except Exception:
+        LOGGER.warning("invalid_float_env", extra={"name": key, "value": raw_value})
+        return default
+
+
 def _get_bool_env(name: str, default: bool = False) -> bool:
     return _env_bool(name, default)
 
@@ -377,10 +388,41 @@ class Config:
     DISCORD_APPLICATION_ID = _get_env("DISCORD_APPLICATION_ID")
     PASSWORD_BREACH_DATASET_PATH = _get_env("PASSWORD_BREACH_DATASET_PATH")
     ENABLE_PASSWORD_BREACH_CHECK = _env_bool("ENABLE_PASSWORD_BREACH_CHECK", False)
+    # QA: hashing bcrypt fuera del event loop (process/thread/inline)
+    PASSWORD_HASH_EXECUTOR = _get_env("PASSWORD_HASH_EXECUTOR")
+    PASSWORD_HASH_WORKERS = _env_int("PASSWORD_HASH_WORKERS", 0)
+    PASSWORD_HASH_MAX_CONCURRENCY = _env_int("PASSWORD_HASH_MAX_CONCURRENCY", 0)
     HTTPX_TIMEOUT_TIMESERIES = _env_int("HTTPX_TIMEOUT_TIMESERIES", 10)
     JWT_SECRET_KEY = _get_env("JWT_SECRET") or _get_env("JWT_SECRET_KEY") or "change_me"
     JWT_ALGORITHM = _get_env("JWT_ALGORITHM", "HS256")
+    # QA: tokens de acceso; EdDSA/ES256 firman con PEM y verifican con JWKS (kid)
+    ACCESS_TOKEN_ALGORITHM = _get_env("ACCESS_TOKEN_ALGORITHM", "HS256")
+    ACCESS_TOKEN_PRIVATE_KEY = _get_env("ACCESS_TOKEN_PRIVATE_KEY")
+    ACCESS_TOKEN_KEY_ID = _get_env("ACCESS_TOKEN_KEY_ID")
+    ACCESS_TOKEN_JWKS = _get_env("ACCESS_TOKEN_JWKS")
+    JWT_CLAIMS_CACHE_SIZE = _env_int("JWT_CLAIMS_CACHE_SIZE", 4096)
     MAX_CONCURRENT_SESSIONS = _env_int("MAX_CONCURRENT_SESSIONS", 5)
+    # QA: caché token → principal; 0 desactiva la capa correspondiente
+    AUTH_CACHE_TTL_SECONDS = _env_int("AUTH_CACHE_TTL_SECONDS", 60)
+    AUTH_CACHE_LOCAL_TTL_SECONDS = _env_int("AUTH_CACHE_LOCAL_TTL_SECONDS", 5)
+    AUTH_CACHE_MAX_ENTRIES = _env_int("AUTH_CACHE_MAX_ENTRIES", 10000)
+    # QA: límite global por IP aplicado en ObservabilityMiddleware; 0 lo desactiva
+    HTTP_RATE_LIMIT_TIMES = _env_int("HTTP_RATE_LIMIT_TIMES", 0)
+    HTTP_RATE_LIMIT_SECONDS = _env_int("HTTP_RATE_LIMIT_SECONDS", 60)
+    # QA: borrado periódico de sesiones y refresh tokens caducados
+    SESSION_PRUNE_ENABLED = _env_bool("SESSION_PRUNE_ENABLED", True)
+    SESSION_PRUNE_INTERVAL_SECONDS = _env_int("SESSION_PRUNE_INTERVAL_SECONDS", 900)
+    SESSION_PRUNE_BATCH_SIZE = _env_int("SESSION_PRUNE_BATCH_SIZE", 1000)
+    SESSION_PRUNE_MAX_BATCHES = _env_int("SESSION_PRUNE_MAX_BATCHES", 50)
+    SESSION_PRUNE_GRACE_SECONDS = _env_int("SESSION_PRUNE_GRACE_SECONDS", 60)
+    # QA: pre-ping solo tras N segundos ociosa; <=0 vuelve al ping en cada checkout
+    DB_POOL_PRE_PING_IDLE_SECONDS = _env_float("DB_POOL_PRE_PING_IDLE_SECONDS", 30.0)
+    # QA: ajuste de pool_size según la concurrencia observada (sin superar el tope)
+    DB_POOL_AUTOTUNE = _env_bool("DB_POOL_AUTOTUNE", False)
+    DB_POOL_AUTOTUNE_INTERVAL_SECONDS = _env_int(
+        "DB_POOL_AUTOTUNE_INTERVAL_SECONDS", 300
+    )
+    DB_POOL_AUTOTUNE_MIN_SIZE = _env_int("DB_POOL_AUTOTUNE_MIN_SIZE", 2)
     HUGGINGFACE_API_KEY = _get_env("HUGGINGFACE_API_KEY")
     HUGGINGFACE_API_URL = (
         _get_env("HUGGINGFACE_API_URL") or "https://api-inference.huggingface.co"
@@ -400,6 +442,64 @@ class Config:
     MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
     POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
     POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+    # QA: motor asíncrono (aiosqlite/psycopg) para las rutas calientes
+    DB_ASYNC_ENABLED = _env_bool("DB_ASYNC_ENABLED", True)
+    PUSH_BROADCAST_PAGE_SIZE = _env_int("PUSH_BROADCAST_PAGE_SIZE", 500)
+    PUSH_OUTCOME_FLUSH_SIZE = _env_int("PUSH_OUTCOME_FLUSH_SIZE", 100)
+    PUSH_OUTCOME_FLUSH_INTERVAL_MS = _env_int("PUSH_OUTCOME_FLUSH_INTERVAL_MS", 500)
+    REALTIME_CONFLATION_TICK_MS = _env_int("REALTIME_CONFLATION_TICK_MS", 250)
+    REALTIME_SEND_TIMEOUT_MS = _env_int("REALTIME_SEND_TIMEOUT_MS", 1000)
+    AI_CACHE_MAX_ENTRIES = _env_int("AI_CACHE_MAX_ENTRIES", 2048)
+    AI_CACHE_COMPRESS_MIN_BYTES = _env_int("AI_CACHE_COMPRESS_MIN_BYTES", 1024)
+    AI_CACHE_MARKET_BUCKET_SECONDS = _env_int("AI_CACHE_MARKET_BUCKET_SECONDS", 60)
+    AI_HTTP_POOL_LIMIT = _env_int("AI_HTTP_POOL_LIMIT", 20)
+    AI_HTTP_KEEPALIVE_SECONDS = _env_float("AI_HTTP_KEEPALIVE_SECONDS", 60.0)
+    AI_MODEL_AVAILABILITY_TTL_SECONDS = _env_int(
+        "AI_MODEL_AVAILABILITY_TTL_SECONDS", 300
+    )
+    SENTIMENT_BATCH_MAX_SIZE = _env_int("SENTIMENT_BATCH_MAX_SIZE", 16)
+    SENTIMENT_BATCH_MAX_WAIT_MS = _env_float("SENTIMENT_BATCH_MAX_WAIT_MS", 10.0)
+    SENTIMENT_CACHE_MAX_ENTRIES = _env_int("SENTIMENT_CACHE_MAX_ENTRIES", 1024)
+    AI_CHAT_HISTORY_MAX_MESSAGES = _env_int("AI_CHAT_HISTORY_MAX_MESSAGES", 20)
+    AI_CHAT_HISTORY_TOKEN_BUDGET = _env_int("AI_CHAT_HISTORY_TOKEN_BUDGET", 1500)
+    AI_CHAT_SUMMARY_TOKEN_BUDGET = _env_int("AI_CHAT_SUMMARY_TOKEN_BUDGET", 400)
+    AI_HEDGE_ENABLED = _env_bool("AI_HEDGE_ENABLED", True)
+    AI_HEDGE_MIN_SAMPLES = _env_int("AI_HEDGE_MIN_SAMPLES", 5)
+    AI_HEDGE_MIN_DELAY_SECONDS = _env_float("AI_HEDGE_MIN_DELAY_SECONDS", 0.5)
+    AI_ENRICHMENT_BUDGET_MS = _env_int("AI_ENRICHMENT_BUDGET_MS", 3000)
+    AI_ENRICHMENT_SOURCE_TIMEOUTS_MS = (
+        _get_env("AI_ENRICHMENT_SOURCE_TIMEOUTS_MS")
+        or "prices=2000,indicators=2500,news=2000,alerts=2000,forex=1500"
+    )
+    MARKET_INDICATORS_CACHE_TTL_SECONDS = _env_int(
+        "MARKET_INDICATORS_CACHE_TTL_SECONDS", 30
+    )
+    MARKET_INDICATORS_CACHE_MAX_ENTRIES = _env_int(
+        "MARKET_INDICATORS_CACHE_MAX_ENTRIES", 256
+    )
+    INSIGHT_PRECOMPUTE_ENABLED = _env_bool("INSIGHT_PRECOMPUTE_ENABLED", True)
+    INSIGHT_POLL_SECONDS = _env_float("INSIGHT_POLL_SECONDS", 15.0)
+    INSIGHT_MIN_MOVE_PCT = _env_float("INSIGHT_MIN_MOVE_PCT", 0.5)
+    INSIGHT_MAX_AGE_SECONDS = _env_int("INSIGHT_MAX_AGE_SECONDS", 900)
+    INSIGHT_IDLE_SECONDS = _env_int("INSIGHT_IDLE_SECONDS", 1800)
+    INSIGHT_MAX_TRACKED = _env_int("INSIGHT_MAX_TRACKED", 200)
+    INSIGHT_MARKET_REFERENCE = _get_env("INSIGHT_MARKET_REFERENCE") or "BTC"
+    # QA: lease por clave entre workers; sólo uno genera cada versión
+    INSIGHT_LEASE_SECONDS = _env_float("INSIGHT_LEASE_SECONDS", 120.0)
+    AI_SEMANTIC_CACHE_ENABLED = _env_bool("AI_SEMANTIC_CACHE_ENABLED", False)
+    AI_SEMANTIC_CACHE_THRESHOLD = _env_float("AI_SEMANTIC_CACHE_THRESHOLD", 0.92)
+    NOTIFICATION_OUTBOX_ENABLED = _env_bool("NOTIFICATION_OUTBOX_ENABLED", True)
+    NOTIFICATION_OUTBOX_CONCURRENCY = (
+        _get_env("NOTIFICATION_OUTBOX_CONCURRENCY") or "realtime=1,push=2,telegram=1"
+    )
+    NOTIFICATION_OUTBOX_MAX_PENDING = _env_int("NOTIFICATION_OUTBOX_MAX_PENDING", 10000)
+    NOTIFICATION_OUTBOX_MAX_ATTEMPTS = _env_int("NOTIFICATION_OUTBOX_MAX_ATTEMPTS", 5)
+    NOTIFICATION_OUTBOX_VISIBILITY_TIMEOUT = _env_int(
+        "NOTIFICATION_OUTBOX_VISIBILITY_TIMEOUT", 60
+    )
+    NOTIFICATION_OUTBOX_ENQUEUE_TIMEOUT_MS = _env_int(
+        "NOTIFICATION_OUTBOX_ENQUEUE_TIMEOUT_MS", 250
+    )
 
     @classmethod
     def require_env(